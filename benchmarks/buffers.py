@@ -0,0 +1,119 @@
+"""Сравнение очистки с диска (process_file) и из памяти (clean_bytes).
+
+Пример::
+
+    python -m benchmarks.buffers --profile smoke
+
+Для режима файлов копирование корпуса в рабочий каталог в замер не входит,
+для режима памяти не входит чтение исходных файлов: сравнивается только
+работа очистителя.
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.corpus import PROFILES, generate_corpus
+from benchmarks.fake_ffmpeg import install_fake_ffmpeg, prepend_to_path
+from benchmarks.run import BenchmarkSettings, group_corpus
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.models import OutputMode
+
+
+def compare_modes(files: list[str], work_dir: Path) -> dict[str, Any]:
+    """Обработать файлы с диска и из памяти и вернуть скорость обоих режимов."""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    dispatcher = MetadataDispatcher(BenchmarkSettings(OutputMode.CREATE_COPY, work_dir))
+
+    copies = []
+    for file in files:
+        target = work_dir / Path(file).name
+        shutil.copyfile(file, target)
+        copies.append(target)
+    buffers = [(Path(file).read_bytes(), Path(file).suffix) for file in files]
+
+    errors = []
+    start = time.perf_counter()
+    for path in copies:
+        result = dispatcher.process_file(path)
+        if not result.is_success:
+            errors.append(f"{path.name}: {result.message}")
+    path_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data, suffix in buffers:
+        result = dispatcher.clean_bytes(data, suffix)
+        if not result.is_success:
+            errors.append(f"{suffix} (память): {result.message}")
+    buffer_seconds = time.perf_counter() - start
+
+    count = len(files)
+    return {
+        "files": count,
+        "path_files_per_s": round(count / path_seconds, 3) if path_seconds else 0.0,
+        "buffer_files_per_s": round(count / buffer_seconds, 3) if buffer_seconds else 0.0,
+        "speedup": round(path_seconds / buffer_seconds, 3) if buffer_seconds else 0.0,
+        "errors": errors,
+    }
+
+
+def parse_args(argv: list[str] | None = None):
+    """Парсинг аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        description="Сравнение очистки с диска и из памяти"
+    )
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="smoke")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        default=None,
+        help="Каталог корпуса (по умолчанию .benchmark-corpus/<profile>)",
+    )
+    parser.add_argument("--groups", default=None, help="Обработчики через запятую")
+    parser.add_argument(
+        "--real-ffmpeg",
+        action="store_true",
+        help="Использовать установленный ffmpeg вместо заменителя",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Главная функция сравнения."""
+    args = parse_args(argv)
+    corpus_dir = args.corpus or Path(".benchmark-corpus") / args.profile
+
+    print(f"Генерация корпуса '{args.profile}' в {corpus_dir}...")
+    groups = group_corpus(generate_corpus(corpus_dir, args.profile, args.seed))
+    if args.groups:
+        wanted = set(args.groups.split(","))
+        groups = {name: paths for name, paths in groups.items() if name in wanted}
+
+    with tempfile.TemporaryDirectory(prefix="mc-bench-") as temp:
+        if not args.real_ffmpeg:
+            ffmpeg_dir = Path(temp) / "bin"
+            install_fake_ffmpeg(ffmpeg_dir)
+            prepend_to_path(ffmpeg_dir)
+
+        for group, paths in sorted(groups.items()):
+            metrics = compare_modes(paths, Path(temp) / group)
+            print(
+                f"{group:12} {metrics['files']:6d} файлов "
+                f"диск {metrics['path_files_per_s']:10.2f} файл/с "
+                f"память {metrics['buffer_files_per_s']:10.2f} файл/с "
+                f"×{metrics['speedup']:.2f}"
+            )
+            for error in metrics["errors"][:3]:
+                print(f"    ошибка: {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
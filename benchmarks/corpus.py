@@ -0,0 +1,515 @@
+"""Генератор воспроизводимого синтетического корпуса для бенчмарков.
+
+Все файлы создаются офлайн из генератора случайных чисел с фиксированным
+зерном и содержат типичные для реальных файлов метаданные: EXIF/GPS/XMP в
+JPEG, WebP и TIFF, текстовые чанки PNG, комментарии GIF, свойства документов
+Office и PDF (в том числе Office с EXIF во вложенных изображениях), атомы udta
+в MP4/MOV, элементы Info/Tags в MKV/WebM и изображения внутри ZIP/TAR.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import random
+import struct
+import tarfile
+import zipfile
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+import piexif
+from docx import Document
+from docx.shared import Inches as DocxInches
+from openpyxl import Workbook
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+from pptx import Presentation
+from pptx.util import Inches
+from pypdf import PdfWriter
+
+# Фиксированная дата для свойств документов, чтобы корпус был воспроизводимым
+FIXED_DATE = datetime(2021, 6, 1, 12, 0, 0, tzinfo=UTC)
+FIXED_TIMESTAMP = int(FIXED_DATE.timestamp())
+
+XMP_PACKET = (
+    '<?xpacket begin="﻿" id="W5M0MpCehiHzreSzNTczkc9d"?>'
+    '<x:xmpmeta xmlns:x="adobe:ns:meta/">'
+    '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+    '<rdf:Description xmlns:dc="http://purl.org/dc/elements/1.1/" '
+    'xmlns:xmp="http://ns.adobe.com/xap/1.0/">'
+    "<dc:creator><rdf:Seq><rdf:li>Benchmark Author</rdf:li></rdf:Seq></dc:creator>"
+    "<xmp:CreateDate>2021-06-01T12:00:00</xmp:CreateDate>"
+    "<xmp:CreatorTool>Synthetic Camera 1.0</xmp:CreatorTool>"
+    "</rdf:Description></rdf:RDF></x:xmpmeta>"
+    + " " * 2048
+    + '<?xpacket end="w"?>'
+)
+
+
+@dataclass(frozen=True)
+class CorpusItem:
+    """Описание группы однотипных файлов корпуса."""
+
+    kind: str
+    count: int
+    params: dict
+
+
+PROFILES: dict[str, list[CorpusItem]] = {
+    "smoke": [
+        CorpusItem("jpeg_exif", 20, {"size": (320, 240)}),
+        CorpusItem("png_small", 20, {"size": (64, 64)}),
+        CorpusItem("png_large", 2, {"size": (1024, 768)}),
+        CorpusItem("gif_animated", 4, {"size": (64, 64), "frames": 8}),
+        CorpusItem("pdf_pages", 2, {"pages": 50}),
+        CorpusItem("docx", 5, {"paragraphs": 20}),
+        CorpusItem("xlsx_cells", 2, {"rows": 200, "cols": 20}),
+        CorpusItem("pptx_media", 2, {"slides": 3}),
+        CorpusItem("mp4_udta", 3, {"mdat_bytes": 256 * 1024}),
+        CorpusItem("mov_udta", 3, {"mdat_bytes": 256 * 1024}),
+        CorpusItem("webp_exif", 10, {"size": (320, 240)}),
+        CorpusItem("tiff_exif", 5, {"size": (320, 240)}),
+        CorpusItem("docx_media", 2, {"images": 3}),
+        CorpusItem("mkv_tags", 3, {"clusters": 8, "cluster_bytes": 32 * 1024}),
+        CorpusItem("webm_tags", 3, {"clusters": 8, "cluster_bytes": 32 * 1024}),
+        CorpusItem("zip_images", 2, {"members": 5, "size": (160, 120)}),
+        CorpusItem("tgz_images", 2, {"members": 5, "size": (160, 120)}),
+    ],
+    "full": [
+        CorpusItem("jpeg_exif", 500, {"size": (2048, 1536)}),
+        CorpusItem("png_small", 1000, {"size": (64, 64)}),
+        CorpusItem("png_large", 10, {"size": (4096, 3072)}),
+        CorpusItem("gif_animated", 20, {"size": (320, 240), "frames": 60}),
+        CorpusItem("pdf_pages", 3, {"pages": 3000}),
+        CorpusItem("docx", 100, {"paragraphs": 200}),
+        CorpusItem("xlsx_cells", 1, {"rows": 1000, "cols": 1000}),
+        CorpusItem("pptx_media", 10, {"slides": 20}),
+        CorpusItem("mp4_udta", 5, {"mdat_bytes": 64 * 1024 * 1024}),
+        CorpusItem("mov_udta", 5, {"mdat_bytes": 64 * 1024 * 1024}),
+        CorpusItem("webp_exif", 200, {"size": (2048, 1536)}),
+        CorpusItem("tiff_exif", 20, {"size": (2048, 1536)}),
+        CorpusItem("docx_media", 10, {"images": 20}),
+        CorpusItem("mkv_tags", 5, {"clusters": 256, "cluster_bytes": 256 * 1024}),
+        CorpusItem("webm_tags", 5, {"clusters": 256, "cluster_bytes": 256 * 1024}),
+        CorpusItem("zip_images", 10, {"members": 50, "size": (1024, 768)}),
+        CorpusItem("tgz_images", 10, {"members": 50, "size": (1024, 768)}),
+    ],
+}
+
+
+def generate_corpus(
+    target_dir: Path | str, profile: str = "smoke", seed: int = 0
+) -> list[Path]:
+    """Сгенерировать корпус профиля в каталог и вернуть список файлов.
+
+    Уже существующие файлы не пересоздаются, поэтому повторный запуск
+    бенчмарка не тратит время на генерацию.
+    """
+    target_dir = Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+
+    for item in PROFILES[profile]:
+        generator, extension = GENERATORS[item.kind]
+        for index in range(item.count):
+            path = target_dir / f"{item.kind}_{index:05d}{extension}"
+            if not path.exists():
+                rng = random.Random(f"{seed}:{item.kind}:{index}")
+                tmp_path = path.with_name(path.name + ".part")
+                generator(tmp_path, rng, **item.params)
+                tmp_path.replace(path)
+            files.append(path)
+
+    return files
+
+
+def _smooth_image(rng: random.Random, size: tuple[int, int], mode: str = "RGB") -> Image.Image:
+    """Гладкое случайное изображение (сжимается как фотография, а не как шум)."""
+    width, height = size
+    channels = len(mode)
+    small = (max(1, width // 16), max(1, height // 16))
+    noise = rng.randbytes(small[0] * small[1] * channels)
+    return Image.frombytes(mode, small, noise).resize(size, Image.Resampling.BILINEAR)
+
+
+def _exif_bytes(rng: random.Random) -> bytes:
+    """EXIF с данными камеры, автора, датами и GPS."""
+    lat = rng.randint(0, 89)
+    lon = rng.randint(0, 179)
+    exif = {
+        "0th": {
+            piexif.ImageIFD.Make: b"SyntheticCam",
+            piexif.ImageIFD.Model: b"SC-1000",
+            piexif.ImageIFD.Software: b"Firmware 1.2.3",
+            piexif.ImageIFD.Artist: b"Benchmark Author",
+            piexif.ImageIFD.Copyright: b"(c) Benchmark",
+            piexif.ImageIFD.DateTime: b"2021:06:01 12:00:00",
+        },
+        "Exif": {
+            piexif.ExifIFD.DateTimeOriginal: b"2021:06:01 12:00:00",
+            piexif.ExifIFD.DateTimeDigitized: b"2021:06:01 12:00:00",
+            piexif.ExifIFD.CameraOwnerName: b"Owner Name",
+            piexif.ExifIFD.BodySerialNumber: str(rng.randint(10**8, 10**9)).encode(),
+            piexif.ExifIFD.LensSerialNumber: b"LENS123456",
+            piexif.ExifIFD.UserComment: b"ASCII\0\0\0synthetic comment",
+            piexif.ExifIFD.FNumber: (28, 10),
+            piexif.ExifIFD.ExposureTime: (1, 125),
+        },
+        "GPS": {
+            piexif.GPSIFD.GPSLatitudeRef: b"N",
+            piexif.GPSIFD.GPSLatitude: ((lat, 1), (30, 1), (0, 1)),
+            piexif.GPSIFD.GPSLongitudeRef: b"E",
+            piexif.GPSIFD.GPSLongitude: ((lon, 1), (15, 1), (0, 1)),
+            piexif.GPSIFD.GPSAltitude: (rng.randint(0, 5000), 1),
+        },
+        "1st": {},
+        "thumbnail": None,
+    }
+    return piexif.dump(exif)
+
+
+def _insert_app1(jpeg: bytes, payload: bytes) -> bytes:
+    """Вставить APP1 сегмент сразу после SOI."""
+    segment = b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+    return jpeg[:2] + segment + jpeg[2:]
+
+
+def make_jpeg(path: Path, rng: random.Random, size: tuple[int, int]):
+    """JPEG с EXIF, GPS и XMP."""
+    img = _smooth_image(rng, size)
+    img.save(path, format="JPEG", quality=90, exif=_exif_bytes(rng))
+    xmp = b"http://ns.adobe.com/xap/1.0/\0" + XMP_PACKET.encode("utf-8")
+    path.write_bytes(_insert_app1(path.read_bytes(), xmp))
+
+
+def make_png(path: Path, rng: random.Random, size: tuple[int, int]):
+    """PNG с текстовыми чанками tEXt/iTXt."""
+    info = PngInfo()
+    info.add_text("Author", "Benchmark Author")
+    info.add_text("Software", "Synthetic Editor 2.0")
+    info.add_text("Creation Time", "2021-06-01T12:00:00")
+    info.add_itxt("Description", "Синтетическое описание", lang="ru")
+    info.add_text("XML:com.adobe.xmp", XMP_PACKET)
+    _smooth_image(rng, size).save(path, format="PNG", pnginfo=info)
+
+
+def make_webp(path: Path, rng: random.Random, size: tuple[int, int]):
+    """WebP (VP8X) с чанками EXIF и XMP."""
+    _smooth_image(rng, size).save(
+        path,
+        format="WEBP",
+        quality=80,
+        exif=_exif_bytes(rng),
+        xmp=XMP_PACKET.encode("utf-8"),
+    )
+
+
+def make_tiff(path: Path, rng: random.Random, size: tuple[int, int]):
+    """TIFF с EXIF, GPS и тегом XMP."""
+    _smooth_image(rng, size).save(
+        path,
+        format="TIFF",
+        compression="tiff_adobe_deflate",
+        exif=_exif_bytes(rng),
+        tiffinfo={700: XMP_PACKET.encode("utf-8")},
+    )
+
+
+def make_gif(path: Path, rng: random.Random, size: tuple[int, int], frames: int):
+    """Анимированный GIF с комментарием."""
+    images = [_smooth_image(rng, size).convert("P") for _ in range(frames)]
+    images[0].save(
+        path,
+        format="GIF",
+        save_all=True,
+        append_images=images[1:],
+        duration=100,
+        loop=0,
+        comment=b"Benchmark Author, 2021-06-01",
+    )
+
+
+def make_pdf(path: Path, rng: random.Random, pages: int):
+    """Многостраничный PDF со словарем Info."""
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=595, height=842)
+    writer.add_metadata(
+        {
+            "/Author": "Benchmark Author",
+            "/Creator": "Synthetic Writer",
+            "/Producer": "Synthetic PDF Library 1.0",
+            "/Title": f"Document {rng.randint(0, 10**6)}",
+            "/CreationDate": "D:20210601120000Z",
+            "/ModDate": "D:20210601120000Z",
+        }
+    )
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def _set_core_properties(props):
+    """Заполнить core properties документа Office."""
+    props.author = "Benchmark Author"
+    props.last_modified_by = "Benchmark Editor"
+    props.title = "Synthetic document"
+    props.comments = "Synthetic comment"
+    props.category = "Benchmarks"
+    props.created = FIXED_DATE
+    props.modified = FIXED_DATE
+    props.revision = 7
+
+
+def make_docx(path: Path, rng: random.Random, paragraphs: int):
+    """DOCX с заполненными core properties."""
+    doc = Document()
+    for _ in range(paragraphs):
+        doc.add_paragraph(" ".join(str(rng.random()) for _ in range(20)))
+    _set_core_properties(doc.core_properties)
+    doc.save(str(path))
+
+
+def make_xlsx(path: Path, rng: random.Random, rows: int, cols: int):
+    """XLSX с большим количеством ячеек (write-only режим openpyxl)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Data")
+    for _ in range(rows):
+        ws.append([rng.randint(0, 10**6) for _ in range(cols)])
+    wb.properties.creator = "Benchmark Author"
+    wb.properties.lastModifiedBy = "Benchmark Editor"
+    wb.properties.created = FIXED_DATE
+    wb.properties.modified = FIXED_DATE
+    wb.save(str(path))
+
+
+def make_pptx(path: Path, rng: random.Random, slides: int):
+    """PPTX со слайдами, содержащими JPEG с EXIF."""
+    prs = Presentation()
+    layout = prs.slide_layouts[6]
+    for _ in range(slides):
+        slide = prs.slides.add_slide(layout)
+        picture = io.BytesIO()
+        _smooth_image(rng, (640, 480)).save(
+            picture, format="JPEG", quality=85, exif=_exif_bytes(rng)
+        )
+        picture.seek(0)
+        slide.shapes.add_picture(picture, Inches(1), Inches(1), width=Inches(6))
+    _set_core_properties(prs.core_properties)
+    prs.save(str(path))
+
+
+def make_docx_media(path: Path, rng: random.Random, images: int):
+    """DOCX с вложенными JPEG, содержащими EXIF и GPS."""
+    doc = Document()
+    for _ in range(images):
+        doc.add_paragraph(" ".join(str(rng.random()) for _ in range(20)))
+        doc.add_picture(io.BytesIO(_jpeg_bytes(rng, (640, 480))), width=DocxInches(5))
+    _set_core_properties(doc.core_properties)
+    doc.save(str(path))
+
+
+def _jpeg_bytes(rng: random.Random, size: tuple[int, int]) -> bytes:
+    """Содержимое JPEG с EXIF и GPS."""
+    buffer = io.BytesIO()
+    _smooth_image(rng, size).save(
+        buffer, format="JPEG", quality=85, exif=_exif_bytes(rng)
+    )
+    return buffer.getvalue()
+
+
+def _png_bytes(rng: random.Random, size: tuple[int, int]) -> bytes:
+    """Содержимое PNG с текстовыми чанками."""
+    info = PngInfo()
+    info.add_text("Author", "Benchmark Author")
+    info.add_text("Software", "Synthetic Editor 2.0")
+    buffer = io.BytesIO()
+    _smooth_image(rng, size).save(buffer, format="PNG", pnginfo=info)
+    return buffer.getvalue()
+
+
+def _archive_members(
+    rng: random.Random, members: int, size: tuple[int, int]
+) -> list[tuple[str, bytes]]:
+    """Члены архива: чередующиеся JPEG и PNG плюс текстовый файл."""
+    result = [("readme.txt", b"Synthetic archive by Benchmark Author\n")]
+    for index in range(members):
+        if index % 2:
+            result.append((f"images/{index:03d}.png", _png_bytes(rng, size)))
+        else:
+            result.append((f"images/{index:03d}.jpg", _jpeg_bytes(rng, size)))
+    return result
+
+
+def make_zip(path: Path, rng: random.Random, members: int, size: tuple[int, int]):
+    """ZIP с изображениями, содержащими метаданные."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in _archive_members(rng, members, size):
+            info = zipfile.ZipInfo(name, date_time=FIXED_DATE.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, data)
+
+
+def make_tgz(path: Path, rng: random.Random, members: int, size: tuple[int, int]):
+    """TAR.GZ с изображениями, содержащими метаданные."""
+    # Имя и mtime в заголовке gzip не пишутся, иначе файл зависит от запуска
+    with (
+        open(path, "wb") as raw,
+        gzip.GzipFile("", "wb", fileobj=raw, mtime=0) as stream,
+        tarfile.open(fileobj=stream, mode="w") as archive,
+    ):
+        for name, data in _archive_members(rng, members, size):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = FIXED_TIMESTAMP
+            info.uname = "benchmark-author"
+            archive.addfile(info, io.BytesIO(data))
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    """Атом ISO BMFF / QuickTime."""
+    return struct.pack(">I", len(payload) + 8) + box_type + payload
+
+
+def _udta() -> bytes:
+    """Атом udta с текстовыми метаданными в стиле QuickTime."""
+    entries = [
+        (b"\xa9nam", "Synthetic clip"),
+        (b"\xa9ART", "Benchmark Author"),
+        (b"\xa9day", "2021-06-01T12:00:00Z"),
+        (b"\xa9xyz", "+55.7558+037.6173/"),
+        (b"\xa9too", "Synthetic Recorder 3.1"),
+    ]
+    payload = b"".join(
+        _box(tag, struct.pack(">HH", len(text.encode()), 0) + text.encode())
+        for tag, text in entries
+    )
+    return _box(b"udta", payload)
+
+
+def _make_isobmff(
+    path: Path, rng: random.Random, mdat_bytes: int, major_brand: bytes
+):
+    """Контейнер ftyp + moov(mvhd, udta) + mdat со случайными данными."""
+    ftyp = _box(b"ftyp", major_brand + struct.pack(">I", 0) + major_brand + b"mp41")
+    mvhd = _box(
+        b"mvhd",
+        struct.pack(">I", 0)  # version + flags
+        + struct.pack(">IIII", 0, 0, 1000, 1000)  # даты, timescale, duration
+        + struct.pack(">IH", 0x00010000, 0x0100)  # rate, volume
+        + b"\0" * 10
+        + struct.pack(">9I", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+        + b"\0" * 24
+        + struct.pack(">I", 2),
+    )
+    moov = _box(b"moov", mvhd + _udta())
+
+    with open(path, "wb") as f:
+        f.write(ftyp)
+        f.write(moov)
+        f.write(struct.pack(">I", mdat_bytes + 8) + b"mdat")
+        remaining = mdat_bytes
+        while remaining:
+            chunk = min(remaining, 1024 * 1024)
+            f.write(rng.randbytes(chunk))
+            remaining -= chunk
+
+
+def make_mp4(path: Path, rng: random.Random, mdat_bytes: int):
+    """MP4 с атомами udta."""
+    _make_isobmff(path, rng, mdat_bytes, b"isom")
+
+
+def make_mov(path: Path, rng: random.Random, mdat_bytes: int):
+    """MOV с атомами udta."""
+    _make_isobmff(path, rng, mdat_bytes, b"qt  ")
+
+
+def _ebml(element_id: int, payload: bytes) -> bytes:
+    """Элемент EBML с размером фиксированной длины 8 байт."""
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + (0x01 << 56 | len(payload)).to_bytes(8, "big") + payload
+
+
+def _make_matroska(
+    path: Path, rng: random.Random, clusters: int, cluster_bytes: int, doc_type: bytes
+):
+    """Сегмент SeekHead + Info + Tracks + кластеры + Tags со случайными кадрами.
+
+    Tags записываются после кластеров и находятся через SeekHead, как в
+    файлах, записанных muxer'ами с индексом в начале.
+    """
+    info = _ebml(
+        0x1549A966,
+        _ebml(0x2AD7B1, (1_000_000).to_bytes(3, "big"))
+        + _ebml(0x4D80, b"Lavf60.3.100")
+        + _ebml(0x5741, b"Synthetic Recorder 3.1")
+        + _ebml(0x7BA9, b"Benchmark Author screen")
+        + _ebml(0x4461, bytes(8)),
+    )
+    tracks = _ebml(0x1654AE6B, _ebml(0xAE, _ebml(0xD7, b"\x01") + _ebml(0x83, b"\x01")))
+    simple_tag = _ebml(0x45A3, b"ARTIST") + _ebml(0x4487, b"Benchmark Author")
+    tags = _ebml(0x1254C367, _ebml(0x7373, _ebml(0x67C8, simple_tag)))
+    # Размер кластера: ID (4) + размер (8) + Timecode + SimpleBlock
+    cluster_size = 4 + 8 + len(_ebml(0xE7, b"\x00")) + 1 + 8 + cluster_bytes
+
+    def seek(target: int, position: int) -> bytes:
+        return _ebml(
+            0x4DBB,
+            _ebml(0x53AB, target.to_bytes(4, "big"))
+            + _ebml(0x53AC, position.to_bytes(8, "big")),
+        )
+
+    seek_size = len(seek(0, 0))
+    seek_head_size = 4 + 8 + 2 * seek_size
+    tags_position = seek_head_size + len(info) + len(tracks) + clusters * cluster_size
+    seek_head = _ebml(
+        0x114D9B74, seek(0x1549A966, seek_head_size) + seek(0x1254C367, tags_position)
+    )
+    body_size = tags_position + len(tags)
+
+    with open(path, "wb") as f:
+        f.write(_ebml(0x1A45DFA3, _ebml(0x4282, doc_type)))
+        f.write(0x18538067.to_bytes(4, "big"))
+        f.write((0x01 << 56 | body_size).to_bytes(8, "big"))
+        f.write(seek_head + info + tracks)
+        for index in range(clusters):
+            f.write(0x1F43B675.to_bytes(4, "big"))
+            f.write((0x01 << 56 | cluster_size - 12).to_bytes(8, "big"))
+            f.write(_ebml(0xE7, (index % 256).to_bytes(1, "big")))
+            f.write(b"\xa3" + (0x01 << 56 | cluster_bytes).to_bytes(8, "big"))
+            f.write(rng.randbytes(cluster_bytes))
+        f.write(tags)
+
+
+def make_mkv(path: Path, rng: random.Random, clusters: int, cluster_bytes: int):
+    """MKV с Info и Tags."""
+    _make_matroska(path, rng, clusters, cluster_bytes, b"matroska")
+
+
+def make_webm(path: Path, rng: random.Random, clusters: int, cluster_bytes: int):
+    """WebM с Info и Tags."""
+    _make_matroska(path, rng, clusters, cluster_bytes, b"webm")
+
+
+GENERATORS: dict[str, tuple[Callable, str]] = {
+    "jpeg_exif": (make_jpeg, ".jpg"),
+    "png_small": (make_png, ".png"),
+    "png_large": (make_png, ".png"),
+    "gif_animated": (make_gif, ".gif"),
+    "pdf_pages": (make_pdf, ".pdf"),
+    "docx": (make_docx, ".docx"),
+    "xlsx_cells": (make_xlsx, ".xlsx"),
+    "pptx_media": (make_pptx, ".pptx"),
+    "mp4_udta": (make_mp4, ".mp4"),
+    "mov_udta": (make_mov, ".mov"),
+    "webp_exif": (make_webp, ".webp"),
+    "tiff_exif": (make_tiff, ".tif"),
+    "docx_media": (make_docx_media, ".docx"),
+    "mkv_tags": (make_mkv, ".mkv"),
+    "webm_tags": (make_webm, ".webm"),
+    "zip_images": (make_zip, ".zip"),
+    "tgz_images": (make_tgz, ".tgz"),
+}
@@ -0,0 +1,68 @@
+"""Заменитель ffmpeg для бенчмарков без установленного ffmpeg.
+
+Понимает ``-version`` и вызов вида ``ffmpeg -i INPUT ... OUTPUT``: копирует
+входной файл в выходной блоками, имитируя потоковый ремукс без перекодирования.
+С ``-progress pipe:1`` после каждого блока печатает прогресс в формате ffmpeg.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import stat
+import sys
+from pathlib import Path
+
+FAKE_VERSION = "ffmpeg version 0.0-benchmark-fake"
+
+CHUNK_SIZE = 1024 * 1024
+# Наименьший вызов: -i INPUT OUTPUT
+MIN_ARGS = 3
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Точка входа заменителя ffmpeg."""
+    argv = sys.argv[1:] if argv is None else argv
+
+    if "-version" in argv:
+        print(FAKE_VERSION)
+        return 0
+
+    if "-i" not in argv or len(argv) < MIN_ARGS:
+        print("fake ffmpeg: ожидается -i INPUT ... OUTPUT", file=sys.stderr)
+        return 1
+
+    source = argv[argv.index("-i") + 1]
+    target = argv[-1]
+    progress = "-progress" in argv and argv[argv.index("-progress") + 1] == "pipe:1"
+
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        if not progress:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            return 0
+
+        while chunk := src.read(CHUNK_SIZE):
+            dst.write(chunk)
+            print(f"total_size={dst.tell()}\nprogress=continue", flush=True)
+    print("progress=end", flush=True)
+    return 0
+
+
+def install_fake_ffmpeg(bin_dir: Path | str) -> Path:
+    """Создать исполняемый файл ffmpeg в каталоге (для добавления в PATH)."""
+    bin_dir = Path(bin_dir)
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    script = bin_dir / "ffmpeg"
+    source = Path(__file__).read_text(encoding="utf-8")
+    script.write_text(f"#!{sys.executable}\n{source}", encoding="utf-8")
+    script.chmod(script.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return script
+
+
+def prepend_to_path(bin_dir: Path | str):
+    """Поставить каталог с заменителем первым в PATH текущего процесса."""
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+
+
+if __name__ == "__main__":
+    sys.exit(main())
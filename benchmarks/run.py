@@ -0,0 +1,404 @@
+"""Запуск бенчмарков обработчиков и проверка регрессий.
+
+Пример::
+
+    python -m benchmarks.run --profile smoke
+    python -m benchmarks.run --profile full --modes replace --update-baseline
+
+Каждая пара «обработчик × режим вывода» выполняется в отдельном процессе,
+чтобы пиковый RSS не накапливался между группами. Копирование корпуса в
+рабочий каталог в замер времени не входит.
+
+Скорость сравнивается с базовыми значениями не в файлах в секунду, а
+относительно эталонной нагрузки того же прогона (``reference_seconds``):
+``relative_speed`` — сколько файлов обрабатывается за время эталона. Так
+сравнение не зависит от скорости машины, на которой записаны базовые
+значения; абсолютные ``files_per_s`` только выводятся. Группа без базовых
+значений считается регрессией: новый формат нельзя добавить в корпус, не
+записав для него базу через ``--update-baseline``.
+
+Память замеряется отдельным проходом (tracemalloc замедляет обработку) и
+сравнивается с бюджетами по форматам из ``memory_budgets.json``: превышение
+бюджета любым форматом, как и формат без бюджета, завершает запуск с ошибкой.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+from PIL import Image
+
+from benchmarks.corpus import PROFILES, generate_corpus
+from benchmarks.fake_ffmpeg import install_fake_ffmpeg, prepend_to_path
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.memory import MB, peak_rss_bytes
+from metadata_cleaner.cleaner.models import OutputMode
+from metadata_cleaner.services.settings_service import SettingsService
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines.json"
+DEFAULT_MEMORY_BUDGETS = Path(__file__).parent / "memory_budgets.json"
+DEFAULT_TOLERANCE = 0.3
+
+# Число замеряемых проходов группы (после прогревочного)
+TIMED_ROUNDS = 3
+
+# Метрики и направление: True — больше лучше, False — меньше лучше
+COMPARED_METRICS = {
+    "relative_speed": True,
+    "peak_rss_mb": False,
+}
+
+# Метрики памяти одного файла, ограниченные бюджетами по форматам
+MEMORY_METRICS = ("peak_traced_mb", "rss_delta_mb")
+
+
+class BenchmarkSettings(SettingsService):
+    """Настройки по умолчанию без чтения и записи пользовательского файла."""
+
+    def __init__(self, output_mode: OutputMode, settings_dir: Path):
+        self._settings_dir = settings_dir
+        super().__init__()
+        self._settings["output_mode"] = output_mode.value
+
+    def _get_settings_file_path(self) -> Path:
+        return self._settings_dir / "settings.json"
+
+    def save_settings(self):
+        pass
+
+
+def peak_rss_mb() -> float:
+    """Пиковый RSS текущего процесса в мегабайтах."""
+    return peak_rss_bytes() / MB
+
+
+def reference_seconds(repeats: int = 5) -> float:
+    """Время эталонной нагрузки: кодирование JPEG и сжатие zlib.
+
+    Нагрузка похожа на работу обработчиков и не зависит от кода проекта;
+    берется лучшее из нескольких повторов, чтобы сгладить шум.
+    """
+    image = Image.linear_gradient("L").convert("RGB")
+    payload = bytes(range(256)) * 1024
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(10):
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=90)
+            buffer.seek(0)
+            with Image.open(buffer) as decoded:
+                decoded.load()
+            zlib.compress(payload, 6)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_group(
+    files: list[str],
+    mode: str,
+    work_dir: str,
+    ffmpeg_dir: str | None,
+    profile_memory: bool = False,
+) -> dict[str, Any]:
+    """Обработать группу файлов и вернуть метрики (выполняется в подпроцессе).
+
+    Первый проход прогревает процесс (импорты, кэши) и в замер не входит,
+    затем берется лучший из ``TIMED_ROUNDS`` проходов по свежим копиям.
+    С ``profile_memory`` выполняется один проход и дополнительно
+    возвращается максимум памяти одного файла по каждому формату.
+    """
+    work = Path(work_dir)
+    work.mkdir(parents=True, exist_ok=True)
+    if ffmpeg_dir:
+        prepend_to_path(ffmpeg_dir)
+
+    dispatcher = MetadataDispatcher(BenchmarkSettings(OutputMode(mode), work))
+    dispatcher.profile_memory = profile_memory
+    if profile_memory:
+        return _run_round(dispatcher, files, work)
+
+    _run_round(dispatcher, files, work / "warmup")
+    best: dict[str, Any] = {}
+    reference = float("inf")
+    for index in range(TIMED_ROUNDS):
+        # Эталон замеряется в том же процессе рядом с каждым проходом
+        reference = min(reference, reference_seconds())
+        metrics = _run_round(dispatcher, files, work / f"round-{index}")
+        if not best or metrics["seconds"] < best["seconds"]:
+            best = metrics
+    best["reference_s"] = round(reference, 5)
+    best["relative_speed"] = round(best["files_per_s"] * reference, 4)
+    return best
+
+
+def _run_round(
+    dispatcher: MetadataDispatcher, files: list[str], work: Path
+) -> dict[str, Any]:
+    """Один проход по свежим копиям файлов; каталог удаляется после замера."""
+    work.mkdir(parents=True, exist_ok=True)
+    copies = []
+    for file in files:
+        target = work / Path(file).name
+        shutil.copyfile(file, target)
+        copies.append(target)
+
+    input_bytes = 0
+    output_bytes = 0
+    errors = []
+    memory: dict[str, dict[str, float]] = {}
+
+    start = time.perf_counter()
+    for path in copies:
+        result = dispatcher.process_file(path)
+        input_bytes += result.input_size
+        output_bytes += result.output_size
+        if not result.is_success:
+            errors.append(f"{path.name}: {result.message}")
+        if result.memory is not None:
+            extension = path.suffix.lower().lstrip(".")
+            worst = memory.setdefault(extension, dict.fromkeys(MEMORY_METRICS, 0.0))
+            for metric in MEMORY_METRICS:
+                worst[metric] = max(worst[metric], round(getattr(result.memory, metric), 2))
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(work, ignore_errors=True)
+
+    return {
+        "files": len(copies),
+        "seconds": round(elapsed, 4),
+        "files_per_s": round(len(copies) / elapsed, 3) if elapsed else 0.0,
+        "mb_per_s": round(input_bytes / elapsed / 1e6, 3) if elapsed else 0.0,
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "size_delta": output_bytes - input_bytes,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "errors": errors,
+        "memory": memory,
+    }
+
+
+def group_corpus(files: list[Path]) -> dict[str, list[str]]:
+    """Разбить файлы корпуса по обработчикам."""
+    settings = BenchmarkSettings(OutputMode.CREATE_COPY, Path(tempfile.gettempdir()))
+    dispatcher = MetadataDispatcher(settings)
+    groups: dict[str, list[str]] = {}
+    for path in files:
+        file_type = dispatcher.get_file_type(path)
+        if file_type is not None:
+            groups.setdefault(file_type.value, []).append(str(path))
+    return groups
+
+
+def compare_to_baseline(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[str]:
+    """Сравнить результаты с базовыми значениями и вернуть список регрессий.
+
+    Группа без базовых значений считается регрессией, а отдельные метрики,
+    отсутствующие в базовых значениях (например, в файле старого формата),
+    пропускаются.
+    """
+    regressions = []
+    for key, metrics in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            regressions.append(f"{key}: нет базовых значений")
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            expected = reference.get(metric)
+            actual = metrics.get(metric)
+            if not expected or actual is None:
+                continue
+            if higher_is_better and actual < expected * (1 - tolerance):
+                regressions.append(f"{key}: {metric} {actual} < {expected} (-{tolerance:.0%})")
+            elif not higher_is_better and actual > expected * (1 + tolerance):
+                regressions.append(f"{key}: {metric} {actual} > {expected} (+{tolerance:.0%})")
+    return regressions
+
+
+def check_memory_budgets(
+    results: dict[str, dict[str, Any]], budgets: dict[str, dict[str, float]]
+) -> list[str]:
+    """Сравнить память по форматам с бюджетами и вернуть список превышений.
+
+    Формат без бюджета тоже считается нарушением.
+    """
+    violations = []
+    for key, metrics in results.items():
+        for extension, usage in sorted(metrics.get("memory", {}).items()):
+            budget = budgets.get(extension)
+            if budget is None:
+                violations.append(f"{key}: {extension} нет бюджета памяти")
+                continue
+            for metric in MEMORY_METRICS:
+                limit = budget.get(metric)
+                if limit is not None and usage.get(metric, 0.0) > limit:
+                    violations.append(
+                        f"{key}: {extension} {metric} {usage[metric]} > {limit} МБ"
+                    )
+    return violations
+
+
+def load_baseline(path: Path) -> dict[str, Any]:
+    """Загрузить файл базовых значений."""
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: Path, profile: str, results: dict[str, dict[str, Any]]):
+    """Обновить базовые значения измеренных групп профиля.
+
+    Значения остальных групп сохраняются, поэтому базу можно обновлять
+    по частям через ``--groups`` и ``--modes``.
+    """
+    baseline = load_baseline(path)
+    baseline.setdefault(profile, {}).update(
+        {
+            key: {metric: metrics[metric] for metric in COMPARED_METRICS}
+            for key, metrics in results.items()
+        }
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def parse_args(argv: list[str] | None = None):
+    """Парсинг аргументов командной строки."""
+    parser = argparse.ArgumentParser(description="Бенчмарки Metadata Cleaner")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="smoke")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        default=None,
+        help="Каталог корпуса (по умолчанию .benchmark-corpus/<profile>)",
+    )
+    parser.add_argument(
+        "--modes",
+        default=",".join(mode.value for mode in OutputMode),
+        help="Режимы вывода через запятую",
+    )
+    parser.add_argument("--groups", default=None, help="Обработчики через запятую")
+    parser.add_argument(
+        "--real-ffmpeg",
+        action="store_true",
+        help="Использовать установленный ffmpeg вместо заменителя",
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--memory-budgets", type=Path, default=DEFAULT_MEMORY_BUDGETS)
+    parser.add_argument(
+        "--no-memory", action="store_true", help="Пропустить проход замера памяти"
+    )
+    parser.add_argument("--json", type=Path, default=None, help="Сохранить результаты в JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Главная функция бенчмарков."""
+    args = parse_args(argv)
+    corpus_dir = args.corpus or Path(".benchmark-corpus") / args.profile
+
+    print(f"Генерация корпуса '{args.profile}' в {corpus_dir}...")
+    files = generate_corpus(corpus_dir, args.profile, args.seed)
+    groups = group_corpus(files)
+    if args.groups:
+        wanted = set(args.groups.split(","))
+        groups = {name: paths for name, paths in groups.items() if name in wanted}
+
+    results: dict[str, dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="mc-bench-") as temp:
+        ffmpeg_dir = None
+        if not args.real_ffmpeg:
+            ffmpeg_dir = str(Path(temp) / "bin")
+            install_fake_ffmpeg(ffmpeg_dir)
+
+        for mode in args.modes.split(","):
+            for group, paths in sorted(groups.items()):
+                key = f"{group}/{mode}"
+                work_dir = str(Path(temp) / group / mode)
+                # Новый процесс на группу: пиковый RSS не наследуется
+                metrics = _run_isolated(paths, mode, work_dir, ffmpeg_dir)
+                if not args.no_memory:
+                    profiled = _run_isolated(paths, mode, work_dir, ffmpeg_dir, True)
+                    metrics["memory"] = profiled["memory"]
+                results[key] = metrics
+                print(
+                    f"{key:32} {metrics['files']:6d} файлов "
+                    f"{metrics['files_per_s']:10.2f} файл/с "
+                    f"(отн. {metrics['relative_speed']:6.3f}) "
+                    f"{metrics['mb_per_s']:8.2f} МБ/с "
+                    f"RSS {metrics['peak_rss_mb']:8.1f} МБ "
+                    f"Δ {metrics['size_delta']:+d} Б"
+                )
+                for extension, usage in sorted(metrics["memory"].items()):
+                    print(
+                        f"    {extension:6} пик {usage['peak_traced_mb']:8.2f} МБ "
+                        f"RSS +{usage['rss_delta_mb']:.2f} МБ"
+                    )
+                for error in metrics["errors"][:3]:
+                    print(f"    ошибка: {error}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    budgets = load_baseline(args.memory_budgets).get(args.profile, {})
+    violations = check_memory_budgets(results, budgets)
+    if violations:
+        print("\nПревышены бюджеты памяти:")
+        for line in violations:
+            print(f"  {line}")
+
+    if args.update_baseline:
+        save_baseline(args.baseline, args.profile, results)
+        print(f"Базовые значения обновлены: {args.baseline}")
+        return 1 if violations else 0
+
+    baseline = load_baseline(args.baseline).get(args.profile, {})
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("\nОбнаружены регрессии:")
+        for line in regressions:
+            print(f"  {line}")
+    if regressions or violations:
+        return 1
+
+    print("\nРегрессий не обнаружено")
+    return 0
+
+
+def _run_isolated(
+    paths: list[str],
+    mode: str,
+    work_dir: str,
+    ffmpeg_dir: str | None,
+    profile_memory: bool = False,
+) -> dict[str, Any]:
+    """Выполнить run_group в новом процессе и удалить рабочий каталог."""
+    try:
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+            future = pool.submit(run_group, paths, mode, work_dir, ffmpeg_dir, profile_memory)
+            return future.result()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""Пакетная обработка: обход файлов, источники путей, движок и отчеты."""
+
+from .engine import BatchEngine
+from .isolation import IsolatedProcessor, IsolationLimits
+from .metrics import CleanerMetrics, MetricsRegistry, TextfileExporter
+from .pipeline import PipelineEngine
+from .reports import ReportSummary, merge_reports
+from .sharding import Shard
+from .sinks import ResultSink, open_sink, read_records, result_to_record
+from .sources import iter_file_list, open_file_list
+from .walker import DirectoryWalker, WalkOptions
+from .watcher import FolderWatcher, WatchOptions
+from .work_queue import QueueWorker, WorkQueue
+
+__all__ = [
+    "BatchEngine",
+    "CleanerMetrics",
+    "DirectoryWalker",
+    "FolderWatcher",
+    "IsolatedProcessor",
+    "IsolationLimits",
+    "MetricsRegistry",
+    "PipelineEngine",
+    "QueueWorker",
+    "ReportSummary",
+    "ResultSink",
+    "Shard",
+    "TextfileExporter",
+    "WalkOptions",
+    "WatchOptions",
+    "WorkQueue",
+    "iter_file_list",
+    "merge_reports",
+    "open_file_list",
+    "open_sink",
+    "read_records",
+    "result_to_record",
+]
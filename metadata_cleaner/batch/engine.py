@@ -0,0 +1,180 @@
+"""Параллельный движок пакетной очистки с отдельными пулами по типам файлов."""
+
+from __future__ import annotations
+
+import functools
+import queue
+import stat
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from metadata_cleaner.cleaner.models import (
+    CleaningOptions,
+    CleanResult,
+    CleanStatus,
+    FileJob,
+    FileType,
+    StageTimings,
+)
+
+if TYPE_CHECKING:
+    from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+
+# Каждый процесс ffmpeg сам нагружает диск, поэтому по умолчанию их немного
+DEFAULT_VIDEO_JOBS = 2
+
+# Маркер завершения подачи задач
+_DONE = object()
+
+
+class BatchEngine:
+    """Параллельная обработка потока файлов.
+
+    Для каждого типа файлов создается собственный пул потоков со своим
+    лимитом, а общий семафор ограничивает суммарное число одновременно
+    выполняемых задач значением ``jobs``. Входной поток читается отдельным
+    потоком с ограниченным числом задач «в полете», поэтому обработка
+    начинается сразу, а память не растет с длиной списка.
+
+    ``options`` — опции очистки запуска (поля и резервная копия), которые
+    получает каждая задача; без них используются настройки диспетчера.
+    """
+
+    def __init__(
+        self,
+        dispatcher: MetadataDispatcher,
+        jobs: int | None = None,
+        type_limits: dict[FileType, int] | None = None,
+        process: Callable[[Path], CleanResult] | None = None,
+        max_pending: int | None = None,
+        *,
+        options: CleaningOptions | None = None,
+    ):
+        self.dispatcher = dispatcher
+        self.options = options
+        self.jobs = max(1, jobs or dispatcher.settings_service.get_max_threads())
+        self.type_limits = {FileType.VIDEO: min(DEFAULT_VIDEO_JOBS, self.jobs)}
+        self.type_limits.update(type_limits or {})
+        self.process = process or functools.partial(
+            dispatcher.process_file, options=options
+        )
+        self.max_pending = max_pending or self.jobs * 4
+        # Суммарное время этапов по типам файлов за все запуски
+        self.stage_totals: dict[FileType, StageTimings] = {}
+
+    def run(self, paths: Iterable[str | Path]) -> Iterator[CleanResult]:
+        """Обработать поток путей, выдавая результаты по мере готовности."""
+        results: queue.Queue = queue.Queue()
+        in_flight = threading.BoundedSemaphore(self.max_pending)
+        slots = threading.BoundedSemaphore(self.jobs)
+        stop = threading.Event()
+        pools: dict[FileType, ThreadPoolExecutor] = {}
+        feeder_error: list[BaseException] = []
+
+        def execute(path: Path):
+            with slots:
+                if stop.is_set():
+                    result = self._error_result(path, "Обработка прервана")
+                else:
+                    try:
+                        result = self.process(path)
+                    except Exception as e:
+                        result = self._error_result(path, str(e), e)
+            results.put(result)
+
+        def feed():
+            try:
+                for item in paths:
+                    path = Path(item)
+                    while not in_flight.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    if stop.is_set():
+                        return
+
+                    file_type, early_result = self._classify(path)
+                    if early_result is not None:
+                        if self.dispatcher.metrics is not None:
+                            self.dispatcher.metrics.record_result(early_result)
+                        results.put(early_result)
+                        continue
+
+                    pool = pools.get(file_type)
+                    if pool is None:
+                        limit = self.type_limits.get(file_type, self.jobs)
+                        pool = ThreadPoolExecutor(
+                            max_workers=max(1, min(self.jobs, limit)),
+                            thread_name_prefix=f"clean-{file_type.value}",
+                        )
+                        pools[file_type] = pool
+                    pool.submit(execute, path)
+            except BaseException as e:
+                feeder_error.append(e)
+            finally:
+                for pool in list(pools.values()):
+                    pool.shutdown(wait=True)
+                results.put(_DONE)
+
+        feeder = threading.Thread(target=feed, name="batch-feeder", daemon=True)
+        feeder.start()
+
+        try:
+            while True:
+                item = results.get()
+                if item is _DONE:
+                    break
+                in_flight.release()
+                self._account(item)
+                yield item
+        finally:
+            stop.set()
+            for pool in list(pools.values()):
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        if feeder_error:
+            raise feeder_error[0]
+
+    def _account(self, result: CleanResult):
+        """Учесть время этапов обработанного файла."""
+        if result.timings.total:
+            totals = self.stage_totals.setdefault(result.job.file_type, StageTimings())
+            totals.merge(result.timings)
+
+    def _classify(self, path: Path) -> tuple[FileType | None, CleanResult | None]:
+        """Определить пул для файла или сразу вернуть итоговый результат."""
+        try:
+            mode = path.stat().st_mode
+        except FileNotFoundError:
+            return None, self._error_result(path, f"Файл не найден: {path}")
+        except OSError as e:
+            return None, self._error_result(path, str(e), e)
+
+        if stat.S_ISDIR(mode):
+            return None, CleanResult(
+                job=FileJob(file_path=path),
+                status=CleanStatus.SKIPPED,
+                message=f"Каталог (используйте --recursive): {path}",
+            )
+
+        file_type = self.dispatcher.get_file_type(path)
+        if file_type is None or file_type not in self.dispatcher.handlers:
+            return None, CleanResult(
+                job=FileJob(file_path=path),
+                status=CleanStatus.SKIPPED,
+                message=f"Неподдерживаемый файл: {path}",
+            )
+        return file_type, None
+
+    @staticmethod
+    def _error_result(
+        path: Path, message: str, error: Exception | None = None
+    ) -> CleanResult:
+        return CleanResult(
+            job=FileJob(file_path=path),
+            status=CleanStatus.ERROR,
+            message=message,
+            error=error,
+        )
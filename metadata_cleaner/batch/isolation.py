@@ -0,0 +1,299 @@
+"""Изоляция обработки файлов в дочерних процессах с лимитами ресурсов.
+
+Каждый файл обрабатывается в рабочем процессе, который переиспользуется
+между задачами. Процесс ограничен по процессорному времени (RLIMIT_CPU, на
+задачу) и адресному пространству (RLIMIT_AS), а родитель следит за временем
+выполнения. Зависший или превысивший лимиты процесс убивается и заменяется
+новым, а задача получает результат ``CleanStatus.ERROR`` с причиной.
+
+Наблюдатели и метрики обработчиков (ffmpeg, резервные копии) работают внутри
+рабочего процесса и родителю не передаются; итоговые результаты учитываются
+в метриках родительского диспетчера.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.models import (
+    CleaningOptions,
+    CleanResult,
+    CleanStatus,
+    FileJob,
+)
+from metadata_cleaner.services.settings_service import SettingsService
+
+try:
+    import resource
+except ImportError:  # Windows: лимиты недоступны, остается только таймаут
+    resource = None
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_MAX_JOBS_PER_WORKER = 200
+
+
+def default_dispatcher(
+    fsync_output: bool = False, profile_memory: bool = False, scrub_xmp: bool = False
+) -> MetadataDispatcher:
+    """Диспетчер рабочего процесса с пользовательскими настройками."""
+    dispatcher = MetadataDispatcher(SettingsService())
+    dispatcher.fsync_output = fsync_output
+    dispatcher.profile_memory = profile_memory
+    dispatcher.scrub_xmp = scrub_xmp
+    return dispatcher
+
+
+@dataclass
+class IsolationLimits:
+    """Лимиты обработки одного файла.
+
+    ``timeout`` — время выполнения в секундах, ``cpu_seconds`` —
+    процессорное время, ``memory_mb`` — адресное пространство рабочего
+    процесса. ``None`` отключает соответствующий лимит.
+    """
+
+    timeout: float | None = DEFAULT_TIMEOUT
+    cpu_seconds: int | None = None
+    memory_mb: int | None = None
+    max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER
+
+
+def _worker_main(
+    conn: Connection,
+    dispatcher_factory: Callable[[], MetadataDispatcher],
+    limits: IsolationLimits,
+):
+    """Цикл рабочего процесса: принимает задачи и возвращает результаты.
+
+    Задача — путь и опции очистки запуска (или None): у рабочего процесса
+    свои настройки, поэтому опции CLI передаются вместе с каждым путем.
+    """
+    if resource is not None and limits.memory_mb:
+        size = limits.memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (size, size))
+
+    dispatcher = dispatcher_factory()
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        path, options = task
+
+        if resource is not None and limits.cpu_seconds:
+            # RLIMIT_CPU считает время всего процесса, поэтому лимит задачи
+            # отсчитывается от уже израсходованного времени
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            used = math.ceil(usage.ru_utime + usage.ru_stime)
+            hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+            resource.setrlimit(resource.RLIMIT_CPU, (used + limits.cpu_seconds, hard))
+
+        try:
+            result = dispatcher.process_file(Path(path), options)
+        except Exception as e:
+            result = CleanResult(
+                job=FileJob(file_path=Path(path)),
+                status=CleanStatus.ERROR,
+                message=str(e),
+                error=e,
+            )
+        conn.send(_portable(result))
+
+
+def _portable(result: CleanResult) -> CleanResult:
+    """Подготовить результат к передаче между процессами."""
+    result.job.listener = None
+    if result.error is not None:
+        try:
+            multiprocessing.reduction.ForkingPickler.dumps(result.error)
+        except Exception:
+            result.error = RuntimeError(f"{type(result.error).__name__}: {result.error}")
+    return result
+
+
+class _Worker:
+    """Рабочий процесс и канал связи с ним."""
+
+    def __init__(self, context, dispatcher_factory, limits: IsolationLimits):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, dispatcher_factory, limits),
+            name="metadata-cleaner-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        with contextlib.suppress(OSError):
+            self.conn.send(None)
+        self.process.join(timeout=5)
+        self.kill()
+
+
+class IsolatedProcessor:
+    """Обработка файлов в пуле изолированных рабочих процессов.
+
+    Экземпляр вызывается как функция ``path -> CleanResult`` и подходит в
+    качестве ``process`` для BatchEngine. Вызовы из разных потоков
+    обслуживаются разными рабочими процессами (не более ``size``).
+    ``options`` передаются рабочему процессу с каждым путем.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        limits: IsolationLimits | None = None,
+        dispatcher_factory: Callable[[], MetadataDispatcher] = default_dispatcher,
+        dispatcher: MetadataDispatcher | None = None,
+        options: CleaningOptions | None = None,
+    ):
+        self.size = max(1, size)
+        self.options = options
+        self.limits = limits or IsolationLimits()
+        self.dispatcher_factory = dispatcher_factory
+        # Диспетчер родителя: в его метриках учитываются результаты
+        self.dispatcher = dispatcher
+        self.workers_started = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: queue.LifoQueue[_Worker] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._total = 0
+        self._closed = False
+
+    def __call__(self, path: Path) -> CleanResult:
+        result = self.process(path)
+        if self.dispatcher is not None and self.dispatcher.metrics is not None:
+            handler = self.dispatcher.handlers.get(result.job.file_type)
+            self.dispatcher.metrics.record_result(
+                result, type(handler).__name__ if handler else None
+            )
+        return result
+
+    def process(self, path: Path) -> CleanResult:
+        """Обработать файл в рабочем процессе."""
+        worker = self._acquire()
+        try:
+            worker.conn.send((str(path), self.options))
+            if not worker.conn.poll(self.limits.timeout):
+                worker.kill()
+                worker = None
+                timeout = self.limits.timeout
+                return self._error(path, f"Превышено время обработки ({timeout:g} с)")
+            result = worker.conn.recv()
+        except (EOFError, OSError):
+            reason = self._exit_reason(worker)
+            worker = None
+            return self._error(path, reason)
+        finally:
+            if worker is None:
+                with self._lock:
+                    self._total -= 1
+        worker.jobs_done += 1
+
+        if isinstance(result.error, MemoryError) and self.limits.memory_mb:
+            # Состояние процесса после нехватки памяти ненадежно
+            result.message = f"Превышен лимит памяти ({self.limits.memory_mb} МБ)"
+            self._discard(worker)
+        elif worker.jobs_done >= self.limits.max_jobs_per_worker:
+            self._discard(worker)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def _acquire(self) -> _Worker:
+        with self._lock:
+            if self._closed:
+                msg = "Пул рабочих процессов закрыт"
+                raise RuntimeError(msg)
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._total < self.size:
+                self._total += 1
+                self.workers_started += 1
+                start_new = True
+            else:
+                start_new = False
+
+        if start_new:
+            try:
+                return _Worker(self._context, self.dispatcher_factory, self.limits)
+            except Exception:
+                with self._lock:
+                    self._total -= 1
+                raise
+        return self._idle.get()
+
+    def _discard(self, worker: _Worker):
+        worker.stop()
+        with self._lock:
+            self._total -= 1
+
+    def _exit_reason(self, worker: _Worker) -> str:
+        """Причина аварийного завершения рабочего процесса."""
+        worker.process.join(timeout=5)
+        code = worker.process.exitcode
+        worker.kill()
+        if code == -getattr(signal, "SIGXCPU", 0) and self.limits.cpu_seconds:
+            return f"Превышен лимит процессорного времени ({self.limits.cpu_seconds} с)"
+        if code == -getattr(signal, "SIGKILL", 0):
+            return "Процесс обработки принудительно завершен (возможно, нехватка памяти)"
+        return f"Процесс обработки аварийно завершился (код {code})"
+
+    def _error(self, path: Path, message: str) -> CleanResult:
+        job = FileJob(file_path=path)
+        if self.dispatcher is not None:
+            job.file_type = self.dispatcher.get_file_type(path) or job.file_type
+        return CleanResult(
+            job=job,
+            status=CleanStatus.ERROR,
+            message=message,
+        )
+
+    def close(self):
+        """Остановить все простаивающие рабочие процессы."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def limits_supported() -> bool:
+    """Доступны ли лимиты CPU и памяти на этой платформе."""
+    return resource is not None and os.name == "posix"
@@ -0,0 +1,291 @@
+"""Метрики пакетной очистки в текстовом формате Prometheus/OpenMetrics.
+
+Метрики пишутся в файл для textfile-коллектора node_exporter: атомарно
+(через временный файл и переименование) в конце запуска и периодически во
+время него. Сетевой сервис не нужен.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from metadata_cleaner.cleaner.models import CleanResult
+
+# Границы гистограммы времени обработки файла, секунды
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+)
+
+DEFAULT_INTERVAL = 15.0
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    """Экранировать значение метки."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: tuple[str, str] | None = None) -> str:
+    """Сформировать блок меток {name="value",...}."""
+    items = [*labels, extra] if extra else list(labels)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+@dataclass
+class _Histogram:
+    """Накопленные значения гистограммы для одного набора меток."""
+
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self):
+        if not self.counts:
+            self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+@dataclass
+class _Family:
+    """Семейство метрик: имя, тип, описание и значения по наборам меток."""
+
+    name: str
+    kind: str
+    description: str
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    values: dict[Labels, float | _Histogram] = field(default_factory=dict)
+
+
+class MetricsRegistry:
+    """Потокобезопасный реестр счетчиков, gauge и гистограмм."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families: dict[str, _Family] = {}
+
+    def counter(self, name: str, description: str):
+        self._register(_Family(name, "counter", description))
+
+    def gauge(self, name: str, description: str):
+        self._register(_Family(name, "gauge", description))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self._register(
+            _Family(name, "histogram", description, tuple(sorted(buckets)))
+        )
+
+    def _register(self, family: _Family):
+        with self._lock:
+            self._families.setdefault(family.name, family)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str):
+        """Увеличить счетчик."""
+        key = self._key(labels)
+        with self._lock:
+            family = self._families[name]
+            family.values[key] = family.values.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels: str):
+        """Установить значение gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._families[name].values[key] = value
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Добавить наблюдение в гистограмму."""
+        key = self._key(labels)
+        with self._lock:
+            family = self._families[name]
+            histogram = family.values.get(key)
+            if histogram is None:
+                histogram = family.values[key] = _Histogram(family.buckets)
+            histogram.observe(value)
+
+    def value(self, name: str, **labels: str) -> float:
+        """Текущее значение счетчика или gauge (0, если не задано)."""
+        with self._lock:
+            value = self._families[name].values.get(self._key(labels), 0.0)
+        return value.count if isinstance(value, _Histogram) else value
+
+    @staticmethod
+    def _key(labels: dict[str, str]) -> Labels:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def render(self) -> str:
+        """Вывести все метрики в текстовом формате экспозиции."""
+        lines = []
+        with self._lock:
+            for family in self._families.values():
+                lines.append(f"# HELP {family.name} {family.description}")
+                lines.append(f"# TYPE {family.name} {family.kind}")
+                for labels, value in sorted(family.values.items()):
+                    if isinstance(value, _Histogram):
+                        lines.extend(self._render_histogram(family, labels, value))
+                    else:
+                        rendered = f"{_format_labels(labels)} {_format_value(value)}"
+                        lines.append(family.name + rendered)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(
+        family: _Family, labels: Labels, histogram: _Histogram
+    ) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(family.buckets, histogram.counts, strict=True):
+            cumulative += count
+            bucket_labels = _format_labels(labels, ("le", _format_value(bound)))
+            lines.append(f"{family.name}_bucket{bucket_labels} {cumulative}")
+        inf_labels = _format_labels(labels, ("le", "+Inf"))
+        lines.append(f"{family.name}_bucket{inf_labels} {histogram.count}")
+        plain = _format_labels(labels)
+        lines.append(f"{family.name}_sum{plain} {_format_value(histogram.total)}")
+        lines.append(f"{family.name}_count{plain} {histogram.count}")
+        return lines
+
+
+class CleanerMetrics(MetricsRegistry):
+    """Метрики очистки, которые заполняются диспетчером и обработчиками."""
+
+    FILES = "metadata_cleaner_files_total"
+    INPUT_BYTES = "metadata_cleaner_input_bytes_total"
+    OUTPUT_BYTES = "metadata_cleaner_output_bytes_total"
+    DURATION = "metadata_cleaner_file_duration_seconds"
+    FFMPEG = "metadata_cleaner_ffmpeg_invocations_total"
+    FFMPEG_UNAVAILABLE = "metadata_cleaner_ffmpeg_unavailable_total"
+    BACKUP_BYTES = "metadata_cleaner_backup_bytes_total"
+    START_TIME = "metadata_cleaner_run_start_time_seconds"
+    UPDATE_TIME = "metadata_cleaner_last_update_time_seconds"
+
+    def __init__(self):
+        super().__init__()
+        self.counter(self.FILES, "Обработанные файлы по типу и статусу")
+        self.counter(self.INPUT_BYTES, "Размер исходных файлов, байты")
+        self.counter(self.OUTPUT_BYTES, "Размер очищенных файлов, байты")
+        self.histogram(self.DURATION, "Время обработки файла обработчиком, секунды")
+        self.counter(self.FFMPEG, "Запуски ffmpeg по результату")
+        self.counter(self.FFMPEG_UNAVAILABLE, "Файлы, для которых ffmpeg не найден")
+        self.counter(self.BACKUP_BYTES, "Объем созданных резервных копий, байты")
+        self.gauge(self.START_TIME, "Время начала запуска (unix time)")
+        self.gauge(self.UPDATE_TIME, "Время последней записи метрик (unix time)")
+        self.set(self.START_TIME, time.time())
+        self.inc(self.BACKUP_BYTES, 0)
+
+    def record_result(self, result: CleanResult, handler: str | None = None):
+        """Учесть результат обработки файла."""
+        file_type = result.job.file_type.value
+        self.inc(self.FILES, file_type=file_type, status=result.status.value)
+        if result.input_size:
+            self.inc(self.INPUT_BYTES, result.input_size, file_type=file_type)
+        if result.output_size:
+            self.inc(self.OUTPUT_BYTES, result.output_size, file_type=file_type)
+        if handler is not None:
+            self.observe(self.DURATION, result.processing_time, handler=handler)
+
+    def record_ffmpeg(self, outcome: str):
+        """Учесть запуск ffmpeg: success, failure или timeout."""
+        self.inc(self.FFMPEG, outcome=outcome)
+
+    def record_ffmpeg_unavailable(self):
+        """Учесть файл, для которого ffmpeg не найден (запуска не было)."""
+        self.inc(self.FFMPEG_UNAVAILABLE)
+
+    def record_backup(self, size: int):
+        """Учесть созданную резервную копию."""
+        self.inc(self.BACKUP_BYTES, size)
+
+    def render(self) -> str:
+        self.set(self.UPDATE_TIME, time.time())
+        return super().render()
+
+
+class TextfileExporter:
+    """Периодическая атомарная запись метрик в файл.
+
+    Используется как контекстный менеджер: при выходе метрики записываются
+    последний раз, чтобы файл отражал итог запуска.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        path: Path | str,
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        self.registry = registry
+        self.path = Path(path)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def write(self):
+        """Записать текущие метрики атомарно."""
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(self.registry.render(), encoding="utf-8")
+            tmp_path.replace(self.path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def start(self):
+        """Запустить периодическую запись в фоновом потоке."""
+        self.write()
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="metrics-textfile", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Остановить фоновую запись и записать итоговые метрики."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                # Временная ошибка записи не должна прерывать обработку
+                continue
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
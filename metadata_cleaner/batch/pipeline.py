@@ -0,0 +1,231 @@
+"""Конвейерная пакетная очистка: чтение, преобразование и запись параллельно.
+
+Обработчик читает, очищает и записывает файл строго последовательно, поэтому
+в обычном режиме диск и процессор простаивают по очереди. Конвейер разделяет
+обработку на три этапа со своими потоками и ограниченными очередями:
+
+* чтение — потоки предвыборки заранее загружают следующие файлы в память в
+  пределах бюджета байт;
+* преобразование — обработчики работают с содержимым в памяти и оставляют
+  результат в памяти (``FileJob.pending_write``);
+* запись — отдельные потоки пишут результаты на диск и выполняют fsync.
+
+Видео не загружается в память: ffmpeg сам читает и пишет файлы.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from metadata_cleaner.cleaner.models import (
+    CleaningOptions,
+    CleanResult,
+    FileJob,
+    FileType,
+)
+
+from .engine import _DONE, BatchEngine
+
+if TYPE_CHECKING:
+    from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+
+DEFAULT_PREFETCH_BYTES = 256 * 1024 * 1024
+DEFAULT_READERS = 2
+DEFAULT_WRITERS = 2
+
+# Типы, которые обработчик читает и пишет сам, минуя конвейер
+_STREAMED_TYPES = frozenset({FileType.VIDEO, FileType.ARCHIVE})
+
+
+class ByteBudget:
+    """Семафор по байтам: ограничивает объем данных в памяти конвейера.
+
+    Запрос больше всего бюджета допускается, когда бюджет свободен, чтобы
+    крупный файл не блокировал обработку навсегда.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.used = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int, timeout: float | None = None) -> bool:
+        """Занять ``size`` байт; False, если не удалось за ``timeout``."""
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self.used == 0 or self.used + size <= self.limit, timeout
+            ):
+                return False
+            self.used += size
+            return True
+
+    def release(self, size: int):
+        """Освободить ранее занятые байты."""
+        with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+
+class PipelineEngine(BatchEngine):
+    """Пакетная обработка конвейером с предвыборкой и отдельной записью.
+
+    Параллельность преобразования и лимиты по типам файлов такие же, как у
+    BatchEngine; ``readers`` и ``writers`` задают число потоков чтения и
+    записи, ``prefetch_bytes`` — объем файлов, одновременно находящихся в
+    памяти между чтением и записью.
+    """
+
+    def __init__(
+        self,
+        dispatcher: MetadataDispatcher,
+        jobs: int | None = None,
+        *,
+        type_limits: dict[FileType, int] | None = None,
+        max_pending: int | None = None,
+        prefetch_bytes: int = DEFAULT_PREFETCH_BYTES,
+        readers: int = DEFAULT_READERS,
+        writers: int = DEFAULT_WRITERS,
+        options: CleaningOptions | None = None,
+    ):
+        super().__init__(
+            dispatcher,
+            jobs=jobs,
+            type_limits=type_limits,
+            max_pending=max_pending,
+            options=options,
+        )
+        self.prefetch_bytes = prefetch_bytes
+        self.readers = max(1, readers)
+        self.writers = max(1, writers)
+
+    def run(self, paths: Iterable[str | Path]) -> Iterator[CleanResult]:
+        """Обработать поток путей, выдавая результаты по мере готовности."""
+        results: queue.Queue = queue.Queue()
+        in_flight = threading.BoundedSemaphore(self.max_pending)
+        slots = threading.BoundedSemaphore(self.jobs)
+        budget = ByteBudget(self.prefetch_bytes)
+        stop = threading.Event()
+        pools: dict[FileType, ThreadPoolExecutor] = {}
+        pools_lock = threading.Lock()
+        feeder_error: list[BaseException] = []
+        read_pool = ThreadPoolExecutor(self.readers, thread_name_prefix="clean-read")
+        write_pool = ThreadPoolExecutor(self.writers, thread_name_prefix="clean-write")
+
+        def transform_pool(file_type: FileType) -> ThreadPoolExecutor:
+            with pools_lock:
+                pool = pools.get(file_type)
+                if pool is None:
+                    limit = self.type_limits.get(file_type, self.jobs)
+                    pool = ThreadPoolExecutor(
+                        max_workers=max(1, min(self.jobs, limit)),
+                        thread_name_prefix=f"clean-{file_type.value}",
+                    )
+                    pools[file_type] = pool
+                return pool
+
+        def read(path: Path, file_type: FileType):
+            reserved = 0
+            try:
+                if file_type not in _STREAMED_TYPES:
+                    reserved = self._file_size(path)
+                    while not budget.acquire(reserved, timeout=0.1):
+                        if stop.is_set():
+                            reserved = 0
+                            break
+                if stop.is_set():
+                    finish(self._error_result(path, "Обработка прервана"), reserved)
+                    return
+
+                job, early_result = self.dispatcher.create_job(
+                    path, defer_write=True, options=self.options
+                )
+                if early_result is not None:
+                    finish(early_result, reserved)
+                    return
+                if reserved:
+                    with job.stage("read"):
+                        job.source_data = path.read_bytes()
+                transform_pool(file_type).submit(transform, job, reserved)
+            except Exception as e:
+                finish(self._error_result(path, str(e), e), reserved)
+
+        def transform(job: FileJob, reserved: int):
+            if stop.is_set():
+                job.source_data = None
+                finish(self._error_result(job.file_path, "Обработка прервана"), reserved)
+                return
+            with slots:
+                try:
+                    result = self.dispatcher.run_job(job)
+                except Exception as e:
+                    result = self._error_result(job.file_path, str(e), e)
+            job.source_data = None
+            write_pool.submit(write, job, result, reserved)
+
+        def write(job: FileJob, result: CleanResult, reserved: int):
+            try:
+                result = self.dispatcher.finish_job(job, result)
+            except Exception as e:
+                result = self._error_result(job.file_path, str(e), e)
+            finish(result, reserved)
+
+        def finish(result: CleanResult, reserved: int):
+            if reserved:
+                budget.release(reserved)
+            results.put(result)
+
+        def feed():
+            try:
+                for item in paths:
+                    path = Path(item)
+                    while not in_flight.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    if stop.is_set():
+                        return
+
+                    file_type, early_result = self._classify(path)
+                    if early_result is not None:
+                        if self.dispatcher.metrics is not None:
+                            self.dispatcher.metrics.record_result(early_result)
+                        results.put(early_result)
+                        continue
+                    read_pool.submit(read, path, file_type)
+            except BaseException as e:
+                feeder_error.append(e)
+            finally:
+                # Этапы завершаются по порядку: каждый передает задачи следующему
+                read_pool.shutdown(wait=True)
+                for pool in list(pools.values()):
+                    pool.shutdown(wait=True)
+                write_pool.shutdown(wait=True)
+                results.put(_DONE)
+
+        feeder = threading.Thread(target=feed, name="pipeline-feeder", daemon=True)
+        feeder.start()
+
+        try:
+            while True:
+                item = results.get()
+                if item is _DONE:
+                    break
+                in_flight.release()
+                self._account(item)
+                yield item
+        finally:
+            stop.set()
+
+        if feeder_error:
+            raise feeder_error[0]
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
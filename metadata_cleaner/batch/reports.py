@@ -0,0 +1,75 @@
+"""Объединение отчетов нескольких запусков (например, частей --shard)."""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .sinks import ResultSink, read_records
+
+
+@dataclass
+class ReportSummary:
+    """Общие итоги по записям нескольких отчетов."""
+
+    records: int = 0
+    statuses: Counter[str] = field(default_factory=Counter)
+    file_types: Counter[str] = field(default_factory=Counter)
+    input_bytes: int = 0
+    output_bytes: int = 0
+    processing_time: float = 0.0
+    stages: dict[str, float] = field(default_factory=dict)
+    # Пути, встретившиеся больше одного раза (пересечение частей или повторы)
+    duplicates: int = 0
+    per_report: dict[str, int] = field(default_factory=dict)
+
+    def add(self, record: dict[str, Any]):
+        """Учесть запись отчета."""
+        self.records += 1
+        self.statuses[record.get("status") or "unknown"] += 1
+        self.file_types[record.get("file_type") or "unknown"] += 1
+        self.input_bytes += record.get("input_size") or 0
+        self.output_bytes += record.get("output_size") or 0
+        self.processing_time += record.get("processing_time") or 0.0
+        for stage, seconds in (record.get("stages") or {}).items():
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def as_dict(self) -> dict[str, Any]:
+        """Итоги в виде сериализуемого словаря."""
+        return {
+            "records": self.records,
+            "statuses": dict(self.statuses),
+            "file_types": dict(self.file_types),
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "processing_time": round(self.processing_time, 6),
+            "stages": {name: round(value, 6) for name, value in self.stages.items()},
+            "duplicates": self.duplicates,
+            "per_report": self.per_report,
+        }
+
+
+def merge_reports(
+    specs: Iterable[str], output: ResultSink | None = None
+) -> ReportSummary:
+    """Прочитать отчеты, подсчитать общие итоги и при необходимости записать
+    все записи в ``output``.
+    """
+    summary = ReportSummary()
+    seen: set[str] = set()
+    for spec in specs:
+        count = 0
+        for record in read_records(spec):
+            summary.add(record)
+            path = record.get("path")
+            if path in seen:
+                summary.duplicates += 1
+            else:
+                seen.add(path)
+            if output is not None:
+                output.write_record(record)
+            count += 1
+        summary.per_report[spec] = count
+    return summary
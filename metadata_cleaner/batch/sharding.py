@@ -0,0 +1,48 @@
+"""Статическое разделение файлов между узлами по хешу относительного пути."""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Shard:
+    """Часть ``index`` из ``count`` (нумерация с 1, как в ``--shard 2/4``).
+
+    Файл принадлежит части по хешу BLAKE2b его пути относительно корня обхода
+    (с разделителем '/'), поэтому разбиение не зависит от точки монтирования,
+    порядка обхода и версии Python, а каждый файл попадает ровно в одну часть.
+    """
+
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if self.count < 1 or not 1 <= self.index <= self.count:
+            msg = f"Некорректная часть: {self.index}/{self.count}"
+            raise ValueError(msg)
+
+    @classmethod
+    def parse(cls, spec: str) -> Shard:
+        """Разобрать спецификацию вида 'i/N'."""
+        index, sep, count = spec.partition("/")
+        try:
+            if not sep:
+                raise ValueError(spec)
+            return cls(int(index), int(count))
+        except ValueError:
+            msg = f"Некорректная часть: {spec} (ожидается i/N, 1 ≤ i ≤ N)"
+            raise ValueError(msg) from None
+
+    def owns(self, rel_path: str) -> bool:
+        """Принадлежит ли файл с относительным путем этой части."""
+        if self.count == 1:
+            return True
+        digest = hashlib.blake2b(
+            rel_path.encode("utf-8", "surrogateescape"), digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "big") % self.count == self.index - 1
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
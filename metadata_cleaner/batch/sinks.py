@@ -0,0 +1,331 @@
+"""Потоковые приемники результатов очистки (JSONL, CSV, SQLite)."""
+
+from __future__ import annotations
+
+import csv
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from metadata_cleaner.cleaner.models import CleanResult
+
+# Поля записи в фиксированном порядке (колонки CSV и SQLite)
+RECORD_FIELDS = [
+    "path",
+    "output_path",
+    "file_type",
+    "status",
+    "message",
+    "error_type",
+    "error",
+    "processing_time",
+    "stages",
+    "memory",
+    "input_size",
+    "output_size",
+    "cleaned_fields",
+    "finished_at",
+]
+
+# Поля со вложенными значениями, хранящиеся в CSV и SQLite как JSON
+_JSON_FIELDS = {"cleaned_fields", "stages", "memory"}
+
+# Числовые поля, которые CSV хранит строками
+_FLOAT_FIELDS = {"processing_time"}
+_INT_FIELDS = {"input_size", "output_size"}
+
+# Таблицы SQLite, имена которых можно подставлять в запросы (имя таблицы
+# нельзя передать параметром)
+_SQL_TABLES = frozenset({"results"})
+
+DEFAULT_BUFFER_RECORDS = 256
+
+
+def result_to_record(result: CleanResult) -> dict[str, Any]:
+    """Преобразовать CleanResult в сериализуемую запись.
+
+    Сохраняются только имена очищенных полей, а не их значения, чтобы отчет
+    не содержал удаленные метаданные.
+    """
+    job = result.job
+    return {
+        "path": str(job.file_path),
+        "output_path": str(job.output_path or job.file_path),
+        "file_type": job.file_type.value,
+        "status": result.status.value,
+        "message": result.message,
+        "error_type": type(result.error).__name__ if result.error else None,
+        "error": str(result.error) if result.error else None,
+        "processing_time": round(result.processing_time, 6),
+        "stages": result.timings.as_dict(),
+        "memory": result.memory.as_dict() if result.memory else None,
+        "input_size": result.input_size,
+        "output_size": result.output_size,
+        "cleaned_fields": sorted(result.cleaned_fields or {}),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+class ResultSink(ABC):
+    """Базовый приемник результатов с буферизованной записью."""
+
+    def __init__(self, buffer_records: int = DEFAULT_BUFFER_RECORDS):
+        self.buffer_records = max(1, buffer_records)
+        self._buffer: list[dict[str, Any]] = []
+        self.records_written = 0
+
+    def write(self, result: CleanResult):
+        """Записать результат очистки."""
+        self.write_record(result_to_record(result))
+
+    def write_record(self, record: dict[str, Any]):
+        """Записать готовую запись."""
+        self._buffer.append(record)
+        if len(self._buffer) >= self.buffer_records:
+            self.flush()
+
+    def flush(self):
+        """Сбросить буфер в хранилище."""
+        if self._buffer:
+            self._write_batch(self._buffer)
+            self.records_written += len(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        """Сбросить буфер и закрыть хранилище."""
+        self.flush()
+        self._close()
+
+    @abstractmethod
+    def _write_batch(self, records: list[dict[str, Any]]):
+        """Записать пакет записей."""
+
+    @abstractmethod
+    def _close(self):
+        """Закрыть хранилище."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonlSink(ResultSink):
+    """Запись результатов в JSON Lines (одна запись на строку)."""
+
+    def __init__(self, path: Path | str, buffer_records: int = DEFAULT_BUFFER_RECORDS):
+        super().__init__(buffer_records)
+        self.path = Path(path)
+        # Файл открыт до close(): контекстный менеджер здесь не подходит
+        self._file = self.path.open("a", encoding="utf-8")
+
+    def _write_batch(self, records: list[dict[str, Any]]):
+        self._file.writelines(
+            json.dumps(record, ensure_ascii=False) + "\n" for record in records
+        )
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class CsvSink(ResultSink):
+    """Запись результатов в CSV."""
+
+    def __init__(self, path: Path | str, buffer_records: int = DEFAULT_BUFFER_RECORDS):
+        super().__init__(buffer_records)
+        self.path = Path(path)
+        write_header = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = self.path.open("a", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=RECORD_FIELDS)
+        if write_header:
+            self._writer.writeheader()
+
+    def _write_batch(self, records: list[dict[str, Any]]):
+        self._writer.writerows(
+            {
+                **record,
+                "cleaned_fields": ";".join(record["cleaned_fields"]),
+                "stages": json.dumps(record.get("stages") or {}),
+                "memory": json.dumps(record["memory"]) if record.get("memory") else "",
+            }
+            for record in records
+        )
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class SqliteSink(ResultSink):
+    """Запись результатов в таблицу SQLite."""
+
+    TABLE = "results"
+
+    def __init__(
+        self,
+        path: Path | str,
+        buffer_records: int = DEFAULT_BUFFER_RECORDS * 4,
+    ):
+        super().__init__(buffer_records)
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        table = _sql_table(self.TABLE)
+        columns = ", ".join(RECORD_FIELDS)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+        # Отчеты прежних версий могут не содержать новых колонок
+        existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        for name in RECORD_FIELDS:
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name}")
+        self._conn.commit()
+        placeholders = ", ".join("?" for _ in RECORD_FIELDS)
+        self._insert = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"  # noqa: S608
+
+    def _write_batch(self, records: list[dict[str, Any]]):
+        rows = [
+            tuple(
+                json.dumps(record.get(name)) if name in _JSON_FIELDS else record.get(name)
+                for name in RECORD_FIELDS
+            )
+            for record in records
+        ]
+        with self._conn:
+            self._conn.executemany(self._insert, rows)
+
+    def _close(self):
+        self._conn.close()
+
+
+class MultiSink(ResultSink):
+    """Передача результатов сразу в несколько приемников."""
+
+    def __init__(self, sinks: list[ResultSink]):
+        super().__init__(buffer_records=1)
+        self.sinks = sinks
+
+    def write_record(self, record: dict[str, Any]):
+        for sink in self.sinks:
+            sink.write_record(record)
+        self.records_written += 1
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def _write_batch(self, records: list[dict[str, Any]]):
+        for sink in self.sinks:
+            for record in records:
+                sink.write_record(record)
+
+    def _close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+SINK_TYPES: dict[str, type[ResultSink]] = {
+    "jsonl": JsonlSink,
+    "csv": CsvSink,
+    "sqlite": SqliteSink,
+}
+
+_EXTENSION_TYPES = {
+    ".jsonl": "jsonl",
+    ".json": "jsonl",
+    ".csv": "csv",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+}
+
+
+def parse_sink_spec(spec: str) -> tuple[str, Path]:
+    """Разобрать спецификацию вида 'jsonl:out.jsonl' или путь с расширением."""
+    kind, sep, target = spec.partition(":")
+    if sep and kind.lower() in SINK_TYPES:
+        return kind.lower(), Path(target)
+
+    path = Path(spec)
+    kind = _EXTENSION_TYPES.get(path.suffix.lower())
+    if kind is None:
+        msg = f"Неизвестный формат отчета: {spec} (ожидается jsonl:, csv: или sqlite:)"
+        raise ValueError(msg)
+    return kind, path
+
+
+def open_sink(spec: str) -> ResultSink:
+    """Создать приемник результатов по спецификации."""
+    kind, path = parse_sink_spec(spec)
+    return SINK_TYPES[kind](path)
+
+
+def _read_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_csv(path: Path) -> Iterator[dict[str, Any]]:
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            record: dict[str, Any] = {
+                name: value if value != "" else None for name, value in row.items()
+            }
+            fields = record.get("cleaned_fields")
+            record["cleaned_fields"] = fields.split(";") if fields else []
+            record["stages"] = json.loads(record.get("stages") or "{}")
+            memory = record.get("memory")
+            record["memory"] = json.loads(memory) if memory else None
+            for name in _FLOAT_FIELDS:
+                if record.get(name) is not None:
+                    record[name] = float(record[name])
+            for name in _INT_FIELDS:
+                if record.get(name) is not None:
+                    record[name] = int(record[name])
+            yield record
+
+
+def _sql_table(name: str) -> str:
+    """Имя таблицы из белого списка ``_SQL_TABLES``."""
+    if name not in _SQL_TABLES:
+        msg = f"Недопустимое имя таблицы SQLite: {name}"
+        raise ValueError(msg)
+    return name
+
+
+def _read_sqlite(path: Path) -> Iterator[dict[str, Any]]:
+    # Открытие только на чтение: отсутствующий файл не создается
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        table = _sql_table(SqliteSink.TABLE)
+        cursor = conn.execute(f"SELECT * FROM {table}")  # noqa: S608
+        names = [column[0] for column in cursor.description]
+        for row in cursor:
+            record = dict(zip(names, row, strict=True))
+            for name in _JSON_FIELDS & record.keys():
+                if record[name] is not None:
+                    record[name] = json.loads(record[name])
+            yield record
+    finally:
+        conn.close()
+
+
+_READERS = {
+    "jsonl": _read_jsonl,
+    "csv": _read_csv,
+    "sqlite": _read_sqlite,
+}
+
+
+def read_records(spec: str) -> Iterator[dict[str, Any]]:
+    """Прочитать записи отчета, созданного приемником, по спецификации."""
+    kind, path = parse_sink_spec(spec)
+    yield from _READERS[kind](path)
@@ -0,0 +1,58 @@
+"""Потоковые источники путей для пакетной обработки."""
+
+from __future__ import annotations
+
+import os
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def iter_file_list(
+    stream: BinaryIO,
+    null_separated: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Path]:
+    """Лениво читать список путей из бинарного потока.
+
+    Пути выдаются сразу по мере поступления разделителя, поэтому первый файл
+    обрабатывается, пока производитель списка еще работает. Память
+    ограничена размером блока и длиной самого длинного пути.
+    """
+    if not null_separated:
+        for line in stream:
+            entry = line.rstrip(b"\r\n")
+            if entry:
+                yield Path(os.fsdecode(entry))
+        return
+
+    # read1 возвращает уже доступные данные, не дожидаясь заполнения блока
+    read = getattr(stream, "read1", stream.read)
+    tail = b""
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        parts = (tail + chunk).split(b"\0")
+        tail = parts.pop()
+        for entry in parts:
+            if entry:
+                yield Path(os.fsdecode(entry))
+
+    if tail:
+        yield Path(os.fsdecode(tail))
+
+
+@contextmanager
+def open_file_list(source: str):
+    """Открыть список файлов: путь к файлу или '-' для stdin."""
+    if source == "-":
+        yield sys.stdin.buffer
+        return
+
+    with open(source, "rb") as stream:
+        yield stream
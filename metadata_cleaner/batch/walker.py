@@ -0,0 +1,192 @@
+"""Многопоточный обход каталогов на основе os.scandir."""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import queue
+import threading
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .sharding import Shard
+
+# Маркер завершения обхода в очереди результатов
+_DONE = object()
+
+
+@dataclass
+class WalkOptions:
+    """Параметры рекурсивного обхода каталогов."""
+
+    include: list[str] = field(default_factory=list)
+    exclude: list[str] = field(default_factory=list)
+    max_depth: int | None = None
+    one_file_system: bool = False
+    follow_symlinks: bool = False
+    extensions: set[str] | None = None
+    threads: int = 4
+    queue_size: int = 1024
+    shard: Shard | None = None
+    on_error: Callable[[Path, OSError], None] | None = None
+
+
+class DirectoryWalker:
+    """Обходит дерево каталогов несколькими потоками и отдает файлы потоком.
+
+    Файлы выдаются по мере обнаружения, поэтому обработка может начинаться
+    до завершения обхода. Очередь результатов ограничена, так что медленный
+    потребитель притормаживает обход, а не копит пути в памяти.
+    """
+
+    def __init__(self, options: WalkOptions | None = None):
+        self.options = options or WalkOptions()
+        self._extensions = (
+            tuple(ext.lower() for ext in self.options.extensions)
+            if self.options.extensions
+            else None
+        )
+
+    def walk(self, root: Path | str) -> Iterator[Path]:
+        """Рекурсивно обойти каталог и вернуть подходящие файлы."""
+        root = Path(root)
+        opts = self.options
+        root_stat = root.stat()
+
+        dirs: queue.Queue = queue.Queue()
+        results: queue.Queue = queue.Queue(maxsize=opts.queue_size)
+        stop = threading.Event()
+        lock = threading.Lock()
+        visited = {(root_stat.st_dev, root_stat.st_ino)}
+        pending = [1]
+        thread_count = max(1, opts.threads)
+
+        def put_result(item) -> bool:
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def finish_dir():
+            with lock:
+                pending[0] -= 1
+                done = pending[0] == 0
+            if done:
+                for _ in range(thread_count):
+                    dirs.put(None)
+                put_result(_DONE)
+
+        def scan(directory: Path, rel: str, depth: int):
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError as e:
+                if opts.on_error:
+                    opts.on_error(directory, e)
+                return
+
+            for entry in entries:
+                if stop.is_set():
+                    return
+                rel_path = f"{rel}{entry.name}"
+                if self._is_excluded(entry.name, rel_path):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=opts.follow_symlinks):
+                        if opts.max_depth is not None and depth >= opts.max_depth:
+                            continue
+                        if not self._should_descend(entry, root_stat, visited, lock):
+                            continue
+                        with lock:
+                            pending[0] += 1
+                        dirs.put((Path(entry.path), f"{rel_path}/", depth + 1))
+                    # Фильтры по имени проверяются до is_file, который для
+                    # символических ссылок и части файловых систем делает stat
+                    elif self._accepts_file(entry.name, rel_path) and entry.is_file(
+                        follow_symlinks=opts.follow_symlinks
+                    ):
+                        if not put_result(Path(entry.path)):
+                            return
+                except OSError as e:
+                    if opts.on_error:
+                        opts.on_error(Path(entry.path), e)
+
+        def worker():
+            while True:
+                item = dirs.get()
+                if item is None or stop.is_set():
+                    return
+                try:
+                    scan(*item)
+                finally:
+                    finish_dir()
+
+        dirs.put((root, "", 0))
+        threads = [
+            threading.Thread(target=worker, name=f"walker-{i}", daemon=True)
+            for i in range(thread_count)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = results.get()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            # Прерывание потребителем: останавливаем потоки и освобождаем очередь
+            stop.set()
+            for _ in range(thread_count):
+                dirs.put(None)
+            while True:
+                try:
+                    results.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _should_descend(self, entry: os.DirEntry, root_stat, visited, lock) -> bool:
+        """Проверить, нужно ли спускаться в подкаталог."""
+        opts = self.options
+        if not (opts.one_file_system or opts.follow_symlinks):
+            return True
+
+        st = entry.stat(follow_symlinks=opts.follow_symlinks)
+        if opts.one_file_system and st.st_dev != root_stat.st_dev:
+            return False
+        if opts.follow_symlinks:
+            # Защита от циклов через символические ссылки
+            key = (st.st_dev, st.st_ino)
+            with lock:
+                if key in visited:
+                    return False
+                visited.add(key)
+        return True
+
+    def _is_excluded(self, name: str, rel_path: str) -> bool:
+        """Проверить, исключен ли элемент шаблонами --exclude."""
+        return any(
+            self._match(pattern, name, rel_path) for pattern in self.options.exclude
+        )
+
+    def _accepts_file(self, name: str, rel_path: str) -> bool:
+        """Проверить файл по расширению, шаблонам --include и части --shard."""
+        if self._extensions and not name.lower().endswith(self._extensions):
+            return False
+        if self.options.include and not any(
+            self._match(pattern, name, rel_path) for pattern in self.options.include
+        ):
+            return False
+        return self.options.shard is None or self.options.shard.owns(rel_path)
+
+    @staticmethod
+    def _match(pattern: str, name: str, rel_path: str) -> bool:
+        """Шаблон с '/' сравнивается с относительным путем, иначе с именем."""
+        if "/" in pattern:
+            return fnmatch.fnmatch(rel_path, pattern)
+        return fnmatch.fnmatch(name, pattern)
@@ -0,0 +1,372 @@
+"""Наблюдение за каталогом: очистка файлов по мере их появления.
+
+На Linux изменения приходят от inotify (через ctypes, без зависимостей), и
+в простое процесс не тратит процессор. На других платформах, а также при
+недоступности inotify каталог периодически опрашивается по stat.
+
+Файл передается в обработку, когда его размер и время изменения не меняются
+в течение ``settle`` секунд: так не обрабатываются файлы, которые еще
+загружаются. Собственные результаты очистки (``*_cleaned.*``, ``.bak``,
+временные файлы) и файлы, перезаписанные самим очистителем, пропускаются.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from metadata_cleaner.cleaner.models import CleanResult
+
+DEFAULT_SETTLE = 2.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Маски событий inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Сигнатура файла для обнаружения изменений: размер и время изменения
+Signature = tuple[int, int]
+
+
+@dataclass
+class WatchOptions:
+    """Параметры наблюдения за каталогом."""
+
+    recursive: bool = False
+    settle: float = DEFAULT_SETTLE
+    poll_interval: float = DEFAULT_POLL_INTERVAL
+    use_inotify: bool = True
+    process_existing: bool = False
+    extensions: set[str] | None = None
+
+
+def is_cleaner_artifact(name: str) -> bool:
+    """Файл создан самим очистителем или является временным."""
+    # '_cleaned.' покрывает и составные расширения: 'bundle_cleaned.tar.gz'
+    return (
+        name.startswith(".")
+        or name.endswith((".bak", ".tmp", "~"))
+        or ".tmp." in name
+        or "_cleaned." in name
+    )
+
+
+def _signature(path: Path) -> Signature | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _scan(root: Path, recursive: bool) -> dict[Path, Signature]:
+    """Снимок файлов каталога с их сигнатурами."""
+    snapshot = {}
+    directories = [root]
+    while directories:
+        directory = directories.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        directories.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    snapshot[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                continue
+    return snapshot
+
+
+class _PollingBackend:
+    """Обнаружение изменений периодическим сравнением снимков каталога."""
+
+    def __init__(self, root: Path, recursive: bool, interval: float):
+        self.root = root
+        self.recursive = recursive
+        self.interval = interval
+        self._snapshot = _scan(root, recursive)
+        self._wake = threading.Event()
+
+    def wait(self, timeout: float | None) -> list[Path]:
+        """Дождаться изменений и вернуть измененные файлы."""
+        delay = self.interval if timeout is None else min(self.interval, timeout)
+        if self._wake.wait(delay):
+            return []
+        snapshot = _scan(self.root, self.recursive)
+        changed = [
+            path for path, sig in snapshot.items() if self._snapshot.get(path) != sig
+        ]
+        self._snapshot = snapshot
+        return changed
+
+    def wake(self):
+        self._wake.set()
+
+    def close(self):
+        self._wake.set()
+
+
+class _InotifyBackend:
+    """Обнаружение изменений через inotify (Linux)."""
+
+    def __init__(self, root: Path, recursive: bool):
+        self.root = root
+        self.recursive = recursive
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._wake_read, self._wake_write = os.pipe()
+        self._directories: dict[int, Path] = {}
+        try:
+            self._add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add(self, directory: Path):
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), _WATCH_MASK
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(directory))
+        self._directories[wd] = directory
+
+    def _add_tree(self, directory: Path) -> list[Path]:
+        """Подписаться на каталог (и подкаталоги) и вернуть найденные файлы."""
+        self._add(directory)
+        if not self.recursive:
+            return []
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_dir(follow_symlinks=False):
+                try:
+                    files.extend(self._add_tree(Path(entry.path)))
+                except OSError:
+                    continue
+            elif entry.is_file(follow_symlinks=False):
+                files.append(Path(entry.path))
+        return files
+
+    def wait(self, timeout: float | None) -> list[Path]:
+        """Дождаться событий и вернуть измененные файлы."""
+        readable, _, _ = select.select([self._fd, self._wake_read], [], [], timeout)
+        if self._wake_read in readable:
+            os.read(self._wake_read, 1024)
+        if self._fd not in readable:
+            return []
+
+        changed = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            changed.extend(self._parse(data))
+        return changed
+
+    def _parse(self, data: bytes) -> list[Path]:
+        changed = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # События потеряны: считаем измененными все файлы
+                changed.extend(_scan(self.root, self.recursive))
+                continue
+            if mask & IN_IGNORED:
+                self._directories.pop(wd, None)
+                continue
+            directory = self._directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        changed.extend(self._add_tree(path))
+                    except OSError:
+                        continue
+            else:
+                changed.append(path)
+        return changed
+
+    def wake(self):
+        # OSError: наблюдение уже завершено
+        with contextlib.suppress(OSError):
+            os.write(self._wake_write, b"\0")
+
+    def close(self):
+        for fd in (self._fd, self._wake_read, self._wake_write):
+            try:
+                os.close(fd)
+            except OSError:
+                continue
+
+
+def _load_libc():
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+def inotify_available() -> bool:
+    """Доступен ли inotify на этой платформе."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        return hasattr(_load_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+
+class FolderWatcher:
+    """Поток готовых к очистке файлов каталога.
+
+    ``iter_files`` выдает файлы по мере того, как они перестают меняться,
+    и блокируется, пока новых файлов нет. Результаты очистки передаются в
+    ``mark_done``, чтобы перезапись файла очистителем не вызывала повторную
+    обработку. ``close`` из другого потока завершает итерацию.
+    """
+
+    def __init__(self, root: Path | str, options: WatchOptions | None = None):
+        self.root = Path(root)
+        self.options = options or WatchOptions()
+        # Кортеж для endswith: расширения бывают составными ('.tar.gz')
+        self._extensions = (
+            tuple(ext.lower() for ext in self.options.extensions)
+            if self.options.extensions
+            else None
+        )
+        # Файл → (сигнатура, момент последнего изменения)
+        self._pending: dict[Path, tuple[Signature, float]] = {}
+        # Файл → сигнатура после очистки
+        self._processed: dict[Path, Signature] = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._backend = None
+        self.backend_name = ""
+
+    def _open_backend(self):
+        if self.options.use_inotify and inotify_available():
+            try:
+                self.backend_name = "inotify"
+                return _InotifyBackend(self.root, self.options.recursive)
+            except OSError:
+                pass
+        self.backend_name = "poll"
+        return _PollingBackend(
+            self.root, self.options.recursive, self.options.poll_interval
+        )
+
+    def accepts(self, path: Path) -> bool:
+        """Подходит ли файл для очистки."""
+        if is_cleaner_artifact(path.name):
+            return False
+        return self._extensions is None or path.name.lower().endswith(self._extensions)
+
+    def iter_files(self) -> Iterator[Path]:
+        """Выдавать файлы, готовые к очистке, до вызова close()."""
+        self._backend = self._open_backend()
+        try:
+            if self.options.process_existing:
+                for path in _scan(self.root, self.options.recursive):
+                    self._touch(path, time.monotonic())
+
+            while not self._closed.is_set():
+                for path in self._backend.wait(self._next_timeout()):
+                    self._touch(path, time.monotonic())
+                yield from self._collect_ready()
+        finally:
+            self._backend.close()
+
+    def _touch(self, path: Path, now: float):
+        if not self.accepts(path):
+            return
+        signature = _signature(path)
+        if signature is None:
+            self._pending.pop(path, None)
+            return
+        current = self._pending.get(path)
+        if current is None or current[0] != signature:
+            self._pending[path] = (signature, now)
+
+    def _next_timeout(self) -> float | None:
+        """Время до ближайшей проверки ожидающих файлов (None — ждать событий)."""
+        if not self._pending:
+            return None
+        now = time.monotonic()
+        earliest = min(changed for _, changed in self._pending.values())
+        return max(0.0, earliest + self.options.settle - now)
+
+    def _collect_ready(self) -> list[Path]:
+        """Файлы, не менявшиеся в течение settle секунд (пачкой)."""
+        now = time.monotonic()
+        ready = []
+        for path, (signature, changed) in list(self._pending.items()):
+            if now - changed < self.options.settle:
+                continue
+            current = _signature(path)
+            if current is None:
+                del self._pending[path]
+            elif current != signature:
+                self._pending[path] = (current, now)
+            else:
+                del self._pending[path]
+                with self._lock:
+                    # Перезапись самим очистителем не требует повторной очистки
+                    if self._processed.get(path) == current:
+                        continue
+                    self._processed.pop(path, None)
+                ready.append(path)
+        return sorted(ready)
+
+    def mark_done(self, result: CleanResult):
+        """Запомнить состояние файла после очистки."""
+        path = result.job.file_path
+        # Копия (*_cleaned) исходный файл не меняет и сама не отслеживается
+        if result.job.output_path not in (None, path):
+            return
+        signature = _signature(path)
+        if signature is not None:
+            with self._lock:
+                self._processed[path] = signature
+
+    def close(self):
+        """Завершить наблюдение."""
+        self._closed.set()
+        if self._backend is not None:
+            self._backend.wake()
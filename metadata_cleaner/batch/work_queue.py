@@ -0,0 +1,378 @@
+"""Очередь задач в SQLite для нескольких независимых рабочих процессов.
+
+Пути добавляются в таблицу ``jobs`` один раз, а рабочие процессы (на одном
+или нескольких хостах с общим каталогом) забирают их пачками под аренду
+ограниченного времени. Пока файлы пачки обрабатываются, аренда продлевается,
+а результаты записываются частями, так что при падении процесса теряется не
+больше одной незаписанной части; остальные задачи упавшего процесса после
+истечения аренды снова выдаются другим.
+Задача, аренда которой истекала ``max_attempts`` раз, считается ошибочной,
+чтобы «ядовитый» файл не ронял рабочие процессы бесконечно.
+
+База открывается в режиме журнала отката (не WAL): WAL требует общей памяти
+и не работает на NFS. Аренда сравнивается по системным часам, поэтому часы
+хостов должны быть синхронизированы.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from metadata_cleaner.cleaner.models import CleanResult, CleanStatus
+
+if TYPE_CHECKING:
+    from .engine import BatchEngine
+
+DEFAULT_LEASE = 300.0
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_COMMIT_EVERY = 8
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Наибольшее число задач, выдаваемых за один запрос
+_MAX_CLAIM = 500
+
+# Состояния задачи
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    status TEXT,
+    message TEXT,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_until);
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class QueueJob:
+    """Задача, выданная рабочему процессу."""
+
+    id: int
+    path: str
+    attempts: int
+
+
+def default_worker_id() -> str:
+    """Идентификатор рабочего процесса: хост и PID."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _normalize(path: str | Path) -> str:
+    """Абсолютный путь в виде, который не меняется при Path(path)."""
+    return str(Path(os.path.normpath(Path(path).absolute())))
+
+
+class WorkQueue:
+    """Таблица задач очистки с арендой."""
+
+    def __init__(
+        self,
+        path: Path | str,
+        lease_seconds: float = DEFAULT_LEASE,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        busy_timeout: float = 60.0,
+    ):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        # Транзакции управляются явно (BEGIN IMMEDIATE)
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        # Соединение используется и потоком продления аренды
+        self._lock = threading.Lock()
+        self._conn.executescript(_SCHEMA)
+
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def enqueue(self, paths: Iterable[str | Path], batch_size: int = 1000) -> int:
+        """Добавить пути в очередь и вернуть число новых задач."""
+        added = 0
+        batch: list[tuple[str]] = []
+
+        def flush():
+            nonlocal added
+            with self._lock:
+                before = self._conn.total_changes
+                self._transaction()
+                try:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO jobs (path) VALUES (?)", batch
+                    )
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+                added += self._conn.total_changes - before
+            batch.clear()
+
+        for path in paths:
+            batch.append((_normalize(path),))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return added
+
+    def claim(self, worker: str, limit: int = DEFAULT_BATCH_SIZE) -> list[QueueJob]:
+        """Взять в аренду до ``limit`` свободных задач или задач с истекшей арендой."""
+        now = time.time()
+        with self._lock:
+            self._transaction()
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET state = ?, status = ?, message = ?, finished = ? "
+                    "WHERE state = ? AND lease_until < ? AND attempts >= ?",
+                    (
+                        FAILED,
+                        CleanStatus.ERROR.value,
+                        "Превышено число попыток обработки",
+                        now,
+                        LEASED,
+                        now,
+                        self.max_attempts,
+                    ),
+                )
+                rows = self._conn.execute(
+                    "SELECT id, path, attempts FROM jobs "
+                    "WHERE state = ? OR (state = ? AND lease_until < ?) "
+                    "ORDER BY id LIMIT ?",
+                    (PENDING, LEASED, now, min(limit, _MAX_CLAIM)),
+                ).fetchall()
+                lease_until = now + self.lease_seconds
+                self._conn.executemany(
+                    "UPDATE jobs SET state = ?, worker = ?, lease_until = ?, "
+                    "attempts = attempts + 1 WHERE id = ?",
+                    [(LEASED, worker, lease_until, row[0]) for row in rows],
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return [
+            QueueJob(job_id, path, attempts + 1) for job_id, path, attempts in rows
+        ]
+
+    def renew(self, worker: str, ids: Iterable[int]) -> int:
+        """Продлить аренду задач и вернуть число продленных."""
+        lease_until = time.time() + self.lease_seconds
+        return self._update_leased(
+            "UPDATE jobs SET lease_until = ? "
+            "WHERE id = ? AND worker = ? AND state = ?",
+            [(lease_until, job_id, worker, LEASED) for job_id in ids],
+        )
+
+    def release(self, worker: str, ids: Iterable[int]) -> int:
+        """Вернуть необработанные задачи в очередь без учета попытки."""
+        return self._update_leased(
+            "UPDATE jobs SET state = ?, worker = NULL, lease_until = NULL, "
+            "attempts = attempts - 1 WHERE id = ? AND worker = ? AND state = ?",
+            [(PENDING, job_id, worker, LEASED) for job_id in ids],
+        )
+
+    def _update_leased(self, statement: str, rows: list[tuple]) -> int:
+        """Выполнить ``statement`` для задач в аренде и вернуть число измененных."""
+        if not rows:
+            return 0
+        with self._lock:
+            before = self._conn.total_changes
+            self._transaction()
+            try:
+                self._conn.executemany(statement, rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def complete(self, worker: str, results: Iterable[tuple[int, CleanResult]]) -> int:
+        """Записать результаты обработки и вернуть число принятых.
+
+        Результат не принимается, если аренду задачи уже получил другой
+        рабочий процесс: задачу тогда завершит он.
+        """
+        now = time.time()
+        rows = [
+            (
+                FAILED if result.status == CleanStatus.ERROR else DONE,
+                result.status.value,
+                result.message,
+                now,
+                job_id,
+                worker,
+                LEASED,
+            )
+            for job_id, result in results
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            before = self._conn.total_changes
+            self._transaction()
+            try:
+                self._conn.executemany(
+                    "UPDATE jobs SET state = ?, status = ?, message = ?, finished = ?, "
+                    "lease_until = NULL WHERE id = ? AND worker = ? AND state = ?",
+                    rows,
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def counts(self) -> dict[str, int]:
+        """Число задач в каждом состоянии."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM jobs GROUP BY state"
+            ).fetchall()
+        counts = dict.fromkeys((PENDING, LEASED, DONE, FAILED), 0)
+        counts.update(rows)
+        return counts
+
+    def is_drained(self) -> bool:
+        """Не осталось ни свободных задач, ни задач в аренде."""
+        counts = self.counts()
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def close(self):
+        """Закрыть соединение с базой."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _LeaseKeeper:
+    """Фоновое продление аренды обрабатываемой пачки."""
+
+    def __init__(self, work_queue: WorkQueue, worker: str, ids: list[int]):
+        self.queue = work_queue
+        self.worker = worker
+        self.ids = ids
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="queue-lease", daemon=True
+        )
+
+    def _run(self):
+        interval = self.queue.lease_seconds / 3
+        while not self._stop.wait(interval):
+            try:
+                self.queue.renew(self.worker, self.ids)
+            except sqlite3.Error:
+                # База занята: продлим на следующем шаге, запас аренды — две трети
+                continue
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+
+
+class QueueWorker:
+    """Рабочий процесс: забирает пачки задач из очереди и очищает их.
+
+    Файлы пачки обрабатываются движком ``engine`` (BatchEngine или
+    PipelineEngine) со всей его параллельностью; движок можно назначить и
+    после создания. Результаты записываются в очередь каждые ``commit_every``
+    файлов или каждый интервал продления аренды. Без ``wait`` работа
+    завершается, когда в очереди не остается ни свободных, ни арендованных
+    задач; задачи упавших процессов дожидаются истечения аренды.
+    """
+
+    def __init__(
+        self,
+        work_queue: WorkQueue,
+        engine: BatchEngine | None = None,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        worker_id: str | None = None,
+        wait: bool = False,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        commit_every: int = DEFAULT_COMMIT_EVERY,
+    ):
+        self.queue = work_queue
+        self.engine = engine
+        self.batch_size = max(1, batch_size)
+        self.commit_every = max(1, commit_every)
+        self.worker_id = worker_id or default_worker_id()
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+
+    def run(self) -> Iterator[CleanResult]:
+        """Обрабатывать задачи очереди, выдавая результаты по мере готовности."""
+        while not self._stop.is_set():
+            batch = self.queue.claim(self.worker_id, self.batch_size)
+            if not batch:
+                if not self.wait and self.queue.is_drained():
+                    return
+                self._stop.wait(self.poll_interval)
+                continue
+            yield from self._run_batch(batch)
+
+    def _run_batch(self, batch: list[QueueJob]) -> Iterator[CleanResult]:
+        ids = {job.path: job.id for job in batch}
+        done: list[tuple[int, CleanResult]] = []
+        interval = self.queue.lease_seconds / 3
+        committed_at = time.monotonic()
+        try:
+            with (
+                _LeaseKeeper(self.queue, self.worker_id, list(ids.values())),
+                closing(self.engine.run(list(ids))) as results,
+            ):
+                for result in results:
+                    job_id = ids.pop(str(result.job.file_path), None)
+                    if job_id is not None:
+                        done.append((job_id, result))
+                    if (
+                        len(done) >= self.commit_every
+                        or time.monotonic() - committed_at >= interval
+                    ):
+                        self.queue.complete(self.worker_id, done)
+                        done.clear()
+                        committed_at = time.monotonic()
+                    yield result
+        finally:
+            self.queue.complete(self.worker_id, done)
+            if ids:
+                # Прерванная пачка: остаток сразу доступен другим процессам
+                self.queue.release(self.worker_id, ids.values())
+
+    def stop(self):
+        """Не брать новые пачки из очереди."""
+        self._stop.set()
@@ -2,16 +2,22 @@
 
 from __future__ import annotations
 
+import functools
 import mimetypes
+import shutil
 import time
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, BinaryIO
 
 from .errors import FileAccessError, UnsupportedFileTypeError
+from .events import DispatcherObserver, ObserverGroup
+from .formats import xmp
+from .handlers.archive import ARCHIVE_SUFFIXES, ArchiveHandler, archive_suffix
 from .handlers.image import ImageHandler
 from .handlers.office import OfficeHandler
 from .handlers.pdf import PDFHandler
 from .handlers.video import VideoHandler
+from .memory import MemoryProbe
 from .models import (
     CleaningOptions,
     CleanResult,
@@ -20,8 +26,10 @@ from .models import (
     FileType,
     OutputMode,
 )
+from .streams import DEFAULT_SPOOL_THRESHOLD, detect_type, spool
 
 if TYPE_CHECKING:
+    from metadata_cleaner.batch.metrics import CleanerMetrics
     from metadata_cleaner.services.settings_service import SettingsService
 
 
@@ -30,32 +38,88 @@ class MetadataDispatcher:
 
     def __init__(self, settings_service: SettingsService):
         self.settings_service = settings_service
+        # Вложенные файлы (члены архивов, изображения в документах) очищаются
+        # в памяти без учета в наблюдателях и метриках
+        clean_member = functools.partial(self.clean_bytes, track=False)
         self.handlers = {
             FileType.IMAGE: ImageHandler(),
-            FileType.DOCUMENT: OfficeHandler(),
+            FileType.DOCUMENT: OfficeHandler(clean_member),
             FileType.PDF: PDFHandler(),
             FileType.VIDEO: VideoHandler(),
+            FileType.ARCHIVE: ArchiveHandler(
+                clean_member, lambda name: self.is_supported(Path(name))
+            ),
         }
+        # Сбрасывать результат на диск (fsync) после записи
+        self.fsync_output = False
+        # Очищать оставшиеся пакеты XMP в результате любого обработчика
+        self.scrub_xmp = False
+        # Замерять пиковую память каждой задачи (только для последовательной обработки)
+        self.profile_memory = False
+        # Метрики запуска или None
+        self.metrics: CleanerMetrics | None = None
+        # Кортеж заменяется целиком, поэтому чтение не требует блокировки
+        self._observers: tuple[DispatcherObserver, ...] = ()
+
+    def add_observer(self, observer: DispatcherObserver):
+        """Подписать наблюдателя на события обработки файлов."""
+        self._observers = (*self._observers, observer)
+
+    def remove_observer(self, observer: DispatcherObserver):
+        """Отписать наблюдателя."""
+        self._observers = tuple(o for o in self._observers if o is not observer)
+
+    def attach_metrics(self, metrics: CleanerMetrics | None):
+        """Подключить метрики к диспетчеру и всем обработчикам."""
+        self.metrics = metrics
+        for handler in self.handlers.values():
+            handler.metrics = metrics
 
     def get_file_type(self, path: Path) -> FileType | None:
         """Определяет тип файла на основе его расширения."""
         ext = path.suffix.lower()
-        if ext in [".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif"]:
+        if ext in [
+            ".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif", ".webp",
+            ".tif", ".tiff", ".dng",
+        ]:
             return FileType.IMAGE
         elif ext in [".docx", ".xlsx", ".pptx"]:
             return FileType.DOCUMENT
         elif ext == ".pdf":
             return FileType.PDF
-        elif ext in [".mp4", ".mov"]:
+        elif ext in [".mp4", ".mov", ".mkv", ".webm"]:
             return FileType.VIDEO
+        elif archive_suffix(path.name) is not None:
+            return FileType.ARCHIVE
         return None
 
-    def process_file(self, path: Path) -> CleanResult:
-        """Обрабатывает один файл."""
+    def process_file(
+        self, path: Path, options: CleaningOptions | None = None
+    ) -> CleanResult:
+        """Обрабатывает один файл (с ``options`` — с опциями очистки запуска)."""
+        start_time = time.perf_counter()
+        file_job, error = self.create_job(path, options=options)
+        if error is not None:
+            return error
+        return self.finish_job(file_job, self.run_job(file_job), start_time)
+
+    def create_job(
+        self,
+        path: Path,
+        defer_write: bool = False,
+        options: CleaningOptions | None = None,
+    ) -> tuple[FileJob | None, CleanResult | None]:
+        """Определить тип файла и создать задачу (этап классификации).
+
+        Возвращает задачу или, если файл не поддерживается, готовый
+        результат с ошибкой. ``options`` (опции запуска из CLI) переопределяют
+        поля очистки из настроек и могут отключить резервную копию.
+        """
+        start_time = time.perf_counter()
         file_type = self.get_file_type(path)
 
         if not file_type:
-            return CleanResult(
+            return None, CleanResult(
                 job=FileJob(file_path=path),
                 status=CleanStatus.ERROR,
                 message=f"Unsupported file type: {path.suffix}",
@@ -63,7 +127,7 @@ class MetadataDispatcher:
 
         handler = self.handlers.get(file_type)
         if not handler:
-            return CleanResult(
+            return None, CleanResult(
                 job=FileJob(file_path=path),
                 status=CleanStatus.ERROR,
                 message=f"No handler for file type: {file_type}",
@@ -75,18 +139,269 @@ class MetadataDispatcher:
         backup_enabled = False
 
         if output_mode == OutputMode.CREATE_COPY:
-            output_path = path.with_name(f"{path.stem}_cleaned{path.suffix}")
+            output_path = self._cleaned_path(path)
         elif output_mode == OutputMode.BACKUP_AND_OVERWRITE:
             backup_enabled = True
 
+        clean_fields = self.settings_service.get_metadata_to_clean(file_type.value)
+        if options is not None:
+            clean_fields = {**clean_fields, **self._options_to_clean_fields(options)}
+            backup_enabled = backup_enabled and options.create_backup
+
         file_job = FileJob(
             file_path=path,
             file_type=file_type,
             output_path=output_path,
             backup_enabled=backup_enabled,
+            clean_fields=clean_fields,
+            fsync=self.fsync_output,
+            size=self._file_size(path),
+            defer_write=defer_write,
+        )
+        file_job.timings.classify = time.perf_counter() - start_time
+        self._start_job(file_job)
+        return file_job, None
+
+    def _start_job(self, file_job: FileJob):
+        """Подключить наблюдателей к задаче и сообщить о ее начале."""
+        if self._observers:
+            file_job.listener = ObserverGroup(self._observers)
+            file_job.listener.on_job_start(file_job)
+            file_job.listener.on_progress(file_job, 0, file_job.size)
+
+    def run_job(self, file_job: FileJob) -> CleanResult:
+        """Очистить файл обработчиком (этапы чтения и преобразования)."""
+        handler = self.handlers[file_job.file_type]
+        # Файл результата до очистки: XMP очищается только в записанном заново
+        stamp = self._output_stamp(file_job) if self.scrub_xmp else None
+        if self.profile_memory:
+            with MemoryProbe() as probe:
+                result = handler.clean(file_job)
+            result.memory = probe.usage
+        else:
+            result = handler.clean(file_job)
+        if self.scrub_xmp and result.is_success:
+            self._scrub_xmp(file_job, result, stamp)
+        result.input_size = file_job.size
+        # Исходное содержимое больше не нужно
+        file_job.source_data = None
+        return result
+
+    def _scrub_xmp(
+        self,
+        file_job: FileJob,
+        result: CleanResult,
+        stamp: tuple[int, int, int] | None,
+    ):
+        """Заменить пакеты XMP в результате пустыми пакетами той же длины.
+
+        Очищается отложенный результат или файл, записанный обработчиком.
+        Задачи в памяти не трогают файловую систему: если обработчик ничего не
+        записал, ``clean_bytes`` очищает ``output_data``.
+        """
+        with file_job.stage("transform"):
+            if file_job.pending_write is not None:
+                output_path, data = file_job.pending_write
+                data, count = xmp.blank_bytes(data)
+                file_job.pending_write = (output_path, data)
+            elif file_job.source_data is not None:
+                return
+            else:
+                written = self._output_stamp(file_job)
+                if written is None or written == stamp:
+                    return
+                count = xmp.blank_file(file_job.output_path or file_job.file_path)
+        self._count_xmp(result, count)
+
+    @staticmethod
+    def _count_xmp(result: CleanResult, count: int):
+        if count:
+            fields = result.cleaned_fields or {}
+            result.cleaned_fields = {**fields, "xmp_packets": count}
+
+    @staticmethod
+    def _output_stamp(file_job: FileJob) -> tuple[int, int, int] | None:
+        """Отпечаток файла результата (inode, размер, время) или None."""
+        if file_job.source_data is not None:
+            return None
+        try:
+            stat = (file_job.output_path or file_job.file_path).stat()
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def finish_job(
+        self, file_job: FileJob, result: CleanResult, start_time: float | None = None
+    ) -> CleanResult:
+        """Записать отложенный результат, проверить его и учесть в метриках.
+
+        Без ``start_time`` время обработки считается как сумма этапов, без
+        ожидания в очередях конвейера.
+        """
+        handler = self.handlers[file_job.file_type]
+        if file_job.pending_write is not None:
+            if result.is_success:
+                try:
+                    handler.flush_output(file_job)
+                except OSError as e:
+                    result.status = CleanStatus.ERROR
+                    result.message = f"Ошибка записи {file_job.file_path.name}: {e!s}"
+                    result.error = e
+            file_job.pending_write = None
+
+        if result.is_success:
+            with file_job.stage("verify"):
+                if result.output_data is not None:
+                    result.output_size = len(result.output_data)
+                else:
+                    output_path = file_job.output_path or file_job.file_path
+                    result.output_size = self._file_size(output_path)
+        if start_time is None:
+            result.processing_time = file_job.timings.total
+        else:
+            result.processing_time = time.perf_counter() - start_time
+        if self.metrics is not None:
+            self.metrics.record_result(result, type(handler).__name__)
+        listener = file_job.listener
+        if listener is not None:
+            if result.is_success:
+                listener.on_progress(file_job, file_job.size, file_job.size)
+            listener.on_job_end(result)
+        return result
+
+    def clean_bytes(
+        self, data: bytes, type_hint: str, track: bool = True
+    ) -> CleanResult:
+        """Очистить содержимое файла в памяти.
+
+        ``type_hint`` — расширение формата («jpeg», «.pdf», «docx»). Очищенное
+        содержимое возвращается в ``result.output_data``. Файловая система не
+        используется, кроме видео (ffmpeg работает с временными файлами) и
+        XLSX (openpyxl пишет листы через временные файлы).
+
+        С ``track=False`` задача не передается наблюдателям и метрикам: так
+        очищаются файлы внутри архива, учитываемого как одна задача.
+        """
+        start_time = time.perf_counter()
+        path = Path(f"stream.{type_hint.lower().lstrip('.')}")
+        file_type = self.get_file_type(path)
+        handler = self.handlers.get(file_type) if file_type else None
+        if handler is None:
+            return CleanResult(
+                job=FileJob(file_path=path),
+                status=CleanStatus.ERROR,
+                message=f"Unsupported file type: {path.suffix}",
+            )
+
+        file_job = FileJob(
+            file_path=path,
+            file_type=file_type,
+            output_path=path,
+            backup_enabled=False,
+            clean_fields=self.settings_service.get_metadata_to_clean(file_type.value),
+            size=len(data),
+            source_data=data,
+            defer_write=True,
+        )
+        file_job.timings.classify = time.perf_counter() - start_time
+        if track:
+            self._start_job(file_job)
+
+        result = self.run_job(file_job)
+        if result.is_success:
+            # Обработчик ничего не записал, если очищать было нечего
+            pending = file_job.pending_write
+            if pending is not None:
+                result.output_data = pending[1]
+            elif self.scrub_xmp:
+                with file_job.stage("transform"):
+                    result.output_data, count = xmp.blank_bytes(data)
+                self._count_xmp(result, count)
+            else:
+                result.output_data = data
+        file_job.pending_write = None
+        if not track:
+            if result.is_success:
+                result.output_size = len(result.output_data)
+            result.processing_time = time.perf_counter() - start_time
+            return result
+        return self.finish_job(file_job, result, start_time)
+
+    def clean_stream(
+        self,
+        source: BinaryIO,
+        target: BinaryIO,
+        type_hint: str | None = None,
+        spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+    ) -> CleanResult:
+        """Очистить файл из потока ``source`` и записать результат в ``target``.
+
+        Форматы требуют произвольного доступа, поэтому поток читается целиком:
+        в память, а если он больше ``spool_threshold`` — во временный файл.
+        Без ``type_hint`` формат определяется по сигнатуре содержимого.
+        """
+        with spool(source, spool_threshold) as spooled:
+            type_hint = type_hint or detect_type(spooled)
+            if type_hint is None:
+                return CleanResult(
+                    job=FileJob(file_path=Path("stream")),
+                    status=CleanStatus.ERROR,
+                    message="Не удалось определить формат по содержимому",
+                )
+            if isinstance(spooled, Path):
+                return self._clean_spooled(spooled, type_hint, target)
+
+            result = self.clean_bytes(spooled, type_hint)
+            if result.is_success:
+                target.write(result.output_data)
+            return result
+
+    def _clean_spooled(self, path: Path, type_hint: str, target: BinaryIO) -> CleanResult:
+        """Очистить поток, сохраненный во временный файл, и скопировать результат."""
+        start_time = time.perf_counter()
+        path = path.rename(path.with_name(f"stream.{type_hint.lower().lstrip('.')}"))
+        file_type = self.get_file_type(path)
+        if file_type is None or file_type not in self.handlers:
+            return CleanResult(
+                job=FileJob(file_path=Path(path.name)),
+                status=CleanStatus.ERROR,
+                message=f"Unsupported file type: {path.suffix}",
+            )
+
+        output_path = self._cleaned_path(path)
+        file_job = FileJob(
+            file_path=path,
+            file_type=file_type,
+            output_path=output_path,
+            backup_enabled=False,
             clean_fields=self.settings_service.get_metadata_to_clean(file_type.value),
+            size=self._file_size(path),
         )
-        return handler.clean(file_job)
+        file_job.timings.classify = time.perf_counter() - start_time
+        self._start_job(file_job)
+
+        result = self.finish_job(file_job, self.run_job(file_job), start_time)
+        if result.is_success:
+            # Обработчик не создает выходной файл, если очищать было нечего
+            source = output_path if output_path.exists() else path
+            with file_job.stage("write"), open(source, "rb") as f:
+                shutil.copyfileobj(f, target)
+        return result
+
+    @staticmethod
+    def _cleaned_path(path: Path) -> Path:
+        """Путь копии результата: 'photo_cleaned.jpg', 'bundle_cleaned.tar.gz'."""
+        suffix = archive_suffix(path.name) or path.suffix
+        stem = path.name[: len(path.name) - len(suffix)]
+        return path.with_name(f"{stem}_cleaned{path.name[len(stem):]}")
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        """Размер файла в байтах или 0, если файл недоступен."""
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
 
     def get_handler_for_file(self, file_path: Path) -> type | None:
         """Получить обработчик для файла на основе расширения."""
@@ -106,10 +421,16 @@ class MetadataDispatcher:
         """Получить список поддерживаемых расширений."""
         extensions = set()
         # Добавляем расширения для каждого типа файла
-        extensions.update([".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif"])  # IMAGE
+        extensions.update(
+            [
+                ".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif", ".webp",
+                ".tif", ".tiff", ".dng",
+            ]
+        )  # IMAGE
         extensions.update([".docx", ".xlsx", ".pptx"])  # DOCUMENT
         extensions.add(".pdf")  # PDF
-        extensions.update([".mp4", ".mov"])  # VIDEO
+        extensions.update([".mp4", ".mov", ".mkv", ".webm"])  # VIDEO
+        extensions.update(ARCHIVE_SUFFIXES)  # ARCHIVE
         return extensions
 
     def _options_to_clean_fields(self, options: CleaningOptions) -> dict[str, bool]:
@@ -132,16 +453,7 @@ class MetadataDispatcher:
         self, file_path: str | Path, options: CleaningOptions
     ) -> CleanResult:
         """Обработать файл с использованием CleaningOptions."""
-        if isinstance(file_path, str):
-            file_path = Path(file_path)
-
-        job = FileJob(
-            file_path=file_path,
-            backup_enabled=options.create_backup,
-            clean_fields=self._options_to_clean_fields(options),
-        )
-
-        return self.process_file(job.file_path)
+        return self.process_file(Path(file_path), options)
 
     def get_file_info(self, file_path: str | Path) -> dict[str, str]:
         """Получить информацию о файле."""
@@ -0,0 +1,59 @@
+"""Наблюдатели за обработкой файлов диспетчером (прогресс, трассировка)."""
+
+from __future__ import annotations
+
+import contextlib
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .models import CleanResult, FileJob
+
+
+class DispatcherObserver:
+    """Базовый наблюдатель: все методы пустые, переопределяются по необходимости.
+
+    Методы вызываются из потока, который обрабатывает файл, поэтому
+    наблюдатель должен быть быстрым и потокобезопасным.
+    """
+
+    def on_job_start(self, job: FileJob):
+        """Начало обработки файла."""
+
+    def on_stage(self, job: FileJob, stage: str, seconds: float):
+        """Завершение этапа обработки (см. StageTimings) и его длительность."""
+
+    def on_progress(self, job: FileJob, bytes_done: int, bytes_total: int):
+        """Прогресс обработки файла в байтах."""
+
+    def on_job_end(self, result: CleanResult):
+        """Завершение обработки файла."""
+
+
+class ObserverGroup(DispatcherObserver):
+    """Рассылка событий нескольким наблюдателям.
+
+    Исключение в наблюдателе не прерывает обработку файла и не мешает
+    остальным наблюдателям.
+    """
+
+    def __init__(self, observers: Iterable[DispatcherObserver]):
+        self.observers = tuple(observers)
+
+    def on_job_start(self, job: FileJob):
+        self._notify("on_job_start", job)
+
+    def on_stage(self, job: FileJob, stage: str, seconds: float):
+        self._notify("on_stage", job, stage, seconds)
+
+    def on_progress(self, job: FileJob, bytes_done: int, bytes_total: int):
+        self._notify("on_progress", job, bytes_done, bytes_total)
+
+    def on_job_end(self, result: CleanResult):
+        self._notify("on_job_end", result)
+
+    def _notify(self, method: str, *args):
+        for observer in self.observers:
+            # Ошибка наблюдателя не должна прерывать обработку
+            with contextlib.suppress(Exception):
+                getattr(observer, method)(*args)
@@ -0,0 +1 @@
+"""Низкоуровневая очистка форматов без перекодирования содержимого."""
@@ -0,0 +1,295 @@
+"""Разбор сегментов JPEG и удаление сегментов метаданных.
+
+Сегменты до начала сжатых данных (SOS) копируются или отбрасываются целиком,
+сами сжатые данные не декодируются, поэтому очистка выполняется без потери
+качества и за один проход по заголовку.
+
+После маркера EOI файл может продолжаться: дополнительные изображения MPF
+(карты глубины, превью, стереопары) со своими EXIF и видео «живых фото»
+Google и Samsung. Эти данные удаляются явно, а изображения MPF при
+необходимости сохраняются и очищаются так же, как основное.
+"""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from metadata_cleaner.cleaner.errors import CorruptedFileError
+
+# Байт, с которого начинается маркер (и байт заполнения перед маркером)
+MARKER_PREFIX = 0xFF
+SOI = 0xD8
+EOI = 0xD9
+SOS = 0xDA
+COM = 0xFE
+APP0 = 0xE0
+APP1 = 0xE1
+APP2 = 0xE2
+APP15 = 0xEF
+
+# Маркеры без поля длины: TEM и RSTn
+_STANDALONE = {0x01, *range(0xD0, 0xD8)}
+
+# Сегменты APPn, нужные для правильного отображения: JFIF (плотность),
+# ICC-профиль и Adobe (преобразование цветов CMYK/YCCK)
+_KEEP_APP = (
+    (APP0, b"JFIF\x00"),
+    (APP2, b"ICC_PROFILE\x00"),
+    (APP0 + 14, b"Adobe"),
+)
+
+# Сегмент APP2 с индексом изображений MPF (Multi-Picture Format)
+MPF_SIGNATURE = b"MPF\x00"
+_MP_ENTRY_TAG = 0xB002
+_MP_ENTRY_SIZE = 16
+
+
+@dataclass(frozen=True, slots=True)
+class Segment:
+    """Сегмент заголовка JPEG: маркер и границы в исходных данных."""
+
+    marker: int
+    start: int
+    end: int
+
+    def payload(self, data: bytes | memoryview) -> bytes:
+        """Содержимое сегмента без маркера и длины."""
+        return bytes(data[self.start + 4 : self.end])
+
+
+@dataclass(frozen=True, slots=True)
+class MpEntry:
+    """Запись индекса MPF: изображение ``size`` байт по смещению ``offset``.
+
+    Смещение отсчитывается от заголовка TIFF внутри сегмента MPF, у основного
+    изображения оно равно 0. ``position`` — место записи в содержимом сегмента.
+    """
+
+    size: int
+    offset: int
+    position: int
+
+
+@dataclass
+class StripStats:
+    """Итоги очистки JPEG."""
+
+    # Байт в удаленных сегментах заголовка (включая изображения MPF)
+    segments: int = 0
+    # Байт после EOI, не вошедших в результат
+    trailer: int = 0
+    # Очищенных и сохраненных дополнительных изображений MPF
+    secondary: int = 0
+
+    @property
+    def removed(self) -> int:
+        """Всего удалено байт."""
+        return self.segments + self.trailer
+
+
+def is_jpeg(data: bytes | memoryview) -> bool:
+    """Начинаются ли данные с сигнатуры JPEG."""
+    return bytes(data[:3]) == b"\xff\xd8\xff"
+
+
+def iter_segments(data: bytes | memoryview) -> Iterator[Segment]:
+    """Сегменты заголовка от SOI до SOS включительно.
+
+    Сегмент SOS последний: его ``end`` указывает на начало сжатых данных.
+    """
+    if not is_jpeg(data):
+        msg = "Нет сигнатуры JPEG"
+        raise CorruptedFileError(msg)
+
+    pos = 2
+    size = len(data)
+    while pos < size:
+        if data[pos] != MARKER_PREFIX:
+            msg = f"Ожидался маркер JPEG по смещению {pos}"
+            raise CorruptedFileError(msg)
+        # Перед маркером допускаются байты заполнения 0xFF
+        while pos < size and data[pos] == MARKER_PREFIX:
+            pos += 1
+        if pos >= size:
+            break
+        marker = data[pos]
+        pos += 1
+        if marker in _STANDALONE:
+            yield Segment(marker, pos - 2, pos)
+            continue
+        if marker == EOI:
+            yield Segment(marker, pos - 2, pos)
+            return
+        if pos + 2 > size:
+            break
+        end = pos + int.from_bytes(data[pos : pos + 2], "big")
+        if end > size or end < pos + 2:
+            break
+        yield Segment(marker, pos - 2, end)
+        if marker == SOS:
+            return
+        pos = end
+
+    msg = "Заголовок JPEG обрезан"
+    raise CorruptedFileError(msg)
+
+
+def find_image_end(data: bytes, scan_start: int) -> int:
+    """Конец изображения (позиция после EOI) или длина данных без EOI.
+
+    В сжатых данных байт 0xFF всегда экранируется или начинает маркер, поэтому
+    первое вхождение FF D9 после SOS — это EOI.
+    """
+    end = data.find(b"\xff\xd9", scan_start)
+    return len(data) if end < 0 else end + 2
+
+
+def parse_mpf(payload: bytes) -> tuple[str, list[MpEntry]]:
+    """Порядок байтов (для struct) и записи индекса из содержимого сегмента MPF."""
+    base = len(MPF_SIGNATURE)
+    order = {b"II": "<", b"MM": ">"}.get(payload[base : base + 2])
+    if order is not None:
+        try:
+            (ifd,) = struct.unpack_from(f"{order}I", payload, base + 4)
+            (count,) = struct.unpack_from(f"{order}H", payload, base + ifd)
+            for index in range(count):
+                tag, _, length, value = struct.unpack_from(
+                    f"{order}HHII", payload, base + ifd + 2 + index * 12
+                )
+                if tag != _MP_ENTRY_TAG:
+                    continue
+                entries = []
+                end = base + value + length
+                for position in range(base + value, end, _MP_ENTRY_SIZE):
+                    size, offset = struct.unpack_from(
+                        f"{order}II", payload, position + 4
+                    )
+                    entries.append(MpEntry(size, offset, position))
+                return order, entries
+        except struct.error:
+            pass
+    msg = "Индекс MPF поврежден"
+    raise CorruptedFileError(msg)
+
+
+def is_metadata_segment(marker: int, payload_head: bytes) -> bool:
+    """Является ли сегмент метаданными (EXIF, XMP, IPTC, комментарий и т. п.)."""
+    if marker == COM:
+        return True
+    if not APP0 <= marker <= APP15:
+        return False
+    return not any(
+        marker == keep and payload_head.startswith(prefix)
+        for keep, prefix in _KEEP_APP
+    )
+
+
+def make_segment(marker: int, payload: bytes) -> bytes:
+    """Сегмент с маркером и полем длины."""
+    if len(payload) > 0xFFFF - 2:
+        msg = "Сегмент JPEG больше 64 КБ"
+        raise ValueError(msg)
+    return bytes([0xFF, marker]) + struct.pack(">H", len(payload) + 2) + payload
+
+
+def strip_metadata(
+    data: bytes,
+    *,
+    exif: bytes | None = None,
+    keep_secondary: bool = False,
+    stats: StripStats | None = None,
+) -> bytes:
+    """Удалить метаданные из JPEG без перекодирования.
+
+    Удаляются COM и все APPn, кроме JFIF, ICC-профиля и Adobe, а также все
+    данные после EOI. С ``keep_secondary`` сегмент MPF сохраняется, а его
+    дополнительные изображения очищаются и записываются после основного с
+    исправленными смещениями. ``exif`` (содержимое APP1 с ``Exif\\0\\0``)
+    вставляется после JFIF. Если менять нечего, возвращается тот же ``data``.
+    """
+    if stats is None:
+        stats = StripStats()
+    view = memoryview(data)
+    parts: list[bytes | bytearray | memoryview] = [b"\xff\xd8"]
+    mpf: Segment | None = None
+    mpf_part = 0
+    changed = False
+    tail = 2
+    for segment in iter_segments(view):
+        tail = segment.end
+        head = bytes(view[segment.start + 4 : min(segment.end, segment.start + 20)])
+        if (
+            keep_secondary
+            and mpf is None
+            and segment.marker == APP2
+            and head.startswith(MPF_SIGNATURE)
+        ):
+            mpf, mpf_part = segment, len(parts)
+            parts.append(bytearray(view[segment.start : segment.end]))
+            continue
+        if is_metadata_segment(segment.marker, head):
+            stats.segments += segment.end - segment.start
+            changed = True
+            continue
+        if exif is not None and segment.marker != APP0:
+            parts.append(make_segment(APP1, exif))
+            exif = None
+            changed = True
+        parts.append(view[segment.start : segment.end])
+
+    image_end = find_image_end(data, tail)
+    parts.append(view[tail:image_end])
+
+    secondary: list[tuple[MpEntry, bytes]] = []
+    order = ">"
+    if mpf is not None:
+        order, entries = parse_mpf(mpf.payload(view))
+        # Смещения MPF отсчитываются от заголовка TIFF после "MPF\0"
+        base = mpf.start + 4 + len(MPF_SIGNATURE)
+        for entry in sorted(entries, key=lambda e: e.offset):
+            if entry.offset == 0:
+                continue
+            start = base + entry.offset
+            if start < image_end or start + entry.size > len(data):
+                msg = "Изображение MPF вне файла"
+                raise CorruptedFileError(msg)
+            original = bytes(view[start : start + entry.size])
+            cleaned = strip_metadata(original, stats=stats)
+            changed = changed or cleaned is not original
+            secondary.append((entry, cleaned))
+            stats.secondary += 1
+
+    trailer = len(data) - image_end - sum(entry.size for entry, _ in secondary)
+    if trailer > 0:
+        stats.trailer += trailer
+        changed = True
+    if not changed:
+        return data
+
+    if mpf is not None:
+        _relocate_mpf(parts, mpf_part, order, secondary)
+    return b"".join([*parts, *(cleaned for _, cleaned in secondary)])
+
+
+def _relocate_mpf(
+    parts: list[bytes | bytearray | memoryview],
+    mpf_part: int,
+    order: str,
+    secondary: list[tuple[MpEntry, bytes]],
+):
+    """Записать в индекс MPF новые размеры и смещения изображений."""
+    segment = parts[mpf_part]
+    _, entries = parse_mpf(bytes(segment[4:]))
+    primary_size = sum(len(part) for part in parts)
+    base = sum(len(part) for part in parts[:mpf_part]) + 4 + len(MPF_SIGNATURE)
+
+    layout = {}
+    position = primary_size
+    for entry, cleaned in secondary:
+        layout[entry.position] = (len(cleaned), position - base)
+        position += len(cleaned)
+    for entry in entries:
+        size, offset = layout.get(entry.position, (primary_size, 0))
+        struct.pack_into(f"{order}II", segment, 4 + entry.position + 4, size, offset)
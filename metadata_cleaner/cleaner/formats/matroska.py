@@ -0,0 +1,452 @@
+"""Удаление метаданных Matroska и WebM на уровне элементов EBML.
+
+Разбираются только заголовки элементов верхнего уровня сегмента: ``SeekHead``,
+``Info``, ``Tags`` и ``Cues``. Кластеры с кадрами не читаются — они
+пропускаются по размеру, а элементы после первого кластера находятся по
+индексу ``SeekHead``, поэтому стоимость разбора не зависит от длины видео.
+
+* На месте (``scrub``) — удаляемые элементы (``Tags`` целиком, название,
+  программы записи и дата из ``Info``) заменяются элементами ``Void`` того же
+  размера с обнуленным содержимым; размер файла и смещения не меняются.
+* Копия (``write_compacted``) — элементы вырезаются, а размеры родителей,
+  ``SeekPosition`` в индексе и ``CueClusterPosition`` в ``Cues`` исправляются.
+
+Контрольные суммы ``CRC-32`` измененных элементов пересчитываются.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import shutil
+import struct
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import BinaryIO
+
+from metadata_cleaner.cleaner.errors import CorruptedFileError
+
+EBML = 0x1A45DFA3
+SEGMENT = 0x18538067
+SEEK_HEAD = 0x114D9B74
+SEEK = 0x4DBB
+SEEK_ID = 0x53AB
+SEEK_POSITION = 0x53AC
+INFO = 0x1549A966
+TRACKS = 0x1654AE6B
+CLUSTER = 0x1F43B675
+CUES = 0x1C53BB6B
+CUE_POINT = 0xBB
+CUE_TRACK_POSITIONS = 0xB7
+CUE_CLUSTER_POSITION = 0xF1
+CUE_CODEC_STATE = 0xEA
+TAGS = 0x1254C367
+VOID = 0xEC
+CRC32 = 0xBF
+
+TITLE = 0x7BA9
+MUXING_APP = 0x4D80
+WRITING_APP = 0x5741
+DATE_UTC = 0x4461
+SEGMENT_FILENAME = 0x7384
+PREV_FILENAME = 0x3C83AB
+NEXT_FILENAME = 0x3E83BB
+
+# Названия удаляемых элементов для отчета
+ELEMENT_NAMES = {
+    TAGS: "tags",
+    TITLE: "title",
+    MUXING_APP: "muxing_app",
+    WRITING_APP: "writing_app",
+    DATE_UTC: "date_utc",
+    SEGMENT_FILENAME: "segment_filename",
+    PREV_FILENAME: "prev_filename",
+    NEXT_FILENAME: "next_filename",
+}
+
+# Группы элементов по настройкам очистки видео
+ENCODER_IDS = frozenset({MUXING_APP, WRITING_APP})
+DATE_IDS = frozenset({DATE_UTC})
+TITLE_IDS = frozenset({TITLE})
+# Имена файлов сегментов удаляются всегда
+ALWAYS_IDS = frozenset({SEGMENT_FILENAME, PREV_FILENAME, NEXT_FILENAME})
+DEFAULT_IDS = ALWAYS_IDS | ENCODER_IDS | DATE_IDS | TITLE_IDS | {TAGS}
+
+# Вложенные элементы, которые разбираются при пересборке
+_NESTED = {SEEK, CUE_POINT, CUE_TRACK_POSITIONS}
+# Смещения относительно начала данных сегмента
+_POSITIONS = {SEEK_POSITION, CUE_CLUSTER_POSITION, CUE_CODEC_STATE}
+
+# Все единицы в поле размера — размер неизвестен (потоковая запись)
+_UNKNOWN = -1
+
+# Наибольший размер, записываемый в одном байте (0x7F зарезервирован)
+_MAX_SHORT_SIZE = 0x7F
+# Наименьший элемент Void: ID и однобайтовый размер
+_MIN_VOID = 2
+# Содержимое CRC-32: четыре байта
+_CRC32_SIZE = 4
+
+
+@dataclass(frozen=True, slots=True)
+class Element:
+    """Элемент EBML: смещение начала, длины полей ID и размера, размер данных."""
+
+    id: int
+    offset: int
+    id_size: int
+    size_width: int
+    size: int
+
+    @property
+    def data_offset(self) -> int:
+        return self.offset + self.id_size + self.size_width
+
+    @property
+    def end(self) -> int:
+        if self.size == _UNKNOWN:
+            msg = f"Размер элемента 0x{self.id:X} неизвестен"
+            raise CorruptedFileError(msg)
+        return self.data_offset + self.size
+
+
+@dataclass
+class ScrubResult:
+    """Итоги очистки: удаленные элементы и освобожденные (или обнуленные) байты."""
+
+    ids: list[int] = field(default_factory=list)
+    removed_bytes: int = 0
+
+    @property
+    def names(self) -> list[str]:
+        return [ELEMENT_NAMES.get(id_, f"0x{id_:X}") for id_ in self.ids]
+
+
+def is_matroska(header: bytes) -> bool:
+    """Начинаются ли данные с заголовка EBML."""
+    return header[:4] == EBML.to_bytes(4, "big")
+
+
+def parse_header(data: bytes | memoryview, offset: int) -> Element:
+    """Заголовок элемента по смещению ``offset`` в ``data``."""
+    try:
+        id_size = _vint_width(data[offset], 4)
+        position = offset + id_size
+        size_width = _vint_width(data[position], 8)
+    except IndexError:
+        msg = f"Заголовок элемента EBML обрезан по смещению {offset}"
+        raise CorruptedFileError(msg) from None
+    raw = bytes(data[position : position + size_width])
+    if len(raw) < size_width:
+        msg = f"Заголовок элемента EBML обрезан по смещению {offset}"
+        raise CorruptedFileError(msg)
+    element_id = int.from_bytes(data[offset:position], "big")
+    size = int.from_bytes(raw, "big") & ((1 << (7 * size_width)) - 1)
+    if size == (1 << (7 * size_width)) - 1:
+        size = _UNKNOWN
+    return Element(element_id, offset, id_size, size_width, size)
+
+
+def iter_children(data: bytes | memoryview) -> Iterator[Element]:
+    """Дочерние элементы в содержимом мастер-элемента."""
+    view = memoryview(data)
+    position = 0
+    while position < len(view):
+        element = parse_header(view, position)
+        if element.end > len(view):
+            msg = f"Элемент 0x{element.id:X} выходит за пределы родителя"
+            raise CorruptedFileError(msg)
+        yield element
+        position = element.end
+
+
+def read_uint(data: bytes | memoryview) -> int:
+    return int.from_bytes(data, "big")
+
+
+def _vint_width(first: int, limit: int) -> int:
+    for width in range(1, limit + 1):
+        if first & (0x80 >> (width - 1)):
+            return width
+    msg = "Недопустимое число переменной длины EBML"
+    raise CorruptedFileError(msg)
+
+
+def encode_size(size: int, width: int) -> bytes:
+    """Поле размера заданной ширины (ширина исходного поля сохраняется)."""
+    if size >= (1 << (7 * width)) - 1:
+        msg = f"Размер {size} не помещается в {width} байт"
+        raise ValueError(msg)
+    return (size | (1 << (7 * width))).to_bytes(width, "big")
+
+
+def void(length: int) -> bytes:
+    """Элемент Void заданной полной длины с нулевым содержимым."""
+    if length < _MIN_VOID:
+        msg = "Элемент Void не короче 2 байт"
+        raise ValueError(msg)
+    width = 1 if length - _MIN_VOID < _MAX_SHORT_SIZE else 8
+    return bytes([VOID]) + encode_size(length - 1 - width, width) + bytes(
+        length - 1 - width
+    )
+
+
+class _Layout:
+    """Элементы верхнего уровня сегмента, нужные для очистки."""
+
+    def __init__(self, source: BinaryIO, ids: Iterable[int]):
+        self.source = source
+        self.ids = set(ids)
+        self.file_size = source.seek(0, 2)
+        ebml = self._header(0)
+        if ebml.id != EBML:
+            msg = "Нет заголовка EBML"
+            raise CorruptedFileError(msg)
+        self.segment = self._header(ebml.end)
+        if self.segment.id != SEGMENT:
+            msg = "Нет сегмента Matroska"
+            raise CorruptedFileError(msg)
+        self.elements: dict[int, Element] = {}
+        self._scan()
+
+    def _header(self, offset: int) -> Element:
+        self.source.seek(offset)
+        return dataclasses.replace(
+            parse_header(self.source.read(12), 0), offset=offset
+        )
+
+    def read(self, element: Element) -> bytes:
+        self.source.seek(element.offset)
+        data = self.source.read(element.end - element.offset)
+        if len(data) < element.end - element.offset:
+            msg = f"Элемент 0x{element.id:X} обрезан"
+            raise CorruptedFileError(msg)
+        return data
+
+    @property
+    def segment_end(self) -> int:
+        if self.segment.size == _UNKNOWN:
+            return self.file_size
+        return min(self.segment.end, self.file_size)
+
+    def _scan(self):
+        """Пройти по элементам сегмента до первого кластера и по индексу."""
+        wanted = {SEEK_HEAD, INFO, TAGS, CUES}
+        position = self.segment.data_offset
+        while position < self.segment_end:
+            element = self._header(position)
+            if element.id == CLUSTER and any(
+                e.id == SEEK_HEAD for e in self.elements.values()
+            ):
+                break
+            if element.id in wanted:
+                self.elements[element.offset] = element
+            if element.size == _UNKNOWN:
+                break
+            position = element.end
+
+        # Элементы после кластеров находятся по индексу (в том числе
+        # дополнительные SeekHead, на которые ссылается первый)
+        pending = [e for e in self.elements.values() if e.id == SEEK_HEAD]
+        while pending:
+            seek_head = pending.pop()
+            for target_id, position in self._seek_entries(seek_head):
+                offset = self.segment.data_offset + position
+                if target_id not in wanted or offset in self.elements:
+                    continue
+                if offset >= self.segment_end:
+                    continue
+                element = self._header(offset)
+                if element.id != target_id or element.size == _UNKNOWN:
+                    continue
+                self.elements[offset] = element
+                if element.id == SEEK_HEAD:
+                    pending.append(element)
+
+    def _seek_entries(self, seek_head: Element) -> Iterator[tuple[int, int]]:
+        data = memoryview(self.read(seek_head))[
+            seek_head.data_offset - seek_head.offset :
+        ]
+        for seek in iter_children(data):
+            if seek.id != SEEK:
+                continue
+            target_id = position = None
+            for child in iter_children(data[seek.data_offset : seek.end]):
+                value = data[
+                    seek.data_offset + child.data_offset : seek.data_offset + child.end
+                ]
+                if child.id == SEEK_ID:
+                    target_id = read_uint(value)
+                elif child.id == SEEK_POSITION:
+                    position = read_uint(value)
+            if target_id is not None and position is not None:
+                yield target_id, position
+
+    def removed_targets(self) -> set[int]:
+        """ID элементов верхнего уровня, удаляемых целиком."""
+        return {TAGS} & self.ids
+
+    def rebuild(
+        self,
+        element: Element,
+        in_place: bool,
+        shift: Callable[[int], int] | None,
+        result: ScrubResult,
+    ) -> bytes:
+        """Новое содержимое элемента ``SeekHead``, ``Info`` или ``Cues``."""
+        data = memoryview(self.read(element))
+        header = data[: element.data_offset - element.offset]
+        body = self._rebuild_body(
+            element.id, data[len(header) :], in_place, shift, result
+        )
+        return bytes(header[: element.id_size]) + encode_size(
+            len(body), element.size_width
+        ) + body
+
+    def _rebuild_body(
+        self,
+        parent_id: int,
+        data: memoryview,
+        in_place: bool,
+        shift: Callable[[int], int] | None,
+        result: ScrubResult,
+    ) -> bytes:
+        parts: list[bytes] = []
+        crc_index = None
+        for child in iter_children(data):
+            raw = data[child.offset : child.end]
+            value = data[child.data_offset : child.end]
+            if child.id == CRC32 and not parts and child.size == _CRC32_SIZE:
+                crc_index = 0
+                parts.append(bytes(raw))
+            elif self._dropped(parent_id, child, value):
+                if parent_id == INFO:
+                    result.ids.append(child.id)
+                result.removed_bytes += len(raw)
+                parts.append(void(len(raw)) if in_place else b"")
+            elif child.id in _NESTED:
+                body = self._rebuild_body(child.id, value, in_place, shift, result)
+                head = raw[: child.id_size]
+                parts.append(
+                    bytes(head) + encode_size(len(body), child.size_width) + body
+                )
+            elif child.id in _POSITIONS and shift is not None:
+                new = shift(read_uint(value)).to_bytes(child.size, "big")
+                parts.append(bytes(raw[: child.data_offset - child.offset]) + new)
+            else:
+                parts.append(bytes(raw))
+
+        if crc_index is not None:
+            # CRC-32 (little-endian) считается по всем элементам после него
+            crc = zlib.crc32(b"".join(parts[crc_index + 1 :]))
+            parts[crc_index] = parts[crc_index][:2] + struct.pack("<I", crc)
+        return b"".join(parts)
+
+    def _dropped(self, parent_id: int, child: Element, value: memoryview) -> bool:
+        if parent_id == INFO:
+            return child.id in self.ids
+        if parent_id == SEEK_HEAD and child.id == SEEK:
+            # Ссылки на удаленные элементы убираются из индекса
+            targets = self.removed_targets()
+            for entry in iter_children(value):
+                if entry.id == SEEK_ID:
+                    return read_uint(value[entry.data_offset : entry.end]) in targets
+        return False
+
+
+def scrub(stream: BinaryIO, ids: Iterable[int] = DEFAULT_IDS) -> ScrubResult:
+    """Удалить элементы на месте, заменив их элементами Void того же размера.
+
+    ``stream`` открывается на чтение и запись; меняются только байты
+    заголовочных элементов, кластеры не читаются.
+    """
+    layout = _Layout(stream, ids)
+    result = ScrubResult()
+    writes: list[tuple[int, bytes]] = []
+    for element in sorted(layout.elements.values(), key=lambda e: e.offset):
+        if element.id in layout.removed_targets():
+            length = element.end - element.offset
+            writes.append((element.offset, void(length)))
+            result.ids.append(element.id)
+            result.removed_bytes += length
+        elif element.id in (SEEK_HEAD, INFO):
+            data = layout.rebuild(element, True, None, result)
+            if data != layout.read(element):
+                writes.append((element.offset, data))
+    for offset, data in writes:
+        stream.seek(offset)
+        stream.write(data)
+    stream.flush()
+    return result
+
+
+def write_compacted(
+    source: BinaryIO, target: BinaryIO, ids: Iterable[int] = DEFAULT_IDS
+) -> ScrubResult:
+    """Записать в ``target`` копию без удаленных элементов.
+
+    Исходник должен поддерживать перемотку, ``target`` пишется
+    последовательно: все замены вычисляются до начала копирования.
+    """
+    layout = _Layout(source, ids)
+    result = ScrubResult()
+    elements = sorted(layout.elements.values(), key=lambda e: e.offset)
+
+    # Первый проход: новые длины (значения смещений не меняют ширину полей)
+    lengths = {}
+    for element in elements:
+        if element.id in layout.removed_targets():
+            lengths[element.offset] = 0
+        elif element.id in (SEEK_HEAD, INFO):
+            data = layout.rebuild(element, False, None, ScrubResult())
+            lengths[element.offset] = len(data)
+    deltas = sorted(
+        (offset, layout.elements[offset].end - offset - length)
+        for offset, length in lengths.items()
+    )
+
+    base = layout.segment.data_offset
+
+    def shift(position: int) -> int:
+        absolute = base + position
+        return position - sum(delta for start, delta in deltas if start < absolute)
+
+    replacements: list[tuple[int, int, bytes]] = []
+    for element in elements:
+        if element.id in layout.removed_targets():
+            replacements.append((element.offset, element.end, b""))
+            result.ids.append(element.id)
+            result.removed_bytes += element.end - element.offset
+        elif element.id in (SEEK_HEAD, INFO, CUES):
+            data = layout.rebuild(element, False, shift, result)
+            replacements.append((element.offset, element.end, data))
+
+    segment = layout.segment
+    if segment.size != _UNKNOWN:
+        total = sum(delta for _, delta in deltas)
+        size_field = encode_size(segment.size - total, segment.size_width)
+        replacements.append(
+            (segment.offset + segment.id_size, segment.data_offset, size_field)
+        )
+    replacements.sort()
+
+    position = 0
+    for start, end, data in replacements:
+        _copy_range(source, target, position, start)
+        target.write(data)
+        position = end
+    _copy_range(source, target, position, layout.file_size)
+    return result
+
+
+def _copy_range(source: BinaryIO, target: BinaryIO, start: int, end: int):
+    """Скопировать диапазон ``[start, end)`` блоками."""
+    source.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = source.read(min(remaining, shutil.COPY_BUFSIZE))
+        if not block:
+            msg = "Файл Matroska обрезан"
+            raise CorruptedFileError(msg)
+        target.write(block)
+        remaining -= len(block)
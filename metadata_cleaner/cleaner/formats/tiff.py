@@ -0,0 +1,381 @@
+"""Удаление чувствительных тегов TIFF и DNG на уровне IFD.
+
+Полосы и тайлы изображения никогда не декодируются и не копируются в память
+целиком. Таблица каждого IFD переписывается на том же месте без удаленных
+записей; дальше возможны два варианта:
+
+* на месте (``scrub_file``) — байты удаленных значений и хвосты таблиц
+  заполняются нулями, остальной файл не меняется;
+* компактная копия (``write_compacted``) — удаленные диапазоны вырезаются,
+  а все смещения (IFD, значений, полос, тайлов) сдвигаются на размер
+  вырезанного перед ними.
+"""
+
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import struct
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import BinaryIO
+
+from metadata_cleaner.cleaner.errors import (
+    CorruptedFileError,
+    MetadataProcessingError,
+)
+
+# Размер значения по типу TIFF
+_TYPE_SIZES = {
+    1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8, 13: 4
+}
+_SHORT, _LONG, _IFD = 3, 4, 13
+# Значения до 4 байт хранятся в самой записи IFD вместо смещения
+_INLINE_SIZE = 4
+# Магические числа заголовка классического TIFF и BigTIFF
+_TIFF_MAGIC, _BIGTIFF_MAGIC = 42, 43
+
+SUB_IFDS = 330
+EXIF_IFD = 34665
+GPS_IFD = 34853
+INTEROP_IFD = 40965
+# Теги-указатели на вложенные IFD
+_IFD_POINTERS = {SUB_IFDS, EXIF_IFD, GPS_IFD, INTEROP_IFD}
+# Теги со смещениями данных: полосы, тайлы, свободные блоки, миниатюра JPEG
+_DATA_OFFSETS = {273: 279, 324: 325, 288: 289, 513: 514}
+
+# Названия чувствительных тегов для отчета
+TAG_NAMES = {
+    270: "image_description",
+    271: "make",
+    272: "model",
+    305: "software",
+    306: "datetime",
+    315: "artist",
+    316: "host_computer",
+    700: "xmp",
+    33432: "copyright",
+    33723: "iptc",
+    34377: "photoshop",
+    34853: "gps",
+    36867: "datetime_original",
+    36868: "datetime_digitized",
+    37500: "maker_note",
+    37510: "user_comment",
+    42032: "camera_owner",
+    42033: "body_serial",
+    42037: "lens_serial",
+    50735: "camera_serial",
+    50740: "dng_private_data",
+    50827: "original_raw_file_name",
+}
+
+# Группы тегов по настройкам очистки изображений
+CAMERA_TAGS = frozenset(
+    {271, 272, 305, 315, 316, 33432, 37500, 42032, 42033, 42037, 50735, 50740}
+)
+DATE_TAGS = frozenset({306, 36867, 36868})
+GPS_TAGS = frozenset({GPS_IFD})
+# XMP, IPTC, ресурсы Photoshop, описание и комментарии удаляются всегда
+ALWAYS_TAGS = frozenset({270, 700, 33723, 34377, 37510, 50827})
+DEFAULT_TAGS = CAMERA_TAGS | DATE_TAGS | GPS_TAGS | ALWAYS_TAGS
+
+
+@dataclass(frozen=True, slots=True)
+class Entry:
+    """Запись IFD: ``position`` — начало 12-байтной записи в файле."""
+
+    tag: int
+    type: int
+    count: int
+    position: int
+    field: bytes
+
+    @property
+    def size(self) -> int:
+        return self.count * _TYPE_SIZES.get(self.type, 1)
+
+    @property
+    def inline(self) -> bool:
+        """Значение хранится в самой записи (не больше 4 байт)."""
+        return self.size <= _INLINE_SIZE
+
+
+@dataclass(slots=True)
+class Ifd:
+    """Каталог тегов: смещение таблицы, записи и указатель на следующий."""
+
+    offset: int
+    entries: list[Entry]
+    next_offset: int
+
+    @property
+    def table_size(self) -> int:
+        return 2 + 12 * len(self.entries) + 4
+
+
+@dataclass
+class ScrubResult:
+    """Итоги очистки: удаленные теги и освобожденные (или обнуленные) байты."""
+
+    tags: list[int] = field(default_factory=list)
+    removed_bytes: int = 0
+
+    @property
+    def names(self) -> list[str]:
+        return [TAG_NAMES.get(tag, str(tag)) for tag in self.tags]
+
+
+class _Layout:
+    """Разобранная структура TIFF и план удаления."""
+
+    def __init__(self, data: bytes | mmap.mmap, tags: Iterable[int]):
+        self.data = data
+        self.size = len(data)
+        byte_order = bytes(data[:2])
+        if byte_order not in (b"II", b"MM"):
+            msg = "Нет сигнатуры TIFF"
+            raise CorruptedFileError(msg)
+        self.order = "<" if byte_order == b"II" else ">"
+        magic = self._unpack("H", 2)
+        if magic == _BIGTIFF_MAGIC:
+            msg = "BigTIFF не поддерживается"
+            raise MetadataProcessingError(msg)
+        if magic != _TIFF_MAGIC:
+            msg = "Нет сигнатуры TIFF"
+            raise CorruptedFileError(msg)
+        self.first_ifd = self._unpack("I", 4)
+        self.ifds = self._read_ifds(self.first_ifd)
+        self.result = ScrubResult()
+        self.removed = self._plan(set(tags))
+
+    def _unpack(self, fmt: str, offset: int) -> int:
+        try:
+            return struct.unpack_from(self.order + fmt, self.data, offset)[0]
+        except struct.error:
+            msg = f"Структура TIFF обрезана по смещению {offset}"
+            raise CorruptedFileError(msg) from None
+
+    def values(self, entry: Entry) -> list[int]:
+        """Значения записи типа SHORT, LONG или IFD."""
+        if entry.type not in (_SHORT, _LONG, _IFD):
+            return []
+        fmt = self.order + ("H" if entry.type == _SHORT else "I") * entry.count
+        if entry.inline:
+            return list(struct.unpack_from(fmt, entry.field))
+        offset = struct.unpack(self.order + "I", entry.field)[0]
+        if offset + entry.size > self.size:
+            msg = f"Значение тега {entry.tag} за пределами файла"
+            raise CorruptedFileError(msg)
+        return list(struct.unpack_from(fmt, self.data, offset))
+
+    def data_offset(self, entry: Entry) -> int:
+        return struct.unpack(self.order + "I", entry.field)[0]
+
+    def _read_ifds(self, first: int) -> list[Ifd]:
+        ifds: list[Ifd] = []
+        visited: set[int] = set()
+        pending = [first]
+        while pending:
+            offset = pending.pop()
+            # Цепочка IFD через указатели «следующий»; циклы игнорируются
+            while offset and offset not in visited:
+                visited.add(offset)
+                count = self._unpack("H", offset)
+                if offset + 2 + 12 * count + 4 > self.size:
+                    msg = f"Таблица IFD по смещению {offset} обрезана"
+                    raise CorruptedFileError(msg)
+                entries = []
+                for index in range(count):
+                    position = offset + 2 + 12 * index
+                    tag, type_, value_count = struct.unpack_from(
+                        self.order + "HHI", self.data, position
+                    )
+                    field_bytes = bytes(self.data[position + 8 : position + 12])
+                    entries.append(
+                        Entry(tag, type_, value_count, position, field_bytes)
+                    )
+                next_offset = self._unpack("I", offset + 2 + 12 * count)
+                ifd = Ifd(offset, entries, next_offset)
+                ifds.append(ifd)
+                for entry in entries:
+                    if entry.tag in _IFD_POINTERS:
+                        pending.extend(self.values(entry))
+                offset = next_offset
+        return ifds
+
+    def _entry_range(self, entry: Entry) -> tuple[int, int] | None:
+        if entry.inline:
+            return None
+        start = self.data_offset(entry)
+        return start, min(start + entry.size, self.size)
+
+    def _plan(self, tags: set[int]) -> list[tuple[int, int]]:
+        """Удалить записи из таблиц и собрать диапазоны удаляемых байт."""
+        by_offset = {ifd.offset: ifd for ifd in self.ifds}
+        dropped: set[int] = set()
+        removed: list[tuple[int, int]] = []
+
+        for ifd in self.ifds:
+            if ifd.offset in dropped:
+                continue
+            kept = []
+            for entry in ifd.entries:
+                if entry.tag not in tags:
+                    kept.append(entry)
+                    continue
+                self.result.tags.append(entry.tag)
+                if (span := self._entry_range(entry)) is not None:
+                    removed.append(span)
+                if entry.tag in _IFD_POINTERS:
+                    # Вложенный каталог (GPS) удаляется вместе с данными
+                    for pointer in self.values(entry):
+                        if pointer in by_offset:
+                            dropped.add(pointer)
+            old_size = ifd.table_size
+            ifd.entries = kept
+            if ifd.table_size < old_size:
+                removed.append((ifd.offset + ifd.table_size, ifd.offset + old_size))
+
+        for offset in dropped:
+            ifd = by_offset[offset]
+            removed.append((ifd.offset, ifd.offset + ifd.table_size))
+            for entry in ifd.entries:
+                if (span := self._entry_range(entry)) is not None:
+                    removed.append(span)
+        self.ifds = [ifd for ifd in self.ifds if ifd.offset not in dropped]
+        self.dropped = dropped
+        return _subtract(_merge(removed), self._kept_ranges())
+
+    def _kept_ranges(self) -> list[tuple[int, int]]:
+        """Диапазоны, которые нельзя удалять: таблицы, значения, полосы."""
+        kept = [(0, 8)]
+        for ifd in self.ifds:
+            kept.append((ifd.offset, ifd.offset + ifd.table_size))
+            counts = {entry.tag: entry for entry in ifd.entries}
+            for entry in ifd.entries:
+                if (span := self._entry_range(entry)) is not None:
+                    kept.append(span)
+                length_tag = _DATA_OFFSETS.get(entry.tag)
+                if length_tag in counts:
+                    offsets = self.values(entry)
+                    lengths = self.values(counts[length_tag])
+                    if len(offsets) != len(lengths):
+                        msg = f"Число смещений и длин тега {entry.tag} не совпадает"
+                        raise CorruptedFileError(msg)
+                    kept.extend(
+                        (start, start + length)
+                        for start, length in zip(offsets, lengths, strict=True)
+                    )
+        return _merge(kept)
+
+    def patches(self, shift) -> list[tuple[int, bytes]]:
+        """Новые таблицы IFD и массивы смещений (позиции в исходном файле)."""
+        order = self.order
+        patches = [(4, struct.pack(order + "I", shift(self.first_ifd)))]
+        for ifd in self.ifds:
+            table = bytearray(struct.pack(order + "H", len(ifd.entries)))
+            for entry in ifd.entries:
+                field_bytes = entry.field
+                relocated = entry.tag in _IFD_POINTERS or entry.tag in _DATA_OFFSETS
+                if relocated and entry.type in (_SHORT, _LONG, _IFD):
+                    fmt = order + ("H" if entry.type == _SHORT else "I") * entry.count
+                    values = struct.pack(fmt, *map(shift, self.values(entry)))
+                    if entry.inline:
+                        field_bytes = values.ljust(4, b"\x00")
+                    else:
+                        patches.append((self.data_offset(entry), values))
+                if not entry.inline:
+                    new_offset = shift(self.data_offset(entry))
+                    field_bytes = struct.pack(order + "I", new_offset)
+                table += struct.pack(order + "HHI", entry.tag, entry.type, entry.count)
+                table += field_bytes
+            next_offset = 0 if ifd.next_offset in self.dropped else ifd.next_offset
+            table += struct.pack(order + "I", shift(next_offset) if next_offset else 0)
+            patches.append((ifd.offset, bytes(table)))
+        return patches
+
+
+def _merge(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(
+    removed: list[tuple[int, int]], kept: list[tuple[int, int]]
+) -> list[tuple[int, int]]:
+    """Исключить из удаляемых диапазоны, пересекающиеся с нужными данными."""
+    starts = [start for start, _ in kept]
+    result = []
+    for start, end in removed:
+        index = bisect.bisect_right(starts, end - 1) - 1
+        if index >= 0 and kept[index][1] > start:
+            continue
+        result.append((start, end))
+    return result
+
+
+def scrub_file(
+    path: str | os.PathLike[str], tags: Iterable[int] = DEFAULT_TAGS
+) -> ScrubResult:
+    """Удалить теги из файла на месте: таблицы сжимаются, данные обнуляются."""
+    with open(path, "r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+        layout = _Layout(mm, tags)
+        for start, end in layout.removed:
+            mm[start:end] = bytes(end - start)
+            layout.result.removed_bytes += end - start
+        for position, data in layout.patches(lambda offset: offset):
+            mm[position : position + len(data)] = data
+        mm.flush()
+        return layout.result
+
+
+def write_compacted(
+    source: bytes | mmap.mmap, target: BinaryIO, tags: Iterable[int] = DEFAULT_TAGS
+) -> ScrubResult:
+    """Записать в ``target`` копию без удаленных тегов и их данных.
+
+    ``target`` должен поддерживать перемотку: после потокового копирования
+    в него дописываются новые таблицы и смещения.
+    """
+    layout = _Layout(source, tags)
+    # Вырезаются только участки четной длины, чтобы смещения после них
+    # сохранили четность; последний байт нечетного участка обнуляется
+    removed = [
+        (start, end - ((end - start) & 1))
+        for start, end in layout.removed
+        if end - start > 1
+    ]
+    leftovers = [
+        (end - 1, end) for start, end in layout.removed if (end - start) & 1
+    ]
+    starts = [start for start, _ in removed]
+    before = [0]
+    for start, end in removed:
+        before.append(before[-1] + end - start)
+
+    def shift(offset: int) -> int:
+        return offset - before[bisect.bisect_right(starts, offset - 1)] if offset else 0
+
+    base = target.tell()
+    position = 0
+    with memoryview(source) as view:
+        for start, end in [*removed, (len(source), len(source))]:
+            target.write(view[position:start])
+            position = end
+    patches = [(start, bytes(end - start)) for start, end in leftovers]
+    for offset, data in [*patches, *layout.patches(shift)]:
+        target.seek(base + shift(offset))
+        target.write(data)
+    target.seek(0, os.SEEK_END)
+
+    layout.result.removed_bytes = before[-1]
+    return layout.result
@@ -0,0 +1,115 @@
+"""Очистка WebP на уровне чанков RIFF без декодирования.
+
+Чанки ``EXIF`` и ``XMP `` удаляются, в заголовке ``VP8X`` сбрасываются флаги
+их наличия, размер RIFF пересчитывается. Остальные чанки (``VP8``, ``VP8L``,
+``ALPH``, ``ANIM``, ``ANMF``, ``ICCP`` и неизвестные) копируются потоком без
+изменений, поэтому в памяти одновременно находится не больше одного блока
+копирования.
+"""
+
+from __future__ import annotations
+
+import shutil
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from metadata_cleaner.cleaner.errors import CorruptedFileError
+
+RIFF_HEADER_SIZE = 12
+CHUNK_HEADER_SIZE = 8
+
+# Чанки метаданных
+METADATA_CHUNKS = {b"EXIF": "exif", b"XMP ": "xmp"}
+
+# Флаги VP8X: наличие EXIF и XMP
+_VP8X_EXIF = 0x08
+_VP8X_XMP = 0x04
+
+
+@dataclass(frozen=True, slots=True)
+class Chunk:
+    """Чанк RIFF: тип, смещение заголовка и размер содержимого (без выравнивания)."""
+
+    fourcc: bytes
+    offset: int
+    size: int
+
+    @property
+    def total_size(self) -> int:
+        """Размер чанка с заголовком и байтом выравнивания."""
+        return CHUNK_HEADER_SIZE + self.size + (self.size & 1)
+
+
+def is_webp(header: bytes) -> bool:
+    """Является ли заголовок заголовком WebP."""
+    return header[:4] == b"RIFF" and header[8:12] == b"WEBP"
+
+
+def iter_chunks(source: BinaryIO) -> Iterator[Chunk]:
+    """Чанки файла WebP; читаются только заголовки, содержимое пропускается."""
+    source.seek(0)
+    header = source.read(RIFF_HEADER_SIZE)
+    if not is_webp(header):
+        msg = "Нет сигнатуры WebP"
+        raise CorruptedFileError(msg)
+    (riff_size,) = struct.unpack("<I", header[4:8])
+    end = min(8 + riff_size, source.seek(0, 2))
+
+    offset = RIFF_HEADER_SIZE
+    while offset + CHUNK_HEADER_SIZE <= end:
+        source.seek(offset)
+        chunk_header = source.read(CHUNK_HEADER_SIZE)
+        fourcc, size = chunk_header[:4], struct.unpack("<I", chunk_header[4:])[0]
+        chunk = Chunk(fourcc, offset, size)
+        if offset + CHUNK_HEADER_SIZE + size > end:
+            msg = f"Чанк {fourcc!r} выходит за пределы файла"
+            raise CorruptedFileError(msg)
+        yield chunk
+        offset += chunk.total_size
+
+
+def strip_metadata(source: BinaryIO, target: BinaryIO) -> list[str]:
+    """Переписать WebP из ``source`` в ``target`` без чанков EXIF и XMP.
+
+    Возвращает названия удаленных чанков. Источник должен поддерживать
+    перемотку: первый проход по заголовкам чанков вычисляет размер RIFF.
+    """
+    chunks = list(iter_chunks(source))
+    kept = [chunk for chunk in chunks if chunk.fourcc not in METADATA_CHUNKS]
+    removed = [
+        METADATA_CHUNKS[chunk.fourcc]
+        for chunk in chunks
+        if chunk.fourcc in METADATA_CHUNKS
+    ]
+
+    riff_size = 4 + sum(chunk.total_size for chunk in kept)
+    target.write(b"RIFF" + struct.pack("<I", riff_size) + b"WEBP")
+    for chunk in kept:
+        source.seek(chunk.offset)
+        length = CHUNK_HEADER_SIZE + chunk.size
+        if chunk.fourcc == b"VP8X" and chunk.size >= 1:
+            # Флаги — первый байт содержимого VP8X
+            data = bytearray(source.read(length))
+            data[CHUNK_HEADER_SIZE] &= ~(_VP8X_EXIF | _VP8X_XMP) & 0xFF
+            target.write(data)
+        else:
+            _copy_exact(source, target, length)
+        # Байт выравнивания пишется всегда: у последнего чанка его может
+        # не быть в исходном файле
+        if chunk.size & 1:
+            target.write(b"\0")
+    return removed
+
+
+def _copy_exact(source: BinaryIO, target: BinaryIO, length: int):
+    """Скопировать ровно ``length`` байт блоками."""
+    remaining = length
+    while remaining:
+        block = source.read(min(remaining, shutil.COPY_BUFSIZE))
+        if not block:
+            msg = "Файл WebP обрезан"
+            raise CorruptedFileError(msg)
+        target.write(block)
+        remaining -= len(block)
@@ -0,0 +1,119 @@
+"""Поиск и очистка пакетов XMP в файлах любого формата.
+
+XMP встраивается в TIFF, PSD, EPS, AI, потоки PDF, боксы ``uuid`` MP4 и
+многие другие форматы как текстовый пакет ``<?xpacket begin=...?>`` ...
+``<?xpacket end=...?>`` с пробелами для дозаписи. Содержимое пакета
+заменяется пустым ``x:xmpmeta`` и пробелами той же длины: смещения и размеры
+контейнера не меняются, поэтому перестраивать файл не нужно. Файлы
+отображаются в память (mmap), а пакеты ищутся поиском подстроки.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+PACKET_BEGIN = b"<?xpacket begin="
+PACKET_END = b"<?xpacket end="
+_PI_CLOSE = b"?>"
+
+# Пустое содержимое пакета, которым заменяются метаданные
+EMPTY_XMPMETA = b'<x:xmpmeta xmlns:x="adobe:ns:meta/"/>'
+
+# Заголовок и окончание пакета — короткие инструкции; дальше не ищем
+_MAX_PI_LENGTH = 256
+
+
+@dataclass(frozen=True, slots=True)
+class XmpPacket:
+    """Пакет XMP: границы целиком и границы содержимого между инструкциями."""
+
+    start: int
+    end: int
+    body_start: int
+    body_end: int
+
+
+def find_packets(data: bytes | bytearray | mmap.mmap) -> Iterator[XmpPacket]:
+    """Найти пакеты XMP в кодировке UTF-8 (или совместимой с ASCII)."""
+    pos = 0
+    while True:
+        start = data.find(PACKET_BEGIN, pos)
+        if start < 0:
+            return
+        body_start = data.find(_PI_CLOSE, start, start + _MAX_PI_LENGTH)
+        if body_start < 0:
+            pos = start + len(PACKET_BEGIN)
+            continue
+        body_start += len(_PI_CLOSE)
+
+        body_end = data.find(PACKET_END, body_start)
+        if body_end < 0:
+            return
+        # Внутри найденного окна начался другой пакет: этот не закрыт
+        nested = data.find(PACKET_BEGIN, body_start, body_end)
+        if nested >= 0:
+            pos = nested
+            continue
+        end = data.find(_PI_CLOSE, body_end, body_end + _MAX_PI_LENGTH)
+        if end < 0:
+            pos = body_end + len(PACKET_END)
+            continue
+        end += len(_PI_CLOSE)
+        yield XmpPacket(start, end, body_start, body_end)
+        pos = end
+
+
+def blank_body(length: int) -> bytes | None:
+    """Пустое содержимое пакета заданной длины или None, если не помещается."""
+    if length < len(EMPTY_XMPMETA):
+        return None
+    padding = length - len(EMPTY_XMPMETA)
+    return EMPTY_XMPMETA + b" " * padding
+
+
+def blank_packets(buffer: bytearray | mmap.mmap) -> int:
+    """Очистить все пакеты XMP в изменяемом буфере на месте.
+
+    Возвращает число измененных пакетов (уже пустые не считаются).
+    """
+    changed = 0
+    for packet in list(find_packets(buffer)):
+        length = packet.body_end - packet.body_start
+        body = blank_body(length)
+        if body is None or buffer[packet.body_start : packet.body_end] == body:
+            continue
+        buffer[packet.body_start : packet.body_end] = body
+        changed += 1
+    return changed
+
+
+def blank_bytes(data: bytes) -> tuple[bytes, int]:
+    """Очистить пакеты XMP в копии ``data``; вернуть ее и число пакетов.
+
+    Без пакетов возвращается тот же объект ``data``.
+    """
+    if data.find(PACKET_BEGIN) < 0:
+        return data, 0
+    buffer = bytearray(data)
+    changed = blank_packets(buffer)
+    return (bytes(buffer), changed) if changed else (data, 0)
+
+
+def blank_file(path: str | os.PathLike[str]) -> int:
+    """Очистить пакеты XMP в файле на месте через mmap.
+
+    Файл не читается целиком: страницы подгружаются по мере поиска, а на
+    диск записываются только измененные.
+    """
+    with open(Path(path), "r+b") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) as mm:
+            changed = blank_packets(mm)
+            if changed:
+                mm.flush()
+            return changed
@@ -1,13 +1,27 @@
 """Обработчики для различных типов файлов."""
 
+import io
+import os
+import shutil
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, TypeVar
 
 from metadata_cleaner.cleaner.models import CleanResult, FileJob
 
+if TYPE_CHECKING:
+    from metadata_cleaner.batch.metrics import CleanerMetrics
+
+T = TypeVar("T")
+
 
 class BaseHandler(ABC):
     """Базовый класс для всех обработчиков файлов."""
 
+    # Метрики запуска, подключаются диспетчером
+    metrics: "CleanerMetrics | None" = None
+
     @abstractmethod
     def clean(self, job: FileJob) -> CleanResult:
         """Очистить метаданные файла."""
@@ -22,8 +36,100 @@ class BaseHandler(ABC):
             return True
 
         try:
-            backup_path = job.file_path.with_suffix(job.file_path.suffix + ".bak")
-            backup_path.write_bytes(job.file_path.read_bytes())
+            with job.stage("backup"):
+                backup_path = job.file_path.with_suffix(job.file_path.suffix + ".bak")
+                if job.source_data is not None:
+                    backup_path.write_bytes(job.source_data)
+                else:
+                    shutil.copyfile(job.file_path, backup_path)
+            if self.metrics is not None:
+                self.metrics.record_backup(backup_path.stat().st_size)
             return True
         except Exception:
             return False
+
+    def _source(self, job: FileJob) -> str | BinaryIO:
+        """Источник для чтения: прочитанное заранее содержимое или путь."""
+        if job.source_data is not None:
+            return io.BytesIO(job.source_data)
+        return str(job.file_path)
+
+    def _write_output(
+        self, job: FileJob, output_path: Path, write: Callable[[BinaryIO], Any]
+    ):
+        """Записать результат функцией ``write``, принимающей файловый объект.
+
+        При отложенной записи результат собирается в памяти и сохраняется в
+        ``job.pending_write``, а на диск его пишет этап записи конвейера.
+        """
+        if job.defer_write:
+            with job.stage("transform"):
+                buffer = io.BytesIO()
+                write(buffer)
+            job.pending_write = (Path(output_path), buffer.getvalue())
+        else:
+            with job.stage("write"), open(output_path, "wb") as output_file:
+                write(output_file)
+
+    def _rewrite_output(
+        self,
+        job: FileJob,
+        output_path: Path,
+        rewrite: Callable[[BinaryIO, BinaryIO], T],
+    ) -> T:
+        """Переписать исходный файл в выходной функцией ``rewrite(source, target)``.
+
+        Исходный файл читается во время записи (а выходной может с ним
+        совпадать), поэтому результат пишется во временный файл рядом с
+        выходным и заменяет его только целиком; при ошибке выходной файл не
+        меняется.
+        """
+        temp_path = output_path.with_name(f".{output_path.name}.tmp")
+        try:
+            with (
+                job.stage("transform"),
+                open(job.file_path, "rb") as source,
+                open(temp_path, "wb") as target,
+            ):
+                result = rewrite(source, target)
+            temp_path.replace(output_path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        return result
+
+    def _store_output(self, job: FileJob, output_path: Path, data: bytes | memoryview):
+        """Записать готовое содержимое результата (или отложить запись)."""
+        if job.defer_write:
+            job.pending_write = (Path(output_path), bytes(data))
+        else:
+            with job.stage("write"):
+                Path(output_path).write_bytes(data)
+
+    def flush_output(self, job: FileJob):
+        """Записать отложенный результат на диск и сбросить его, если нужно."""
+        if job.pending_write is None:
+            return
+        output_path, data = job.pending_write
+        with job.stage("write"):
+            output_path.write_bytes(data)
+        job.pending_write = None
+        self._sync_output(job)
+
+    def _sync_output(self, job: FileJob):
+        """Сбросить записанный файл на диск, если это запрошено."""
+        # Отложенный результат сбрасывается после записи в flush_output
+        if not job.fsync or job.pending_write is not None:
+            return
+
+        output_path = job.output_path or job.file_path
+        if not output_path.exists():
+            return
+
+        # На Windows fsync требует дескриптор, открытый на запись
+        flags = os.O_RDWR if os.name == "nt" else os.O_RDONLY
+        with job.stage("fsync"):
+            fd = os.open(output_path, flags)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
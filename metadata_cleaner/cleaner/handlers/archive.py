@@ -0,0 +1,274 @@
+"""Обработчик для архивов ZIP и TAR (в том числе tar.gz, tar.bz2, tar.xz).
+
+Архив не распаковывается на диск: члены читаются по одному, поддерживаемые
+очищаются в памяти соответствующим обработчиком, остальные копируются
+потоком без изменений. Новый архив пишется рядом с результатом во временный
+файл, поэтому на диске в пике находится один выходной архив, а в памяти —
+содержимое одного (самого большого) поддерживаемого члена.
+"""
+
+from __future__ import annotations
+
+import copy
+import io
+import shutil
+import tarfile
+import zipfile
+from collections.abc import Callable
+from pathlib import PurePosixPath
+from typing import IO, Any
+
+from metadata_cleaner.cleaner.errors import (
+    BackupError,
+    EncryptedFileError,
+    MetadataProcessingError,
+)
+from metadata_cleaner.cleaner.models import CleanResult, CleanStatus, FileJob
+
+from . import BaseHandler
+
+# Суффикс архива → (формат, сжатие TAR)
+ARCHIVE_SUFFIXES = {
+    ".tar.gz": ("tar", "gz"),
+    ".tar.bz2": ("tar", "bz2"),
+    ".tar.xz": ("tar", "xz"),
+    ".tgz": ("tar", "gz"),
+    ".tbz2": ("tar", "bz2"),
+    ".txz": ("tar", "xz"),
+    ".tar": ("tar", ""),
+    ".zip": ("zip", ""),
+}
+
+# Дата, подставляемая вместо времени изменения членов ZIP (минимум формата)
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# Очистка члена: (содержимое, расширение) → результат с output_data
+MemberCleaner = Callable[[bytes, str], CleanResult]
+
+
+def archive_suffix(name: str) -> str | None:
+    """Суффикс архива в имени файла (например, '.tar.gz') или None."""
+    lower = name.lower()
+    for suffix in ARCHIVE_SUFFIXES:
+        if lower.endswith(suffix):
+            return suffix
+    return None
+
+
+class ArchiveHandler(BaseHandler):
+    """Обработчик для архивов: очищает поддерживаемые файлы внутри архива."""
+
+    def __init__(
+        self,
+        clean_member: MemberCleaner | None = None,
+        is_supported: Callable[[str], bool] | None = None,
+    ):
+        # Диспетчер передает очистку в памяти и проверку поддержки расширения
+        self.clean_member = clean_member
+        self.is_supported = is_supported
+
+    def clean(self, job: FileJob) -> CleanResult:
+        """Очистить метаданные архива и файлов внутри него."""
+        try:
+            if self.clean_member is None or self.is_supported is None:
+                msg = "Обработчик архивов не подключен к диспетчеру"
+                raise RuntimeError(msg)
+
+            if not self._create_backup(job):
+                msg = "Не удалось создать резервную копию"
+                raise BackupError(msg)
+
+            stats = _ArchiveStats()
+            self._rewrite_archive(job, stats)
+            self._sync_output(job)
+
+            return CleanResult(
+                job=job,
+                status=CleanStatus.SUCCESS,
+                message=(
+                    f"Метаданные успешно очищены из {job.file_path.name} "
+                    f"({stats.summary()})"
+                ),
+                cleaned_fields=stats.cleaned_fields,
+            )
+
+        except Exception as e:
+            return CleanResult(
+                job=job,
+                status=CleanStatus.ERROR,
+                message=f"Ошибка при обработке {job.file_path.name}: {e!s}",
+                error=e,
+            )
+
+    def _rewrite_archive(self, job: FileJob, stats: _ArchiveStats):
+        """Переписать архив в выходной файл (или в память для source_data)."""
+        suffix = archive_suffix(job.file_path.name)
+        if suffix is None:
+            msg = f"Неизвестный формат архива: {job.file_path.name}"
+            raise ValueError(msg)
+        kind, compression = ARCHIVE_SUFFIXES[suffix]
+        rewrite = self._rewrite_zip if kind == "zip" else self._rewrite_tar
+        output_path = job.output_path or job.file_path
+
+        if job.source_data is not None:
+            with job.stage("transform"):
+                buffer = io.BytesIO()
+                rewrite(job, io.BytesIO(job.source_data), buffer, compression, stats)
+            stats.check()
+            self._store_output(job, output_path, buffer.getbuffer())
+            return
+
+        def write(source: IO[bytes], target: IO[bytes]):
+            rewrite(job, source, target, compression, stats)
+            # Проверка до замены: неполный архив не заменяет выходной файл
+            stats.check()
+
+        self._rewrite_output(job, output_path, write)
+
+    def _clean_data(self, name: str, data: bytes, stats: _ArchiveStats) -> bytes:
+        """Очистить содержимое члена; при ошибке запомнить его и продолжить.
+
+        Архив дописывается до конца, чтобы сообщить обо всех неочищенных
+        членах, но результат с ними не сохраняется (см. ``_ArchiveStats.check``).
+        """
+        type_hint = archive_suffix(name) or PurePosixPath(name).suffix
+        result = self.clean_member(data, type_hint)
+        if not result.is_success:
+            stats.failed.append(name)
+            return data
+        stats.cleaned += 1
+        return result.output_data
+
+    def _member_supported(self, name: str) -> bool:
+        return bool(PurePosixPath(name).suffix) and self.is_supported(name)
+
+    def _rewrite_zip(
+        self,
+        job: FileJob,
+        source: IO[bytes],
+        target: IO[bytes],
+        compression: str,
+        stats: _ArchiveStats,
+    ):
+        clean_comments = job.clean_fields.get("comments", True)
+        clean_dates = job.clean_fields.get("modified", True)
+
+        with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target, "w") as zout:
+            if zin.comment:
+                if clean_comments:
+                    stats.cleaned_fields["archive_comment"] = zin.comment.decode(
+                        "utf-8", "replace"
+                    )
+                else:
+                    zout.comment = zin.comment
+
+            for info in zin.infolist():
+                if info.flag_bits & 0x1:
+                    msg = f"Член архива зашифрован: {info.filename}"
+                    raise EncryptedFileError(msg)
+
+                # Новая запись без extra-полей (UID/GID, точные времена)
+                new_info = zipfile.ZipInfo(
+                    info.filename, _ZIP_EPOCH if clean_dates else info.date_time
+                )
+                new_info.compress_type = info.compress_type
+                new_info.external_attr = info.external_attr
+                new_info.create_system = info.create_system
+                if info.comment and not clean_comments:
+                    new_info.comment = info.comment
+                stats.count_zip_metadata(info, clean_comments, clean_dates)
+
+                if info.is_dir():
+                    zout.writestr(new_info, b"")
+                elif self._member_supported(info.filename):
+                    data = self._clean_data(info.filename, zin.read(info), stats)
+                    zout.writestr(new_info, data)
+                else:
+                    force_zip64 = info.file_size >= zipfile.ZIP64_LIMIT
+                    with (
+                        zin.open(info) as member,
+                        zout.open(new_info, "w", force_zip64=force_zip64) as out,
+                    ):
+                        shutil.copyfileobj(member, out)
+                    stats.copied += 1
+                job.report_progress(info.header_offset + info.compress_size, job.size)
+
+    def _rewrite_tar(
+        self,
+        job: FileJob,
+        source: IO[bytes],
+        target: IO[bytes],
+        compression: str,
+        stats: _ArchiveStats,
+    ):
+        clean_owner = job.clean_fields.get("author", True)
+        clean_dates = job.clean_fields.get("modified", True)
+
+        # Потоковый режим: члены читаются строго по порядку, без перемотки
+        with (
+            tarfile.open(fileobj=source, mode=f"r|{compression}") as tin,
+            tarfile.open(
+                fileobj=target, mode=f"w|{compression}", format=tarfile.PAX_FORMAT
+            ) as tout,
+        ):
+            for member in tin:
+                info = copy.copy(member)
+                if member.pax_headers:
+                    # Расширенные атрибуты, atime/ctime и прочие записи PAX;
+                    # длинные имена и размеры tarfile запишет заново сам
+                    stats.cleaned_fields["pax_headers"] = True
+                    info.pax_headers = {}
+                if clean_owner and (member.uname or member.gname or member.uid):
+                    stats.cleaned_fields["owner"] = True
+                    info.uid = info.gid = 0
+                    info.uname = info.gname = ""
+                if clean_dates and member.mtime:
+                    stats.cleaned_fields["modified"] = True
+                    info.mtime = 0
+
+                if not member.isfile():
+                    tout.addfile(info)
+                elif self._member_supported(member.name):
+                    with tin.extractfile(member) as f:
+                        data = self._clean_data(member.name, f.read(), stats)
+                    info.size = len(data)
+                    tout.addfile(info, io.BytesIO(data))
+                else:
+                    with tin.extractfile(member) as f:
+                        tout.addfile(info, f)
+                    stats.copied += 1
+                job.report_progress(source.tell(), job.size)
+
+
+class _ArchiveStats:
+    """Итоги переписывания архива."""
+
+    def __init__(self):
+        self.cleaned = 0
+        self.copied = 0
+        self.failed: list[str] = []
+        self.cleaned_fields: dict[str, Any] = {}
+
+    def count_zip_metadata(
+        self, info: zipfile.ZipInfo, clean_comments: bool, clean_dates: bool
+    ):
+        if info.extra:
+            self.cleaned_fields["extra_fields"] = True
+        if info.comment and clean_comments:
+            self.cleaned_fields["member_comments"] = True
+        if clean_dates and info.date_time != _ZIP_EPOCH:
+            self.cleaned_fields["modified"] = True
+
+    def check(self):
+        """Ошибка, если хотя бы один член не удалось очистить.
+
+        Такой член остался бы в архиве с метаданными, поэтому результат не
+        записывается, а очистка завершается ошибкой.
+        """
+        if self.failed:
+            names = ", ".join(self.failed[:3])
+            msg = f"не удалось очистить {len(self.failed)}: {names}"
+            raise MetadataProcessingError(msg)
+
+    def summary(self) -> str:
+        return f"очищено файлов: {self.cleaned}; скопировано: {self.copied}"
@@ -1,11 +1,15 @@
 """Обработчик для изображений."""
 
+import io
+import mmap
+from pathlib import Path
 from typing import Any
 
 import piexif
 from PIL import Image
 
 from metadata_cleaner.cleaner.errors import BackupError, MetadataProcessingError
+from metadata_cleaner.cleaner.formats import jpeg, tiff, webp
 from metadata_cleaner.cleaner.models import CleanResult, CleanStatus, FileJob
 
 from . import BaseHandler
@@ -31,6 +35,7 @@ class ImageHandler(BaseHandler):
                 raise BackupError(msg)
 
             cleaned_fields = self._clean_image_metadata(job)
+            self._sync_output(job)
 
             return CleanResult(
                 job=job,
@@ -60,6 +65,10 @@ class ImageHandler(BaseHandler):
             cleaned_fields = self._clean_heic_metadata(job)
         elif extension == ".gif":
             cleaned_fields = self._clean_gif_metadata(job)
+        elif extension == ".webp":
+            cleaned_fields = self._clean_webp_metadata(job)
+        elif extension in [".tif", ".tiff", ".dng"]:
+            cleaned_fields = self._clean_tiff_metadata(job)
         else:
             msg = f"Неподдерживаемый формат изображения: {extension}"
             raise MetadataProcessingError(msg)
@@ -77,8 +86,10 @@ class ImageHandler(BaseHandler):
                 # Если все настройки отключены, ничего не делаем
                 return cleaned_fields
 
-            # Чтение существующих EXIF данных
-            exif_dict = piexif.load(str(job.file_path))
+            # Чтение файла и существующих EXIF данных
+            data = self._read_source(job)
+            with job.stage("read"):
+                exif_dict = piexif.load(data)
 
             # Сохранение удаляемых данных
             # Проверяем есть ли хотя бы одна настройка камеры включена
@@ -257,36 +268,54 @@ class ImageHandler(BaseHandler):
             if not gps_fields_enabled and "GPS" in exif_dict:
                 new_exif_dict["GPS"] = exif_dict["GPS"]
 
-            # Открытие изображения и сохранение с новыми EXIF
-            img = Image.open(str(job.file_path))
-
-            # Создание байтов EXIF
-            exif_bytes = piexif.dump(new_exif_dict)
-
-            # Сохранение изображения с сохранением ICC профиля
-            output_path = job.output_path or job.file_path
-            save_kwargs = {"exif": exif_bytes, "quality": 95, "optimize": True}
-
-            # Сохранение ICC профиля если он есть
-            if hasattr(img, "info") and "icc_profile" in img.info:
-                save_kwargs["icc_profile"] = img.info["icc_profile"]
-
-            img.save(str(output_path), **save_kwargs)
+            # Сегменты заменяются без перекодирования сжатых данных
+            with job.stage("transform"):
+                exif_bytes = None
+                if any(new_exif_dict[ifd] for ifd in ("0th", "Exif", "GPS")):
+                    exif_bytes = piexif.dump(new_exif_dict)
+            self._strip_jpeg(job, data, exif_bytes, cleaned_fields)
 
         except piexif.InvalidImageDataError:
-            # Если EXIF данных нет, просто копируем изображение
-            img = Image.open(str(job.file_path))
-            output_path = job.output_path or job.file_path
-            img.save(str(output_path), quality=95)
+            # Если EXIF данных нет, удаляем только остальные сегменты
+            self._strip_jpeg(job, data, None, cleaned_fields)
 
         return cleaned_fields
 
+    def _strip_jpeg(
+        self,
+        job: FileJob,
+        data: bytes,
+        exif_bytes: bytes | None,
+        cleaned_fields: dict[str, Any],
+    ):
+        """Записать JPEG без сегментов метаданных и данных после EOI.
+
+        Видео «живых фото» удаляется всегда. Дополнительные изображения MPF
+        удаляются вместе с ним, если включена настройка ``mpf_secondary``
+        (по умолчанию), иначе сохраняются с очищенными EXIF; число
+        сэкономленных байт попадает в ``cleaned_fields``.
+        """
+        stats = jpeg.StripStats()
+        keep_secondary = not job.clean_fields.get("mpf_secondary", True)
+        with job.stage("transform"):
+            cleaned = jpeg.strip_metadata(
+                data, exif=exif_bytes, keep_secondary=keep_secondary, stats=stats
+            )
+        if stats.secondary:
+            cleaned_fields["mpf_secondary"] = stats.secondary
+        if stats.trailer:
+            cleaned_fields["trailer_bytes"] = stats.trailer
+        if len(cleaned) < len(data):
+            cleaned_fields["saved_bytes"] = len(data) - len(cleaned)
+        output_path = job.output_path or job.file_path
+        self._store_output(job, output_path, cleaned)
+
     def _clean_png_metadata(self, job: FileJob) -> dict[str, Any]:
         """Очистить метаданные из PNG файла."""
         cleaned_fields = {}
 
         # Открытие изображения
-        img = Image.open(str(job.file_path))
+        img = self._open_image(job)
 
         # Сохранение метаданных, которые будут удалены
         if hasattr(img, "info") and img.info:
@@ -295,12 +324,12 @@ class ImageHandler(BaseHandler):
                     cleaned_fields[f"png_{key}"] = str(value)
 
         # Создание нового изображения без метаданных
-        new_img = Image.new(img.mode, img.size)
-        new_img.putdata(list(img.getdata()))
+        with job.stage("transform"):
+            new_img = self._copy_pixels(img)
 
         # Сохранение без метаданных
         output_path = job.output_path or job.file_path
-        new_img.save(str(output_path), format="PNG")
+        self._save_image(job, new_img, output_path, format="PNG")
 
         return cleaned_fields
 
@@ -314,7 +343,7 @@ class ImageHandler(BaseHandler):
 
         try:
             # Открываем HEIC изображение
-            img = Image.open(str(job.file_path))
+            img = self._open_image(job)
 
             # Сохраняем удаляемые метаданные
             if hasattr(img, "info") and img.info:
@@ -323,8 +352,8 @@ class ImageHandler(BaseHandler):
                         cleaned_fields[f"heic_{key}"] = str(value)
 
             # Создаём новое изображение без метаданных
-            new_img = Image.new(img.mode, img.size)
-            new_img.putdata(list(img.getdata()))
+            with job.stage("transform"):
+                new_img = self._copy_pixels(img)
             
             # Сохраняем ICC профиль если он есть
             if hasattr(img, "info") and 'icc_profile' in img.info:
@@ -334,17 +363,19 @@ class ImageHandler(BaseHandler):
             
             # Пытаемся сохранить как HEIC
             try:
-                new_img.save(str(output_path), format="HEIF", quality=95)
+                self._save_image(job, new_img, output_path, format="HEIF", quality=95)
             except (ValueError, OSError):
                 # Если не получается сохранить как HEIC, пробуем другие варианты
                 try:
                     # Пробуем AVIF как альтернативу
-                    new_img.save(str(output_path), format="AVIF", quality=95)
+                    self._save_image(job, new_img, output_path, format="AVIF", quality=95)
                 except (ValueError, OSError):
                     # В крайнем случае сохраняем как высококачественный JPEG
                     if str(output_path).lower().endswith('.heic'):
                         output_path = output_path.with_suffix('.jpg')
-                    new_img.save(str(output_path), format="JPEG", quality=98, optimize=True)
+                    self._save_image(
+                        job, new_img, output_path, format="JPEG", quality=98, optimize=True
+                    )
                     cleaned_fields["format_changed"] = "HEIC → JPEG (высокое качество)"
 
         except Exception as e:
@@ -358,7 +389,7 @@ class ImageHandler(BaseHandler):
         cleaned_fields = {}
 
         # Открытие GIF
-        img = Image.open(str(job.file_path))
+        img = self._open_image(job)
 
         # Сохранение информации о метаданных
         if hasattr(img, "info") and img.info:
@@ -369,22 +400,123 @@ class ImageHandler(BaseHandler):
         # Сохранение GIF без метаданных
         output_path = job.output_path or job.file_path
 
-        # Для анимированных GIF нужна особая обработка
-        frames = []
-        try:
-            while True:
-                frames.append(img.copy())
-                img.seek(img.tell() + 1)
-        except EOFError:
-            pass
-
-        if len(frames) > 1:
-            # Анимированный GIF
-            frames[0].save(
-                str(output_path), save_all=True, append_images=frames[1:], format="GIF"
-            )
+        # Анимированный GIF кодируется покадрово из исходного файла,
+        # без одновременного хранения копий всех кадров
+        if getattr(img, "n_frames", 1) > 1:
+            self._save_image(job, img, output_path, format="GIF", save_all=True)
         else:
             # Статичный GIF
-            img.save(str(output_path), format="GIF")
+            self._save_image(job, img, output_path, format="GIF")
 
         return cleaned_fields
+
+    def _read_source(self, job: FileJob) -> bytes:
+        """Прочитать исходное содержимое файла (этап чтения)."""
+        if job.source_data is not None:
+            return job.source_data
+        with job.stage("read"):
+            return job.file_path.read_bytes()
+
+    def _clean_webp_metadata(self, job: FileJob) -> dict[str, Any]:
+        """Очистить метаданные из WebP: удалить чанки EXIF и XMP без декодирования."""
+        output_path = job.output_path or job.file_path
+
+        if job.source_data is not None:
+            with job.stage("transform"):
+                buffer = io.BytesIO()
+                removed = webp.strip_metadata(io.BytesIO(job.source_data), buffer)
+            self._store_output(job, output_path, buffer.getbuffer())
+        else:
+            removed = self._rewrite_output(job, output_path, webp.strip_metadata)
+
+        return {f"webp_{name}": True for name in removed}
+
+    def _clean_tiff_metadata(self, job: FileJob) -> dict[str, Any]:
+        """Очистить метаданные из TIFF/DNG без декодирования полос и тайлов.
+
+        При замене файла теги удаляются на месте (данные обнуляются), при
+        создании копии пишется компактная копия без удаленных данных.
+        """
+        tags = self._tiff_tags(job.clean_fields)
+        if not tags:
+            return {}
+
+        output_path = job.output_path or job.file_path
+        if job.source_data is None and output_path == job.file_path:
+            with job.stage("transform"):
+                result = tiff.scrub_file(job.file_path, tags)
+        elif job.source_data is not None:
+            with job.stage("transform"):
+                buffer = io.BytesIO()
+                result = tiff.write_compacted(job.source_data, buffer, tags)
+            self._store_output(job, output_path, buffer.getbuffer())
+        else:
+            with (
+                job.stage("transform"),
+                open(job.file_path, "rb") as source,
+                mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data,
+                open(output_path, "w+b") as target,
+            ):
+                result = tiff.write_compacted(data, target, tags)
+
+        cleaned_fields: dict[str, Any] = dict.fromkeys(result.names, True)
+        if result.removed_bytes:
+            cleaned_fields["removed_bytes"] = result.removed_bytes
+        return cleaned_fields
+
+    @staticmethod
+    def _tiff_tags(clean_fields: dict[str, Any]) -> frozenset[int]:
+        """Теги TIFF для удаления по настройкам (группы как у EXIF в JPEG)."""
+        if not any(value for value in clean_fields.values() if isinstance(value, bool)):
+            return frozenset()
+        tags = tiff.ALWAYS_TAGS
+        if any(
+            clean_fields.get(name, False)
+            for name in (
+                "exif_camera",
+                "exif_author",
+                "exif_software",
+                "camera_owner",
+                "camera_serial",
+                "camera",
+            )
+        ):
+            tags |= tiff.CAMERA_TAGS
+        if any(
+            clean_fields.get(name, False)
+            for name in ("gps_coords", "gps_altitude", "gps")
+        ):
+            tags |= tiff.GPS_TAGS
+        if any(
+            clean_fields.get(name, False) for name in ("exif_datetime", "created")
+        ):
+            tags |= tiff.DATE_TAGS
+        return tags
+
+    def _open_image(self, job: FileJob) -> Image.Image:
+        """Открыть и декодировать исходное изображение (этап чтения)."""
+        with job.stage("read"):
+            img = Image.open(self._source(job))
+            img.load()
+        return img
+
+    @staticmethod
+    def _copy_pixels(img: Image.Image) -> Image.Image:
+        """Скопировать пиксели в новое изображение без метаданных.
+
+        Копирование идет буфер в буфер, без промежуточного списка пикселей.
+        """
+        new_img = Image.new(img.mode, img.size)
+        new_img.paste(img)
+        return new_img
+
+    def _save_image(self, job: FileJob, img: Image.Image, output_path: Path, **save_kwargs):
+        """Закодировать изображение в память и записать результат на диск.
+
+        Кодирование и запись разделены, чтобы время этапов transform и write
+        учитывалось отдельно.
+        """
+        with job.stage("transform"):
+            buffer = io.BytesIO()
+            img.save(buffer, **save_kwargs)
+        self._store_output(job, output_path, buffer.getbuffer())
@@ -1,6 +1,21 @@
-"""Обработчик для Office документов (docx, pptx, xlsx)."""
+"""Обработчик для Office документов (docx, pptx, xlsx).
 
-from typing import Any
+Кроме свойств документа очищаются встроенные изображения (``word/media/``,
+``ppt/media/``, ``xl/media/``) и миниатюра ``docProps/thumbnail``: сохраненный
+документ переписывается за один проход по ZIP, изображения очищаются в памяти
+параллельно, сжатые данные остальных частей копируются без распаковки. Если хотя бы одно изображение
+не удалось очистить, документ не сохраняется и очистка завершается ошибкой.
+"""
+
+from __future__ import annotations
+
+import copy
+import io
+import struct
+import zipfile
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any
 
 from docx import Document as DocxDocument
 from openpyxl import load_workbook
@@ -10,11 +25,35 @@ from metadata_cleaner.cleaner.errors import BackupError, MetadataProcessingError
 from metadata_cleaner.cleaner.models import CleanResult, CleanStatus, FileJob
 
 from . import BaseHandler
+from .archive import MemberCleaner
+
+# Каталоги встроенных файлов в DOCX, PPTX и XLSX и миниатюра документа
+MEDIA_DIRS = ("word/media/", "ppt/media/", "xl/media/", "docprops/thumbnail")
+# Встроенные изображения, которые очищаются обработчиком изображений
+MEDIA_SUFFIXES = (".jpg", ".jpeg", ".png")
+
+# Локальный заголовок ZIP: сигнатура и длины имени и extra-поля
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+_LOCAL_SIGNATURE = b"PK\x03\x04"
+# Флаг дескриптора данных после сжатого содержимого
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+
+def is_embedded_image(name: str) -> bool:
+    """Является ли часть документа встроенным изображением."""
+    lower = name.lower()
+    return lower.startswith(MEDIA_DIRS) and lower.endswith(MEDIA_SUFFIXES)
 
 
 class OfficeHandler(BaseHandler):
     """Обработчик для Office документов."""
 
+    def __init__(self, clean_media: MemberCleaner | None = None, max_workers: int = 4):
+        # Диспетчер передает очистку изображений в памяти; без нее встроенные
+        # изображения не изменяются
+        self.clean_media = clean_media
+        self.max_workers = max(1, max_workers)
+
     def clean(self, job: FileJob) -> CleanResult:
         """Очистка метаданных из офисных документов."""
         try:
@@ -36,6 +75,8 @@ class OfficeHandler(BaseHandler):
                 msg = f"Неизвестный Office формат: {extension}"
                 raise MetadataProcessingError(msg)
 
+            self._sync_output(job)
+
             return CleanResult(
                 job=job,
                 status=CleanStatus.SUCCESS,
@@ -53,7 +94,8 @@ class OfficeHandler(BaseHandler):
 
     def _clean_docx(self, job: FileJob) -> dict[str, Any]:
         """Очистить метаданные из DOCX файла."""
-        doc = DocxDocument(str(job.file_path))
+        with job.stage("read"):
+            doc = DocxDocument(self._source(job))
         cleaned_fields = {}
 
         # Доступ к core properties
@@ -126,14 +168,14 @@ class OfficeHandler(BaseHandler):
             # last_printed нельзя очистить напрямую
 
         # Сохранение изменений
-        output_path = job.output_path or job.file_path
-        doc.save(str(output_path))
+        self._save(job, doc.save, cleaned_fields)
 
         return cleaned_fields
 
     def _clean_pptx(self, job: FileJob) -> dict[str, Any]:
         """Очистить метаданные из PPTX файла."""
-        prs = Presentation(str(job.file_path))
+        with job.stage("read"):
+            prs = Presentation(self._source(job))
         cleaned_fields = {}
 
         # Доступ к core properties
@@ -202,14 +244,14 @@ class OfficeHandler(BaseHandler):
             # last_printed нельзя очистить напрямую
 
         # Сохранение изменений
-        output_path = job.output_path or job.file_path
-        prs.save(str(output_path))
+        self._save(job, prs.save, cleaned_fields)
 
         return cleaned_fields
 
     def _clean_xlsx(self, job: FileJob) -> dict[str, Any]:
         """Очистить метаданные из XLSX файла."""
-        wb = load_workbook(str(job.file_path))
+        with job.stage("read"):
+            wb = load_workbook(self._source(job))
         cleaned_fields = {}
 
         # Доступ к properties через workbook
@@ -281,7 +323,111 @@ class OfficeHandler(BaseHandler):
             props.revision = ""
 
         # Сохранение изменений
-        output_path = job.output_path or job.file_path
-        wb.save(str(output_path))
+        self._save(job, wb.save, cleaned_fields)
 
         return cleaned_fields
+
+    def _save(
+        self,
+        job: FileJob,
+        save: Callable[[IO[bytes]], Any],
+        cleaned_fields: dict[str, Any],
+    ):
+        """Сохранить документ, очистив встроенные изображения."""
+        output_path = job.output_path or job.file_path
+        if self.clean_media is None:
+            self._write_output(job, output_path, save)
+            return
+
+        with job.stage("transform"):
+            saved = io.BytesIO()
+            save(saved)
+            data = self._clean_embedded_images(saved, cleaned_fields)
+        self._store_output(job, output_path, data)
+
+    def _clean_embedded_images(
+        self, saved: io.BytesIO, cleaned_fields: dict[str, Any]
+    ) -> bytes | memoryview:
+        """Переписать сохраненный документ с очищенными изображениями."""
+        with zipfile.ZipFile(saved) as zin:
+            infos = zin.infolist()
+            media = [info for info in infos if is_embedded_image(info.filename)]
+            if not media:
+                return saved.getbuffer()
+
+            # PIL освобождает GIL при декодировании и кодировании, поэтому
+            # изображения очищаются параллельно в потоках
+            workers = min(self.max_workers, len(media))
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="office-media"
+            ) as pool:
+                futures = {
+                    info.filename: pool.submit(
+                        self.clean_media,
+                        zin.read(info),
+                        "." + info.filename.rsplit(".", 1)[-1],
+                    )
+                    for info in media
+                }
+                cleaned: dict[str, bytes] = {}
+                failed: list[str] = []
+                for name, future in futures.items():
+                    result = future.result()
+                    if result.is_success:
+                        cleaned[name] = result.output_data
+                    else:
+                        failed.append(name)
+
+            # Неочищенное изображение осталось бы в документе с EXIF/GPS
+            if failed:
+                names = ", ".join(failed[:3])
+                msg = f"не удалось очистить изображения {len(failed)}: {names}"
+                raise MetadataProcessingError(msg)
+
+            source = saved.getbuffer()
+            output = io.BytesIO()
+            with zipfile.ZipFile(output, "w") as zout:
+                for info in infos:
+                    if info.filename in cleaned:
+                        # Новая запись: исходную zin еще читает по header_offset
+                        new_info = zipfile.ZipInfo(info.filename, info.date_time)
+                        new_info.compress_type = info.compress_type
+                        new_info.external_attr = info.external_attr
+                        new_info.create_system = info.create_system
+                        zout.writestr(new_info, cleaned[info.filename])
+                    else:
+                        _copy_compressed(source, info, zout)
+            del source
+
+        cleaned_fields["embedded_images"] = len(cleaned)
+        return output.getbuffer()
+
+
+def _copy_compressed(source: memoryview, info: zipfile.ZipInfo, zout: zipfile.ZipFile):
+    """Скопировать запись ZIP со сжатыми данными как есть, без распаковки.
+
+    Локальный заголовок пишется заново (без дескриптора данных), а запись
+    добавляется в центральный каталог ``zout`` так же, как ее добавил бы
+    ``ZipFile.writestr``.
+    """
+    offset = info.header_offset
+    signature, name_length, extra_length = _LOCAL_HEADER.unpack_from(source, offset)
+    if signature != _LOCAL_SIGNATURE:
+        msg = f"Поврежден локальный заголовок части {info.filename}"
+        raise MetadataProcessingError(msg)
+    start = offset + _LOCAL_HEADER.size + name_length + extra_length
+    data = source[start : start + info.compress_size]
+    if len(data) != info.compress_size:
+        msg = f"Обрезаны данные части {info.filename}"
+        raise MetadataProcessingError(msg)
+
+    new_info = copy.copy(info)
+    new_info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    new_info.header_offset = zout.fp.tell()
+    zout.fp.write(new_info.FileHeader())
+    zout.fp.write(data)
+    zout.filelist.append(new_info)
+    zout.NameToInfo[new_info.filename] = new_info
+    zout.start_dir = zout.fp.tell()
+    # Центральный каталог пишется при закрытии только после изменений
+    zout._didModify = True
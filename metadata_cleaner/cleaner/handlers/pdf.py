@@ -1,10 +1,17 @@
 """Обработчик для PDF документов."""
 
+import hashlib
 from typing import Any
 
 from pypdf import PdfReader, PdfWriter
-
-from metadata_cleaner.cleaner.errors import BackupError, EncryptedFileError
+from pypdf.generic import DictionaryObject, IndirectObject, StreamObject
+
+from metadata_cleaner.cleaner.errors import (
+    BackupError,
+    CorruptedFileError,
+    EncryptedFileError,
+)
+from metadata_cleaner.cleaner.formats import jpeg
 from metadata_cleaner.cleaner.models import CleanResult, CleanStatus, FileJob
 
 from . import BaseHandler
@@ -22,6 +29,7 @@ class PDFHandler(BaseHandler):
                 raise BackupError(msg)
 
             cleaned_fields = self._clean_pdf_metadata(job)
+            self._sync_output(job)
 
             return CleanResult(
                 job=job,
@@ -40,7 +48,8 @@ class PDFHandler(BaseHandler):
 
     def _clean_pdf_metadata(self, job: FileJob) -> dict[str, Any]:
         """Очистить метаданные из PDF файла."""
-        reader = PdfReader(str(job.file_path))
+        with job.stage("read"):
+            reader = PdfReader(self._source(job))
 
         # Проверка на зашифрованность
         if reader.is_encrypted:
@@ -83,11 +92,16 @@ class PDFHandler(BaseHandler):
                 cleaned_fields["producer"] = metadata.producer
 
         # Создание writer с копированием страниц
-        writer = PdfWriter()
+        with job.stage("transform"):
+            writer = PdfWriter()
+
+            # Копирование всех страниц
+            for page in reader.pages:
+                writer.add_page(page)
 
-        # Копирование всех страниц
-        for page in reader.pages:
-            writer.add_page(page)
+            # EXIF/XMP встроенных изображений
+            if job.clean_fields.get("images", True):
+                cleaned_fields.update(self._clean_images(writer))
 
         # Селективная очистка или полное удаление метаданных
         if not self._should_remove_all_metadata(job.clean_fields):
@@ -146,11 +160,75 @@ class PDFHandler(BaseHandler):
 
         # Сохранение файла
         output_path = job.output_path or job.file_path
-        with open(str(output_path), "wb") as output_file:
-            writer.write(output_file)
+        self._write_output(job, output_path, writer.write)
 
         return cleaned_fields
 
+    def _clean_images(self, writer: PdfWriter) -> dict[str, Any]:
+        """Удалить метаданные из изображений (XObject) всех страниц.
+
+        Из потоков DCTDecode удаляются сегменты APPn без перекодирования, у
+        изображений и форм удаляются потоки XMP (/Metadata). Одинаковые потоки
+        очищаются один раз: результат берется из кеша по хешу содержимого.
+        """
+        cache: dict[bytes, bytes] = {}
+        visited: set[int] = set()
+        stripped = xmp = 0
+
+        # Обход без рекурсии: формы могут быть вложены глубоко
+        pending = [page.get("/Resources") for page in writer.pages]
+        while pending:
+            resources = _resolve(pending.pop())
+            if not isinstance(resources, DictionaryObject):
+                continue
+            xobjects = _resolve(resources.get("/XObject"))
+            if not isinstance(xobjects, DictionaryObject):
+                continue
+            for ref in xobjects.values():
+                xobject = _resolve(ref)
+                if not isinstance(xobject, StreamObject) or id(xobject) in visited:
+                    continue
+                visited.add(id(xobject))
+
+                if "/Metadata" in xobject:
+                    # Сам поток XMP тоже обнуляется: без ссылки pypdf все равно
+                    # запишет его как объект-сироту
+                    _blank_stream(_resolve(xobject["/Metadata"]))
+                    del xobject["/Metadata"]
+                    xmp += 1
+                subtype = xobject.get("/Subtype")
+                if subtype == "/Form":
+                    pending.append(xobject.get("/Resources"))
+                elif subtype == "/Image" and self._strip_dct(xobject, cache):
+                    stripped += 1
+
+        cleaned_fields: dict[str, Any] = {}
+        if stripped:
+            cleaned_fields["image_metadata"] = stripped
+        if xmp:
+            cleaned_fields["image_xmp"] = xmp
+        return cleaned_fields
+
+    def _strip_dct(self, image: StreamObject, cache: dict[bytes, bytes]) -> bool:
+        """Удалить APPn из потока DCTDecode; True, если поток изменился."""
+        if _resolve(image.get("/Filter")) not in ("/DCTDecode", ["/DCTDecode"]):
+            return False
+
+        # Для единственного фильтра DCTDecode поток хранится как есть
+        data = image.get_data()
+        key = hashlib.blake2b(data, digest_size=16).digest()
+        cleaned = cache.get(key)
+        if cleaned is None:
+            try:
+                cleaned = jpeg.strip_metadata(data)
+            except CorruptedFileError:
+                cleaned = data
+            cache[key] = cleaned
+        if len(cleaned) == len(data):
+            return False
+        StreamObject.set_data(image, cleaned)
+        return True
+
     def _should_remove_all_metadata(self, clean_fields: dict[str, bool]) -> bool:
         """Проверить, нужно ли удалить все метаданные."""
         metadata_fields = [
@@ -164,3 +242,19 @@ class PDFHandler(BaseHandler):
             "modified",
         ]
         return all(clean_fields.get(field, True) for field in metadata_fields)
+
+
+def _blank_stream(stream: Any):
+    """Заменить содержимое потока пустым (фильтры удаляются)."""
+    if not isinstance(stream, StreamObject):
+        return
+    for key in ("/Filter", "/DecodeParms"):
+        stream.pop(key, None)
+    StreamObject.set_data(stream, b"")
+
+
+def _resolve(value: Any) -> Any:
+    """Разыменовать косвенную ссылку PDF."""
+    if isinstance(value, IndirectObject):
+        return value.get_object()
+    return value
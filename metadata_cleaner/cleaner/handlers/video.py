@@ -1,8 +1,12 @@
 """Обработчик для видео файлов."""
 
+import dataclasses
+import io
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
 from pathlib import Path
 from typing import Any
 
@@ -10,23 +14,35 @@ from hachoir.metadata import extractMetadata
 from hachoir.parser import createParser
 
 from metadata_cleaner.cleaner.errors import BackupError, MetadataProcessingError
+from metadata_cleaner.cleaner.formats import matroska
 from metadata_cleaner.cleaner.models import CleanResult, CleanStatus, FileJob
 
 from . import BaseHandler
 
+# Контейнеры Matroska очищаются без ffmpeg, на уровне элементов EBML
+MATROSKA_SUFFIXES = (".mkv", ".webm")
+
 
 class VideoHandler(BaseHandler):
     """Обработчик для видео файлов."""
 
     def clean(self, job: FileJob) -> CleanResult:
         """Очистить метаданные из видео файла."""
+        is_matroska = job.file_path.suffix.lower() in MATROSKA_SUFFIXES
+        if job.source_data is not None and not is_matroska:
+            return self._clean_buffer(job)
+
         try:
             # Создание бэкапа
             if not self._create_backup(job):
                 msg = "Не удалось создать резервную копию"
                 raise BackupError(msg)
 
-            cleaned_fields = self._clean_video_metadata(job)
+            if is_matroska:
+                cleaned_fields = self._clean_matroska_metadata(job)
+            else:
+                cleaned_fields = self._clean_video_metadata(job)
+            self._sync_output(job)
 
             return CleanResult(
                 job=job,
@@ -43,18 +59,52 @@ class VideoHandler(BaseHandler):
                 error=e,
             )
 
+    def _clean_buffer(self, job: FileJob) -> CleanResult:
+        """Очистить видео из памяти.
+
+        hachoir и ffmpeg работают только с файлами (MP4/MOV требуют
+        произвольного доступа), поэтому содержимое записывается во временный
+        каталог, а результат читается обратно в память.
+        """
+        with tempfile.TemporaryDirectory(prefix="metadata-cleaner-") as temp_dir:
+            source = Path(temp_dir) / job.file_path.name
+            output = source.with_name(f"{source.stem}_cleaned{source.suffix}")
+            with job.stage("read"):
+                source.write_bytes(job.source_data)
+            # Временная задача разделяет с исходной замеры этапов и наблюдателей
+            spooled = dataclasses.replace(
+                job,
+                file_path=source,
+                output_path=output,
+                backup_enabled=False,
+                fsync=False,
+                source_data=None,
+                defer_write=False,
+            )
+            result = self.clean(spooled)
+            result.job = job
+            if result.is_success:
+                data = output.read_bytes() if output.exists() else job.source_data
+                if job.defer_write:
+                    job.pending_write = (job.output_path or job.file_path, data)
+                else:
+                    self._store_output(job, job.output_path or job.file_path, data)
+                    self._sync_output(job)
+        return result
+
     def _clean_video_metadata(self, job: FileJob) -> dict[str, Any]:
         """Очистить метаданные из видео файла."""
         cleaned_fields = {}
 
         try:
             # Проверяем что файл является валидным видео
-            parser = createParser(str(job.file_path))
-            if not parser:
-                msg = f"Не удалось распознать видео файл: {job.file_path.name}"
-                raise MetadataProcessingError(msg)
-                
-            metadata = extractMetadata(parser)
+            with job.stage("read"):
+                parser = createParser(str(job.file_path))
+                if not parser:
+                    msg = f"Не удалось распознать видео файл: {job.file_path.name}"
+                    raise MetadataProcessingError(msg)
+
+                metadata = extractMetadata(parser)
             if metadata:
                 # Сохранение информации об удаляемых метаданных
                 metadata_lines = metadata.exportPlaintext()
@@ -78,7 +128,8 @@ class VideoHandler(BaseHandler):
                 # Fallback: просто копируем файл с предупреждением
                 output_path = job.output_path or job.file_path
                 if str(output_path) != str(job.file_path):
-                    shutil.copy2(str(job.file_path), str(output_path))
+                    with job.stage("write"):
+                        shutil.copy2(str(job.file_path), str(output_path))
                 cleaned_fields["warning"] = "FFmpeg недоступен. Метаданные не удалены."
             else:
                 cleaned_fields["method"] = "FFmpeg - полная очистка метаданных"
@@ -89,6 +140,56 @@ class VideoHandler(BaseHandler):
 
         return cleaned_fields
 
+    def _clean_matroska_metadata(self, job: FileJob) -> dict[str, Any]:
+        """Очистить метаданные из MKV/WebM без перекодирования и ремукса.
+
+        При замене файла элементы заменяются на Void того же размера, при
+        создании копии вырезаются с исправлением индекса и точек Cues.
+        """
+        ids = self._matroska_ids(job.clean_fields)
+        output_path = job.output_path or job.file_path
+
+        if job.source_data is not None:
+            with job.stage("transform"):
+                buffer = io.BytesIO()
+                result = matroska.write_compacted(
+                    io.BytesIO(job.source_data), buffer, ids
+                )
+            self._store_output(job, output_path, buffer.getbuffer())
+        elif output_path == job.file_path:
+            with job.stage("transform"), open(job.file_path, "r+b") as stream:
+                result = matroska.scrub(stream, ids)
+        else:
+            with (
+                job.stage("transform"),
+                open(job.file_path, "rb") as source,
+                open(output_path, "wb") as target,
+            ):
+                result = matroska.write_compacted(source, target, ids)
+
+        cleaned_fields: dict[str, Any] = dict.fromkeys(result.names, True)
+        if result.removed_bytes:
+            cleaned_fields["removed_bytes"] = result.removed_bytes
+        return cleaned_fields
+
+    @staticmethod
+    def _matroska_ids(clean_fields: dict[str, Any]) -> frozenset[int]:
+        """Элементы Matroska для удаления по настройкам очистки видео."""
+        ids = matroska.ALWAYS_IDS
+        # Tags содержат произвольные поля: автора, комментарии, место съемки
+        if any(
+            clean_fields.get(name, True)
+            for name in ("author", "comment", "location", "gps_coords")
+        ):
+            ids |= {matroska.TAGS}
+        if clean_fields.get("encoder", True):
+            ids |= matroska.ENCODER_IDS
+        if clean_fields.get("creation_time", True):
+            ids |= matroska.DATE_IDS
+        if clean_fields.get("title", False):
+            ids |= matroska.TITLE_IDS
+        return ids
+
     def _clean_with_ffmpeg(self, job: FileJob) -> bool:
         """Очистить метаданные с помощью ffmpeg."""
         try:
@@ -111,6 +212,8 @@ class VideoHandler(BaseHandler):
                     continue
                     
             if not ffmpeg_cmd:
+                if self.metrics is not None:
+                    self.metrics.record_ffmpeg_unavailable()
                 return False
 
             output_path = job.output_path or job.file_path
@@ -123,22 +226,22 @@ class VideoHandler(BaseHandler):
                 "-map_metadata", "-1",     # Удалить ВСЕ метаданные
                 "-map_chapters", "-1",     # Удалить главы
                 "-c", "copy",              # Копировать без перекодирования
+                "-progress", "pipe:1",     # Прогресс в stdout
+                "-nostats",
                 "-y",                      # Перезаписать без вопросов
                 str(temp_path)             # Временный выходной файл
             ]
 
             # Выполняем команду
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=300  # 5 минут максимум
-            )
+            with job.stage("transform"):
+                returncode = self._run_ffmpeg(job, cmd, timeout=300)  # 5 минут максимум
 
-            if result.returncode == 0:
+            self._record_ffmpeg("success" if returncode == 0 else "failure")
+            if returncode == 0:
                 # Успешно - заменяем оригинал
                 if temp_path.exists():
-                    temp_path.replace(output_path)
+                    with job.stage("write"):
+                        temp_path.replace(output_path)
                     return True
             else:
                 # Удаляем временный файл если он создался
@@ -146,13 +249,56 @@ class VideoHandler(BaseHandler):
                     temp_path.unlink()
                 return False
 
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError, FileNotFoundError, OSError):
+        except subprocess.TimeoutExpired:
+            self._record_ffmpeg("timeout")
             return False
         except Exception:
             return False
         
         return False
 
+    def _run_ffmpeg(self, job: FileJob, cmd: list[str], timeout: float) -> int:
+        """Запустить ffmpeg и передавать прогресс из вывода -progress.
+
+        ffmpeg печатает блоки строк ``key=value``; ``total_size`` — объем уже
+        записанного результата, который при ремуксе сопоставим с размером
+        исходного файла.
+        """
+        bytes_total = job.file_path.stat().st_size
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            for line in process.stdout:
+                key, _, value = line.strip().partition("=")
+                if key == "total_size" and value.isdigit():
+                    job.report_progress(min(int(value), bytes_total), bytes_total)
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+            process.stdout.close()
+
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return returncode
+
+    def _record_ffmpeg(self, outcome: str):
+        """Учесть запуск ffmpeg в метриках."""
+        if self.metrics is not None:
+            self.metrics.record_ffmpeg(outcome)
+
     def _get_ffmpeg_paths(self) -> list[str]:
         """Получить список путей для поиска FFmpeg."""
         paths = []
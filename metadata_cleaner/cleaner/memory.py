@@ -0,0 +1,81 @@
+"""Учет пикового потребления памяти при обработке файлов."""
+
+from __future__ import annotations
+
+import platform
+import tracemalloc
+from dataclasses import dataclass
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+
+def peak_rss_bytes() -> int:
+    """Пиковый RSS текущего процесса в байтах (0, если недоступен)."""
+    if resource is None:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдает килобайты, macOS — байты
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+@dataclass(slots=True)
+class MemoryUsage:
+    """Потребление памяти одной задачей в байтах.
+
+    ``peak_traced`` — пик выделений Python (tracemalloc) сверх уровня на
+    начало задачи. ``rss_delta`` — прирост пикового RSS процесса; он
+    учитывает и буферы C-библиотек (Pillow, pypdf), но становится ненулевым
+    только когда задача превышает предыдущий пик процесса.
+    """
+
+    peak_traced: int = 0
+    rss_delta: int = 0
+
+    @property
+    def peak_traced_mb(self) -> float:
+        return self.peak_traced / MB
+
+    @property
+    def rss_delta_mb(self) -> float:
+        return self.rss_delta / MB
+
+    def as_dict(self) -> dict[str, int]:
+        return {"peak_traced": self.peak_traced, "rss_delta": self.rss_delta}
+
+
+class MemoryProbe:
+    """Контекстный менеджер замера памяти задачи.
+
+    tracemalloc учитывает выделения всех потоков процесса, поэтому замер
+    точен только при последовательной обработке.
+    """
+
+    def __init__(self):
+        self.usage: MemoryUsage | None = None
+        self._started = False
+        self._traced_before = 0
+        self._rss_before = 0
+
+    def __enter__(self) -> MemoryProbe:
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._traced_before = tracemalloc.get_traced_memory()[0]
+        self._rss_before = peak_rss_bytes()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._started:
+            tracemalloc.stop()
+        self.usage = MemoryUsage(
+            peak_traced=max(0, peak - self._traced_before),
+            rss_delta=max(0, peak_rss_bytes() - self._rss_before),
+        )
@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
 from enum import Enum
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from .events import DispatcherObserver
+    from .memory import MemoryUsage
+
 
 class CleanStatus(Enum):
     """Статус очистки файла."""
@@ -28,6 +34,7 @@ class FileType(Enum):
     PDF = "pdf"
     VIDEO = "video"
     SPREADSHEET = "spreadsheet"
+    ARCHIVE = "archive"
     UNKNOWN = "unknown"
 
 
@@ -267,6 +274,35 @@ class CleaningOptions:
     create_backup: bool = True
 
 
+@dataclass(slots=True)
+class StageTimings:
+    """Время этапов обработки файла в секундах."""
+
+    classify: float = 0.0
+    backup: float = 0.0
+    read: float = 0.0
+    transform: float = 0.0
+    write: float = 0.0
+    fsync: float = 0.0
+    verify: float = 0.0
+
+    @property
+    def total(self) -> float:
+        return sum(getattr(self, f.name) for f in fields(self))
+
+    def add(self, stage: str, seconds: float):
+        """Добавить время к этапу."""
+        setattr(self, stage, getattr(self, stage) + seconds)
+
+    def merge(self, other: StageTimings):
+        """Прибавить время всех этапов другого замера (агрегация по пакету)."""
+        for f in fields(self):
+            self.add(f.name, getattr(other, f.name))
+
+    def as_dict(self) -> dict[str, float]:
+        return {f.name: round(getattr(self, f.name), 6) for f in fields(self)}
+
+
 @dataclass
 class FileJob:
     """Задача на очистку файла."""
@@ -276,6 +312,37 @@ class FileJob:
     output_path: Path | None = None
     backup_enabled: bool = True
     clean_fields: dict[str, bool] | None = None
+    fsync: bool = False
+    timings: StageTimings = field(default_factory=StageTimings)
+    # Размер исходного файла, байты
+    size: int = 0
+    # Содержимое файла, прочитанное заранее (конвейер); None — читать с диска
+    source_data: bytes | None = field(default=None, repr=False, compare=False)
+    # Не писать результат на диск в обработчике, а оставить его в pending_write
+    defer_write: bool = False
+    # Отложенная запись: путь и содержимое очищенного файла
+    pending_write: tuple[Path, bytes] | None = field(
+        default=None, repr=False, compare=False
+    )
+    # Получатель событий обработки; None, если наблюдателей нет
+    listener: DispatcherObserver | None = field(default=None, repr=False, compare=False)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Замерить время этапа обработки."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.timings.add(name, seconds)
+            if self.listener is not None:
+                self.listener.on_stage(self, name, seconds)
+
+    def report_progress(self, bytes_done: int, bytes_total: int):
+        """Сообщить наблюдателям о прогрессе обработки."""
+        if self.listener is not None:
+            self.listener.on_progress(self, bytes_done, bytes_total)
 
     def __post_init__(self):
         if self.clean_fields is None:
@@ -304,6 +371,16 @@ class CleanResult:
     cleaned_fields: dict[str, Any] | None = None
     error: Exception | None = None
     processing_time: float = 0.0
+    input_size: int = 0
+    output_size: int = 0
+    # Заполняется только в режиме замера памяти
+    memory: MemoryUsage | None = None
+    # Очищенное содержимое при обработке в памяти (clean_bytes)
+    output_data: bytes | None = field(default=None, repr=False)
+
+    @property
+    def timings(self) -> StageTimings:
+        return self.job.timings
 
     @property
     def is_success(self) -> bool:
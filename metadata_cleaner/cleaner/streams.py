@@ -0,0 +1,157 @@
+"""Потоковый ввод: определение формата по сигнатуре и буферизация потока."""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import io
+import lzma
+import tempfile
+import zipfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import ModuleType
+from typing import BinaryIO
+
+from .memory import MB
+
+# Поток больше этого размера буферизуется во временном файле
+DEFAULT_SPOOL_THRESHOLD = 64 * MB
+
+CHUNK_SIZE = 1024 * 1024
+
+# Бренды ftyp контейнеров HEIF
+_HEIF_BRANDS = {b"heic", b"heix", b"hevc", b"hevx", b"heim", b"heis", b"mif1", b"msf1"}
+
+# Бренды ftyp контейнеров MP4 и QuickTime; прочие (avif, crx, jp2 и т.п.)
+# не распознаются, чтобы не отдавать их обработчику видео
+_MP4_BRANDS = {
+    b"isom", b"iso2", b"iso3", b"iso4", b"iso5", b"iso6", b"mp41", b"mp42",
+    b"mp71", b"avc1", b"dash", b"M4V ", b"M4VH", b"M4VP", b"f4v ", b"3gp4",
+    b"3gp5", b"3gp6", b"3g2a", b"MSNV", b"XAVC",
+}
+_QUICKTIME_BRANDS = {b"qt  "}
+
+# Каталог первой части имени в архиве OOXML → расширение
+_OOXML_DIRS = {"word": "docx", "xl": "xlsx", "ppt": "pptx"}
+
+# Сигнатуры сжатия → (модуль распаковки, расширение сжатого TAR)
+_COMPRESSED_TAR = (
+    (b"\x1f\x8b", gzip, "tar.gz"),
+    (b"BZh", bz2, "tar.bz2"),
+    (b"\xfd7zXZ\x00", lzma, "tar.xz"),
+)
+
+# Сигнатуры в начале файла, по которым формат определяется однозначно
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"%PDF-", "pdf"),
+)
+
+# Заголовку TAR нужен первый блок целиком: магия ustar находится по смещению 257
+_HEADER_SIZE = 512
+
+
+def detect_type(source: bytes | Path) -> str | None:
+    """Определить расширение формата по содержимому (без точки) или None."""
+    if isinstance(source, bytes):
+        header = source[:_HEADER_SIZE]
+    else:
+        with open(source, "rb") as f:
+            header = f.read(_HEADER_SIZE)
+
+    for magic, extension in _SIGNATURES:
+        if header.startswith(magic):
+            return extension
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        # DocType в заголовке EBML отличает WebM от прочих Matroska
+        return "webm" if b"\x42\x82\x84webm" in header else "mkv"
+    if header[4:8] == b"ftyp":
+        return _ftyp_type(header[8:12])
+    if header.startswith(b"PK\x03\x04"):
+        return _detect_ooxml(source)
+    return _detect_tar(source, header)
+
+
+def _ftyp_type(brand: bytes) -> str | None:
+    """Расширение ISO BMFF по основному бренду из ``ftyp``."""
+    if brand in _HEIF_BRANDS:
+        return "heic"
+    if brand in _QUICKTIME_BRANDS:
+        return "mov"
+    return "mp4" if brand in _MP4_BRANDS else None
+
+
+def _detect_tar(source: bytes | Path, header: bytes) -> str | None:
+    """Расширение TAR, в том числе сжатого gzip, bzip2 или xz."""
+    if _is_tar(header):
+        return "tar"
+    for magic, module, extension in _COMPRESSED_TAR:
+        if header.startswith(magic):
+            return extension if _is_compressed_tar(source, module) else None
+    return None
+
+
+def _is_tar(header: bytes) -> bool:
+    return header[257:262] == b"ustar"
+
+
+def _is_compressed_tar(source: bytes | Path, module: ModuleType) -> bool:
+    """Распаковать начало потока и проверить заголовок TAR."""
+    stream = io.BytesIO(source) if isinstance(source, bytes) else source
+    try:
+        with module.open(stream) as f:
+            return _is_tar(f.read(_HEADER_SIZE))
+    except (OSError, EOFError, lzma.LZMAError):
+        return False
+
+
+def _detect_ooxml(source: bytes | Path) -> str | None:
+    """Определить тип документа Office по каталогам внутри ZIP (иначе — zip)."""
+    try:
+        archive = source if isinstance(source, Path) else io.BytesIO(source)
+        with zipfile.ZipFile(archive) as zf:
+            names = zf.namelist()
+    except zipfile.BadZipFile:
+        return None
+    for name in names:
+        extension = _OOXML_DIRS.get(name.split("/", 1)[0])
+        if extension is not None:
+            return extension
+    return "zip"
+
+
+@contextmanager
+def spool(
+    source: BinaryIO, threshold: int = DEFAULT_SPOOL_THRESHOLD
+) -> Iterator[bytes | Path]:
+    """Прочитать поток целиком: в память или, если он больше ``threshold``,
+    во временный файл.
+
+    Возвращает содержимое (bytes) или путь к временному файлу ``stream``,
+    который удаляется при выходе.
+    """
+    buffer = bytearray()
+    while len(buffer) <= threshold:
+        chunk = source.read(CHUNK_SIZE)
+        if not chunk:
+            yield bytes(buffer)
+            return
+        buffer += chunk
+
+    with tempfile.TemporaryDirectory(prefix="metadata-cleaner-") as temp_dir:
+        path = Path(temp_dir) / "stream"
+        with open(path, "wb") as f:
+            f.write(buffer)
+            del buffer[:]
+            while chunk := source.read(CHUNK_SIZE):
+                f.write(chunk)
+        yield path
@@ -5,11 +5,109 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import itertools
+import json
+import shutil
 import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 from pathlib import Path
 
+from .batch import (
+    BatchEngine,
+    CleanerMetrics,
+    DirectoryWalker,
+    TextfileExporter,
+    WalkOptions,
+    iter_file_list,
+    open_file_list,
+    open_sink,
+)
+from .batch.isolation import (
+    IsolatedProcessor,
+    IsolationLimits,
+    default_dispatcher,
+    limits_supported,
+)
+from .batch.pipeline import DEFAULT_PREFETCH_BYTES, DEFAULT_WRITERS, PipelineEngine
+from .batch.reports import ReportSummary, merge_reports
+from .batch.sharding import Shard
+from .batch.sinks import MultiSink
+from .batch.work_queue import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_LEASE,
+    DEFAULT_MAX_ATTEMPTS,
+    QueueWorker,
+    WorkQueue,
+)
+from .batch.watcher import DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE, FolderWatcher, WatchOptions
 from .cleaner import MetadataDispatcher
-from .cleaner.models import CleaningOptions
+from .cleaner.events import DispatcherObserver
+from .cleaner.memory import MB
+from .cleaner.models import (
+    CleaningOptions,
+    CleanResult,
+    CleanStatus,
+    FileJob,
+    FileType,
+    StageTimings,
+)
+from .cleaner.streams import DEFAULT_SPOOL_THRESHOLD
+from .services.settings_service import SettingsService
+
+# Форматы для --type (jpeg и jpg — синонимы)
+STREAM_TYPES = (
+    "jpg", "jpeg", "png", "gif", "heic", "heif", "webp", "tiff", "dng", "docx",
+    "xlsx", "pptx", "pdf", "mp4", "mov", "mkv", "webm", "zip", "tar", "tgz",
+    "tar.gz", "tar.bz2", "tar.xz",
+)
+
+
+@dataclass
+class EngineOptions:
+    """Параметры движка обработки.
+
+    ``pipeline`` включает конвейер, ``isolation`` — обработку в рабочих
+    процессах с лимитами; одновременно их использовать нельзя.
+    """
+
+    jobs: int | None = None
+    type_limits: dict[FileType, int] | None = None
+    fsync: bool = False
+    scrub_xmp: bool = False
+    profile_memory: bool = False
+    isolation: IsolationLimits | None = None
+    pipeline: bool = False
+    prefetch_mb: int = DEFAULT_PREFETCH_BYTES // MB
+    write_threads: int = DEFAULT_WRITERS
+
+    def __post_init__(self):
+        if self.pipeline and self.isolation is not None:
+            msg = "Конвейер нельзя сочетать с изолированной обработкой"
+            raise ValueError(msg)
+
+
+@dataclass
+class ReportOptions:
+    """Вывод запуска: отчеты, файл метрик и строка прогресса."""
+
+    reports: list[str] = field(default_factory=list)
+    metrics_textfile: str | None = None
+    metrics_interval: float = 15.0
+    progress: bool = False
+
+
+def _shard_arg(value: str) -> Shard:
+    """Разбор значения --shard с понятным сообщением argparse об ошибке."""
+    try:
+        return Shard.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
 
 
 def parse_args():
@@ -22,10 +120,155 @@ def parse_args():
   %(prog)s file1.pdf file2.docx file3.jpg
   %(prog)s *.pdf --no-backup
   %(prog)s document.docx --keep-title --keep-subject
+  %(prog)s -r ~/Photos --include "*.jpg" --exclude ".git" --max-depth 3
+  find /data -name "*.pdf" -print0 | %(prog)s --files-from - -0
+  %(prog)s -r /data --report jsonl:run.jsonl --report sqlite:run.db
+  %(prog)s -r /data --metrics-textfile /var/lib/node_exporter/cleaner.prom
+  %(prog)s --stdin --type jpeg < photo.jpg > clean.jpg
+  %(prog)s watch ~/Uploads -r --settle 5
+  %(prog)s -r /data --shard 2/4 --report jsonl:shard2.jsonl
+  %(prog)s merge-reports shard1.jsonl shard2.jsonl shard3.jsonl shard4.jsonl
+  %(prog)s enqueue --queue /nfs/q.db -r /nfs/archive && %(prog)s worker --queue /nfs/q.db
         """,
     )
 
-    parser.add_argument("files", nargs="+", help="Файлы для обработки")
+    parser.add_argument("files", nargs="*", help="Файлы или каталоги для обработки")
+
+    # Режим фильтра stdin → stdout
+    parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Очистить файл из stdin и записать результат в stdout",
+    )
+
+    parser.add_argument(
+        "--type",
+        choices=STREAM_TYPES,
+        type=str.lower,
+        default=None,
+        help="Формат данных в stdin (по умолчанию определяется по содержимому)",
+    )
+
+    parser.add_argument(
+        "--spool-mb",
+        type=int,
+        default=DEFAULT_SPOOL_THRESHOLD // MB,
+        metavar="MB",
+        help="Объем stdin в памяти; больший поток буферизуется во временном файле",
+    )
+
+    # Потоковый список файлов
+    parser.add_argument(
+        "--files-from",
+        metavar="FILE",
+        help="Читать список файлов из FILE ('-' — из stdin)",
+    )
+
+    parser.add_argument(
+        "--null",
+        "-0",
+        action="store_true",
+        help="Элементы списка --files-from разделены NUL, а не переводом строки",
+    )
+
+    # Обход каталогов
+    parser.add_argument(
+        "--recursive", "-r", action="store_true", help="Рекурсивно обходить каталоги"
+    )
+
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Обрабатывать только файлы, подходящие под шаблон (можно повторять)",
+    )
+
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Пропускать файлы и каталоги, подходящие под шаблон (можно повторять)",
+    )
+
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Максимальная глубина вложенности каталогов (0 — без подкаталогов)",
+    )
+
+    parser.add_argument(
+        "--one-file-system",
+        action="store_true",
+        help="Не переходить на другие файловые системы",
+    )
+
+    parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Следовать символическим ссылкам",
+    )
+
+    parser.add_argument(
+        "--scan-threads",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Количество потоков обхода каталогов (по умолчанию 4)",
+    )
+
+    parser.add_argument(
+        "--shard",
+        type=_shard_arg,
+        default=None,
+        metavar="I/N",
+        help="Обработать только часть I из N (по хешу пути относительно корня обхода)",
+    )
+
+    # Параллельная обработка
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Общее число параллельных задач (по умолчанию из настроек)",
+    )
+
+    parser.add_argument(
+        "--image-jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Лимит параллельных задач для изображений",
+    )
+
+    parser.add_argument(
+        "--video-jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Лимит одновременно запущенных процессов ffmpeg (по умолчанию 2)",
+    )
+
+    parser.add_argument(
+        "--document-jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Лимит параллельных задач для Office документов",
+    )
+
+    parser.add_argument(
+        "--pdf-jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Лимит параллельных задач для PDF",
+    )
 
     # Опции очистки
     parser.add_argument(
@@ -59,11 +302,415 @@ def parse_args():
         "--no-backup", action="store_true", help="Не создавать резервные копии"
     )
 
+    # Конвейер
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Читать, очищать и записывать файлы параллельно (конвейер)",
+    )
+
+    parser.add_argument(
+        "--prefetch-mb",
+        type=int,
+        default=DEFAULT_PREFETCH_BYTES // (1024 * 1024),
+        metavar="MB",
+        help="Объем файлов в памяти конвейера (по умолчанию 256)",
+    )
+
+    parser.add_argument(
+        "--write-threads",
+        type=int,
+        default=DEFAULT_WRITERS,
+        metavar="N",
+        help="Количество потоков записи конвейера (по умолчанию 2)",
+    )
+
+    # Изоляция
+    parser.add_argument(
+        "--isolate",
+        action="store_true",
+        help="Обрабатывать каждый файл в отдельном рабочем процессе",
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Лимит времени на файл (включает --isolate, по умолчанию 300)",
+    )
+
+    parser.add_argument(
+        "--cpu-limit",
+        type=int,
+        default=None,
+        metavar="SECONDS",
+        help="Лимит процессорного времени на файл (включает --isolate)",
+    )
+
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        default=None,
+        metavar="MB",
+        help="Лимит адресного пространства рабочего процесса (включает --isolate)",
+    )
+
+    parser.add_argument(
+        "--fsync",
+        action="store_true",
+        help="Сбрасывать каждый записанный файл на диск (fsync)",
+    )
+
+    parser.add_argument(
+        "--scrub-xmp",
+        action="store_true",
+        help="Дополнительно очищать пакеты XMP в результате (без изменения размера)",
+    )
+
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Замерять пиковую память каждого файла (обработка в один поток)",
+    )
+
+    parser.add_argument(
+        "--report",
+        action="append",
+        default=[],
+        metavar="KIND:PATH",
+        help="Записывать результаты в отчет: jsonl:, csv: или sqlite: (можно повторять)",
+    )
+
+    parser.add_argument(
+        "--metrics-textfile",
+        metavar="PATH",
+        help="Записывать метрики Prometheus в файл для textfile-коллектора",
+    )
+
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=15.0,
+        metavar="SECONDS",
+        help="Период обновления файла метрик во время обработки (0 — только в конце)",
+    )
+
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Показывать прогресс обработки текущего файла в stderr",
+    )
+
     parser.add_argument("--verbose", "-v", action="store_true", help="Подробный вывод")
 
     parser.add_argument("--quiet", "-q", action="store_true", help="Тихий режим")
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.stdin:
+        if args.files or args.files_from:
+            parser.error("--stdin нельзя сочетать с файлами и --files-from")
+    elif not args.files and not args.files_from:
+        parser.error("укажите файлы для обработки или --files-from")
+    if args.pipeline and create_isolation_limits(args) is not None:
+        parser.error(
+            "--pipeline нельзя сочетать с --isolate, --timeout, --cpu-limit "
+            "и --memory-limit"
+        )
+    return args
+
+
+def _add_service_arguments(parser: argparse.ArgumentParser):
+    """Общие параметры подкоманд, работающих без списка файлов."""
+    parser.add_argument(
+        "--no-backup", action="store_true", help="Не создавать резервные копии"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Общее число параллельных задач (по умолчанию из настроек)",
+    )
+    parser.add_argument(
+        "--report",
+        action="append",
+        default=[],
+        metavar="KIND:PATH",
+        help="Записывать результаты в отчет: jsonl:, csv: или sqlite: (можно повторять)",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        metavar="PATH",
+        help="Записывать метрики Prometheus в файл для textfile-коллектора",
+    )
+    parser.add_argument(
+        "--fsync",
+        action="store_true",
+        help="Сбрасывать каждый записанный файл на диск (fsync)",
+    )
+    parser.add_argument(
+        "--scrub-xmp",
+        action="store_true",
+        help="Дополнительно очищать пакеты XMP в результате (без изменения размера)",
+    )
+    parser.add_argument("--verbose", "-v", action="store_true", help="Подробный вывод")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Тихий режим")
+
+
+def parse_watch_args(argv: list[str]):
+    """Парсинг аргументов подкоманды watch."""
+    parser = argparse.ArgumentParser(
+        prog="metadata-cleaner-cli watch",
+        description="Очищать файлы по мере их появления в каталоге",
+    )
+    parser.add_argument("directory", type=Path, help="Наблюдаемый каталог")
+    parser.add_argument(
+        "--recursive", "-r", action="store_true", help="Наблюдать и за подкаталогами"
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=DEFAULT_SETTLE,
+        metavar="SECONDS",
+        help="Сколько секунд файл не должен меняться перед очисткой",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        metavar="SECONDS",
+        help="Период опроса каталога, если inotify недоступен",
+    )
+    parser.add_argument(
+        "--no-inotify",
+        action="store_true",
+        help="Всегда опрашивать каталог вместо inotify",
+    )
+    parser.add_argument(
+        "--process-existing",
+        action="store_true",
+        help="Очистить и файлы, уже лежащие в каталоге при запуске",
+    )
+    _add_service_arguments(parser)
+
+    args = parser.parse_args(argv)
+    if not args.directory.is_dir():
+        parser.error(f"каталог не найден: {args.directory}")
+    if args.settle < 0 or args.poll_interval <= 0:
+        parser.error("--settle и --poll-interval должны быть положительными")
+    return args
+
+
+def _service_options(args) -> CleaningOptions:
+    """Опции очистки подкоманд: все поля, как у основной команды по умолчанию."""
+    return CleaningOptions(
+        clean_title=True,
+        clean_subject=True,
+        clean_keywords=True,
+        create_backup=not args.no_backup,
+    )
+
+
+def _service_engine_options(args) -> EngineOptions:
+    """Параметры движка подкоманд watch и worker."""
+    return EngineOptions(jobs=args.jobs, fsync=args.fsync, scrub_xmp=args.scrub_xmp)
+
+
+def _service_report_options(args) -> ReportOptions:
+    """Вывод подкоманд watch и worker."""
+    return ReportOptions(
+        reports=args.report or [], metrics_textfile=args.metrics_textfile
+    )
+
+
+def watch_directory(args):
+    """Запуск наблюдения за каталогом по аргументам подкоманды watch."""
+    watch = WatchOptions(
+        recursive=args.recursive,
+        settle=args.settle,
+        poll_interval=args.poll_interval,
+        use_inotify=not args.no_inotify,
+        process_existing=args.process_existing,
+    )
+    process_files(
+        [args.directory],
+        _service_options(args),
+        args.verbose,
+        args.quiet,
+        engine_options=_service_engine_options(args),
+        report_options=_service_report_options(args),
+        watch=watch,
+    )
+
+
+def parse_enqueue_args(argv: list[str]):
+    """Парсинг аргументов подкоманды enqueue."""
+    parser = argparse.ArgumentParser(
+        prog="metadata-cleaner-cli enqueue",
+        description="Добавить файлы в очередь задач для рабочих процессов",
+    )
+    parser.add_argument("files", nargs="*", help="Файлы или каталоги")
+    parser.add_argument("--queue", required=True, metavar="DB", help="База очереди SQLite")
+    parser.add_argument(
+        "--files-from",
+        metavar="FILE",
+        help="Читать список файлов из FILE ('-' — из stdin)",
+    )
+    parser.add_argument(
+        "--null",
+        "-0",
+        action="store_true",
+        help="Элементы списка --files-from разделены NUL, а не переводом строки",
+    )
+    parser.add_argument(
+        "--recursive", "-r", action="store_true", help="Рекурсивно обходить каталоги"
+    )
+    args = parser.parse_args(argv)
+    if not args.files and not args.files_from:
+        parser.error("укажите файлы для обработки или --files-from")
+    return args
+
+
+def enqueue_files(args):
+    """Добавление файлов в очередь по аргументам подкоманды enqueue."""
+    dispatcher = MetadataDispatcher(SettingsService())
+    walk_options = WalkOptions() if args.recursive else None
+    with ExitStack() as stack:
+        files = args.files
+        if args.files_from:
+            stream = stack.enter_context(open_file_list(args.files_from))
+            files = itertools.chain(files, iter_file_list(stream, args.null))
+        work_queue = stack.enter_context(WorkQueue(args.queue))
+        added = work_queue.enqueue(
+            iter_input_paths(files, walk_options, dispatcher.get_supported_extensions())
+        )
+        counts = work_queue.counts()
+    print(f"Добавлено задач: {added}; в очереди: {counts['pending']}")
+
+
+def parse_worker_args(argv: list[str]):
+    """Парсинг аргументов подкоманды worker."""
+    parser = argparse.ArgumentParser(
+        prog="metadata-cleaner-cli worker",
+        description="Обрабатывать задачи из очереди до ее опустошения",
+    )
+    parser.add_argument("--queue", required=True, metavar="DB", help="База очереди SQLite")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        metavar="N",
+        help="Сколько задач брать из очереди за раз",
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=DEFAULT_LEASE,
+        metavar="SECONDS",
+        help="Срок аренды задач; задачи упавшего процесса выдаются снова по истечении",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+        metavar="N",
+        help="После стольких истекших аренд задача считается ошибочной",
+    )
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="Не завершаться на пустой очереди, ждать новых задач",
+    )
+    _add_service_arguments(parser)
+
+    args = parser.parse_args(argv)
+    if not Path(args.queue).is_file():
+        parser.error(f"очередь не найдена: {args.queue}")
+    if args.lease <= 0:
+        parser.error("--lease должен быть положительным")
+    return args
+
+
+def run_worker(args):
+    """Запуск рабочего процесса очереди по аргументам подкоманды worker."""
+    with WorkQueue(args.queue, args.lease, args.max_attempts) as work_queue:
+        process_files(
+            [],
+            _service_options(args),
+            args.verbose,
+            args.quiet,
+            engine_options=_service_engine_options(args),
+            report_options=_service_report_options(args),
+            worker=QueueWorker(work_queue, batch_size=args.batch_size, wait=args.wait),
+        )
+        if not args.quiet:
+            counts = work_queue.counts()
+            print(
+                f"Очередь: {counts['done']} готово, {counts['failed']} ошибок, "
+                f"{counts['pending'] + counts['leased']} осталось"
+            )
+
+
+def parse_merge_args(argv: list[str]):
+    """Парсинг аргументов подкоманды merge-reports."""
+    parser = argparse.ArgumentParser(
+        prog="metadata-cleaner-cli merge-reports",
+        description="Объединить отчеты нескольких запусков и вывести общие итоги",
+    )
+    parser.add_argument(
+        "reports", nargs="+", metavar="KIND:PATH", help="Отчеты jsonl:, csv: или sqlite:"
+    )
+    parser.add_argument(
+        "--output",
+        metavar="KIND:PATH",
+        help="Записать все записи в один отчет",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Вывести итоги в формате JSON"
+    )
+    return parser.parse_args(argv)
+
+
+def merge_report_files(args):
+    """Объединение отчетов по аргументам подкоманды merge-reports."""
+    with ExitStack() as stack:
+        output = stack.enter_context(open_sink(args.output)) if args.output else None
+        summary = merge_reports(args.reports, output)
+    if args.json:
+        print(json.dumps(summary.as_dict(), ensure_ascii=False, indent=2))
+    else:
+        _print_summary(summary)
+
+
+def _print_summary(summary: ReportSummary):
+    """Вывести общие итоги объединенных отчетов."""
+    for spec, count in summary.per_report.items():
+        print(f"{spec}: {count} записей")
+    statuses = summary.statuses
+    errors = summary.records - statuses["success"] - statuses["skipped"]
+    print(
+        f"\nРезультат: {statuses['success']} обработано, "
+        f"{statuses['skipped']} пропущено, {errors} ошибок"
+    )
+    types = ", ".join(f"{name}: {count}" for name, count in summary.file_types.most_common())
+    print(f"Типы файлов: {types}")
+    print(
+        f"Объем: {summary.input_bytes / MB:.1f} МБ → {summary.output_bytes / MB:.1f} МБ, "
+        f"время обработки {summary.processing_time:.2f} с"
+    )
+    if summary.duplicates:
+        print(f"Повторяющихся путей: {summary.duplicates}")
+
+
+# Подкоманды: имя → (парсер аргументов, обработчик)
+SUBCOMMANDS = {
+    "watch": (parse_watch_args, watch_directory),
+    "enqueue": (parse_enqueue_args, enqueue_files),
+    "worker": (parse_worker_args, run_worker),
+    "merge-reports": (parse_merge_args, merge_report_files),
+}
 
 
 def create_options(args) -> CleaningOptions:
@@ -82,72 +729,349 @@ def create_options(args) -> CleaningOptions:
     )
 
 
+def create_walk_options(args) -> WalkOptions | None:
+    """Создание параметров обхода каталогов из аргументов."""
+    if not args.recursive:
+        return None
+    return WalkOptions(
+        include=args.include,
+        exclude=args.exclude,
+        max_depth=args.max_depth,
+        one_file_system=args.one_file_system,
+        follow_symlinks=args.follow_symlinks,
+        threads=args.scan_threads,
+    )
+
+
+def create_type_limits(args) -> dict[FileType, int]:
+    """Создание лимитов параллельности по типам файлов из аргументов."""
+    limits = {
+        FileType.IMAGE: args.image_jobs,
+        FileType.VIDEO: args.video_jobs,
+        FileType.DOCUMENT: args.document_jobs,
+        FileType.PDF: args.pdf_jobs,
+    }
+    return {file_type: limit for file_type, limit in limits.items() if limit}
+
+
+def create_engine_options(args) -> EngineOptions:
+    """Создание параметров движка обработки из аргументов."""
+    return EngineOptions(
+        jobs=args.jobs,
+        type_limits=create_type_limits(args),
+        fsync=args.fsync,
+        scrub_xmp=args.scrub_xmp,
+        profile_memory=args.profile_memory,
+        isolation=create_isolation_limits(args),
+        pipeline=args.pipeline,
+        prefetch_mb=args.prefetch_mb,
+        write_threads=args.write_threads,
+    )
+
+
+def create_report_options(args) -> ReportOptions:
+    """Создание параметров вывода запуска из аргументов."""
+    return ReportOptions(
+        reports=args.report or [],
+        metrics_textfile=args.metrics_textfile,
+        metrics_interval=args.metrics_interval,
+        progress=args.progress,
+    )
+
+
+def create_isolation_limits(args) -> IsolationLimits | None:
+    """Создание лимитов изолированной обработки из аргументов."""
+    if not (args.isolate or args.timeout or args.cpu_limit or args.memory_limit):
+        return None
+    limits = IsolationLimits(cpu_seconds=args.cpu_limit, memory_mb=args.memory_limit)
+    if args.timeout:
+        limits.timeout = args.timeout
+    return limits
+
+
+def iter_input_paths(
+    paths: Iterable[str | Path],
+    walk_options: WalkOptions | None = None,
+    supported_extensions: set[str] | None = None,
+    shard: Shard | None = None,
+) -> Iterator[Path]:
+    """Развернуть входные пути в поток файлов, обходя каталоги при -r.
+
+    С ``shard`` файлы каталогов отбираются по пути относительно каталога, а
+    явно указанные файлы — по пути в том виде, в каком он передан.
+    """
+    walker = None
+    if walk_options is not None:
+        if supported_extensions and walk_options.extensions is None:
+            walk_options.extensions = supported_extensions
+        if walk_options.shard is None:
+            walk_options.shard = shard
+        walker = DirectoryWalker(walk_options)
+
+    for item in paths:
+        path = Path(item)
+        if walker is not None and path.is_dir():
+            yield from walker.walk(path)
+        elif shard is None or shard.owns(path.as_posix()):
+            yield path
+
+
 def process_files(
-    files: list[str],
+    files: Iterable[str | Path],
     options: CleaningOptions,
     verbose: bool = False,
     quiet: bool = False,
+    *,
+    engine_options: EngineOptions | None = None,
+    report_options: ReportOptions | None = None,
+    walk_options: WalkOptions | None = None,
+    watch: WatchOptions | None = None,
+    worker: QueueWorker | None = None,
+    shard: Shard | None = None,
 ):
-    """Обработка списка файлов."""
-    from .services.settings_service import SettingsService
-    
+    """Обработка потока файлов.
+
+    ``options`` передаются каждой задаче любого движка (в том числе рабочим
+    процессам). С ``watch`` единственный элемент ``files`` — наблюдаемый
+    каталог, а файлы обрабатываются по мере появления до прерывания
+    (Ctrl+C). С ``worker`` файлы берутся из очереди задач, а ``files`` не
+    используется.
+    """
+    settings = engine_options or EngineOptions()
+    output = report_options or ReportOptions()
+    jobs = settings.jobs
+    type_limits = settings.type_limits
+    isolation = settings.isolation
+
     settings_service = SettingsService()
     dispatcher = MetadataDispatcher(settings_service)
+    dispatcher.fsync_output = settings.fsync
+    dispatcher.scrub_xmp = settings.scrub_xmp
+    if settings.profile_memory:
+        # tracemalloc общий для процесса: замер точен только без параллельности
+        dispatcher.profile_memory = True
+        jobs = 1
+        type_limits = None
+    if output.progress and not quiet:
+        dispatcher.add_observer(ProgressPrinter())
+    if settings.pipeline:
+        engine = PipelineEngine(
+            dispatcher,
+            jobs=jobs,
+            type_limits=type_limits,
+            prefetch_bytes=settings.prefetch_mb * MB,
+            writers=settings.write_threads,
+            options=options,
+        )
+    else:
+        # Изолированная обработка идет в рабочих процессах, конвейер не нужен
+        engine = BatchEngine(
+            dispatcher, jobs=jobs, type_limits=type_limits, options=options
+        )
+
+    counts: Counter[CleanStatus] = Counter()
+
+    def report_walk_error(path: Path, error: OSError):
+        if not quiet:
+            print(f"Ошибка доступа: {path}: {error}")
 
-    total_files = len(files)
-    processed = 0
-    skipped = 0
-    errors = 0
+    if walk_options is not None and walk_options.on_error is None:
+        walk_options.on_error = report_walk_error
+
+    watcher = None
+    paths: Iterable[Path] = ()
+    if worker is not None:
+        worker.engine = engine
+        if not quiet:
+            print(f"Обработка очереди {worker.queue.path} ({worker.worker_id})...")
+    elif watch is not None:
+        if watch.extensions is None:
+            watch.extensions = dispatcher.get_supported_extensions()
+        (directory,) = files
+        watcher = FolderWatcher(directory, watch)
+        paths = watcher.iter_files()
+        if not quiet:
+            print(f"Наблюдение за {directory} (Ctrl+C — остановка)...")
+    else:
+        if not quiet:
+            if walk_options is None and isinstance(files, list | tuple):
+                print(f"Обработка {len(files)} файлов...")
+            else:
+                print("Обработка файлов...")
+        paths = iter_input_paths(
+            files, walk_options, dispatcher.get_supported_extensions(), shard
+        )
+
+    with ExitStack() as stack:
+        if isolation is not None:
+            if (isolation.cpu_seconds or isolation.memory_mb) and not limits_supported():
+                print("Лимиты CPU и памяти недоступны на этой платформе")
+            factory = functools.partial(
+                default_dispatcher,
+                fsync_output=settings.fsync,
+                profile_memory=settings.profile_memory,
+                scrub_xmp=settings.scrub_xmp,
+            )
+            engine.process = stack.enter_context(
+                IsolatedProcessor(
+                    engine.jobs,
+                    isolation,
+                    factory,
+                    dispatcher=dispatcher,
+                    options=options,
+                )
+            )
+        if output.metrics_textfile:
+            metrics = CleanerMetrics()
+            dispatcher.attach_metrics(metrics)
+            exporter = TextfileExporter(
+                metrics, output.metrics_textfile, output.metrics_interval
+            )
+            stack.enter_context(exporter)
+        sinks = [open_sink(spec) for spec in output.reports]
+        sink = stack.enter_context(MultiSink(sinks))
+        results = worker.run() if worker is not None else engine.run(paths)
+        try:
+            for result in results:
+                if watcher is not None:
+                    watcher.mark_done(result)
+                sink.write(result)
+                counts[result.status] += 1
+                if not quiet:
+                    _print_result(result, verbose)
+        except KeyboardInterrupt:
+            # Для наблюдения прерывание — штатное завершение
+            if watcher is None:
+                raise
+        finally:
+            if watcher is not None:
+                watcher.close()
+            # Рабочий очереди при закрытии возвращает незавершенные задачи
+            results.close()
 
     if not quiet:
-        print(f"Обработка {total_files} файлов...")
+        processed = counts[CleanStatus.SUCCESS]
+        skipped = counts[CleanStatus.SKIPPED]
+        errors = counts.total() - processed - skipped
+        print(f"\nРезультат: {processed} обработано, {skipped} пропущено, {errors} ошибок")
+        if verbose:
+            _print_stage_totals(engine.stage_totals)
 
-    for file_path in files:
-        path = Path(file_path)
 
-        if not path.exists():
-            if not quiet:
-                print(f"Ошибка: Файл не найден: {file_path}")
-            errors += 1
-            continue
+def _print_result(result: CleanResult, verbose: bool):
+    """Вывести результат обработки файла."""
+    file_path = str(result.job.file_path)
 
-        if not dispatcher.is_supported(file_path):
-            if verbose and not quiet:
-                print(f"Пропущен неподдерживаемый файл: {file_path}")
-            skipped += 1
-            continue
+    if result.status == CleanStatus.SUCCESS:
+        memory = ""
+        if result.memory is not None:
+            memory = (
+                f" (пик {result.memory.peak_traced_mb:.1f} МБ,"
+                f" RSS +{result.memory.rss_delta_mb:.1f} МБ)"
+            )
+        print(f"✓ Обработан: {file_path}{memory}")
+    elif result.status == CleanStatus.SKIPPED:
+        if verbose:
+            print(f"Пропущен: {result.message}")
+    else:
+        print(f"✗ Ошибка в файле {file_path}: {result.message}")
 
-        try:
-            if verbose and not quiet:
-                print(f"Обработка: {file_path}")
 
-            result = dispatcher.process_file_with_options(file_path, options)
+class ProgressPrinter(DispatcherObserver):
+    """Строка прогресса обрабатываемого файла в stderr."""
 
-            if result.status.value == "success":
-                if not quiet:
-                    print(f"✓ Обработан: {file_path}")
-                processed += 1
-            else:
-                if not quiet:
-                    print(f"✗ Ошибка в файле {file_path}: {result.message}")
-                errors += 1
+    # Не чаще одного обновления строки за интервал, секунды
+    MIN_INTERVAL = 0.2
 
-        except Exception as e:
-            if not quiet:
-                print(f"✗ Исключение при обработке {file_path}: {e}")
-            errors += 1
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self._lock = threading.Lock()
+        self._last_update = 0.0
+        self._width = 0
+
+    def on_progress(self, job: FileJob, bytes_done: int, bytes_total: int):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_update < self.MIN_INTERVAL:
+                return
+            self._last_update = now
+            percent = bytes_done * 100 // bytes_total if bytes_total else 0
+            columns = shutil.get_terminal_size().columns - 1
+            line = f"{job.file_path.name}: {percent:3d}% ({bytes_done // 1024} КБ)"
+            self._write(line[:columns])
+
+    def on_job_end(self, result: CleanResult):
+        with self._lock:
+            self._write("")
+
+    def _write(self, line: str):
+        # Старая строка затирается пробелами, если новая короче
+        padding = " " * max(0, self._width - len(line))
+        self.stream.write(f"\r{line}{padding}\r{line}")
+        self.stream.flush()
+        self._width = len(line)
 
-    if not quiet:
-        print(f"\nРезультат: {processed} обработано, {skipped} пропущено, {errors} ошибок")
+
+def _print_stage_totals(stage_totals: dict[FileType, StageTimings]):
+    """Вывести суммарное время этапов по типам файлов."""
+    if stage_totals:
+        print("Время этапов:")
+    for file_type, timings in sorted(stage_totals.items(), key=lambda item: item[0].value):
+        stages = ", ".join(
+            f"{name} {seconds:.3f}с" for name, seconds in timings.as_dict().items() if seconds
+        )
+        print(f"  {file_type.value}: {timings.total:.3f}с ({stages})")
+
+
+def process_stdin(
+    type_hint: str | None = None, spool_threshold: int = DEFAULT_SPOOL_THRESHOLD
+) -> bool:
+    """Очистить файл из stdin и записать результат в stdout (режим фильтра).
+
+    Сообщения выводятся только в stderr, чтобы не смешиваться с данными.
+    """
+    dispatcher = MetadataDispatcher(SettingsService())
+    try:
+        result = dispatcher.clean_stream(
+            sys.stdin.buffer, sys.stdout.buffer, type_hint, spool_threshold
+        )
+        sys.stdout.buffer.flush()
+    except Exception as e:
+        print(f"Критическая ошибка: {e}", file=sys.stderr)
+        return False
+    if not result.is_success:
+        print(f"✗ Ошибка: {result.message}", file=sys.stderr)
+    return result.is_success
 
 
 def main():
     """Главная функция CLI."""
     try:
+        if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+            parse, run = SUBCOMMANDS[sys.argv[1]]
+            run(parse(sys.argv[2:]))
+            return
         args = parse_args()
+        if args.stdin:
+            sys.exit(0 if process_stdin(args.type, args.spool_mb * MB) else 1)
         options = create_options(args)
 
-        process_files(args.files, options, args.verbose, args.quiet)
+        with ExitStack() as stack:
+            files = args.files
+            if args.files_from:
+                stream = stack.enter_context(open_file_list(args.files_from))
+                files = itertools.chain(files, iter_file_list(stream, args.null))
+
+            process_files(
+                files,
+                options,
+                args.verbose,
+                args.quiet,
+                engine_options=create_engine_options(args),
+                report_options=create_report_options(args),
+                walk_options=create_walk_options(args),
+                shard=args.shard,
+            )
 
     except KeyboardInterrupt:
         print("\nОперация прервана пользователем")
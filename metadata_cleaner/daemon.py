@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+
+"""Фоновый сервис очистки с постоянно загруженными обработчиками.
+
+Каждый запуск CLI тратит время на старт интерпретатора, импорт Pillow,
+pypdf, openpyxl и hachoir и чтение настроек. Сервис делает это один раз и
+принимает задачи по Unix-сокету или локальному HTTP.
+
+Протокол Unix-сокета — строки JSON: один запрос и один ответ на строку,
+соединение можно использовать для многих запросов. Запрос::
+
+    {"id": 1, "path": "/data/photo.jpg"}
+    {"id": 2, "data": "<base64>", "type": "jpg"}
+    {"op": "ping"}
+
+Ответ — запись результата как в отчетах (см. ``result_to_record``) с полем
+``ok``; для содержимого в запросе очищенные данные возвращаются в ``data``
+(base64). HTTP принимает тот же JSON в ``POST /clean``, ``GET /health``
+проверяет доступность.
+
+Права на файл сокета не защищают HTTP: к порту может подключиться любой
+локальный пользователь или страница в браузере. Поэтому ``POST /clean``
+требует заголовок ``Authorization: Bearer <токен>`` (токен создается при
+запуске и записывается в файл, доступный только владельцу), тип
+``application/json`` и отсутствие заголовка ``Origin``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import binascii
+import hmac
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import secrets
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from .batch.sinks import result_to_record
+from .cleaner import MetadataDispatcher
+from .cleaner.models import CleanResult
+from .cleaner.streams import detect_type
+from .services.settings_service import SettingsService
+
+DEFAULT_SOCKET_NAME = "metadata-cleaner.sock"
+DEFAULT_TIMEOUT = 300.0
+
+# Максимальный размер одного запроса (содержимое передается в base64)
+MAX_REQUEST_BYTES = 512 * 1024 * 1024
+
+UNIX_SOCKETS_SUPPORTED = hasattr(socket, "AF_UNIX") and hasattr(
+    socketserver, "UnixStreamServer"
+)
+
+
+def default_token_path() -> Path:
+    """Файл токена HTTP по умолчанию: рядом с сокетом по умолчанию."""
+    return default_socket_path().with_suffix(".token")
+
+
+def write_token(path: Path, token: str):
+    """Записать токен в файл, доступный только владельцу."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        path.chmod(0o600)
+        f.write(token + "\n")
+
+
+def default_socket_path() -> Path:
+    """Путь сокета по умолчанию: в XDG_RUNTIME_DIR или во временном каталоге."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / DEFAULT_SOCKET_NAME
+    user = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    return Path(tempfile.gettempdir()) / f"metadata-cleaner-{user}.sock"
+
+
+class _InvalidRequestError(Exception):
+    """Запрос нельзя выполнить: ответ содержит текст ошибки."""
+
+
+class CleanerService:
+    """Обработка запросов общим диспетчером с ограничением параллельности."""
+
+    def __init__(self, dispatcher: MetadataDispatcher, jobs: int | None = None):
+        self.dispatcher = dispatcher
+        self.jobs = max(1, jobs or dispatcher.settings_service.get_max_threads())
+        self._slots = threading.BoundedSemaphore(self.jobs)
+
+    def handle(self, request: Any) -> dict[str, Any]:
+        """Выполнить запрос и вернуть ответ."""
+        if not isinstance(request, dict):
+            return self._error(None, "Запрос должен быть объектом JSON")
+        request_id = request.get("id")
+        op = request.get("op", "clean")
+        if op == "ping":
+            return {"id": request_id, "ok": True}
+        if op != "clean":
+            return self._error(request_id, f"Неизвестная операция: {op}")
+        try:
+            result = self._clean(request)
+        except _InvalidRequestError as e:
+            return self._error(request_id, str(e))
+
+        response = {"id": request_id, "ok": True, **result_to_record(result)}
+        if result.output_data is not None:
+            response["data"] = base64.b64encode(result.output_data).decode("ascii")
+        return response
+
+    def _clean(self, request: dict[str, Any]) -> CleanResult:
+        """Очистить содержимое ``data`` или файл ``path`` из запроса."""
+        if "data" in request:
+            try:
+                data = base64.b64decode(request["data"], validate=True)
+            except (binascii.Error, TypeError) as e:
+                msg = f"Некорректные данные base64: {e}"
+                raise _InvalidRequestError(msg) from e
+            type_hint = request.get("type") or detect_type(data)
+            if type_hint is None:
+                msg = "Не удалось определить формат"
+                raise _InvalidRequestError(msg)
+            with self._slots:
+                return self.dispatcher.clean_bytes(data, str(type_hint))
+        if "path" in request:
+            with self._slots:
+                return self.dispatcher.process_file(Path(request["path"]))
+        msg = "Запрос должен содержать path или data"
+        raise _InvalidRequestError(msg)
+
+    def handle_line(self, line: bytes) -> bytes:
+        """Обработать строку JSON и вернуть строку ответа."""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = self._error(None, f"Некорректный JSON: {e}")
+        else:
+            response = self.handle(request)
+        return json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    @staticmethod
+    def _error(request_id: Any, message: str) -> dict[str, Any]:
+        return {"id": request_id, "ok": False, "error": message}
+
+
+class _UnixRequestHandler(socketserver.StreamRequestHandler):
+    """Соединение Unix-сокета: строки JSON до закрытия клиентом."""
+
+    def handle(self):
+        service: CleanerService = self.server.service
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+            if not line:
+                break
+            if len(line) > MAX_REQUEST_BYTES:
+                message = CleanerService._error(None, "Запрос слишком большой")
+                self.wfile.write(json.dumps(message, ensure_ascii=False).encode() + b"\n")
+                break
+            if line.strip():
+                self.wfile.write(service.handle_line(line))
+                self.wfile.flush()
+
+
+if UNIX_SOCKETS_SUPPORTED:
+
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+class _HTTPRequestHandler(BaseHTTPRequestHandler):
+    """HTTP: POST /clean с запросом JSON и GET /health."""
+
+    server_version = "metadata-cleaner"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"ok": True})
+        else:
+            self._send(404, {"ok": False, "error": "Не найдено"})
+
+    def do_POST(self):
+        if self.path != "/clean":
+            self._send(404, {"ok": False, "error": "Не найдено"})
+            return
+        # Браузеры всегда передают Origin в межсайтовых запросах
+        if self.headers.get("Origin") is not None:
+            self._send(403, {"ok": False, "error": "Запросы из браузера запрещены"})
+            return
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.split(";")[0].strip().lower() != "application/json":
+            self._send(415, {"ok": False, "error": "Нужен тип application/json"})
+            return
+        expected = f"Bearer {self.server.token}".encode()
+        provided = self.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(provided, expected):
+            self._send(401, {"ok": False, "error": "Неверный токен"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send(400, {"ok": False, "error": "Некорректный Content-Length"})
+            return
+        if length > MAX_REQUEST_BYTES:
+            self._send(413, {"ok": False, "error": "Запрос слишком большой"})
+            return
+        body = self.server.service.handle_line(self.rfile.read(length))
+        self._send_raw(200, body)
+
+    def _send(self, code: int, payload: dict[str, Any]):
+        self._send_raw(code, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    def _send_raw(self, code: int, body: bytes):
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        # Журнал запросов не нужен: результаты возвращаются клиенту
+        pass
+
+
+class CleanerDaemon:
+    """Серверы Unix-сокета и HTTP поверх одного CleanerService."""
+
+    def __init__(
+        self,
+        service: CleanerService,
+        socket_path: Path | str | None = None,
+        http_port: int | None = None,
+        http_host: str = "127.0.0.1",
+        http_token: str | None = None,
+    ):
+        self.service = service
+        self.socket_path = Path(socket_path) if socket_path else None
+        self.http_port = http_port
+        self.http_host = http_host
+        # Токен для POST /clean; без явного значения создается случайный
+        self.http_token = http_token or secrets.token_urlsafe(32)
+        self._servers: list[socketserver.BaseServer] = []
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def http_address(self) -> tuple[str, int] | None:
+        """Адрес HTTP-сервера (с фактическим портом, если запрошен порт 0)."""
+        for server in self._servers:
+            if isinstance(server, ThreadingHTTPServer):
+                return server.server_address[:2]
+        return None
+
+    def start(self):
+        """Открыть сокеты и запустить серверы в фоновых потоках."""
+        if self.socket_path is not None:
+            if not UNIX_SOCKETS_SUPPORTED:
+                msg = "Unix-сокеты недоступны на этой платформе, используйте --http"
+                raise RuntimeError(msg)
+            self._remove_stale_socket()
+            # Сокет доступен только владельцу
+            old_umask = os.umask(0o177)
+            try:
+                server = _UnixServer(str(self.socket_path), _UnixRequestHandler)
+            finally:
+                os.umask(old_umask)
+            self._add_server(server, "daemon-unix")
+        if self.http_port is not None:
+            server = ThreadingHTTPServer(
+                (self.http_host, self.http_port), _HTTPRequestHandler
+            )
+            server.daemon_threads = True
+            server.token = self.http_token
+            self._add_server(server, "daemon-http")
+
+    def _add_server(self, server: socketserver.BaseServer, name: str):
+        server.service = self.service
+        thread = threading.Thread(target=server.serve_forever, name=name, daemon=True)
+        thread.start()
+        self._servers.append(server)
+        self._threads.append(thread)
+
+    def _remove_stale_socket(self):
+        """Удалить сокет, оставшийся от завершившегося сервиса."""
+        if not self.socket_path.exists():
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self.socket_path))
+        except OSError:
+            self.socket_path.unlink()
+        else:
+            msg = f"Сервис уже запущен: {self.socket_path}"
+            raise RuntimeError(msg)
+        finally:
+            probe.close()
+
+    def stop(self):
+        """Остановить серверы и удалить файл сокета."""
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._servers.clear()
+        self._threads.clear()
+        if self.socket_path is not None:
+            self.socket_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class DaemonClient:
+    """Клиент сервиса по Unix-сокету.
+
+    Если сервис недоступен и ``fallback`` включен, запрос выполняется в
+    текущем процессе; ответ в обоих случаях одинаковый. Соединение
+    переиспользуется между запросами.
+    """
+
+    def __init__(
+        self,
+        socket_path: Path | str | None = None,
+        fallback: bool = True,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.fallback = fallback
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock: socket.socket | None = None
+        self._reader = None
+        self._local: CleanerService | None = None
+
+    def ping(self) -> bool:
+        """Проверить, что сервис запущен."""
+        try:
+            return self._remote({"op": "ping"}).get("ok", False)
+        except OSError:
+            return False
+
+    def clean_path(self, path: Path | str) -> dict[str, Any]:
+        """Очистить файл по пути (режим вывода — из настроек сервиса)."""
+        return self.request({"path": str(Path(path).resolve())})
+
+    def clean_bytes(self, data: bytes, type_hint: str | None = None) -> dict[str, Any]:
+        """Очистить содержимое; очищенные данные — в ``response["data"]``."""
+        payload = {"data": base64.b64encode(data).decode("ascii")}
+        if type_hint:
+            payload["type"] = type_hint
+        response = self.request(payload)
+        if "data" in response:
+            response["data"] = base64.b64decode(response["data"])
+        return response
+
+    def request(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Отправить запрос сервису или выполнить его локально."""
+        try:
+            return self._remote(payload)
+        except OSError:
+            if not self.fallback:
+                raise
+        return self._local_service().handle(payload)
+
+    def _remote(self, payload: dict[str, Any]) -> dict[str, Any]:
+        line = json.dumps(payload).encode("utf-8") + b"\n"
+        with self._lock:
+            # Повтор на случай, если сервис перезапускался и соединение устарело
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(line)
+                    response = self._reader.readline()
+                    if not response:
+                        msg = "Сервис закрыл соединение"
+                        raise ConnectionError(msg)
+                    return json.loads(response)
+                except OSError:
+                    self._disconnect()
+                    if attempt:
+                        raise
+        msg = "Сервис недоступен"
+        raise ConnectionError(msg)
+
+    def _connect(self):
+        if not UNIX_SOCKETS_SUPPORTED:
+            msg = "Unix-сокеты недоступны на этой платформе"
+            raise ConnectionError(msg)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(str(self.socket_path))
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    def _disconnect(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _local_service(self) -> CleanerService:
+        if self._local is None:
+            self._local = CleanerService(MetadataDispatcher(SettingsService()), jobs=1)
+        return self._local
+
+    def close(self):
+        """Закрыть соединение с сервисом."""
+        with self._lock:
+            self._disconnect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def parse_args(argv: list[str] | None = None):
+    """Парсинг аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        description="Фоновый сервис очистки метаданных",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Примеры использования:
+  %(prog)s
+  %(prog)s --socket /run/cleaner.sock --jobs 8
+  %(prog)s --http 8765 --no-socket
+        """,
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help=f"Путь Unix-сокета (по умолчанию {default_socket_path()})",
+    )
+    parser.add_argument(
+        "--no-socket", action="store_true", help="Не открывать Unix-сокет"
+    )
+    parser.add_argument(
+        "--http",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="Принимать запросы по HTTP на 127.0.0.1:PORT",
+    )
+    parser.add_argument(
+        "--token-file",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help=(
+            "Файл, в который записывается токен HTTP "
+            f"(по умолчанию {default_token_path()})"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Число одновременно обрабатываемых файлов (по умолчанию из настроек)",
+    )
+    parser.add_argument(
+        "--fsync",
+        action="store_true",
+        help="Сбрасывать каждый записанный файл на диск (fsync)",
+    )
+    args = parser.parse_args(argv)
+    if args.no_socket and args.http is None:
+        parser.error("укажите --http или уберите --no-socket")
+    return args
+
+
+def main(argv: list[str] | None = None):
+    """Главная функция сервиса."""
+    args = parse_args(argv)
+    dispatcher = MetadataDispatcher(SettingsService())
+    dispatcher.fsync_output = args.fsync
+    service = CleanerService(dispatcher, jobs=args.jobs)
+    socket_path = None if args.no_socket else args.socket or default_socket_path()
+    daemon = CleanerDaemon(service, socket_path=socket_path, http_port=args.http)
+
+    stopped = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopped.set())
+
+    try:
+        daemon.start()
+    except (OSError, RuntimeError) as e:
+        print(f"Не удалось запустить сервис: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if socket_path is not None:
+        print(f"Сокет: {socket_path}")
+    token_path = None
+    if daemon.http_address is not None:
+        host, port = daemon.http_address
+        token_path = args.token_file or default_token_path()
+        write_token(token_path, daemon.http_token)
+        print(f"HTTP: http://{host}:{port}/clean")
+        print(f"Токен HTTP: {token_path}")
+    sys.stdout.flush()
+    try:
+        while not stopped.wait(1.0):
+            pass
+    finally:
+        daemon.stop()
+        if token_path is not None:
+            token_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import asyncio
+import sqlite3
+import time
 from pathlib import Path
 
 import flet as ft
 
+from metadata_cleaner.batch.sinks import open_sink
 from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.events import DispatcherObserver
 from metadata_cleaner.cleaner.models import (
     CleanResult,
     CleanStatus,
@@ -22,6 +26,25 @@ from metadata_cleaner.services.settings_service import SettingsService
 from metadata_cleaner.version import get_version
 
 
+class GuiProgressObserver(DispatcherObserver):
+    """Передает прогресс обработки файла в ProgressCard"""
+
+    # Не чаще одного обновления интерфейса за интервал, секунды
+    MIN_INTERVAL = 0.1
+
+    def __init__(self, app: MetadataCleanerApp):
+        self.app = app
+        self._last_update = 0.0
+
+    def on_progress(self, job: FileJob, bytes_done: int, bytes_total: int):
+        now = time.monotonic()
+        if 0 < bytes_done < bytes_total and now - self._last_update < self.MIN_INTERVAL:
+            return
+        self._last_update = now
+        fraction = bytes_done / bytes_total if bytes_total else 0.0
+        self.app.on_file_progress(job.file_path, fraction)
+
+
 class MetadataCleanerApp:
     def __init__(self, page: ft.Page):
         self.page = page
@@ -29,12 +52,16 @@ class MetadataCleanerApp:
         self.cleaning_results = {}
         self.file_cards = {}
         self.is_processing = False  # Флаг активной обработки
+        self.processing_index = 0  # Номер текущего файла при обработке
 
         self.settings = SettingsService()
         self.dispatcher = MetadataDispatcher(settings_service=self.settings)
+        self.dispatcher.add_observer(GuiProgressObserver(self))
         
         # Диалог детальных результатов
-        self.detailed_results_dialog = DetailedResultsDialog()
+        self.detailed_results_dialog = DetailedResultsDialog(
+            on_export=self.export_report
+        )
 
         # Установка языка из настроек
         translator.set_language(self.settings.get_language())
@@ -87,8 +114,11 @@ class MetadataCleanerApp:
         # Настройка файл пикера
         self.file_picker = ft.FilePicker(on_result=self.on_files_picked)
         self.folder_picker = ft.FilePicker(on_result=self.on_folder_picked)
+        self.report_picker = ft.FilePicker(on_result=self.on_report_path_picked)
 
-        self.page.overlay.extend([self.file_picker, self.folder_picker])
+        self.page.overlay.extend(
+            [self.file_picker, self.folder_picker, self.report_picker]
+        )
 
     def build_ui(self):
         """Построение интерфейса"""
@@ -305,12 +335,21 @@ class MetadataCleanerApp:
                 "gif",
                 "heic",
                 "heif",
+                "webp",
+                "tif",
+                "tiff",
+                "dng",
                 "pdf",
                 "docx",
                 "pptx",
                 "xlsx",
                 "mp4",
                 "mov",
+                "mkv",
+                "webm",
+                "zip",
+                "tar",
+                "tgz",
             ],
         )
 
@@ -337,12 +376,21 @@ class MetadataCleanerApp:
                 ".gif",
                 ".heic",
                 ".heif",
+                ".webp",
+                ".tif",
+                ".tiff",
+                ".dng",
                 ".pdf",
                 ".docx",
                 ".pptx",
                 ".xlsx",
                 ".mp4",
                 ".mov",
+                ".mkv",
+                ".webm",
+                ".zip",
+                ".tar",
+                ".tgz",
             }
 
             # Показываем уведомление о начале сканирования
@@ -554,13 +602,14 @@ class MetadataCleanerApp:
 
         total_files = len(self.selected_files)
 
-        for _i, file_path in enumerate(self.selected_files):
-            Path(file_path).name
+        for index, file_path in enumerate(self.selected_files):
+            self.processing_index = index
 
-            # Простое обновление без детальной информации
+            # Детали и прогресс файла приходят от GuiProgressObserver
             self.progress_card.update_progress(
                 translator.get("processing_now"),
-                "",  # Пустая строка вместо деталей
+                "",
+                index / total_files,
             )
             self.page.update()
 
@@ -609,6 +658,14 @@ class MetadataCleanerApp:
         self.page.update()
         self.show_completion_snackbar(successful, total_files)
 
+    def on_file_progress(self, file_path: Path, fraction: float):
+        """Прогресс текущего файла (вызывается из потока обработки)"""
+        if not self.is_processing or not self.selected_files:
+            return
+        overall = (self.processing_index + fraction) / len(self.selected_files)
+        self.progress_card.update_file_progress(file_path.name, fraction, overall)
+        self.page.update()
+
     def show_completion_snackbar(self, successful: int, total: int):
         """Показ уведомления о завершении"""
         if successful == total:
@@ -634,6 +691,36 @@ class MetadataCleanerApp:
         self.detailed_results_dialog.update_results(self.cleaning_results)
         self.detailed_results_dialog.show(self.page)
 
+    def export_report(self):
+        """Выбор файла для экспорта отчета"""
+        self.report_picker.save_file(
+            dialog_title=translator.get("export_report_dialog_title"),
+            file_name="metadata_cleaner_report.jsonl",
+            allowed_extensions=["jsonl", "csv", "db"],
+        )
+
+    def on_report_path_picked(self, e: ft.FilePickerResultEvent):
+        """Экспорт результатов через те же приемники, что и в CLI"""
+        if not e.path:
+            return
+
+        try:
+            with open_sink(e.path) as sink:
+                for result in self.cleaning_results.values():
+                    sink.write(result)
+            message = translator.get("report_exported", path=e.path)
+            bgcolor = ft.colors.GREEN_100
+        except (OSError, ValueError, sqlite3.Error) as ex:
+            message = translator.get("report_export_failed", error=str(ex))
+            bgcolor = ft.colors.ORANGE_100
+
+        self.page.snack_bar = ft.SnackBar(
+            content=ft.Text(message, color=ft.colors.BLACK87),
+            bgcolor=bgcolor,
+        )
+        self.page.snack_bar.open = True
+        self.page.update()
+
     def toggle_theme(self, e):
         """Переключение темы"""
         # Получаем текущие настройки темы
@@ -724,14 +811,19 @@ class MetadataCleanerApp:
     def get_file_icon(self, file_path: str) -> ft.Icon:
         """Получение иконки в зависимости от типа файла"""
         ext = Path(file_path).suffix.lower()
-        if ext in [".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif"]:
+        if ext in [
+            ".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif", ".webp",
+            ".tif", ".tiff", ".dng",
+        ]:
             return ft.Icon(ft.icons.IMAGE, color=ft.colors.BLUE_GREY_400)
         elif ext in [".docx", ".xlsx", ".pptx"]:
             return ft.Icon(ft.icons.DESCRIPTION, color=ft.colors.BLUE_400)
         elif ext == ".pdf":
             return ft.Icon(ft.icons.PICTURE_AS_PDF, color=ft.colors.RED_400)
-        elif ext in [".mp4", ".mov"]:
+        elif ext in [".mp4", ".mov", ".mkv", ".webm"]:
             return ft.Icon(ft.icons.VIDEOCAM, color=ft.colors.PURPLE_400)
+        elif ext in [".zip", ".tar", ".tgz", ".gz", ".bz2", ".xz"]:
+            return ft.Icon(ft.icons.FOLDER_ZIP, color=ft.colors.AMBER_400)
         else:
             return ft.Icon(ft.icons.INSERT_DRIVE_FILE, color=ft.colors.GREY)
 
@@ -21,10 +21,12 @@ class DetailedResultsDialog(ft.UserControl):
         self,
         results: dict[str, CleanResult] | None = None,
         on_close: Callable | None = None,
+        on_export: Callable | None = None,
     ):
         super().__init__()
         self.results = results or {}
         self.on_close = on_close
+        self.on_export = on_export
         self.dialog = None
 
     def build(self):
@@ -288,7 +290,17 @@ class DetailedResultsDialog(ft.UserControl):
 
     def _build_actions(self) -> list[ft.Control]:
         """Построить кнопки действий"""
+        actions = []
+        if self.on_export and self.results:
+            actions.append(
+                ft.TextButton(
+                    translator.get("export_report"),
+                    on_click=lambda e: self.on_export(),
+                    icon=ft.icons.SAVE_ALT,
+                )
+            )
         return [
+            *actions,
             ft.TextButton(
                 translator.get("close"),
                 on_click=self._close_dialog,
@@ -56,14 +56,19 @@ class FileCard(ft.UserControl):
     def _get_file_icon(self) -> ft.Icon:
         """Получение иконки в зависимости от типа файла"""
         ext = Path(self.file_path).suffix.lower()
-        if ext in [".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif"]:
+        if ext in [
+            ".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif", ".webp",
+            ".tif", ".tiff", ".dng",
+        ]:
             return ft.Icon(ft.icons.IMAGE, color=ft.colors.BLUE_GREY_400)
         elif ext in [".docx", ".xlsx", ".pptx"]:
             return ft.Icon(ft.icons.DESCRIPTION, color=ft.colors.BLUE_400)
         elif ext == ".pdf":
             return ft.Icon(ft.icons.PICTURE_AS_PDF, color=ft.colors.RED_400)
-        elif ext in [".mp4", ".mov"]:
+        elif ext in [".mp4", ".mov", ".mkv", ".webm"]:
             return ft.Icon(ft.icons.VIDEOCAM, color=ft.colors.PURPLE_400)
+        elif ext in [".zip", ".tar", ".tgz", ".gz", ".bz2", ".xz"]:
+            return ft.Icon(ft.icons.FOLDER_ZIP, color=ft.colors.AMBER_400)
         else:
             return ft.Icon(ft.icons.INSERT_DRIVE_FILE, color=ft.colors.GREY)
 
@@ -112,6 +112,16 @@ class ProgressCard(ft.UserControl):
         if hasattr(self, "page") and self.page:
             self._rebuild()
 
+    def update_file_progress(self, filename: str, fraction: float, overall: float):
+        """Обновление прогресса текущего файла и общего прогресса"""
+        self.update_progress(
+            translator.get("processing_now"),
+            translator.get(
+                "file_progress", filename=filename, percent=int(fraction * 100)
+            ),
+            overall,
+        )
+
     def show_success(self, status: str, details: str):
         """Показать успешное завершение"""
         self.status_text.value = status
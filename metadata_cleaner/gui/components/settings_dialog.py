@@ -49,6 +49,7 @@ class SettingsDialog(ft.UserControl):
                     "camera_owner": True,       # Владелец камеры
                     "camera_serial": True,      # Серийный номер камеры
                     "user_comments": True,      # Комментарии пользователя
+                    "mpf_secondary": True,      # Дополнительные кадры MPF
                 },
                 "document": {
                     # Авторские данные
@@ -77,6 +78,7 @@ class SettingsDialog(ft.UserControl):
                     "author": True,             # Автор PDF
                     "creator": True,            # Создатель (программа)
                     "producer": True,           # Производитель PDF
+                    "images": True,             # EXIF/XMP встроенных изображений
                     # Временные данные
                     "created": True,            # Дата создания
                     "modified": True,           # Дата изменения
@@ -401,6 +403,7 @@ class SettingsDialog(ft.UserControl):
                 ("camera_owner", "camera_owner", "camera_owner_desc"),
                 ("camera_serial", "camera_serial", "camera_serial_desc"),
                 ("user_comments", "user_comments", "user_comments_desc"),
+                ("mpf_secondary", "mpf_secondary", "mpf_secondary_desc"),
             ],
             "document": [
                 # Авторские данные
@@ -429,6 +432,7 @@ class SettingsDialog(ft.UserControl):
                 ("author", "author", "author_desc"),
                 ("creator", "creator", "creator_desc"),
                 ("producer", "producer", "producer_desc"),
+                ("images", "images", "images_desc"),
                 # Временные данные
                 ("created", "created", "created_desc"),
                 ("modified", "modified", "modified_desc"),
@@ -1002,6 +1006,7 @@ class SettingsDialog(ft.UserControl):
                     "camera_owner": True,       # Владелец камеры
                     "camera_serial": True,      # Серийный номер камеры
                     "user_comments": True,      # Комментарии пользователя
+                    "mpf_secondary": True,      # Дополнительные кадры MPF
                 },
                 "document": {
                     # Авторские данные
@@ -1030,6 +1035,7 @@ class SettingsDialog(ft.UserControl):
                     "author": True,             # Автор PDF
                     "creator": True,            # Создатель (программа)
                     "producer": True,           # Производитель PDF
+                    "images": True,             # EXIF/XMP встроенных изображений
                     # Временные данные
                     "created": True,            # Дата создания
                     "modified": True,           # Дата изменения
@@ -29,6 +29,7 @@ LOCALIZATION = {
         "preparing_files": "Подготовка к обработке файлов",
         "processing_file_count": "Обрабатываю файл {i}/{total}",
         "file": "Файл: {filename}",
+        "file_progress": "{filename}: {percent}%",
         # File Card
         "file_size": "{size:.2f} KB",
         "status_pending": "Ожидание...",
@@ -47,6 +48,10 @@ LOCALIZATION = {
         "details": "Детали",
         "detailed_results": "Детальные результаты обработки",
         "close": "Закрыть",
+        "export_report": "Экспорт отчета",
+        "export_report_dialog_title": "Сохранить отчет (JSONL, CSV или SQLite)",
+        "report_exported": "Отчет сохранен: {path}",
+        "report_export_failed": "Не удалось сохранить отчет: {error}",
         # Settings Dialog
         "settings": "Настройки",
         "cancel": "Отмена",
@@ -190,6 +195,8 @@ LOCALIZATION = {
         "camera_serial_desc": "Серийные номера камеры и объектива",
         "user_comments": "Комментарии",
         "user_comments_desc": "Пользовательские комментарии",
+        "mpf_secondary": "Дополнительные кадры",
+        "mpf_secondary_desc": "Изображения MPF: стереопары и превью",
         "author": "Автор документа",
         "author_desc": "Имя создателя документа",
         "last_modified_by": "Последний редактор",
@@ -226,6 +233,7 @@ LOCALIZATION = {
         "creator_desc": "Программа создания PDF",
         "producer": "Производитель",
         "producer_desc": "ПО для генерации PDF",
+        "images_desc": "EXIF и XMP встроенных фотографий",
         "encoder": "Энкодер",
         "encoder_desc": "Программа/устройство записи",
         "creation_time": "Дата создания",
@@ -271,6 +279,7 @@ LOCALIZATION = {
         "preparing_files": "Preparing files for processing",
         "processing_file_count": "Processing file {i}/{total}",
         "file": "File: {filename}",
+        "file_progress": "{filename}: {percent}%",
         # File Card
         "file_size": "{size:.2f} KB",
         "status_pending": "Pending...",
@@ -289,6 +298,10 @@ LOCALIZATION = {
         "details": "Details",
         "detailed_results": "Detailed Processing Results",
         "close": "Close",
+        "export_report": "Export report",
+        "export_report_dialog_title": "Save report (JSONL, CSV or SQLite)",
+        "report_exported": "Report saved: {path}",
+        "report_export_failed": "Failed to save report: {error}",
         # Settings Dialog
         "settings": "Settings",
         "cancel": "Cancel",
@@ -432,6 +445,8 @@ LOCALIZATION = {
         "camera_serial_desc": "Camera and lens serial numbers",
         "user_comments": "Comments",
         "user_comments_desc": "User comments",
+        "mpf_secondary": "Extra frames",
+        "mpf_secondary_desc": "MPF images: stereo pairs and previews",
         "author": "Document Author",
         "author_desc": "Document creator's name",
         "last_modified_by": "Last Editor",
@@ -468,6 +483,7 @@ LOCALIZATION = {
         "creator_desc": "PDF creation software",
         "producer": "Producer",
         "producer_desc": "PDF generation software",
+        "images_desc": "EXIF and XMP of embedded photos",
         "encoder": "Encoder",
         "encoder_desc": "Recording software/device",
         "creation_time": "Creation Date",
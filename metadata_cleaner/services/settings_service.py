@@ -71,6 +71,7 @@ class SettingsService:
                     "camera_owner": True,       # Владелец камеры
                     "camera_serial": True,      # Серийный номер камеры
                     "user_comments": True,      # Комментарии пользователя
+                    "mpf_secondary": True,      # Дополнительные кадры MPF
                 },
                 "document": {
                     # Авторские данные
@@ -99,6 +100,7 @@ class SettingsService:
                     "author": True,             # Автор PDF
                     "creator": True,            # Создатель (программа)
                     "producer": True,           # Производитель PDF
+                    "images": True,             # EXIF/XMP встроенных изображений
                     # Временные данные
                     "created": True,            # Дата создания
                     "modified": True,           # Дата изменения
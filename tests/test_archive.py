@@ -0,0 +1,214 @@
+"""Тесты для очистки файлов внутри архивов."""
+
+import io
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.handlers.archive import archive_suffix
+from metadata_cleaner.cleaner.models import CleanStatus, FileType, OutputMode
+from metadata_cleaner.cleaner.streams import detect_type
+from metadata_cleaner.services.settings_service import SettingsService
+
+TEST_FILES = Path(__file__).parent / "test_files"
+
+NOTES = b"plain text member\n" * 100
+
+
+# Тег EXIF с указателем на GPS IFD
+GPS_IFD = 34853
+
+
+def _has_gps(data: bytes) -> bool:
+    with Image.open(io.BytesIO(data)) as image:
+        return GPS_IFD in image.getexif()
+
+
+class TestArchiveHandler(unittest.TestCase):
+    """Тесты для ArchiveHandler."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.mock_settings = mock.Mock(spec=SettingsService)
+        self.mock_settings.get_max_threads.return_value = 2
+        self.mock_settings.get_output_mode.return_value = OutputMode.CREATE_COPY
+        self.mock_settings.get_metadata_to_clean.return_value = {"gps": True}
+        self.dispatcher = MetadataDispatcher(self.mock_settings)
+        self.photo = (TEST_FILES / "test_image.jpeg").read_bytes()
+        self.assertTrue(_has_gps(self.photo))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _make_zip(self, name: str = "bundle.zip") -> Path:
+        path = self.temp_dir / name
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.comment = b"exported by j.doe"
+            zf.writestr("photos/", b"")
+            zf.writestr(
+                zipfile.ZipInfo("photos/photo.jpeg", (2021, 5, 4, 3, 2, 0)), self.photo
+            )
+            info = zipfile.ZipInfo("notes.txt", (2021, 5, 4, 3, 2, 0))
+            info.comment = b"private note"
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, NOTES)
+        return path
+
+    def _make_tar(self, name: str = "bundle.tar.gz") -> Path:
+        path = self.temp_dir / name
+        mode = "w:gz" if name.endswith(("gz", "tgz")) else "w"
+        with tarfile.open(path, mode, format=tarfile.PAX_FORMAT) as tf:
+            for member_name, data in (("photo.jpeg", self.photo), ("notes.txt", NOTES)):
+                info = tarfile.TarInfo(member_name)
+                info.size = len(data)
+                info.uname, info.uid, info.mtime = "jdoe", 1000, 1_600_000_000
+                info.pax_headers = {"SCHILY.xattr.user.origin": "laptop"}
+                tf.addfile(info, io.BytesIO(data))
+        return path
+
+    def test_zip_members_cleaned(self):
+        """Тест: изображения очищаются, прочие члены копируются без изменений."""
+        source = self._make_zip()
+
+        result = self.dispatcher.process_file(source)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        self.assertEqual(result.job.file_type, FileType.ARCHIVE)
+        output = self.temp_dir / "bundle_cleaned.zip"
+        self.assertEqual(result.job.output_path, output)
+        with zipfile.ZipFile(output) as zf:
+            self.assertEqual(
+                zf.namelist(), ["photos/", "photos/photo.jpeg", "notes.txt"]
+            )
+            self.assertEqual(zf.comment, b"")
+            self.assertFalse(_has_gps(zf.read("photos/photo.jpeg")))
+            self.assertEqual(zf.read("notes.txt"), NOTES)
+            notes = zf.getinfo("notes.txt")
+            self.assertEqual(notes.comment, b"")
+            self.assertEqual(notes.date_time, (1980, 1, 1, 0, 0, 0))
+            self.assertEqual(notes.compress_type, zipfile.ZIP_DEFLATED)
+        self.assertIn("archive_comment", result.cleaned_fields)
+        self.assertIn("очищено файлов: 1", result.message)
+        self.assertGreater(result.output_size, 0)
+
+    def test_tar_gz_members_cleaned(self):
+        """Тест очистки tar.gz: члены и атрибуты владельца, времени и PAX."""
+        source = self._make_tar()
+
+        result = self.dispatcher.process_file(source)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        output = self.temp_dir / "bundle_cleaned.tar.gz"
+        with tarfile.open(output, "r:gz") as tf:
+            members = {m.name: m for m in tf.getmembers()}
+            self.assertEqual(list(members), ["photo.jpeg", "notes.txt"])
+            for member in members.values():
+                self.assertEqual((member.uname, member.uid, member.mtime), ("", 0, 0))
+                self.assertEqual(member.pax_headers.get("SCHILY.xattr.user.origin"), None)
+            self.assertFalse(_has_gps(tf.extractfile("photo.jpeg").read()))
+            self.assertEqual(tf.extractfile("notes.txt").read(), NOTES)
+
+    def test_keep_fields(self):
+        """Тест: при отключенной очистке дат и комментариев они сохраняются."""
+        self.mock_settings.get_metadata_to_clean.return_value = {
+            "comments": False,
+            "modified": False,
+        }
+        result = self.dispatcher.process_file(self._make_zip())
+
+        self.assertTrue(result.is_success, result.message)
+        with zipfile.ZipFile(self.temp_dir / "bundle_cleaned.zip") as zf:
+            self.assertEqual(zf.comment, b"exported by j.doe")
+            notes = zf.getinfo("notes.txt")
+            self.assertEqual(notes.comment, b"private note")
+            self.assertEqual(notes.date_time, (2021, 5, 4, 3, 2, 0))
+
+    def test_replace_in_place(self):
+        """Тест замены архива на месте без временных файлов."""
+        self.mock_settings.get_output_mode.return_value = OutputMode.REPLACE
+        source = self._make_tar("bundle.tar")
+
+        result = self.dispatcher.process_file(source)
+
+        self.assertTrue(result.is_success, result.message)
+        self.assertEqual(sorted(p.name for p in self.temp_dir.iterdir()), ["bundle.tar"])
+        with tarfile.open(source) as tf:
+            self.assertFalse(_has_gps(tf.extractfile("photo.jpeg").read()))
+
+    def test_failed_member_kept(self):
+        """Тест: поврежденный член приводит к ошибке, архив не записывается."""
+        path = self.temp_dir / "broken.zip"
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("broken.jpg", b"not a jpeg")
+            zf.writestr("notes.txt", b"hello")
+
+        result = self.dispatcher.process_file(path)
+
+        self.assertEqual(result.status, CleanStatus.ERROR)
+        self.assertIn("не удалось очистить 1: broken.jpg", result.message)
+        self.assertEqual([p.name for p in self.temp_dir.iterdir()], ["broken.zip"])
+
+    def test_failed_member_in_memory(self):
+        """Тест: в памяти неочищенный член тоже дает ошибку."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zf:
+            zf.writestr("broken.jpg", b"not a jpeg")
+
+        result = self.dispatcher.clean_bytes(buffer.getvalue(), "zip")
+
+        self.assertEqual(result.status, CleanStatus.ERROR)
+        self.assertIsNone(result.output_data)
+
+    def test_nested_archive(self):
+        """Тест очистки архива внутри архива."""
+        inner = self._make_zip("inner.zip").read_bytes()
+        outer = self.temp_dir / "outer.zip"
+        with zipfile.ZipFile(outer, "w") as zf:
+            zf.writestr("inner.zip", inner)
+
+        result = self.dispatcher.process_file(outer)
+
+        self.assertTrue(result.is_success, result.message)
+        with zipfile.ZipFile(self.temp_dir / "outer_cleaned.zip") as zf:
+            nested = zipfile.ZipFile(io.BytesIO(zf.read("inner.zip")))
+        self.assertFalse(_has_gps(nested.read("photos/photo.jpeg")))
+
+    def test_clean_bytes(self):
+        """Тест очистки архива в памяти."""
+        data = self._make_tar("bundle.tgz").read_bytes()
+
+        result = self.dispatcher.clean_bytes(data, "tgz")
+
+        self.assertTrue(result.is_success, result.message)
+        with tarfile.open(fileobj=io.BytesIO(result.output_data), mode="r:gz") as tf:
+            self.assertFalse(_has_gps(tf.extractfile("photo.jpeg").read()))
+
+    def test_archive_names(self):
+        """Тест определения архивов по составным расширениям."""
+        self.assertEqual(archive_suffix("Export.TAR.GZ"), ".tar.gz")
+        self.assertIsNone(archive_suffix("notes.gz"))
+        self.assertEqual(
+            self.dispatcher.get_file_type(Path("a.tar.bz2")), FileType.ARCHIVE
+        )
+        self.assertEqual(
+            MetadataDispatcher._cleaned_path(Path("/x/a.tar.xz")),
+            Path("/x/a_cleaned.tar.xz"),
+        )
+
+    def test_detect_type(self):
+        """Тест определения формата архивов по содержимому."""
+        self.assertEqual(detect_type(self._make_zip().read_bytes()), "zip")
+        self.assertEqual(detect_type(self._make_tar().read_bytes()), "tar.gz")
+        self.assertEqual(detect_type(self._make_tar("plain.tar")), "tar")
+        self.assertIsNone(detect_type(b"\x1f\x8b\x08\x00garbage"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+"""Тесты для инфраструктуры бенчмарков."""
+
+import json
+import random
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import piexif
+
+from benchmarks.buffers import compare_modes
+from benchmarks.corpus import GENERATORS, PROFILES, make_jpeg, make_mp4, make_png
+from benchmarks.fake_ffmpeg import FAKE_VERSION
+from benchmarks.fake_ffmpeg import main as fake_ffmpeg_main
+from benchmarks.run import (
+    DEFAULT_BASELINE,
+    DEFAULT_MEMORY_BUDGETS,
+    check_memory_budgets,
+    compare_to_baseline,
+    group_corpus,
+    reference_seconds,
+)
+from metadata_cleaner.cleaner.models import OutputMode
+
+
+class TestCorpus(unittest.TestCase):
+    """Тесты генератора синтетического корпуса."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_jpeg_is_reproducible_and_rich(self):
+        """Тест воспроизводимости JPEG и наличия EXIF/GPS/XMP."""
+        first = self.temp_dir / "a.jpg"
+        second = self.temp_dir / "b.jpg"
+        make_jpeg(first, random.Random("seed"), size=(64, 48))
+        make_jpeg(second, random.Random("seed"), size=(64, 48))
+
+        self.assertEqual(first.read_bytes(), second.read_bytes())
+        exif = piexif.load(str(first))
+        self.assertIn(piexif.GPSIFD.GPSLatitude, exif["GPS"])
+        self.assertIn(b"http://ns.adobe.com/xap/1.0/", first.read_bytes())
+
+    def test_png_text_chunks(self):
+        """Тест наличия текстовых чанков PNG."""
+        path = self.temp_dir / "a.png"
+        make_png(path, random.Random(1), size=(16, 16))
+        data = path.read_bytes()
+        self.assertIn(b"tEXtAuthor", data)
+        self.assertIn(b"iTXt", data)
+
+    def test_mp4_udta(self):
+        """Тест структуры MP4 с атомом udta."""
+        path = self.temp_dir / "a.mp4"
+        make_mp4(path, random.Random(1), mdat_bytes=1000)
+        data = path.read_bytes()
+        self.assertEqual(data[4:8], b"ftyp")
+        self.assertIn(b"udta", data)
+        self.assertIn(b"Benchmark Author", data)
+
+
+class TestFakeFfmpeg(unittest.TestCase):
+    """Тесты заменителя ffmpeg."""
+
+    def test_copies_input_to_output(self):
+        """Тест копирования входного файла в выходной."""
+        with tempfile.TemporaryDirectory() as temp:
+            source = Path(temp) / "in.mp4"
+            target = Path(temp) / "out.mp4"
+            source.write_bytes(b"video")
+            code = fake_ffmpeg_main(
+                ["-i", str(source), "-map_metadata", "-1", "-c", "copy", "-y", str(target)]
+            )
+            self.assertEqual(code, 0)
+            self.assertEqual(target.read_bytes(), b"video")
+
+    def test_version(self):
+        """Тест ответа на -version."""
+        self.assertEqual(fake_ffmpeg_main(["-version"]), 0)
+        self.assertIn("fake", FAKE_VERSION)
+
+
+class TestBufferComparison(unittest.TestCase):
+    """Тесты сравнения очистки с диска и из памяти."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_both_modes_measured(self):
+        """Тест замера обоих режимов без ошибок."""
+        files = []
+        for i in range(2):
+            path = self.temp_dir / f"src{i}.jpg"
+            make_jpeg(path, random.Random(i), size=(32, 24))
+            files.append(str(path))
+
+        metrics = compare_modes(files, self.temp_dir / "work")
+
+        self.assertEqual(metrics["files"], 2)
+        self.assertEqual(metrics["errors"], [])
+        self.assertGreater(metrics["path_files_per_s"], 0)
+        self.assertGreater(metrics["buffer_files_per_s"], 0)
+
+
+class TestBaselineComparison(unittest.TestCase):
+    """Тесты сравнения с базовыми значениями."""
+
+    def test_regressions_detected(self):
+        """Тест обнаружения падения скорости и роста памяти."""
+        baseline = {
+            "image/replace": {"relative_speed": 1.0, "peak_rss_mb": 100.0},
+            "pdf/replace": {"relative_speed": 0.1, "peak_rss_mb": 50.0},
+        }
+        results = {
+            "image/replace": {"relative_speed": 0.6, "peak_rss_mb": 105.0},
+            "pdf/replace": {"relative_speed": 0.09, "peak_rss_mb": 80.0},
+            "video/replace": {"relative_speed": 0.01, "peak_rss_mb": 10.0},
+        }
+
+        regressions = compare_to_baseline(results, baseline, tolerance=0.3)
+
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(regressions[0].startswith("image/replace: relative_speed"))
+        self.assertTrue(regressions[1].startswith("pdf/replace: peak_rss_mb"))
+        self.assertEqual(regressions[2], "video/replace: нет базовых значений")
+
+    def test_absolute_speed_not_compared(self):
+        """Тест: более медленная машина не считается регрессией."""
+        baseline = {"image/replace": {"files_per_s": 100.0, "relative_speed": 1.0}}
+        results = {"image/replace": {"files_per_s": 40.0, "relative_speed": 0.95}}
+
+        self.assertEqual(compare_to_baseline(results, baseline), [])
+
+    def test_reference_seconds(self):
+        """Тест эталонной нагрузки."""
+        self.assertGreater(reference_seconds(repeats=1), 0)
+
+
+class TestMemoryBudgets(unittest.TestCase):
+    """Тесты проверки бюджетов памяти по форматам."""
+
+    def test_budget_violations(self):
+        """Тест обнаружения превышения бюджета отдельным форматом."""
+        results = {
+            "image/replace": {
+                "memory": {
+                    "png": {"peak_traced_mb": 60.0, "rss_delta_mb": 2.0},
+                    "jpg": {"peak_traced_mb": 1.0, "rss_delta_mb": 1.0},
+                }
+            },
+            "video/replace": {"memory": {"mp4": {"peak_traced_mb": 0.1, "rss_delta_mb": 0.0}}},
+        }
+        budgets = {
+            "png": {"peak_traced_mb": 8, "rss_delta_mb": 32},
+            "jpg": {"peak_traced_mb": 4, "rss_delta_mb": 32},
+        }
+
+        violations = check_memory_budgets(results, budgets)
+
+        self.assertEqual(
+            violations,
+            [
+                "image/replace: png peak_traced_mb 60.0 > 8 МБ",
+                "video/replace: mp4 нет бюджета памяти",
+            ],
+        )
+
+    def test_budgets_file_covers_profiles(self):
+        """Тест: бюджеты заданы для каждого профиля корпуса."""
+        budgets = json.loads(DEFAULT_MEMORY_BUDGETS.read_text(encoding="utf-8"))
+        self.assertEqual(set(budgets), set(PROFILES))
+
+    def test_baselines_cover_corpus(self):
+        """Тест: для каждого формата и группы корпуса есть бюджет и база."""
+        budgets = json.loads(DEFAULT_MEMORY_BUDGETS.read_text(encoding="utf-8"))
+        baselines = json.loads(DEFAULT_BASELINE.read_text(encoding="utf-8"))
+        for profile, items in PROFILES.items():
+            with self.subTest(profile=profile):
+                paths = [
+                    Path(f"{item.kind}{GENERATORS[item.kind][1]}") for item in items
+                ]
+                extensions = {path.suffix.lstrip(".") for path in paths}
+                self.assertEqual(extensions - set(budgets[profile]), set())
+                keys = {
+                    f"{group}/{mode.value}"
+                    for group in group_corpus(paths)
+                    for mode in OutputMode
+                }
+                self.assertEqual(keys - set(baselines.get(profile, {})), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+"""Тесты для фонового сервиса очистки."""
+
+import base64
+import json
+import shutil
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.models import OutputMode
+from metadata_cleaner.daemon import (
+    UNIX_SOCKETS_SUPPORTED,
+    CleanerDaemon,
+    CleanerService,
+    DaemonClient,
+)
+from metadata_cleaner.services.settings_service import SettingsService
+
+TEST_FILES = Path(__file__).parent / "test_files"
+
+
+def _service() -> CleanerService:
+    settings = mock.Mock(spec=SettingsService)
+    settings.get_max_threads.return_value = 2
+    settings.get_output_mode.return_value = OutputMode.CREATE_COPY
+    settings.get_metadata_to_clean.return_value = {"creator": True, "gps": True}
+    return CleanerService(MetadataDispatcher(settings))
+
+
+class TestCleanerService(unittest.TestCase):
+    """Тесты обработки запросов."""
+
+    def setUp(self):
+        self.service = _service()
+
+    def test_ping(self):
+        """Тест проверки доступности."""
+        self.assertEqual(self.service.handle({"op": "ping", "id": 7}), {"id": 7, "ok": True})
+
+    def test_inline_data(self):
+        """Тест очистки содержимого из запроса с определением формата."""
+        data = (TEST_FILES / "test_image.jpeg").read_bytes()
+
+        response = self.service.handle({"id": 1, "data": base64.b64encode(data).decode()})
+
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["status"], "success")
+        self.assertEqual(response["file_type"], "image")
+        self.assertTrue(base64.b64decode(response["data"]).startswith(b"\xff\xd8"))
+
+    def test_invalid_requests(self):
+        """Тест ответов на некорректные запросы."""
+        cases = [
+            b"not json",
+            b"[1, 2]",
+            b'{"op": "unknown"}',
+            b'{"id": 3}',
+            b'{"data": "***"}',
+            b'{"data": "cGxhaW4gdGV4dA=="}',
+        ]
+        for line in cases:
+            with self.subTest(line=line):
+                response = json.loads(self.service.handle_line(line))
+                self.assertFalse(response["ok"])
+                self.assertTrue(response["error"])
+
+
+@unittest.skipUnless(UNIX_SOCKETS_SUPPORTED, "нужны Unix-сокеты")
+class TestCleanerDaemon(unittest.TestCase):
+    """Тесты сервиса через Unix-сокет и HTTP."""
+
+    def setUp(self):
+        # Короткий путь: длина пути Unix-сокета ограничена
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="mc"))
+        self.socket_path = self.temp_dir / "d.sock"
+        self.daemon = CleanerDaemon(_service(), socket_path=self.socket_path, http_port=0)
+        self.daemon.start()
+        self.addCleanup(self.daemon.stop)
+        self.client = DaemonClient(self.socket_path, fallback=False)
+        self.addCleanup(self.client.close)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_socket_permissions(self):
+        """Тест: сокет доступен только владельцу."""
+        self.assertEqual(self.socket_path.stat().st_mode & 0o777, 0o600)
+
+    def test_clean_path_and_bytes(self):
+        """Тест очистки по пути и содержимого через одно соединение."""
+        image = self.temp_dir / "photo.png"
+        Image.new("RGB", (8, 8)).save(image)
+
+        self.assertTrue(self.client.ping())
+        by_path = self.client.clean_path(image)
+        by_data = self.client.clean_bytes(image.read_bytes(), "png")
+
+        self.assertEqual(by_path["status"], "success")
+        self.assertTrue((self.temp_dir / "photo_cleaned.png").exists())
+        self.assertEqual(by_data["status"], "success")
+        self.assertEqual(by_data["data"], (self.temp_dir / "photo_cleaned.png").read_bytes())
+
+    def test_reconnect_after_restart(self):
+        """Тест переподключения клиента после перезапуска сервиса."""
+        self.assertTrue(self.client.ping())
+        self.daemon.stop()
+        self.daemon = CleanerDaemon(_service(), socket_path=self.socket_path)
+        self.daemon.start()
+        self.addCleanup(self.daemon.stop)
+
+        self.assertTrue(self.client.ping())
+
+    def test_second_instance_refused(self):
+        """Тест: второй сервис на том же сокете не запускается."""
+        with self.assertRaises(RuntimeError):
+            CleanerDaemon(_service(), socket_path=self.socket_path).start()
+
+    def test_http(self):
+        """Тест HTTP: проверка доступности и очистка содержимого."""
+        host, port = self.daemon.http_address
+        with urllib.request.urlopen(f"http://{host}:{port}/health") as response:
+            self.assertEqual(json.load(response), {"ok": True})
+
+        data = (TEST_FILES / "test_image.gif").read_bytes()
+        body = json.dumps({"data": base64.b64encode(data).decode(), "type": "gif"})
+        with urllib.request.urlopen(self._post(body)) as response:
+            payload = json.load(response)
+        self.assertEqual(payload["status"], "success")
+
+    def test_http_rejects_unauthorized(self):
+        """Тест HTTP: без токена, не JSON и из браузера запросы отклоняются."""
+        image = self.temp_dir / "photo.png"
+        Image.new("RGB", (8, 8)).save(image)
+        body = json.dumps({"path": str(image)})
+        cases = {
+            401: {"Authorization": "Bearer wrong"},
+            415: {"Content-Type": "text/plain"},
+            403: {"Origin": "https://example.com"},
+        }
+        for code, headers in cases.items():
+            with self.subTest(code=code):
+                with self.assertRaises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(self._post(body, **headers))
+                self.assertEqual(error.exception.code, code)
+                error.exception.close()
+        self.assertFalse((self.temp_dir / "photo_cleaned.png").exists())
+
+    def test_http_bad_content_length(self):
+        """Тест HTTP: некорректный Content-Length отклоняется с кодом 400."""
+        for value in ("abc", "-1"):
+            with self.subTest(value=value):
+                request = self._post("{}", **{"Content-Length": value})
+                with self.assertRaises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(request)
+                self.assertEqual(error.exception.code, 400)
+                error.exception.close()
+
+    def _post(self, body: str, **headers: str) -> urllib.request.Request:
+        host, port = self.daemon.http_address
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.daemon.http_token}",
+            **headers,
+        }
+        return urllib.request.Request(
+            f"http://{host}:{port}/clean",
+            data=body.encode(),
+            headers=headers,
+            method="POST",
+        )
+
+
+class TestDaemonClientFallback(unittest.TestCase):
+    """Тесты запасной обработки в текущем процессе."""
+
+    def test_fallback_without_daemon(self):
+        """Тест: без сервиса запрос выполняется локально."""
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        client = DaemonClient(temp_dir / "missing.sock")
+        client._local = _service()
+        data = (TEST_FILES / "test_image.jpeg").read_bytes()
+
+        response = client.clean_bytes(data)
+
+        self.assertFalse(client.ping())
+        self.assertEqual(response["status"], "success")
+        self.assertTrue(response["data"].startswith(b"\xff\xd8"))
+
+    def test_no_fallback_raises(self):
+        """Тест: без запасного варианта недоступность сервиса — ошибка."""
+        client = DaemonClient("/nonexistent/missing.sock", fallback=False)
+        with self.assertRaises(OSError):
+            client.clean_path("photo.jpg")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,14 @@
 """Тесты для диспетчера метаданных."""
 
+import io
 import unittest
 from pathlib import Path
 from unittest.mock import Mock, patch
 import tempfile
 import shutil
 
+from PIL import Image
+
 from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
 from metadata_cleaner.cleaner.models import (
     CleanStatus,
@@ -45,6 +48,9 @@ class TestMetadataDispatcher(unittest.TestCase):
             ("test.gif", FileType.IMAGE),
             ("test.heic", FileType.IMAGE),
             ("test.heif", FileType.IMAGE),
+            ("test.webp", FileType.IMAGE),
+            ("test.tif", FileType.IMAGE),
+            ("test.dng", FileType.IMAGE),
             ("TEST.JPG", FileType.IMAGE),  # Проверка регистронезависимости
         ]
 
@@ -77,6 +83,8 @@ class TestMetadataDispatcher(unittest.TestCase):
         test_cases = [
             ("test.mp4", FileType.VIDEO),
             ("test.mov", FileType.VIDEO),
+            ("test.mkv", FileType.VIDEO),
+            ("test.webm", FileType.VIDEO),
             ("TEST.MP4", FileType.VIDEO),
         ]
 
@@ -105,9 +113,10 @@ class TestMetadataDispatcher(unittest.TestCase):
         """Тест проверки поддержки файлов."""
         supported_files = [
             "test.jpg", "test.jpeg", "test.png", "test.gif", "test.heic", "test.heif",
+            "test.webp", "test.tif", "test.tiff", "test.dng",
             "test.docx", "test.xlsx", "test.pptx",
             "test.pdf",
-            "test.mp4", "test.mov",
+            "test.mp4", "test.mov", "test.mkv", "test.webm",
         ]
 
         for filename in supported_files:
@@ -128,13 +137,16 @@ class TestMetadataDispatcher(unittest.TestCase):
 
         expected_extensions = {
             # Изображения
-            ".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif",
+            ".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif", ".webp",
+            ".tif", ".tiff", ".dng",
             # Документы
             ".docx", ".xlsx", ".pptx",
             # PDF
             ".pdf",
             # Видео
-            ".mp4", ".mov",
+            ".mp4", ".mov", ".mkv", ".webm",
+            # Архивы
+            ".zip", ".tar", ".tgz", ".tar.gz", ".tbz2", ".tar.bz2", ".txz", ".tar.xz",
         }
 
         self.assertEqual(extensions, expected_extensions)
@@ -256,6 +268,33 @@ class TestDispatcherRealFiles(unittest.TestCase):
         self.assertIsNotNone(result.job.output_path)
         self.assertTrue(result.job.output_path.exists())
 
+    def test_process_records_stage_timings(self):
+        """Тест заполнения processing_time и времени этапов."""
+        for filename in ("test_image.jpeg", "test_image.gif", "test_spreadsheet.xlsx"):
+            with self.subTest(filename=filename):
+                test_file = self._copy_test_file(filename)
+
+                result = self.dispatcher.process_file(test_file)
+
+                self.assertEqual(result.status, CleanStatus.SUCCESS)
+                timings = result.timings
+                self.assertGreater(timings.read, 0)
+                self.assertGreater(timings.write, 0)
+                self.assertGreater(timings.verify, 0)
+                self.assertEqual(timings.fsync, 0)
+                self.assertGreaterEqual(result.processing_time, timings.total)
+
+    def test_process_with_fsync(self):
+        """Тест сброса результата на диск."""
+        test_file = self._copy_test_file("test_image.gif")
+        self.dispatcher.fsync_output = True
+
+        result = self.dispatcher.process_file(test_file)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS)
+        self.assertTrue(result.job.fsync)
+        self.assertGreater(result.timings.fsync, 0)
+
     def test_process_image_jpeg(self):
         """Тест обработки JPEG изображения с расширением .jpeg."""
         test_file = self._copy_test_file("test_image.jpeg")
@@ -403,6 +442,26 @@ class TestDispatcherRealFiles(unittest.TestCase):
         
         self.assertEqual(result.status, CleanStatus.SUCCESS)
 
+    def test_options_reach_job(self):
+        """Тест: опции запуска переопределяют поля очистки и резервную копию."""
+        self.mock_settings.get_output_mode.return_value = OutputMode.BACKUP_AND_OVERWRITE
+        self.mock_settings.get_metadata_to_clean.return_value = {
+            "gps": True,
+            "camera": True,
+            "xmp": True,
+        }
+        test_file = self._copy_test_file("test_image.jpeg")
+        options = CleaningOptions(clean_gps_data=False, create_backup=False)
+
+        result = self.dispatcher.process_file(test_file, options)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        self.assertFalse(result.job.backup_enabled)
+        self.assertFalse(result.job.clean_fields["gps"])
+        self.assertTrue(result.job.clean_fields["camera"])
+        self.assertTrue(result.job.clean_fields["xmp"])
+        self.assertFalse(test_file.with_suffix(".jpeg.bak").exists())
+
     def test_multiple_files_processing(self):
         """Тест обработки нескольких файлов."""
         test_files = [
@@ -445,5 +504,127 @@ class TestDispatcherRealFiles(unittest.TestCase):
                     self.assertEqual(handler_type, expected_handler)
 
 
+class TestCleanBytes(unittest.TestCase):
+    """Тесты очистки содержимого в памяти."""
+
+    def setUp(self):
+        self.mock_settings = Mock(spec=SettingsService)
+        self.mock_settings.get_metadata_to_clean.return_value = {
+            "creator": True,
+            "gps": True,
+        }
+        self.dispatcher = MetadataDispatcher(self.mock_settings)
+        self.test_files_dir = Path(__file__).parent / "test_files"
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_matches_path_based_cleaning(self):
+        """Тест: результат в памяти совпадает с очисткой файла на диске."""
+        self.mock_settings.get_output_mode.return_value = OutputMode.CREATE_COPY
+        source = self.temp_dir / "image.png"
+        Image.new("RGB", (8, 8), (10, 20, 30)).save(source)
+        self.dispatcher.process_file(source)
+        expected = (self.temp_dir / "image_cleaned.png").read_bytes()
+
+        result = self.dispatcher.clean_bytes(source.read_bytes(), "png")
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS)
+        self.assertEqual(result.output_data, expected)
+        self.assertEqual(result.output_size, len(expected))
+        self.assertEqual(result.job.file_type, FileType.IMAGE)
+
+    def test_formats_without_filesystem(self):
+        """Тест: изображения и документы очищаются без обращения к диску."""
+        cases = [
+            ("test_image.jpeg", "jpeg"),
+            ("test_image.gif", ".gif"),
+            ("test_presentation.pptx", "PPTX"),
+        ]
+        for name, type_hint in cases:
+            with self.subTest(name=name):
+                data = (self.test_files_dir / name).read_bytes()
+                with patch("builtins.open", side_effect=AssertionError("open")), patch.object(
+                    Path, "write_bytes", side_effect=AssertionError("write_bytes")
+                ):
+                    result = self.dispatcher.clean_bytes(data, type_hint)
+
+                self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+                self.assertTrue(result.output_data)
+                self.assertEqual(result.input_size, len(data))
+                self.assertIsNone(result.job.source_data)
+
+    def test_xlsx(self):
+        """Тест очистки XLSX в памяти (openpyxl пишет листы через временные файлы)."""
+        data = (self.test_files_dir / "test_spreadsheet.xlsx").read_bytes()
+
+        result = self.dispatcher.clean_bytes(data, "xlsx")
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        self.assertTrue(result.output_data.startswith(b"PK"))
+
+    def test_video_spooled_to_temp_file(self):
+        """Тест очистки видео из памяти через временный файл."""
+        data = (self.test_files_dir / "test_video.mp4").read_bytes()
+
+        result = self.dispatcher.clean_bytes(data, "mp4")
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        self.assertTrue(result.output_data)
+        self.assertEqual(result.job.file_path, Path("stream.mp4"))
+
+    def test_clean_stream(self):
+        """Тест очистки из потока в поток."""
+        source = io.BytesIO((self.test_files_dir / "test_image.jpeg").read_bytes())
+        target = io.BytesIO()
+
+        result = self.dispatcher.clean_stream(source, target, "jpg")
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS)
+        self.assertEqual(target.getvalue(), result.output_data)
+        self.assertTrue(target.getvalue().startswith(b"\xff\xd8"))
+
+    def test_clean_stream_detects_type(self):
+        """Тест определения формата потока по содержимому."""
+        data = (self.test_files_dir / "test_presentation.pptx").read_bytes()
+        target = io.BytesIO()
+
+        result = self.dispatcher.clean_stream(io.BytesIO(data), target)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        self.assertEqual(result.job.file_path.suffix, ".pptx")
+        self.assertEqual(target.getvalue(), result.output_data)
+
+    def test_clean_stream_spooled(self):
+        """Тест: поток больше порога очищается через временный файл."""
+        data = (self.test_files_dir / "test_image.jpeg").read_bytes()
+        expected = self.dispatcher.clean_bytes(data, "jpg").output_data
+        target = io.BytesIO()
+
+        result = self.dispatcher.clean_stream(io.BytesIO(data), target, spool_threshold=16)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        self.assertEqual(target.getvalue(), expected)
+        self.assertEqual(result.output_size, len(expected))
+        self.assertFalse(result.job.file_path.exists())
+
+    def test_clean_stream_unknown_format(self):
+        """Тест потока с нераспознанным форматом."""
+        target = io.BytesIO()
+
+        result = self.dispatcher.clean_stream(io.BytesIO(b"plain text"), target)
+
+        self.assertEqual(result.status, CleanStatus.ERROR)
+        self.assertEqual(target.getvalue(), b"")
+
+    def test_unsupported_type(self):
+        """Тест неподдерживаемого типа."""
+        result = self.dispatcher.clean_bytes(b"data", "txt")
+
+        self.assertEqual(result.status, CleanStatus.ERROR)
+        self.assertIsNone(result.output_data)
+
+
 if __name__ == "__main__":
     unittest.main()
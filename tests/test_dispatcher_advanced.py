@@ -284,12 +284,16 @@ class TestDispatcherAdvanced(unittest.TestCase):
             ("test.gif", "ImageHandler"),
             ("test.heic", "ImageHandler"),
             ("test.heif", "ImageHandler"),
+            ("test.webp", "ImageHandler"),
+            ("test.tiff", "ImageHandler"),
+            ("test.dng", "ImageHandler"),
             ("test.docx", "OfficeHandler"),
             ("test.xlsx", "OfficeHandler"),
             ("test.pptx", "OfficeHandler"),
             ("test.pdf", "PDFHandler"),
             ("test.mp4", "VideoHandler"),
             ("test.mov", "VideoHandler"),
+            ("test.webm", "VideoHandler"),
         ]
         
         for filename, expected_handler in test_cases:
@@ -338,17 +342,20 @@ class TestDispatcherAdvanced(unittest.TestCase):
         
         expected_extensions = {
             # Images
-            ".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif",
+            ".jpg", ".jpeg", ".png", ".gif", ".heic", ".heif", ".webp",
+            ".tif", ".tiff", ".dng",
             # Documents
             ".docx", ".xlsx", ".pptx",
             # PDF
             ".pdf",
             # Video
-            ".mp4", ".mov"
+            ".mp4", ".mov", ".mkv", ".webm",
+            # Archives
+            ".zip", ".tar", ".tgz", ".tar.gz", ".tbz2", ".tar.bz2", ".txz", ".tar.xz",
         }
         
         self.assertEqual(extensions, expected_extensions)
-        self.assertEqual(len(extensions), 12)  # проверяем что всё добавлено
+        self.assertEqual(len(extensions), 26)  # проверяем что всё добавлено
 
     def test_get_file_type_case_insensitive(self):
         """Тест определения типа файла независимо от регистра."""
@@ -0,0 +1,180 @@
+"""Тесты для параллельного движка пакетной обработки."""
+
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from metadata_cleaner.batch.engine import BatchEngine
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.models import CleanResult, CleanStatus, FileJob, FileType
+from metadata_cleaner.services.settings_service import SettingsService
+
+
+class _ConcurrencyProbe:
+    """Фейковая обработка, фиксирующая максимальную параллельность по типам."""
+
+    def __init__(self, dispatcher, delay=0.02):
+        self.dispatcher = dispatcher
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active: dict[FileType, int] = {}
+        self.peak: dict[FileType, int] = {}
+        self.total_active = 0
+        self.total_peak = 0
+
+    def __call__(self, path: Path) -> CleanResult:
+        file_type = self.dispatcher.get_file_type(path)
+        with self.lock:
+            self.active[file_type] = self.active.get(file_type, 0) + 1
+            self.peak[file_type] = max(self.peak.get(file_type, 0), self.active[file_type])
+            self.total_active += 1
+            self.total_peak = max(self.total_peak, self.total_active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active[file_type] -= 1
+            self.total_active -= 1
+        return CleanResult(job=FileJob(file_path=path), status=CleanStatus.SUCCESS)
+
+
+class TestBatchEngine(unittest.TestCase):
+    """Тесты для BatchEngine."""
+
+    def setUp(self):
+        """Создание тестовых файлов."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.mock_settings = mock.Mock(spec=SettingsService)
+        self.mock_settings.get_max_threads.return_value = 3
+        self.dispatcher = MetadataDispatcher(self.mock_settings)
+
+        self.files = []
+        for i in range(8):
+            for ext in (".jpg", ".mp4", ".pdf"):
+                path = self.temp_dir / f"file{i}{ext}"
+                path.write_bytes(b"data")
+                self.files.append(path)
+
+    def tearDown(self):
+        """Удаление тестовых файлов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_default_jobs_from_settings(self):
+        """Тест значения --jobs по умолчанию из настроек."""
+        engine = BatchEngine(self.dispatcher)
+        self.assertEqual(engine.jobs, 3)
+        self.assertEqual(engine.type_limits[FileType.VIDEO], 2)
+
+    def test_all_files_processed(self):
+        """Тест обработки всех файлов потока."""
+        probe = _ConcurrencyProbe(self.dispatcher, delay=0)
+        engine = BatchEngine(self.dispatcher, jobs=4, process=probe)
+
+        results = list(engine.run(iter(self.files)))
+
+        self.assertEqual(len(results), len(self.files))
+        self.assertEqual(
+            {r.job.file_path for r in results}, set(self.files)
+        )
+
+    def test_type_and_global_limits(self):
+        """Тест соблюдения лимитов по типам и общего лимита."""
+        probe = _ConcurrencyProbe(self.dispatcher)
+        engine = BatchEngine(
+            self.dispatcher,
+            jobs=4,
+            type_limits={FileType.VIDEO: 1, FileType.PDF: 2},
+            process=probe,
+        )
+
+        list(engine.run(self.files))
+
+        self.assertEqual(probe.peak[FileType.VIDEO], 1)
+        self.assertLessEqual(probe.peak[FileType.PDF], 2)
+        self.assertLessEqual(probe.total_peak, 4)
+        self.assertGreater(probe.total_peak, 1)
+
+    def test_missing_and_unsupported_files(self):
+        """Тест итоговых результатов без запуска обработчика."""
+        unsupported = self.temp_dir / "notes.txt"
+        unsupported.write_text("text")
+        probe = _ConcurrencyProbe(self.dispatcher, delay=0)
+        engine = BatchEngine(self.dispatcher, jobs=2, process=probe)
+
+        results = {
+            r.job.file_path: r
+            for r in engine.run(
+                [self.temp_dir / "missing.jpg", unsupported, self.temp_dir]
+            )
+        }
+
+        self.assertEqual(results[self.temp_dir / "missing.jpg"].status, CleanStatus.ERROR)
+        self.assertEqual(results[unsupported].status, CleanStatus.SKIPPED)
+        self.assertEqual(results[self.temp_dir].status, CleanStatus.SKIPPED)
+        self.assertEqual(probe.total_peak, 0)
+
+    def test_processing_exception_becomes_error(self):
+        """Тест преобразования исключения обработчика в результат с ошибкой."""
+        def failing(path):
+            raise RuntimeError("boom")
+
+        engine = BatchEngine(self.dispatcher, jobs=2, process=failing)
+        results = list(engine.run(self.files[:2]))
+
+        self.assertTrue(all(r.status == CleanStatus.ERROR for r in results))
+        self.assertIn("boom", results[0].message)
+
+    def test_streaming_input_is_bounded(self):
+        """Тест ограниченного опережения при чтении входного потока."""
+        consumed = []
+
+        def source():
+            for path in self.files:
+                consumed.append(path)
+                yield path
+
+        probe = _ConcurrencyProbe(self.dispatcher, delay=0)
+        engine = BatchEngine(self.dispatcher, jobs=1, process=probe, max_pending=2)
+        stream = engine.run(source())
+        next(stream)
+        time.sleep(0.05)
+
+        self.assertLessEqual(len(consumed), 4)
+        stream.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestStageTotals(unittest.TestCase):
+    """Тесты агрегации времени этапов в BatchEngine."""
+
+    def test_stage_totals_by_file_type(self):
+        """Тест суммирования времени этапов по типам файлов."""
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        files = []
+        for name in ("a.jpg", "b.jpg", "c.pdf", "d.txt"):
+            path = temp_dir / name
+            path.write_bytes(b"data")
+            files.append(path)
+
+        settings = mock.Mock(spec=SettingsService)
+        settings.get_max_threads.return_value = 2
+        dispatcher = MetadataDispatcher(settings)
+
+        def process(path: Path) -> CleanResult:
+            job = FileJob(file_path=path, file_type=dispatcher.get_file_type(path))
+            job.timings.read = 1.0
+            job.timings.write = 0.5
+            return CleanResult(job=job, status=CleanStatus.SUCCESS)
+
+        engine = BatchEngine(dispatcher, process=process)
+        list(engine.run(files))
+
+        self.assertEqual(set(engine.stage_totals), {FileType.IMAGE, FileType.PDF})
+        self.assertEqual(engine.stage_totals[FileType.IMAGE].read, 2.0)
+        self.assertEqual(engine.stage_totals[FileType.PDF].total, 1.5)
@@ -0,0 +1,143 @@
+"""Тесты для наблюдателей за обработкой файлов."""
+
+import io
+import random
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from benchmarks.corpus import make_mp4
+from benchmarks.fake_ffmpeg import install_fake_ffmpeg
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.events import DispatcherObserver
+from metadata_cleaner.cleaner.models import CleanStatus, FileJob, FileType, OutputMode
+from metadata_cleaner.cli import ProgressPrinter
+from metadata_cleaner.services.settings_service import SettingsService
+
+
+class _Recorder(DispatcherObserver):
+    """Наблюдатель, записывающий все события."""
+
+    def __init__(self):
+        self.events = []
+
+    def on_job_start(self, job):
+        self.events.append(("start", job.file_path.name))
+
+    def on_stage(self, job, stage, seconds):
+        self.events.append(("stage", stage))
+
+    def on_progress(self, job, bytes_done, bytes_total):
+        self.events.append(("progress", bytes_done, bytes_total))
+
+    def on_job_end(self, result):
+        self.events.append(("end", result.status))
+
+
+class _Failing(DispatcherObserver):
+    """Наблюдатель, падающий на каждом событии."""
+
+    def on_job_start(self, job):
+        raise RuntimeError("observer failure")
+
+    def on_progress(self, job, bytes_done, bytes_total):
+        raise RuntimeError("observer failure")
+
+
+class TestDispatcherObservers(unittest.TestCase):
+    """Тесты событий MetadataDispatcher."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        settings = mock.Mock(spec=SettingsService)
+        settings.get_output_mode.return_value = OutputMode.CREATE_COPY
+        settings.get_metadata_to_clean.return_value = {"gps": True}
+        self.dispatcher = MetadataDispatcher(settings)
+        self.image = self.temp_dir / "image.png"
+        Image.new("RGB", (16, 16)).save(self.image)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_events_sequence(self):
+        """Тест последовательности событий обработки файла."""
+        recorder = _Recorder()
+        self.dispatcher.add_observer(recorder)
+        size = self.image.stat().st_size
+
+        result = self.dispatcher.process_file(self.image)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS)
+        events = recorder.events
+        self.assertEqual(events[0], ("start", "image.png"))
+        self.assertEqual(events[1], ("progress", 0, size))
+        stages = [event[1] for event in events if event[0] == "stage"]
+        self.assertEqual(stages, ["read", "transform", "transform", "write", "verify"])
+        self.assertEqual(events[-2], ("progress", size, size))
+        self.assertEqual(events[-1], ("end", CleanStatus.SUCCESS))
+
+    def test_failing_observer_does_not_break_processing(self):
+        """Тест: исключение наблюдателя не влияет на обработку и других наблюдателей."""
+        recorder = _Recorder()
+        self.dispatcher.add_observer(_Failing())
+        self.dispatcher.add_observer(recorder)
+
+        result = self.dispatcher.process_file(self.image)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS)
+        self.assertEqual(recorder.events[0][0], "start")
+
+    def test_no_listener_without_observers(self):
+        """Тест: без подписчиков задача не получает получателя событий."""
+        recorder = _Recorder()
+        self.dispatcher.add_observer(recorder)
+        self.dispatcher.remove_observer(recorder)
+
+        result = self.dispatcher.process_file(self.image)
+
+        self.assertIsNone(result.job.listener)
+        self.assertEqual(recorder.events, [])
+
+    def test_video_progress_from_ffmpeg(self):
+        """Тест прогресса ремукса из вывода ffmpeg -progress."""
+        video = self.temp_dir / "video.mp4"
+        make_mp4(video, random.Random(1), mdat_bytes=3 * 1024 * 1024)
+        ffmpeg = install_fake_ffmpeg(self.temp_dir / "bin")
+        handler = self.dispatcher.handlers[FileType.VIDEO]
+        recorder = _Recorder()
+        self.dispatcher.add_observer(recorder)
+
+        with mock.patch.object(handler, "_get_ffmpeg_paths", return_value=[str(ffmpeg)]):
+            result = self.dispatcher.process_file(video)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS)
+        self.assertIn("method", result.cleaned_fields)
+        done = [event[1] for event in recorder.events if event[0] == "progress"]
+        self.assertGreaterEqual(len(done), 5)
+        self.assertEqual(done, sorted(done))
+        self.assertEqual(done[-1], video.stat().st_size)
+
+
+class TestProgressPrinter(unittest.TestCase):
+    """Тесты строки прогресса CLI."""
+
+    def test_line_is_drawn_and_cleared(self):
+        """Тест вывода и очистки строки прогресса."""
+        stream = io.StringIO()
+        printer = ProgressPrinter(stream)
+        job = FileJob(file_path=Path("/data/movie.mp4"))
+
+        printer.on_progress(job, 512 * 1024, 1024 * 1024)
+        printer.on_job_end(mock.Mock())
+
+        output = stream.getvalue()
+        self.assertIn("movie.mp4:  50% (512 КБ)", output)
+        self.assertTrue(output.endswith("\r"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -125,4 +125,27 @@ class TestHandlersIntegration:
         """Проверка консистентности создания резервных копий."""
         for handler in self.handlers:
             assert hasattr(handler, '_create_backup')
-            assert callable(getattr(handler, '_create_backup')) 
\ No newline at end of file
+            assert callable(getattr(handler, '_create_backup')) 
+
+    def test_rewrite_output_replaces_whole_file(self):
+        """Проверка замены выходного файла через временный файл."""
+        handler = ImageHandler()
+        with tempfile.TemporaryDirectory() as temp:
+            path = Path(temp) / "image.webp"
+            path.write_bytes(b"original")
+            job = FileJob(file_path=path, output_path=path)
+
+            def failing(source, target):
+                target.write(source.read()[:4])
+                raise ValueError("broken")
+
+            with pytest.raises(ValueError):
+                handler._rewrite_output(job, path, failing)
+            assert path.read_bytes() == b"original"
+
+            size = handler._rewrite_output(
+                job, path, lambda source, target: target.write(source.read().upper())
+            )
+            assert size == len(b"ORIGINAL")
+            assert path.read_bytes() == b"ORIGINAL"
+            assert [p.name for p in Path(temp).iterdir()] == ["image.webp"]
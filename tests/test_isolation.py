@@ -0,0 +1,168 @@
+"""Тесты для изолированной обработки файлов в рабочих процессах."""
+
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from metadata_cleaner.batch.engine import BatchEngine
+from metadata_cleaner.batch.isolation import (
+    IsolatedProcessor,
+    IsolationLimits,
+    limits_supported,
+)
+from metadata_cleaner.batch.metrics import CleanerMetrics
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.handlers.image import ImageHandler
+from metadata_cleaner.cleaner.models import (
+    CleaningOptions,
+    CleanStatus,
+    FileType,
+    OutputMode,
+)
+from metadata_cleaner.services.settings_service import SettingsService
+
+
+class _Settings(SettingsService):
+    """Настройки без чтения пользовательского файла (передаются в процесс)."""
+
+    def __init__(self):
+        self._settings = {"output_mode": OutputMode.CREATE_COPY.value}
+
+    def get_output_mode(self) -> OutputMode:
+        return OutputMode.CREATE_COPY
+
+    def get_metadata_to_clean(self, file_type: str) -> dict[str, bool]:
+        return {"gps": True}
+
+    def get_max_threads(self) -> int:
+        return 2
+
+
+class _HostileImageHandler(ImageHandler):
+    """Обработчик, имитирующий зависание, бесконечный цикл и утечку памяти."""
+
+    def clean(self, job):
+        name = job.file_path.stem
+        if name == "hang":
+            time.sleep(3600)
+        elif name == "spin":
+            while True:
+                pass
+        elif name == "bomb":
+            _ = bytearray(4 * 1024 * 1024 * 1024)
+        return super().clean(job)
+
+
+def _dispatcher() -> MetadataDispatcher:
+    dispatcher = MetadataDispatcher(_Settings())
+    dispatcher.handlers[FileType.IMAGE] = _HostileImageHandler()
+    return dispatcher
+
+
+class TestIsolatedProcessor(unittest.TestCase):
+    """Тесты пула изолированных рабочих процессов."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        for name in ("ok", "ok2", "hang", "spin", "bomb"):
+            Image.new("RGB", (8, 8)).save(self.temp_dir / f"{name}.png")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _processor(self, **limits) -> IsolatedProcessor:
+        processor = IsolatedProcessor(1, IsolationLimits(**limits), _dispatcher)
+        self.addCleanup(processor.close)
+        return processor
+
+    def test_worker_is_reused(self):
+        """Тест обработки в переиспользуемом рабочем процессе."""
+        processor = self._processor()
+
+        first = processor.process(self.temp_dir / "ok.png")
+        second = processor.process(self.temp_dir / "ok2.png")
+
+        self.assertEqual(first.status, CleanStatus.SUCCESS)
+        self.assertEqual(second.status, CleanStatus.SUCCESS)
+        self.assertTrue((self.temp_dir / "ok_cleaned.png").exists())
+        self.assertGreater(first.timings.total, 0)
+        self.assertEqual(processor.workers_started, 1)
+
+    def test_options_sent_to_worker(self):
+        """Тест: опции запуска передаются рабочему процессу вместе с путем."""
+        options = CleaningOptions(clean_gps_data=False, create_backup=False)
+        processor = IsolatedProcessor(
+            1, IsolationLimits(), _dispatcher, options=options
+        )
+        self.addCleanup(processor.close)
+
+        result = processor.process(self.temp_dir / "ok.png")
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        self.assertFalse(result.job.clean_fields["gps"])
+
+    def test_timeout_kills_and_recycles_worker(self):
+        """Тест: зависший процесс убивается, следующий файл обрабатывается."""
+        processor = self._processor(timeout=2)
+
+        result = processor.process(self.temp_dir / "hang.png")
+        after = processor.process(self.temp_dir / "ok.png")
+
+        self.assertEqual(result.status, CleanStatus.ERROR)
+        self.assertIn("Превышено время обработки", result.message)
+        self.assertEqual(after.status, CleanStatus.SUCCESS)
+        self.assertEqual(processor.workers_started, 2)
+
+    @unittest.skipUnless(limits_supported() and sys.platform == "linux", "нужен Linux")
+    def test_cpu_limit(self):
+        """Тест лимита процессорного времени на задачу."""
+        processor = self._processor(timeout=60, cpu_seconds=1)
+
+        result = processor.process(self.temp_dir / "spin.png")
+
+        self.assertEqual(result.status, CleanStatus.ERROR)
+        self.assertIn("процессорного времени", result.message)
+
+    @unittest.skipUnless(limits_supported() and sys.platform == "linux", "нужен Linux")
+    def test_memory_limit(self):
+        """Тест лимита памяти: задача завершается ошибкой, процесс заменяется."""
+        processor = self._processor(timeout=60, memory_mb=1536)
+
+        result = processor.process(self.temp_dir / "bomb.png")
+        after = processor.process(self.temp_dir / "ok.png")
+
+        self.assertEqual(result.status, CleanStatus.ERROR)
+        self.assertIn("лимит памяти", result.message)
+        self.assertEqual(after.status, CleanStatus.SUCCESS)
+        self.assertEqual(processor.workers_started, 2)
+
+    def test_engine_with_isolation_and_metrics(self):
+        """Тест BatchEngine с изолированной обработкой и учетом метрик."""
+        settings = mock.Mock(spec=SettingsService)
+        settings.get_max_threads.return_value = 2
+        dispatcher = MetadataDispatcher(settings)
+        metrics = CleanerMetrics()
+        dispatcher.attach_metrics(metrics)
+        processor = IsolatedProcessor(
+            2, IsolationLimits(timeout=2), _dispatcher, dispatcher=dispatcher
+        )
+        self.addCleanup(processor.close)
+        engine = BatchEngine(dispatcher, process=processor)
+
+        files = [self.temp_dir / name for name in ("ok.png", "ok2.png", "hang.png")]
+        results = {r.job.file_path.name: r for r in engine.run(files)}
+
+        self.assertEqual(results["ok.png"].status, CleanStatus.SUCCESS)
+        self.assertEqual(results["hang.png"].status, CleanStatus.ERROR)
+        self.assertEqual(metrics.value(metrics.FILES, file_type="image", status="success"), 2)
+        self.assertEqual(metrics.value(metrics.FILES, file_type="image", status="error"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""Тесты для разбора и очистки сегментов JPEG."""
+
+import io
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.errors import CorruptedFileError
+from metadata_cleaner.cleaner.formats import jpeg
+from metadata_cleaner.services.settings_service import SettingsService
+
+TEST_FILES = Path(__file__).parent / "test_files"
+
+# Тег EXIF с указателем на GPS IFD
+GPS_IFD = 34853
+
+# Видео «живого фото», дописанное после EOI
+MOTION_VIDEO = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 200
+
+
+def _segment(marker: int, payload: bytes) -> bytes:
+    return bytes([0xFF, marker]) + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+class TestJpegSegments(unittest.TestCase):
+    """Тесты для metadata_cleaner.cleaner.formats.jpeg."""
+
+    def setUp(self):
+        self.photo = (TEST_FILES / "test_image.jpeg").read_bytes()
+
+    def test_strip_photo(self):
+        """Тест: EXIF удаляется, сжатые данные не меняются."""
+        cleaned = jpeg.strip_metadata(self.photo)
+
+        self.assertLess(len(cleaned), len(self.photo))
+        markers = [s.marker for s in jpeg.iter_segments(cleaned)]
+        self.assertNotIn(0xE1, markers)
+        with Image.open(io.BytesIO(cleaned)) as image:
+            self.assertEqual(len(image.getexif()), 0)
+            image.load()
+        sos = [s for s in jpeg.iter_segments(self.photo) if s.marker == jpeg.SOS][0]
+        self.assertTrue(cleaned.endswith(self.photo[sos.end :]))
+
+    def test_keeps_color_segments(self):
+        """Тест: JFIF, ICC и Adobe сохраняются, COM и APP13 удаляются."""
+        header = b"".join(
+            [
+                _segment(0xE0, b"JFIF\x00\x01\x02"),
+                _segment(0xE2, b"ICC_PROFILE\x00\x01\x01data"),
+                _segment(0xE2, b"MPF\x00data"),
+                _segment(0xED, b"Photoshop 3.0\x00"),
+                _segment(0xEE, b"Adobe\x00\x64"),
+                _segment(jpeg.COM, b"comment"),
+                _segment(jpeg.SOS, b"\x01\x01\x00\x00\x3f\x00"),
+            ]
+        )
+        data = b"\xff\xd8" + header + b"\x12\x34\xff\xd9"
+
+        cleaned = jpeg.strip_metadata(data)
+
+        self.assertEqual(
+            [s.marker for s in jpeg.iter_segments(cleaned)], [0xE0, 0xE2, 0xEE, jpeg.SOS]
+        )
+        self.assertTrue(cleaned.endswith(b"\x12\x34\xff\xd9"))
+
+    def test_unchanged_returns_same_object(self):
+        """Тест: без метаданных возвращается исходный объект."""
+        cleaned = jpeg.strip_metadata(self.photo)
+        self.assertIs(jpeg.strip_metadata(cleaned), cleaned)
+
+    def test_corrupted(self):
+        """Тест: не JPEG и обрезанный заголовок."""
+        with self.assertRaises(CorruptedFileError):
+            jpeg.strip_metadata(b"not a jpeg")
+        with self.assertRaises(CorruptedFileError):
+            jpeg.strip_metadata(self.photo[:40])
+
+
+class TestJpegTrailerAndMpf(unittest.TestCase):
+    """Тесты удаления данных после EOI и изображений MPF."""
+
+    def setUp(self):
+        self.photo = (TEST_FILES / "test_image.jpeg").read_bytes()
+        with Image.open(io.BytesIO(self.photo)) as image:
+            exif = image.info["exif"]
+            depth = image.convert("L").convert("RGB")
+            buffer = io.BytesIO()
+            # У второго изображения свой EXIF с GPS
+            image.save(
+                buffer, "MPO", save_all=True, append_images=[depth], exif=exif
+            )
+        self.mpo = buffer.getvalue()
+
+    def test_motion_photo_trailer_removed(self):
+        """Тест: видео после EOI удаляется, размер учитывается."""
+        stats = jpeg.StripStats()
+
+        cleaned = jpeg.strip_metadata(self.photo + MOTION_VIDEO, stats=stats)
+
+        self.assertEqual(stats.trailer, len(MOTION_VIDEO))
+        self.assertEqual(cleaned, jpeg.strip_metadata(self.photo))
+        self.assertEqual(
+            stats.removed, len(self.photo) + len(MOTION_VIDEO) - len(cleaned)
+        )
+
+    def test_mpf_stripped(self):
+        """Тест: без keep_secondary остается только основное изображение."""
+        stats = jpeg.StripStats()
+
+        cleaned = jpeg.strip_metadata(self.mpo, stats=stats)
+
+        self.assertEqual(stats.secondary, 0)
+        self.assertGreater(stats.trailer, 0)
+        with Image.open(io.BytesIO(cleaned)) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertNotIn(GPS_IFD, image.getexif())
+
+    def test_mpf_secondary_cleaned(self):
+        """Тест: изображения MPF очищаются, индекс указывает на новые смещения."""
+        stats = jpeg.StripStats()
+
+        cleaned = jpeg.strip_metadata(
+            self.mpo + MOTION_VIDEO, keep_secondary=True, stats=stats
+        )
+
+        self.assertEqual(stats.secondary, 1)
+        self.assertEqual(stats.trailer, len(MOTION_VIDEO))
+        self.assertFalse(cleaned.endswith(MOTION_VIDEO))
+        with Image.open(io.BytesIO(cleaned)) as image:
+            self.assertEqual((image.format, image.n_frames), ("MPO", 2))
+            for frame in range(2):
+                image.seek(frame)
+                image.load()
+                self.assertNotIn(GPS_IFD, image.getexif())
+                self.assertEqual(image.size, (200, 200))
+
+    def test_image_handler_lossless(self):
+        """Тест: обработчик изображений не перекодирует JPEG и отчитывается."""
+        settings = mock.Mock(spec=SettingsService)
+        settings.get_metadata_to_clean.return_value = {"gps": True}
+        dispatcher = MetadataDispatcher(settings)
+
+        result = dispatcher.clean_bytes(self.photo + MOTION_VIDEO, "jpg")
+
+        self.assertTrue(result.is_success, result.message)
+        self.assertEqual(result.cleaned_fields["trailer_bytes"], len(MOTION_VIDEO))
+        self.assertEqual(
+            result.cleaned_fields["saved_bytes"],
+            len(self.photo) + len(MOTION_VIDEO) - len(result.output_data),
+        )
+        sos = [s for s in jpeg.iter_segments(self.photo) if s.marker == jpeg.SOS][0]
+        self.assertTrue(result.output_data.endswith(self.photo[sos.end :]))
+        with Image.open(io.BytesIO(result.output_data)) as image:
+            exif = image.getexif()
+            self.assertNotIn(GPS_IFD, exif)
+            self.assertIn(0x0110, exif)  # модель камеры сохраняется
+
+    def test_image_handler_keeps_mpf_secondary(self):
+        """Тест: с отключенной настройкой mpf_secondary кадры MPF сохраняются."""
+        settings = mock.Mock(spec=SettingsService)
+        settings.get_metadata_to_clean.return_value = {
+            "gps": True,
+            "mpf_secondary": False,
+        }
+        dispatcher = MetadataDispatcher(settings)
+
+        result = dispatcher.clean_bytes(self.mpo + MOTION_VIDEO, "jpg")
+
+        self.assertTrue(result.is_success, result.message)
+        self.assertEqual(result.cleaned_fields["mpf_secondary"], 1)
+        self.assertEqual(result.cleaned_fields["trailer_bytes"], len(MOTION_VIDEO))
+        with Image.open(io.BytesIO(result.output_data)) as image:
+            self.assertEqual((image.format, image.n_frames), ("MPO", 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
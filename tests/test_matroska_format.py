@@ -0,0 +1,274 @@
+"""Тесты для удаления метаданных Matroska/WebM на уровне элементов EBML."""
+
+import io
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+from unittest import mock
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.errors import CorruptedFileError
+from metadata_cleaner.cleaner.formats import matroska as mkv
+from metadata_cleaner.cleaner.models import CleanStatus, OutputMode
+from metadata_cleaner.services.settings_service import SettingsService
+
+SECRETS = (b"SecretRecorder", b"J. Doe", b"Lavf60")
+UNKNOWN_SIZE = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+
+
+def _element(element_id: int, payload: bytes) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    width = next(w for w in range(1, 9) if len(payload) < (1 << (7 * w)) - 1)
+    return id_bytes + mkv.encode_size(len(payload), width) + payload
+
+
+def _uint(element_id: int, value: int, width: int = 1) -> bytes:
+    return _element(element_id, value.to_bytes(width, "big"))
+
+
+def _with_crc(payload: bytes) -> bytes:
+    return _element(mkv.CRC32, struct.pack("<I", zlib.crc32(payload))) + payload
+
+
+def _make_mkv(tags_first: bool = False, unknown_size: bool = False) -> bytes:
+    """Файл с SeekHead, Info (с CRC-32), Tracks, кластерами, Cues и Tags."""
+    info = _element(
+        mkv.INFO,
+        _with_crc(
+            _uint(0x2AD7B1, 1_000_000, 3)
+            + _element(mkv.MUXING_APP, b"Lavf60")
+            + _element(mkv.WRITING_APP, b"SecretRecorder 1.0")
+            + _element(mkv.TITLE, b"J. Doe screen")
+            + _element(mkv.DATE_UTC, bytes(8))
+        ),
+    )
+    tracks = _element(mkv.TRACKS, _element(0xAE, _uint(0xD7, 1) + _uint(0x83, 1)))
+    simple_tag = _element(0x45A3, b"ARTIST") + _element(0x4487, b"J. Doe")
+    tags = _element(mkv.TAGS, _element(0x7373, _element(0x67C8, simple_tag)))
+    clusters = [
+        _element(mkv.CLUSTER, _uint(0xE7, index) + _element(0xA3, bytes(300)))
+        for index in range(3)
+    ]
+
+    seek_head = b""
+    for _ in range(2):
+        # Второй проход: длина SeekHead уже известна, смещения окончательные
+        position = len(seek_head) + len(info) + len(tracks)
+        if tags_first:
+            position += len(tags)
+        cluster_positions = []
+        for cluster in clusters:
+            cluster_positions.append(position)
+            position += len(cluster)
+        cues = _element(
+            mkv.CUES,
+            b"".join(
+                _element(
+                    mkv.CUE_POINT,
+                    _uint(0xB3, index)
+                    + _element(
+                        mkv.CUE_TRACK_POSITIONS,
+                        _uint(0xF7, 1) + _uint(mkv.CUE_CLUSTER_POSITION, offset, 4),
+                    ),
+                )
+                for index, offset in enumerate(cluster_positions)
+            ),
+        )
+        offsets = {
+            mkv.INFO: len(seek_head),
+            mkv.CUES: position,
+            mkv.TAGS: len(seek_head) + len(info) + len(tracks)
+            if tags_first
+            else position + len(cues),
+        }
+        seek_head = _element(
+            mkv.SEEK_HEAD,
+            _with_crc(
+                b"".join(
+                    _element(
+                        mkv.SEEK,
+                        _element(mkv.SEEK_ID, target.to_bytes(4, "big"))
+                        + _uint(mkv.SEEK_POSITION, offset, 4),
+                    )
+                    for target, offset in offsets.items()
+                )
+            ),
+        )
+
+    if tags_first:
+        body = b"".join([seek_head, info, tracks, tags, *clusters, cues])
+    else:
+        body = b"".join([seek_head, info, tracks, *clusters, cues, tags])
+    size = UNKNOWN_SIZE if unknown_size else mkv.encode_size(len(body), 8)
+    ebml = _element(mkv.EBML, _element(0x4282, b"webm"))
+    return ebml + mkv.SEGMENT.to_bytes(4, "big") + size + body
+
+
+def _check_structure(test: unittest.TestCase, data: bytes):
+    """Смещения индекса и Cues указывают на элементы, CRC-32 совпадают."""
+    layout = mkv._Layout(io.BytesIO(data), ())
+    base = layout.segment.data_offset
+    for element in layout.elements.values():
+        data = memoryview(layout.read(element))
+        body = data[element.data_offset - element.offset :]
+        children = list(mkv.iter_children(body))
+        if children and children[0].id == mkv.CRC32:
+            crc = struct.unpack("<I", body[children[0].data_offset : children[0].end])
+            test.assertEqual(crc[0], zlib.crc32(body[children[0].end :]))
+        if element.id == mkv.SEEK_HEAD:
+            for target_id, position in layout._seek_entries(element):
+                test.assertEqual(layout._header(base + position).id, target_id)
+        if element.id == mkv.CUES:
+            for position in _cue_positions(body):
+                test.assertEqual(layout._header(base + position).id, mkv.CLUSTER)
+
+
+def _cue_positions(body: memoryview) -> list[int]:
+    positions = []
+    for child in mkv.iter_children(body):
+        value = body[child.data_offset : child.end]
+        if child.id == mkv.CUE_CLUSTER_POSITION:
+            positions.append(mkv.read_uint(value))
+        elif child.id in (mkv.CUE_POINT, mkv.CUE_TRACK_POSITIONS):
+            positions.extend(_cue_positions(value))
+    return positions
+
+
+class TestMatroskaScrub(unittest.TestCase):
+    """Тесты для metadata_cleaner.cleaner.formats.matroska."""
+
+    def setUp(self):
+        self.data = _make_mkv()
+        _check_structure(self, self.data)
+
+    def test_scrub_in_place(self):
+        """Тест: элементы заменяются Void того же размера."""
+        stream = io.BytesIO(self.data)
+
+        result = mkv.scrub(stream)
+
+        cleaned = stream.getvalue()
+        self.assertEqual(len(cleaned), len(self.data))
+        self.assertEqual(
+            sorted(result.names),
+            ["date_utc", "muxing_app", "tags", "title", "writing_app"],
+        )
+        for secret in SECRETS:
+            self.assertNotIn(secret, cleaned)
+        # Смещения не изменились: индекс и Cues указывают на те же кластеры
+        _check_structure(self, cleaned)
+
+    def test_write_compacted(self):
+        """Тест: в копии элементы вырезаны, смещения исправлены."""
+        for tags_first in (False, True):
+            with self.subTest(tags_first=tags_first):
+                data = _make_mkv(tags_first=tags_first)
+                target = io.BytesIO()
+
+                result = mkv.write_compacted(io.BytesIO(data), target)
+
+                cleaned = target.getvalue()
+                self.assertEqual(len(cleaned), len(data) - result.removed_bytes)
+                for secret in SECRETS:
+                    self.assertNotIn(secret, cleaned)
+                _check_structure(self, cleaned)
+                layout = mkv._Layout(io.BytesIO(cleaned), ())
+                self.assertEqual(layout.segment.end, len(cleaned))
+                self.assertNotIn(mkv.TAGS, [e.id for e in layout.elements.values()])
+
+    def test_keep_selected(self):
+        """Тест: элементы вне набора сохраняются."""
+        target = io.BytesIO()
+
+        result = mkv.write_compacted(io.BytesIO(self.data), target, mkv.ENCODER_IDS)
+
+        cleaned = target.getvalue()
+        self.assertEqual(sorted(result.names), ["muxing_app", "writing_app"])
+        self.assertIn(b"J. Doe screen", cleaned)
+        self.assertIn(b"ARTIST", cleaned)
+        _check_structure(self, cleaned)
+
+    def test_unknown_segment_size(self):
+        """Тест потоковой записи (размер сегмента неизвестен, без индекса)."""
+        data = _make_mkv(unknown_size=True)
+        target = io.BytesIO()
+
+        mkv.write_compacted(io.BytesIO(data), target)
+
+        cleaned = target.getvalue()
+        self.assertIn(UNKNOWN_SIZE, cleaned)
+        for secret in SECRETS:
+            self.assertNotIn(secret, cleaned)
+
+    def test_corrupted(self):
+        """Тест: не EBML и обрезанный заголовок."""
+        with self.assertRaises(CorruptedFileError):
+            mkv.scrub(io.BytesIO(b"RIFF\0\0\0\0AVI "))
+        with self.assertRaises(CorruptedFileError):
+            mkv.scrub(io.BytesIO(self.data[:30]))
+
+    def test_void(self):
+        """Тест элементов Void разной длины."""
+        for length in (2, 9, 128, 129, 5000):
+            with self.subTest(length=length):
+                element = mkv.parse_header(mkv.void(length), 0)
+                self.assertEqual(element.id, mkv.VOID)
+                self.assertEqual(element.end, length)
+
+
+class TestMatroskaHandler(unittest.TestCase):
+    """Тесты очистки MKV/WebM через диспетчер."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.mock_settings = mock.Mock(spec=SettingsService)
+        self.mock_settings.get_metadata_to_clean.return_value = {"title": True}
+        self.mock_settings.get_output_mode.return_value = OutputMode.REPLACE
+        self.dispatcher = MetadataDispatcher(self.mock_settings)
+        self.data = _make_mkv()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_replace_in_place(self):
+        """Тест замены файла на месте без ffmpeg и временных файлов."""
+        path = self.temp_dir / "capture.webm"
+        path.write_bytes(self.data)
+
+        result = self.dispatcher.process_file(path)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        self.assertTrue(result.cleaned_fields["tags"])
+        self.assertTrue(result.cleaned_fields["title"])
+        self.assertEqual(path.stat().st_size, len(self.data))
+        self.assertNotIn(b"SecretRecorder", path.read_bytes())
+        self.assertEqual([p.name for p in self.temp_dir.iterdir()], ["capture.webm"])
+
+    def test_create_copy(self):
+        """Тест: копия меньше исходника, исходник не меняется."""
+        self.mock_settings.get_output_mode.return_value = OutputMode.CREATE_COPY
+        path = self.temp_dir / "capture.mkv"
+        path.write_bytes(self.data)
+
+        result = self.dispatcher.process_file(path)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        output = result.job.output_path.read_bytes()
+        self.assertLess(len(output), len(self.data))
+        _check_structure(self, output)
+        self.assertEqual(path.read_bytes(), self.data)
+
+    def test_clean_bytes(self):
+        """Тест очистки WebM в памяти."""
+        result = self.dispatcher.clean_bytes(self.data, "webm")
+
+        self.assertTrue(result.is_success, result.message)
+        for secret in SECRETS:
+            self.assertNotIn(secret, result.output_data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Тесты для замера памяти задач."""
+
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+from PIL import Image
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.memory import MB, MemoryProbe
+from metadata_cleaner.cleaner.models import CleanStatus, OutputMode
+from metadata_cleaner.services.settings_service import SettingsService
+
+
+class TestMemoryProbe(unittest.TestCase):
+    """Тесты для MemoryProbe."""
+
+    def test_peak_traced_allocation(self):
+        """Тест учета пика выделений внутри замера."""
+        with MemoryProbe() as probe:
+            data = bytearray(8 * MB)
+            del data
+
+        self.assertGreaterEqual(probe.usage.peak_traced, 8 * MB)
+        self.assertGreaterEqual(probe.usage.rss_delta, 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_keeps_external_tracing(self):
+        """Тест: уже запущенный tracemalloc не останавливается."""
+        tracemalloc.start()
+        try:
+            with MemoryProbe() as probe:
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+            self.assertLess(probe.usage.peak_traced, MB)
+        finally:
+            tracemalloc.stop()
+
+
+class TestDispatcherMemoryProfile(unittest.TestCase):
+    """Тесты режима замера памяти в диспетчере."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        settings = Mock(spec=SettingsService)
+        settings.get_output_mode.return_value = OutputMode.BACKUP_AND_OVERWRITE
+        settings.get_metadata_to_clean.return_value = {"gps": True, "camera": True}
+        self.dispatcher = MetadataDispatcher(settings)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_memory_recorded_only_when_enabled(self):
+        """Тест заполнения CleanResult.memory."""
+        path = self.temp_dir / "image.png"
+        Image.new("RGB", (256, 256), (200, 10, 10)).save(path)
+
+        result = self.dispatcher.process_file(path)
+        self.assertIsNone(result.memory)
+
+        self.dispatcher.profile_memory = True
+        result = self.dispatcher.process_file(path)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS)
+        self.assertIsNotNone(result.memory)
+        self.assertGreater(result.memory.peak_traced, 0)
+        # Копия PNG не строит список пикселей в памяти Python
+        self.assertLess(result.memory.peak_traced, 4 * MB)
+        self.assertTrue(path.with_suffix(".png.bak").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Тесты для метрик пакетной очистки."""
+
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from metadata_cleaner.batch.engine import BatchEngine
+from metadata_cleaner.batch.metrics import CleanerMetrics, MetricsRegistry, TextfileExporter
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.models import FileType, OutputMode
+from metadata_cleaner.services.settings_service import SettingsService
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Тесты реестра метрик и формата вывода."""
+
+    def test_counter_and_labels(self):
+        """Тест счетчика с экранированием меток."""
+        registry = MetricsRegistry()
+        registry.counter("test_total", "Тестовый счетчик")
+        registry.inc("test_total", kind='a"b')
+        registry.inc("test_total", 2, kind='a"b')
+
+        text = registry.render()
+
+        self.assertIn("# TYPE test_total counter", text)
+        self.assertIn('test_total{kind="a\\"b"} 3', text)
+        self.assertEqual(registry.value("test_total", kind='a"b'), 3)
+
+    def test_histogram_is_cumulative(self):
+        """Тест накопительных корзин гистограммы."""
+        registry = MetricsRegistry()
+        registry.histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            registry.observe("latency_seconds", value, handler="ImageHandler")
+
+        lines = registry.render().splitlines()
+
+        self.assertIn('latency_seconds_bucket{handler="ImageHandler",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{handler="ImageHandler",le="1"} 3', lines)
+        self.assertIn('latency_seconds_bucket{handler="ImageHandler",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum{handler="ImageHandler"} 6.05', lines)
+        self.assertIn('latency_seconds_count{handler="ImageHandler"} 4', lines)
+
+
+class TestCleanerMetrics(unittest.TestCase):
+    """Тесты метрик, заполняемых диспетчером и движком."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        settings = mock.Mock(spec=SettingsService)
+        settings.get_output_mode.return_value = OutputMode.BACKUP_AND_OVERWRITE
+        settings.get_metadata_to_clean.return_value = {"gps": True}
+        settings.get_max_threads.return_value = 2
+        self.dispatcher = MetadataDispatcher(settings)
+        self.metrics = CleanerMetrics()
+        self.dispatcher.attach_metrics(self.metrics)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_batch_metrics(self):
+        """Тест счетчиков по типам, статусам, байтам и резервным копиям."""
+        image = self.temp_dir / "a.png"
+        Image.new("RGB", (32, 32)).save(image)
+        backup_size = image.stat().st_size
+        unsupported = self.temp_dir / "b.txt"
+        unsupported.write_text("text")
+
+        engine = BatchEngine(self.dispatcher)
+        list(engine.run([image, unsupported, self.temp_dir / "missing.pdf"]))
+
+        m = self.metrics
+        self.assertEqual(m.value(m.FILES, file_type="image", status="success"), 1)
+        self.assertEqual(m.value(m.FILES, file_type="unknown", status="skipped"), 1)
+        self.assertEqual(m.value(m.FILES, file_type="unknown", status="error"), 1)
+        self.assertEqual(m.value(m.INPUT_BYTES, file_type="image"), backup_size)
+        self.assertEqual(m.value(m.BACKUP_BYTES), backup_size)
+        self.assertEqual(m.value(m.DURATION, handler="ImageHandler"), 1)
+
+    def test_ffmpeg_invocations(self):
+        """Тест учета запусков ffmpeg обработчиком видео."""
+        video = self.temp_dir / "a.mp4"
+        video.write_bytes(b"\x00\x00\x00\x08free")
+        handler = self.dispatcher.handlers[FileType.VIDEO]
+
+        with mock.patch.object(handler, "_get_ffmpeg_paths", return_value=[]):
+            self.dispatcher.process_file(video)
+
+        self.assertEqual(self.metrics.value(CleanerMetrics.FFMPEG_UNAVAILABLE), 1)
+        self.assertEqual(self.metrics.value(CleanerMetrics.FFMPEG, outcome="unavailable"), 0)
+
+
+class TestTextfileExporter(unittest.TestCase):
+    """Тесты записи метрик в файл."""
+
+    def test_periodic_and_final_write(self):
+        """Тест периодической и итоговой атомарной записи."""
+        with tempfile.TemporaryDirectory() as temp:
+            path = Path(temp) / "cleaner.prom"
+            metrics = CleanerMetrics()
+
+            with TextfileExporter(metrics, path, interval=0.01):
+                self.assertTrue(path.exists())
+                metrics.inc(CleanerMetrics.FILES, file_type="pdf", status="success")
+                deadline = time.monotonic() + 5
+                while "pdf" not in path.read_text(encoding="utf-8"):
+                    self.assertLess(time.monotonic(), deadline)
+                    time.sleep(0.01)
+                metrics.inc(CleanerMetrics.FILES, file_type="pdf", status="success")
+
+            text = path.read_text(encoding="utf-8")
+            self.assertIn(
+                'metadata_cleaner_files_total{file_type="pdf",status="success"} 2', text
+            )
+            self.assertEqual([p.name for p in Path(temp).iterdir()], ["cleaner.prom"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,7 @@ from metadata_cleaner.cleaner.models import (
     FileType,
     OutputMode,
     CleaningOptions,
+    StageTimings,
 )
 
 
@@ -256,6 +257,45 @@ class TestCleanResult(unittest.TestCase):
                 self.assertEqual(result.processing_time, time_val)
 
 
+class TestStageTimings(unittest.TestCase):
+    """Тесты для замеров времени этапов."""
+
+    def test_job_stage_records_time(self):
+        """Тест накопления времени этапа в задаче."""
+        job = FileJob(file_path=Path("/test/file.jpg"))
+        with job.stage("read"):
+            pass
+        with job.stage("read"):
+            pass
+
+        self.assertGreater(job.timings.read, 0)
+        self.assertEqual(job.timings.write, 0)
+        self.assertAlmostEqual(job.timings.total, job.timings.read)
+
+        result = CleanResult(job=job, status=CleanStatus.SUCCESS)
+        self.assertIs(result.timings, job.timings)
+
+    def test_stage_recorded_on_exception(self):
+        """Тест: время этапа учитывается и при исключении."""
+        job = FileJob(file_path=Path("/test/file.jpg"))
+        with self.assertRaises(ValueError), job.stage("write"):
+            raise ValueError("boom")
+        self.assertGreater(job.timings.write, 0)
+
+    def test_merge_and_as_dict(self):
+        """Тест агрегации замеров."""
+        total = StageTimings()
+        total.merge(StageTimings(read=1.0, write=0.5))
+        total.merge(StageTimings(read=2.0, fsync=0.25))
+
+        self.assertEqual(total.read, 3.0)
+        self.assertEqual(total.total, 3.75)
+        self.assertEqual(
+            list(total.as_dict()),
+            ["classify", "backup", "read", "transform", "write", "fsync", "verify"],
+        )
+
+
 class TestCleaningOptions(unittest.TestCase):
     """Тесты для CleaningOptions модели."""
 
@@ -0,0 +1,173 @@
+"""Тесты для очистки изображений, встроенных в Office документы."""
+
+import io
+import shutil
+import tempfile
+import unittest
+import zipfile
+import zlib
+from pathlib import Path
+from unittest import mock
+
+from docx import Document
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.handlers.office import OfficeHandler, is_embedded_image
+from metadata_cleaner.cleaner.models import (
+    CleanStatus,
+    FileJob,
+    FileType,
+    OutputMode,
+)
+from metadata_cleaner.services.settings_service import SettingsService
+
+TEST_FILES = Path(__file__).parent / "test_files"
+
+# Тег EXIF с указателем на GPS IFD
+GPS_IFD = 34853
+
+
+def _has_gps(data: bytes) -> bool:
+    with Image.open(io.BytesIO(data)) as image:
+        return GPS_IFD in image.getexif()
+
+
+def _media(path_or_data) -> dict[str, bytes]:
+    source = path_or_data
+    if isinstance(path_or_data, bytes):
+        source = io.BytesIO(path_or_data)
+    with zipfile.ZipFile(source) as zf:
+        return {name: zf.read(name) for name in zf.namelist() if "/media/" in name}
+
+
+class TestOfficeEmbeddedImages(unittest.TestCase):
+    """Тесты очистки встроенных изображений через диспетчер."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.photo = TEST_FILES / "test_image.jpeg"
+        self.mock_settings = mock.Mock(spec=SettingsService)
+        self.mock_settings.get_output_mode.return_value = OutputMode.CREATE_COPY
+        self.mock_settings.get_metadata_to_clean.return_value = {"gps": True}
+        self.dispatcher = MetadataDispatcher(self.mock_settings)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _make_docx(self, pictures: int = 2) -> Path:
+        document = Document()
+        for _ in range(pictures):
+            document.add_picture(str(self.photo))
+        path = self.temp_dir / "report.docx"
+        document.save(path)
+        return path
+
+    def _make_pptx(self) -> bytes:
+        presentation = Presentation(TEST_FILES / "test_presentation.pptx")
+        slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+        slide.shapes.add_picture(str(self.photo), Inches(1), Inches(1))
+        buffer = io.BytesIO()
+        presentation.save(buffer)
+        return buffer.getvalue()
+
+    def test_docx_images_cleaned(self):
+        """Тест: GPS удаляется из изображений DOCX, текст документа не меняется."""
+        source = self._make_docx()
+        media = _media(source)
+        self.assertTrue(media)
+        self.assertTrue(all(_has_gps(data) for data in media.values()))
+
+        result = self.dispatcher.process_file(source)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        output = self.temp_dir / "report_cleaned.docx"
+        cleaned = _media(output)
+        self.assertEqual(set(cleaned), set(media))
+        self.assertFalse(any(_has_gps(data) for data in cleaned.values()))
+        with zipfile.ZipFile(source) as before, zipfile.ZipFile(output) as after:
+            embedded = [n for n in before.namelist() if is_embedded_image(n)]
+            self.assertEqual(result.cleaned_fields["embedded_images"], len(embedded))
+            self.assertEqual(after.namelist(), before.namelist())
+            self.assertEqual(
+                after.read("word/document.xml"), before.read("word/document.xml")
+            )
+        self.assertEqual(len(Document(output).inline_shapes), 2)
+
+    def test_pptx_clean_bytes(self):
+        """Тест очистки изображений PPTX в памяти."""
+        result = self.dispatcher.clean_bytes(self._make_pptx(), "pptx")
+
+        self.assertTrue(result.is_success, result.message)
+        media = _media(result.output_data)
+        self.assertTrue(any(name.startswith("ppt/media/") for name in media))
+        self.assertFalse(any(_has_gps(data) for data in media.values()))
+        Presentation(io.BytesIO(result.output_data))
+
+    def test_broken_image_fails(self):
+        """Тест: поврежденное изображение приводит к ошибке, копия не пишется."""
+        source = self._make_docx(pictures=1)
+        patched = self.temp_dir / "patched.docx"
+        with zipfile.ZipFile(source) as zin, zipfile.ZipFile(patched, "w") as zout:
+            for info in zin.infolist():
+                data = zin.read(info)
+                if info.filename.startswith("word/media/"):
+                    data = b"not an image"
+                zout.writestr(info, data)
+
+        result = self.dispatcher.process_file(patched)
+
+        self.assertEqual(result.status, CleanStatus.ERROR)
+        self.assertIn("word/media/", result.message)
+        self.assertFalse((self.temp_dir / "patched_cleaned.docx").exists())
+
+    def test_other_parts_copied_compressed(self):
+        """Тест: сжатые данные остальных частей копируются без перепаковки."""
+        source = self._make_docx()
+
+        with mock.patch("zlib.compressobj", wraps=zlib.compressobj) as compress:
+            result = self.dispatcher.process_file(source)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        output = self.temp_dir / "report_cleaned.docx"
+        with zipfile.ZipFile(output) as after:
+            self.assertIsNone(after.testzip())
+            parts = [i for i in after.infolist() if not is_embedded_image(i.filename)]
+            self.assertTrue(all(i.compress_type == zipfile.ZIP_DEFLATED for i in parts))
+        # Сжимаются только при сохранении документа и очищенные изображения
+        with zipfile.ZipFile(source) as before:
+            infos = before.infolist()
+            saved = sum(i.compress_type == zipfile.ZIP_DEFLATED for i in infos)
+        self.assertLessEqual(compress.call_count, saved + 2)
+
+    def test_handler_without_cleaner(self):
+        """Тест: без очистки изображений обработчик их не трогает."""
+        source = self._make_docx(pictures=1)
+        job = FileJob(
+            file_path=source,
+            file_type=FileType.DOCUMENT,
+            output_path=self.temp_dir / "plain.docx",
+            backup_enabled=False,
+        )
+
+        result = OfficeHandler().clean(job)
+
+        self.assertTrue(result.is_success, result.message)
+        self.assertNotIn("embedded_images", result.cleaned_fields)
+        self.assertTrue(
+            all(_has_gps(data) for data in _media(job.output_path).values())
+        )
+
+    def test_embedded_image_names(self):
+        """Тест отбора частей документа для очистки."""
+        self.assertTrue(is_embedded_image("word/media/image1.JPEG"))
+        self.assertTrue(is_embedded_image("xl/media/image2.png"))
+        self.assertTrue(is_embedded_image("docProps/thumbnail.jpeg"))
+        self.assertFalse(is_embedded_image("ppt/media/media1.mp4"))
+        self.assertFalse(is_embedded_image("word/document.xml"))
+
+
+if __name__ == "__main__":
+    unittest.main()
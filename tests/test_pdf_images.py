@@ -0,0 +1,128 @@
+"""Тесты для очистки изображений, встроенных в PDF."""
+
+import io
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+    NumberObject,
+)
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.formats import jpeg
+from metadata_cleaner.services.settings_service import SettingsService
+
+TEST_FILES = Path(__file__).parent / "test_files"
+
+# Тег EXIF с указателем на GPS IFD
+GPS_IFD = 34853
+
+
+def _stream(data: bytes, **entries) -> DecodedStreamObject:
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    for key, value in entries.items():
+        stream[NameObject(f"/{key}")] = value
+    return stream
+
+
+class TestPdfEmbeddedImages(unittest.TestCase):
+    """Тесты очистки изображений XObject в PDF."""
+
+    def setUp(self):
+        self.photo = (TEST_FILES / "test_image.jpeg").read_bytes()
+        self.mock_settings = mock.Mock(spec=SettingsService)
+        self.mock_settings.get_metadata_to_clean.return_value = {}
+        self.dispatcher = MetadataDispatcher(self.mock_settings)
+
+    def _image(self, writer: PdfWriter, with_xmp: bool = True):
+        with Image.open(io.BytesIO(self.photo)) as image:
+            width, height = image.size
+        image = _stream(
+            self.photo,
+            Type=NameObject("/XObject"),
+            Subtype=NameObject("/Image"),
+            Width=NumberObject(width),
+            Height=NumberObject(height),
+            ColorSpace=NameObject("/DeviceRGB"),
+            BitsPerComponent=NumberObject(8),
+            Filter=NameObject("/DCTDecode"),
+        )
+        if with_xmp:
+            image[NameObject("/Metadata")] = writer._add_object(
+                _stream(b"<x:xmpmeta>SECRET_GPS</x:xmpmeta>")
+            )
+        return writer._add_object(image)
+
+    def _make_pdf(self, images) -> bytes:
+        """PDF со страницей на каждое изображение (функция от writer)."""
+        writer = PdfWriter()
+        for make in images:
+            page = writer.add_blank_page(200, 200)
+            page[NameObject("/Resources")] = DictionaryObject(
+                {
+                    NameObject("/XObject"): DictionaryObject(
+                        {NameObject("/Im0"): make(writer)}
+                    )
+                }
+            )
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+    def _images(self, data: bytes) -> list:
+        reader = PdfReader(io.BytesIO(data))
+        return [
+            page["/Resources"]["/XObject"]["/Im0"].get_object() for page in reader.pages
+        ]
+
+    def test_dct_and_xmp_removed(self):
+        """Тест: APPn и /Metadata удаляются, изображение декодируется."""
+        result = self.dispatcher.clean_bytes(self._make_pdf([self._image]), "pdf")
+
+        self.assertTrue(result.is_success, result.message)
+        (image,) = self._images(result.output_data)
+        self.assertNotIn("/Metadata", image)
+        # Поток XMP не остается в файле объектом-сиротой
+        self.assertNotIn(b"SECRET_GPS", result.output_data)
+        with Image.open(io.BytesIO(image.get_data())) as decoded:
+            self.assertNotIn(GPS_IFD, decoded.getexif())
+            decoded.load()
+        self.assertEqual(result.cleaned_fields["image_metadata"], 1)
+        self.assertEqual(result.cleaned_fields["image_xmp"], 1)
+
+    def test_identical_streams_cleaned_once(self):
+        """Тест: одинаковые потоки очищаются один раз благодаря кешу."""
+        data = self._make_pdf([self._image] * 3)
+
+        with mock.patch.object(
+            jpeg, "strip_metadata", wraps=jpeg.strip_metadata
+        ) as strip:
+            result = self.dispatcher.clean_bytes(data, "pdf")
+
+        self.assertTrue(result.is_success, result.message)
+        self.assertEqual(strip.call_count, 1)
+        self.assertEqual(result.cleaned_fields["image_metadata"], 3)
+        for image in self._images(result.output_data):
+            self.assertNotIn(GPS_IFD, Image.open(io.BytesIO(image.get_data())).getexif())
+
+    def test_keep_images(self):
+        """Тест: при отключенной очистке изображения не меняются."""
+        self.mock_settings.get_metadata_to_clean.return_value = {"images": False}
+
+        result = self.dispatcher.clean_bytes(self._make_pdf([self._image]), "pdf")
+
+        self.assertTrue(result.is_success, result.message)
+        (image,) = self._images(result.output_data)
+        self.assertIn("/Metadata", image)
+        self.assertEqual(image.get_data(), self.photo)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+"""Тесты для конвейерной пакетной обработки."""
+
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from metadata_cleaner.batch.pipeline import ByteBudget, PipelineEngine
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.events import DispatcherObserver
+from metadata_cleaner.cleaner.models import (
+    CleaningOptions,
+    CleanStatus,
+    FileType,
+    OutputMode,
+)
+from metadata_cleaner.services.settings_service import SettingsService
+
+TEST_FILES = Path(__file__).parent / "test_files"
+
+
+class _StageThreads(DispatcherObserver):
+    """Наблюдатель, запоминающий потоки, в которых выполнялись этапы."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.threads: dict[str, set[str]] = {}
+
+    def on_stage(self, job, stage, seconds):
+        with self.lock:
+            self.threads.setdefault(stage, set()).add(threading.current_thread().name)
+
+
+class TestByteBudget(unittest.TestCase):
+    """Тесты для ByteBudget."""
+
+    def test_acquire_within_limit(self):
+        """Тест: запросы в пределах бюджета не блокируются."""
+        budget = ByteBudget(100)
+        self.assertTrue(budget.acquire(60, timeout=0))
+        self.assertTrue(budget.acquire(40, timeout=0))
+        self.assertFalse(budget.acquire(1, timeout=0.01))
+
+        budget.release(40)
+        self.assertTrue(budget.acquire(30, timeout=0))
+        self.assertEqual(budget.used, 90)
+
+    def test_oversized_request_when_empty(self):
+        """Тест: файл больше бюджета допускается, только когда бюджет свободен."""
+        budget = ByteBudget(100)
+        self.assertTrue(budget.acquire(500, timeout=0))
+        self.assertFalse(budget.acquire(1, timeout=0.01))
+        budget.release(500)
+        self.assertTrue(budget.acquire(1, timeout=0))
+
+
+class TestPipelineEngine(unittest.TestCase):
+    """Тесты для PipelineEngine."""
+
+    def setUp(self):
+        """Создание тестовых файлов."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.mock_settings = mock.Mock(spec=SettingsService)
+        self.mock_settings.get_max_threads.return_value = 3
+        self.mock_settings.get_output_mode.return_value = OutputMode.CREATE_COPY
+        self.mock_settings.get_metadata_to_clean.return_value = {"creator": True}
+        self.dispatcher = MetadataDispatcher(self.mock_settings)
+
+        self.files = []
+        for i in range(6):
+            path = self.temp_dir / f"image{i}.png"
+            Image.new("RGB", (16 + i, 16), (i * 40, 0, 0)).save(path)
+            self.files.append(path)
+        xlsx = self.temp_dir / "sheet.xlsx"
+        shutil.copy(TEST_FILES / "test_spreadsheet.xlsx", xlsx)
+        self.files.append(xlsx)
+
+    def tearDown(self):
+        """Удаление тестовых файлов."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _cleaned(path: Path) -> Path:
+        return path.with_name(f"{path.stem}_cleaned{path.suffix}")
+
+    def test_all_files_processed(self):
+        """Тест обработки всех файлов с результатом, как у обычной очистки."""
+        engine = PipelineEngine(self.dispatcher, jobs=2, prefetch_bytes=4096)
+
+        results = list(engine.run(self.files))
+
+        self.assertEqual(len(results), len(self.files))
+        for result in results:
+            self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+            self.assertIsNone(result.job.source_data)
+            self.assertIsNone(result.job.pending_write)
+            self.assertGreater(result.output_size, 0)
+
+        expected = self._cleaned(self.files[0]).read_bytes()
+        self._cleaned(self.files[0]).unlink()
+        self.dispatcher.process_file(self.files[0])
+        self.assertEqual(self._cleaned(self.files[0]).read_bytes(), expected)
+
+    def test_options_reach_jobs(self):
+        """Тест: опции запуска попадают в задачи конвейера."""
+        self.mock_settings.get_output_mode.return_value = (
+            OutputMode.BACKUP_AND_OVERWRITE
+        )
+        options = CleaningOptions(clean_author=False, create_backup=False)
+        engine = PipelineEngine(self.dispatcher, jobs=1, options=options)
+
+        results = list(engine.run(self.files[:1]))
+
+        self.assertEqual(results[0].status, CleanStatus.SUCCESS, results[0].message)
+        self.assertFalse(results[0].job.clean_fields["creator"])
+        self.assertFalse(results[0].job.backup_enabled)
+        self.assertFalse(self.files[0].with_suffix(".png.bak").exists())
+
+    def test_stages_run_in_separate_threads(self):
+        """Тест: чтение, очистка и запись выполняются разными пулами потоков."""
+        observer = _StageThreads()
+        self.dispatcher.add_observer(observer)
+        self.dispatcher.fsync_output = True
+        engine = PipelineEngine(self.dispatcher, jobs=2)
+
+        results = list(engine.run(self.files))
+
+        self.assertTrue(all(r.is_success for r in results))
+        threads = observer.threads
+        self.assertTrue(any(n.startswith("clean-read") for n in threads["read"]))
+        self.assertTrue(all(n.startswith("clean-write") for n in threads["write"]))
+        self.assertTrue(all(n.startswith("clean-write") for n in threads["fsync"]))
+        self.assertTrue(
+            any(n.startswith(f"clean-{FileType.IMAGE.value}") for n in threads["transform"])
+        )
+        self.assertGreater(engine.stage_totals[FileType.IMAGE].write, 0)
+
+    def test_backup_from_prefetched_data(self):
+        """Тест резервной копии из прочитанного заранее содержимого."""
+        self.mock_settings.get_output_mode.return_value = (
+            OutputMode.BACKUP_AND_OVERWRITE
+        )
+        original = self.files[0].read_bytes()
+        engine = PipelineEngine(self.dispatcher, jobs=1)
+
+        results = list(engine.run(self.files[:1]))
+
+        self.assertEqual(results[0].status, CleanStatus.SUCCESS)
+        backup = self.files[0].with_suffix(".png.bak")
+        self.assertEqual(backup.read_bytes(), original)
+        self.assertNotEqual(self.files[0].read_bytes(), b"")
+
+    def test_write_error_reported(self):
+        """Тест: ошибка записи на этапе записи дает результат с ошибкой."""
+        engine = PipelineEngine(self.dispatcher, jobs=1)
+
+        with mock.patch.object(Path, "write_bytes", side_effect=OSError("диск полон")):
+            results = list(engine.run(self.files[:1]))
+
+        self.assertEqual(results[0].status, CleanStatus.ERROR)
+        self.assertIn("диск полон", results[0].message)
+        self.assertFalse(self._cleaned(self.files[0]).exists())
+
+    def test_unsupported_and_missing_files(self):
+        """Тест пропуска неподдерживаемых и отсутствующих файлов."""
+        unsupported = self.temp_dir / "notes.txt"
+        unsupported.write_text("text")
+        engine = PipelineEngine(self.dispatcher, jobs=2)
+
+        results = list(engine.run([unsupported, self.temp_dir / "missing.png"]))
+
+        statuses = {r.job.file_path.name: r.status for r in results}
+        self.assertEqual(statuses["notes.txt"], CleanStatus.SKIPPED)
+        self.assertEqual(statuses["missing.png"], CleanStatus.ERROR)
+
+    def test_early_stop(self):
+        """Тест досрочного прекращения чтения результатов."""
+        engine = PipelineEngine(self.dispatcher, jobs=1, prefetch_bytes=1)
+
+        results = engine.run(self.files)
+        first = next(results)
+        results.close()
+
+        self.assertIn(first.job.file_path, self.files)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Тесты для разделения файлов между узлами."""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from metadata_cleaner.batch.sharding import Shard
+from metadata_cleaner.batch.walker import DirectoryWalker, WalkOptions
+from metadata_cleaner.cli import iter_input_paths
+
+
+class TestShard(unittest.TestCase):
+    """Тесты для Shard."""
+
+    def test_parse(self):
+        """Тест разбора спецификации i/N."""
+        self.assertEqual(Shard.parse("2/4"), Shard(2, 4))
+        self.assertEqual(str(Shard.parse("1/1")), "1/1")
+        for spec in ("0/4", "5/4", "2", "a/b", "1/0"):
+            with self.assertRaises(ValueError, msg=spec):
+                Shard.parse(spec)
+
+    def test_every_path_in_exactly_one_shard(self):
+        """Тест: каждый путь принадлежит ровно одной части."""
+        paths = [f"dir{i % 7}/file{i}.jpg" for i in range(1000)]
+        shards = [Shard(i, 4) for i in range(1, 5)]
+
+        owners = [sum(shard.owns(path) for shard in shards) for path in paths]
+
+        self.assertEqual(set(owners), {1})
+        sizes = [sum(shard.owns(path) for path in paths) for shard in shards]
+        expected = len(paths) / len(shards)
+        self.assertTrue(all(abs(size - expected) < expected / 2 for size in sizes), sizes)
+
+    def test_stable_assignment(self):
+        """Тест: разбиение не зависит от запуска (фиксированный хеш)."""
+        owners = [i for i in range(1, 4) if Shard(i, 3).owns("photos/2020/a.jpg")]
+        self.assertEqual(owners, [1])
+
+
+class TestShardedWalk(unittest.TestCase):
+    """Тесты обхода каталогов с --shard."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.rel_paths = [f"sub{i % 3}/file{i}.jpg" for i in range(30)]
+        for rel in self.rel_paths:
+            path = self.temp_dir / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"data")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _walk(self, shard: Shard) -> set[str]:
+        walker = DirectoryWalker(WalkOptions(shard=shard))
+        return {
+            p.relative_to(self.temp_dir).as_posix() for p in walker.walk(self.temp_dir)
+        }
+
+    def test_shards_partition_tree(self):
+        """Тест: части обхода не пересекаются и вместе дают все файлы."""
+        parts = [self._walk(Shard(i, 3)) for i in range(1, 4)]
+
+        self.assertEqual(sum(len(part) for part in parts), len(self.rel_paths))
+        self.assertEqual(set().union(*parts), set(self.rel_paths))
+        for rel in parts[0]:
+            self.assertTrue(Shard(1, 3).owns(rel))
+
+    def test_iter_input_paths_explicit_files(self):
+        """Тест: явные файлы отбираются по пути, каталоги — по относительному."""
+        shard = Shard(2, 3)
+        explicit = [self.temp_dir / rel for rel in self.rel_paths[:10]]
+
+        paths = list(
+            iter_input_paths(
+                [*explicit, self.temp_dir], WalkOptions(), {".jpg"}, shard
+            )
+        )
+
+        expected_explicit = [p for p in explicit if shard.owns(p.as_posix())]
+        self.assertEqual(paths[: len(expected_explicit)], expected_explicit)
+        walked = {
+            p.relative_to(self.temp_dir).as_posix()
+            for p in paths[len(expected_explicit) :]
+        }
+        self.assertEqual(walked, {rel for rel in self.rel_paths if shard.owns(rel)})
+
+
+if __name__ == "__main__":
+    unittest.main()
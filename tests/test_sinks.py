@@ -0,0 +1,221 @@
+"""Тесты для приемников результатов очистки."""
+
+import csv
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from metadata_cleaner.batch.reports import merge_reports
+from metadata_cleaner.batch.sinks import (
+    CsvSink,
+    JsonlSink,
+    MultiSink,
+    SqliteSink,
+    open_sink,
+    parse_sink_spec,
+    read_records,
+    result_to_record,
+)
+from metadata_cleaner.cleaner.errors import EncryptedFileError
+from metadata_cleaner.cleaner.models import CleanResult, CleanStatus, FileJob, FileType
+
+
+def _make_result(index: int, status=CleanStatus.SUCCESS, error=None) -> CleanResult:
+    job = FileJob(
+        file_path=Path(f"/data/file{index}.pdf"),
+        file_type=FileType.PDF,
+        output_path=Path(f"/data/file{index}_cleaned.pdf"),
+    )
+    job.timings.read = 0.1
+    job.timings.write = 0.05
+    return CleanResult(
+        job=job,
+        status=status,
+        message="ok",
+        cleaned_fields={"author": "Иван", "created": "2020"},
+        error=error,
+        processing_time=0.25,
+        input_size=1000,
+        output_size=900,
+    )
+
+
+class TestResultRecord(unittest.TestCase):
+    """Тесты сериализации CleanResult."""
+
+    def test_record_is_json_serializable(self):
+        """Тест сериализации результата с исключением."""
+        result = _make_result(1, CleanStatus.ERROR, EncryptedFileError("зашифрован"))
+        record = result_to_record(result)
+
+        json.dumps(record)
+        self.assertEqual(record["status"], "error")
+        self.assertEqual(record["file_type"], "pdf")
+        self.assertEqual(record["error_type"], "EncryptedFileError")
+        self.assertEqual(record["input_size"], 1000)
+
+    def test_record_contains_field_names_only(self):
+        """Тест: в отчет попадают имена полей, а не удаленные значения."""
+        record = result_to_record(_make_result(1))
+        self.assertEqual(record["cleaned_fields"], ["author", "created"])
+        self.assertNotIn("Иван", json.dumps(record, ensure_ascii=False))
+
+    def test_record_contains_stage_timings(self):
+        """Тест: время этапов попадает в запись."""
+        record = result_to_record(_make_result(1))
+        self.assertEqual(record["stages"]["read"], 0.1)
+        self.assertEqual(record["stages"]["fsync"], 0)
+        self.assertIsNone(record["memory"])
+
+
+class TestSinks(unittest.TestCase):
+    """Тесты для JSONL, CSV и SQLite приемников."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_jsonl_sink_buffers(self):
+        """Тест буферизованной записи JSONL."""
+        path = self.temp_dir / "out.jsonl"
+        sink = JsonlSink(path, buffer_records=3)
+        for i in range(4):
+            sink.write(_make_result(i))
+        self.assertEqual(len(path.read_text(encoding="utf-8").splitlines()), 3)
+        sink.close()
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(json.loads(lines[3])["path"], str(Path("/data/file3.pdf")))
+
+    def test_csv_sink(self):
+        """Тест записи CSV с заголовком."""
+        path = self.temp_dir / "out.csv"
+        with CsvSink(path) as sink:
+            sink.write(_make_result(1))
+
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(rows[0]["status"], "success")
+        self.assertEqual(rows[0]["cleaned_fields"], "author;created")
+        self.assertEqual(json.loads(rows[0]["stages"])["write"], 0.05)
+
+    def test_sqlite_sink(self):
+        """Тест записи в SQLite."""
+        path = self.temp_dir / "run.db"
+        with SqliteSink(path, buffer_records=2) as sink:
+            for i in range(5):
+                sink.write(_make_result(i))
+
+        with sqlite3.connect(path) as conn:
+            count, size = conn.execute(
+                "SELECT COUNT(*), SUM(output_size) FROM results"
+            ).fetchone()
+        self.assertEqual(count, 5)
+        self.assertEqual(size, 4500)
+
+    def test_sqlite_sink_adds_missing_columns(self):
+        """Тест дозаписи в отчет SQLite без колонки stages."""
+        path = self.temp_dir / "old.db"
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE results (path, status)")
+
+        with SqliteSink(path) as sink:
+            sink.write(_make_result(1))
+
+        with sqlite3.connect(path) as conn:
+            stages = conn.execute("SELECT stages FROM results").fetchone()[0]
+        self.assertEqual(json.loads(stages)["read"], 0.1)
+
+    def test_multi_sink(self):
+        """Тест одновременной записи в несколько приемников."""
+        jsonl = self.temp_dir / "a.jsonl"
+        db = self.temp_dir / "a.db"
+        with MultiSink([open_sink(f"jsonl:{jsonl}"), open_sink(str(db))]) as sink:
+            sink.write(_make_result(1))
+
+        self.assertEqual(len(jsonl.read_text(encoding="utf-8").splitlines()), 1)
+        with sqlite3.connect(db) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM results").fetchone()[0], 1)
+
+    def test_parse_sink_spec(self):
+        """Тест разбора спецификаций отчетов."""
+        self.assertEqual(parse_sink_spec("sqlite:run.db"), ("sqlite", Path("run.db")))
+        self.assertEqual(parse_sink_spec("report.csv"), ("csv", Path("report.csv")))
+        with self.assertRaises(ValueError):
+            parse_sink_spec("report.txt")
+
+
+class TestReadAndMerge(unittest.TestCase):
+    """Тесты чтения и объединения отчетов."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _report(self, spec: str, indexes: list[int], status=CleanStatus.SUCCESS) -> str:
+        spec = spec.replace("DIR", str(self.temp_dir))
+        with open_sink(spec) as sink:
+            for index in indexes:
+                sink.write(_make_result(index, status))
+        return spec
+
+    def test_read_round_trip(self):
+        """Тест: записи читаются из всех форматов в исходном виде."""
+        expected = result_to_record(_make_result(1))
+        for kind, name in (("jsonl", "r.jsonl"), ("csv", "r.csv"), ("sqlite", "r.db")):
+            with self.subTest(kind=kind):
+                spec = self._report(f"{kind}:DIR/{name}", [1])
+                (record,) = read_records(spec)
+                for key in RECORD_KEYS:
+                    self.assertEqual(record[key], expected[key], key)
+
+    def test_merge_reports(self):
+        """Тест общих итогов по отчетам частей."""
+        specs = [
+            self._report("jsonl:DIR/shard1.jsonl", [1, 2]),
+            self._report("csv:DIR/shard2.csv", [3], CleanStatus.ERROR),
+            self._report("sqlite:DIR/shard3.db", [4, 2]),
+        ]
+        merged = self.temp_dir / "all.jsonl"
+
+        with open_sink(f"jsonl:{merged}") as output:
+            summary = merge_reports(specs, output)
+
+        self.assertEqual(summary.records, 5)
+        self.assertEqual(summary.statuses["success"], 4)
+        self.assertEqual(summary.statuses["error"], 1)
+        self.assertEqual(summary.file_types["pdf"], 5)
+        self.assertEqual(summary.input_bytes, 5000)
+        self.assertEqual(summary.output_bytes, 4500)
+        self.assertAlmostEqual(summary.processing_time, 1.25)
+        self.assertAlmostEqual(summary.stages["read"], 0.5)
+        self.assertEqual(summary.duplicates, 1)
+        self.assertEqual(list(summary.per_report.values()), [2, 1, 2])
+        self.assertEqual(len(list(read_records(str(merged)))), 5)
+        json.dumps(summary.as_dict())
+
+
+# Поля, которые сохраняются без изменений во всех форматах
+RECORD_KEYS = [
+    "path",
+    "output_path",
+    "file_type",
+    "status",
+    "processing_time",
+    "stages",
+    "input_size",
+    "output_size",
+    "cleaned_fields",
+]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Тесты для потоковых источников путей."""
+
+import io
+import os
+import unittest
+from pathlib import Path
+
+from metadata_cleaner.batch.sources import iter_file_list
+
+
+class _TrickleStream(io.RawIOBase):
+    """Поток, отдающий данные маленькими порциями, как медленный pipe."""
+
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+        self.reads = 0
+
+    def readable(self):
+        return True
+
+    def read1(self, size=-1):
+        self.reads += 1
+        return self._chunks.pop(0) if self._chunks else b""
+
+
+class TestIterFileList(unittest.TestCase):
+    """Тесты для iter_file_list."""
+
+    def test_newline_separated(self):
+        """Тест списка, разделенного переводами строк."""
+        stream = io.BytesIO(b"a.jpg\nb c.pdf\r\n\nd.docx")
+        self.assertEqual(
+            list(iter_file_list(stream)),
+            [Path("a.jpg"), Path("b c.pdf"), Path("d.docx")],
+        )
+
+    def test_null_separated(self):
+        """Тест списка с разделителем NUL и переводом строки в имени."""
+        stream = io.BytesIO(b"a.jpg\0with\nnewline.pdf\0\0last.png")
+        self.assertEqual(
+            list(iter_file_list(stream, null_separated=True)),
+            [Path("a.jpg"), Path("with\nnewline.pdf"), Path("last.png")],
+        )
+
+    def test_null_separated_is_lazy(self):
+        """Тест ленивого чтения: первый путь доступен до конца списка."""
+        stream = _TrickleStream([b"fir", b"st.jpg\0sec", b"ond.jpg\0"])
+        paths = iter_file_list(stream, null_separated=True)
+
+        self.assertEqual(next(paths), Path("first.jpg"))
+        self.assertEqual(stream.reads, 2)
+        self.assertEqual(list(paths), [Path("second.jpg")])
+
+    def test_undecodable_bytes(self):
+        """Тест путей с байтами, не являющимися корректным UTF-8."""
+        raw = b"caf\xe9.jpg"
+        paths = list(iter_file_list(io.BytesIO(raw + b"\0"), null_separated=True))
+        self.assertEqual(os.fsencode(paths[0]), raw)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Тесты для определения формата и буферизации потокового ввода."""
+
+import io
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from metadata_cleaner.cleaner.streams import detect_type, spool
+
+TEST_FILES = Path(__file__).parent / "test_files"
+
+
+class TestDetectType(unittest.TestCase):
+    """Тесты определения формата по сигнатуре."""
+
+    def test_test_files(self):
+        """Тест определения формата тестовых файлов."""
+        cases = {
+            "test_image.jpeg": "jpg",
+            "test_image.gif": "gif",
+            "test_spreadsheet.xlsx": "xlsx",
+            "test_presentation.pptx": "pptx",
+            "test_video.mp4": "mp4",
+            "test_video.mov": "mov",
+        }
+        for name, expected in cases.items():
+            with self.subTest(name=name):
+                path = TEST_FILES / name
+                self.assertEqual(detect_type(path.read_bytes()), expected)
+                self.assertEqual(detect_type(path), expected)
+
+    def test_signatures(self):
+        """Тест сигнатур форматов без тестовых файлов."""
+        self.assertEqual(detect_type(b"\x89PNG\r\n\x1a\n" + b"\0" * 8), "png")
+        self.assertEqual(detect_type(b"%PDF-1.7\n"), "pdf")
+        self.assertEqual(detect_type(b"RIFF\x24\0\0\0WEBPVP8X"), "webp")
+        self.assertEqual(detect_type(b"II*\x00\x08\0\0\0"), "tiff")
+        self.assertEqual(detect_type(b"MM\x00*\0\0\0\x08"), "tiff")
+        ebml = b"\x1a\x45\xdf\xa3"
+        self.assertEqual(detect_type(ebml + b"\x87\x42\x82\x84webm"), "webm")
+        self.assertEqual(detect_type(ebml + b"\x8b\x42\x82\x88matroska"), "mkv")
+        self.assertEqual(detect_type(b"\0\0\0\x18ftypheic\0\0\0\0"), "heic")
+        self.assertEqual(detect_type(b"\0\0\0\x18ftypisom\0\0\0\0"), "mp4")
+        self.assertEqual(detect_type(b"\0\0\0\x18ftypqt  \0\0\0\0"), "mov")
+
+    def test_unknown(self):
+        """Тест неизвестного содержимого и поврежденного ZIP."""
+        self.assertIsNone(detect_type(b"plain text"))
+        self.assertIsNone(detect_type(b""))
+        self.assertIsNone(detect_type(b"PK\x03\x04broken"))
+        self.assertIsNone(detect_type(b"\0\0\0\x18ftypavif\0\0\0\0"))
+
+
+class TestSpool(unittest.TestCase):
+    """Тесты буферизации потока."""
+
+    def test_small_stream_in_memory(self):
+        """Тест: поток до порога остается в памяти."""
+        with spool(io.BytesIO(b"x" * 100), threshold=100) as spooled:
+            self.assertEqual(spooled, b"x" * 100)
+
+    def test_large_stream_spooled_to_file(self):
+        """Тест: поток больше порога сохраняется во временный файл и удаляется."""
+        data = bytes(range(256)) * 40
+        with spool(io.BytesIO(data), threshold=1000) as spooled:
+            self.assertIsInstance(spooled, Path)
+            self.assertEqual(spooled.read_bytes(), data)
+            temp_dir = spooled.parent
+        self.assertFalse(temp_dir.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+"""Тесты для удаления тегов TIFF на уровне IFD."""
+
+import io
+import shutil
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image, TiffImagePlugin
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.errors import CorruptedFileError, MetadataProcessingError
+from metadata_cleaner.cleaner.formats import tiff
+from metadata_cleaner.cleaner.models import CleanStatus, OutputMode
+from metadata_cleaner.services.settings_service import SettingsService
+
+TEST_FILES = Path(__file__).parent / "test_files"
+
+XMP = b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><Artist>J. Doe</Artist></x:xmpmeta>'
+SECRETS = (b"Test Camera", b"J. Doe", b"Editor 1.0", b"2024:01:01")
+# Тип SHORT: значение записи занимает два байта
+SHORT = 3
+
+
+def _make_tiff(compression: str | None = None, gps: bool = True) -> bytes:
+    info = TiffImagePlugin.ImageFileDirectory_v2()
+    info[271] = "Test Camera"
+    info[272] = "Test Model"
+    info[305] = "Editor 1.0"
+    info[306] = "2024:01:01 12:00:00"
+    info[315] = "J. Doe"
+    info[700] = XMP
+    if gps:
+        # libtiff (сжатые TIFF) не умеет записывать GPS IFD из словаря
+        info[tiff.GPS_IFD] = {1: "N", 2: (55.0, 45.0, 0.0)}
+    with Image.open(TEST_FILES / "test_image.jpeg") as image:
+        buffer = io.BytesIO()
+        image.convert("RGB").save(
+            buffer, "TIFF", tiffinfo=info, compression=compression
+        )
+    return buffer.getvalue()
+
+
+def _odd_offset_tiff() -> bytes:
+    """TIFF 2x1 в градациях серого: значения Make и Artist по нечетным смещениям."""
+    make, artist, pixels = b"SecretMake\0", b"SecretArtist\0", b"\x10\xf0"
+    entries = 9
+    data_start = 8 + 2 + 12 * entries + 4
+    make_offset = data_start + 1
+    artist_offset = make_offset + len(make) + 2
+    pixels_offset = artist_offset + len(artist) + 1
+    fields = [
+        (256, 3, 1, 2),
+        (257, 3, 1, 1),
+        (258, 3, 1, 8),
+        (259, 3, 1, 1),
+        (262, 3, 1, 1),
+        (271, 2, len(make), make_offset),
+        (273, 4, 1, pixels_offset),
+        (279, 4, 1, len(pixels)),
+        (315, 2, len(artist), artist_offset),
+    ]
+    table = struct.pack("<H", entries)
+    for tag, type_, count, value in fields:
+        fmt = "<HHIHxx" if type_ == SHORT else "<HHII"
+        table += struct.pack(fmt, tag, type_, count, value)
+    table += struct.pack("<I", 0)
+    return (
+        b"II*\x00" + struct.pack("<I", 8) + table
+        + b"\0" + make + b"\0\0" + artist + b"\0" + pixels
+    )
+
+
+def _pixels(data: bytes) -> bytes:
+    with Image.open(io.BytesIO(data)) as image:
+        return image.tobytes()
+
+
+def _tags(data: bytes) -> set[int]:
+    with Image.open(io.BytesIO(data)) as image:
+        return set(image.getexif())
+
+
+class TestTiffScrub(unittest.TestCase):
+    """Тесты для metadata_cleaner.cleaner.formats.tiff."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.data = _make_tiff()
+        self.assertTrue({271, 315, 700, tiff.GPS_IFD} <= _tags(self.data))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_scrub_in_place(self):
+        """Тест: на месте размер не меняется, значения тегов обнуляются."""
+        path = self.temp_dir / "photo.tiff"
+        path.write_bytes(self.data)
+
+        result = tiff.scrub_file(path)
+
+        cleaned = path.read_bytes()
+        self.assertEqual(len(cleaned), len(self.data))
+        self.assertEqual(
+            sorted(result.names),
+            ["artist", "datetime", "gps", "make", "model", "software", "xmp"],
+        )
+        self.assertFalse(_tags(cleaned) & tiff.DEFAULT_TAGS)
+        for secret in (*SECRETS, b"xmpmeta"):
+            self.assertNotIn(secret, cleaned)
+        self.assertEqual(_pixels(cleaned), _pixels(self.data))
+
+    def test_write_compacted(self):
+        """Тест: в копии удаленные значения вырезаны, смещения полос сдвинуты."""
+        target = io.BytesIO()
+
+        result = tiff.write_compacted(self.data, target)
+
+        cleaned = target.getvalue()
+        self.assertEqual(len(cleaned), len(self.data) - result.removed_bytes)
+        self.assertGreater(result.removed_bytes, len(XMP))
+        self.assertFalse(_tags(cleaned) & tiff.DEFAULT_TAGS)
+        self.assertEqual(_pixels(cleaned), _pixels(self.data))
+
+    def test_compressed_strips(self):
+        """Тест: несколько полос LZW не декодируются и остаются читаемыми."""
+        data = _make_tiff("tiff_lzw", gps=False)
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertGreater(len(image.tag_v2[273]), 1)
+        target = io.BytesIO()
+
+        tiff.write_compacted(data, target, tiff.ALWAYS_TAGS)
+
+        cleaned = target.getvalue()
+        self.assertNotIn(700, _tags(cleaned))
+        self.assertIn(271, _tags(cleaned))
+        self.assertEqual(_pixels(cleaned), _pixels(data))
+
+    def test_odd_offsets(self):
+        """Тест: значения по нечетным смещениям не остаются в копии."""
+        data = _odd_offset_tiff()
+        self.assertEqual(_tags(data) & {271, 315}, {271, 315})
+        target = io.BytesIO()
+
+        result = tiff.write_compacted(data, target)
+
+        cleaned = target.getvalue()
+        self.assertEqual(sorted(result.names), ["artist", "make"])
+        self.assertNotIn(b"Secret", cleaned)
+        self.assertFalse(_tags(cleaned) & {271, 315})
+        self.assertEqual(_pixels(cleaned), _pixels(data))
+
+    def test_nothing_to_remove(self):
+        """Тест: без подходящих тегов копия совпадает с исходником."""
+        target = io.BytesIO()
+
+        result = tiff.write_compacted(self.data, target, {42016})
+
+        self.assertEqual(result.tags, [])
+        self.assertEqual(target.getvalue(), self.data)
+
+    def test_unsupported(self):
+        """Тест: не TIFF, BigTIFF и обрезанная таблица."""
+        with self.assertRaises(CorruptedFileError):
+            tiff.write_compacted(b"GIF89a\0\0", io.BytesIO())
+        with self.assertRaises(MetadataProcessingError):
+            tiff.write_compacted(b"II+\x00\x08\x00\x00\x00", io.BytesIO())
+        with self.assertRaises(CorruptedFileError):
+            tiff.write_compacted(b"II*\x00\x08\x00\x00\x00\x05\x00", io.BytesIO())
+
+
+class TestTiffHandler(unittest.TestCase):
+    """Тесты очистки TIFF через диспетчер."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.mock_settings = mock.Mock(spec=SettingsService)
+        self.mock_settings.get_metadata_to_clean.return_value = {"gps": True}
+        self.mock_settings.get_output_mode.return_value = OutputMode.REPLACE
+        self.dispatcher = MetadataDispatcher(self.mock_settings)
+        self.data = _make_tiff()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_replace_in_place(self):
+        """Тест: при замене удаляются только выбранные группы тегов."""
+        path = self.temp_dir / "photo.tif"
+        path.write_bytes(self.data)
+
+        result = self.dispatcher.process_file(path)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        self.assertTrue(result.cleaned_fields["gps"])
+        self.assertTrue(result.cleaned_fields["xmp"])
+        tags = _tags(path.read_bytes())
+        self.assertNotIn(tiff.GPS_IFD, tags)
+        self.assertIn(271, tags)
+        self.assertEqual(path.stat().st_size, len(self.data))
+        self.assertEqual([p.name for p in self.temp_dir.iterdir()], ["photo.tif"])
+
+    def test_create_copy(self):
+        """Тест: копия компактнее исходника, исходник не меняется."""
+        self.mock_settings.get_output_mode.return_value = OutputMode.CREATE_COPY
+        self.mock_settings.get_metadata_to_clean.return_value = {
+            "gps": True,
+            "camera": True,
+        }
+        path = self.temp_dir / "scan.dng"
+        path.write_bytes(self.data)
+
+        result = self.dispatcher.process_file(path)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        output = result.job.output_path.read_bytes()
+        self.assertLess(len(output), len(self.data))
+        self.assertFalse(_tags(output) & (tiff.CAMERA_TAGS | tiff.GPS_TAGS))
+        self.assertEqual(_pixels(output), _pixels(self.data))
+        self.assertEqual(path.read_bytes(), self.data)
+
+    def test_clean_bytes(self):
+        """Тест очистки TIFF в памяти."""
+        result = self.dispatcher.clean_bytes(self.data, "tiff")
+
+        self.assertTrue(result.is_success, result.message)
+        self.assertNotIn(tiff.GPS_IFD, _tags(result.output_data))
+        self.assertEqual(_pixels(result.output_data), _pixels(self.data))
+
+
+if __name__ == "__main__":
+    unittest.main()
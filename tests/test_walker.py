@@ -0,0 +1,105 @@
+"""Тесты для многопоточного обхода каталогов."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from metadata_cleaner.batch.walker import DirectoryWalker, WalkOptions
+from metadata_cleaner.cli import iter_input_paths
+
+
+class TestDirectoryWalker(unittest.TestCase):
+    """Тесты для DirectoryWalker."""
+
+    def setUp(self):
+        """Создание тестового дерева каталогов."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        for rel in [
+            "a.jpg",
+            "b.txt",
+            "sub/c.pdf",
+            "sub/deep/d.png",
+            "sub/deep/deeper/e.docx",
+            ".git/objects/f.jpg",
+        ]:
+            path = self.temp_dir / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"data")
+
+    def tearDown(self):
+        """Удаление тестового дерева."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _walk(self, **kwargs) -> list[str]:
+        walker = DirectoryWalker(WalkOptions(**kwargs))
+        return sorted(
+            p.relative_to(self.temp_dir).as_posix() for p in walker.walk(self.temp_dir)
+        )
+
+    def test_walk_all_files(self):
+        """Тест обхода всех файлов дерева."""
+        self.assertEqual(len(self._walk()), 6)
+
+    def test_walk_extensions_filter(self):
+        """Тест фильтрации по поддерживаемым расширениям."""
+        result = self._walk(extensions={".jpg", ".pdf"})
+        self.assertEqual(result, [".git/objects/f.jpg", "a.jpg", "sub/c.pdf"])
+
+    def test_walk_include_exclude(self):
+        """Тест шаблонов --include и --exclude."""
+        result = self._walk(include=["*.jpg", "*.png"], exclude=[".git"])
+        self.assertEqual(result, ["a.jpg", "sub/deep/d.png"])
+
+    def test_walk_exclude_relative_path(self):
+        """Тест шаблона исключения с относительным путем."""
+        result = self._walk(exclude=["sub/deep"])
+        self.assertNotIn("sub/deep/d.png", result)
+        self.assertIn("sub/c.pdf", result)
+
+    def test_walk_max_depth(self):
+        """Тест ограничения глубины обхода."""
+        self.assertEqual(self._walk(max_depth=0, exclude=[".git"]), ["a.jpg", "b.txt"])
+        self.assertEqual(
+            self._walk(max_depth=1, exclude=[".git"]), ["a.jpg", "b.txt", "sub/c.pdf"]
+        )
+
+    @unittest.skipIf(os.name == "nt", "Символические ссылки требуют прав на Windows")
+    def test_walk_symlink_loop(self):
+        """Тест защиты от циклов при следовании ссылкам."""
+        (self.temp_dir / "sub" / "loop").symlink_to(self.temp_dir, target_is_directory=True)
+
+        without_follow = self._walk()
+        with_follow = self._walk(follow_symlinks=True)
+
+        self.assertEqual(len(without_follow), 6)
+        self.assertEqual(len(with_follow), 6)
+
+    def test_walk_early_close(self):
+        """Тест досрочного прекращения обхода потребителем."""
+        walker = DirectoryWalker(WalkOptions(queue_size=1))
+        stream = walker.walk(self.temp_dir)
+        first = next(stream)
+        stream.close()
+        self.assertTrue(first.exists())
+
+    def test_iter_input_paths_mixed(self):
+        """Тест разворачивания файлов и каталогов в единый поток."""
+        explicit = self.temp_dir / "b.txt"
+        paths = list(
+            iter_input_paths(
+                [explicit, self.temp_dir / "sub"],
+                WalkOptions(),
+                supported_extensions={".pdf", ".png"},
+            )
+        )
+
+        self.assertEqual(paths[0], explicit)
+        self.assertEqual(
+            sorted(p.name for p in paths[1:]), ["c.pdf", "d.png"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
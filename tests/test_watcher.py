@@ -0,0 +1,192 @@
+"""Тесты для наблюдения за каталогом."""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from metadata_cleaner.batch.watcher import (
+    FolderWatcher,
+    WatchOptions,
+    inotify_available,
+    is_cleaner_artifact,
+)
+from metadata_cleaner.cleaner.models import CleanResult, CleanStatus, FileJob, FileType
+
+SETTLE = 0.2
+TIMEOUT = 5.0
+
+
+class _Collector:
+    """Итерация watcher.iter_files в отдельном потоке."""
+
+    def __init__(self, watcher: FolderWatcher):
+        self.watcher = watcher
+        self.files: queue.Queue[Path] = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        for path in self.watcher.iter_files():
+            self.files.put(path)
+
+    def next(self, timeout: float = TIMEOUT) -> Path:
+        return self.files.get(timeout=timeout)
+
+    def assert_empty(self, test: unittest.TestCase, wait: float):
+        with test.assertRaises(queue.Empty):
+            self.files.get(timeout=wait)
+
+    def stop(self):
+        self.watcher.close()
+        self.thread.join(TIMEOUT)
+
+
+class TestArtifacts(unittest.TestCase):
+    """Тесты распознавания собственных файлов очистителя."""
+
+    def test_artifacts(self):
+        """Тест: результаты очистки и временные файлы пропускаются."""
+        for name in (
+            "photo_cleaned.jpg",
+            "photo.jpg.bak",
+            ".photo.jpg",
+            "photo.jpg.tmp",
+            "photo.tmp.jpg",
+            "photo.jpg~",
+        ):
+            self.assertTrue(is_cleaner_artifact(name), name)
+        for name in ("photo.jpg", "cleaned.jpg", "report.pdf"):
+            self.assertFalse(is_cleaner_artifact(name), name)
+
+
+class _WatcherTests:
+    """Общие тесты для обоих способов обнаружения изменений."""
+
+    use_inotify = True
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.collectors = []
+
+    def tearDown(self):
+        for collector in self.collectors:
+            collector.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _watch(self, **kwargs) -> _Collector:
+        options = WatchOptions(
+            settle=SETTLE,
+            poll_interval=0.05,
+            use_inotify=self.use_inotify,
+            extensions={".jpg", ".png"},
+            **kwargs,
+        )
+        collector = _Collector(FolderWatcher(self.temp_dir, options))
+        self.collectors.append(collector)
+        # Дать наблюдателю подписаться на каталог
+        time.sleep(0.1)
+        return collector
+
+    def test_new_file_detected(self):
+        """Тест: новый файл выдается после того, как перестал меняться."""
+        collector = self._watch()
+        path = self.temp_dir / "photo.jpg"
+        path.write_bytes(b"data")
+
+        self.assertEqual(collector.next(), path)
+        collector.assert_empty(self, SETTLE * 2)
+
+    def test_growing_file_waits(self):
+        """Тест: файл, который еще дописывается, не выдается."""
+        collector = self._watch()
+        path = self.temp_dir / "upload.jpg"
+        with open(path, "wb") as f:
+            for _ in range(4):
+                f.write(b"x" * 1024)
+                f.flush()
+                collector.assert_empty(self, SETTLE / 2)
+
+        self.assertEqual(collector.next(), path)
+        self.assertEqual(path.stat().st_size, 4096)
+
+    def test_ignored_files(self):
+        """Тест: артефакты очистки и неподдерживаемые файлы не выдаются."""
+        collector = self._watch()
+        (self.temp_dir / "notes.txt").write_text("text")
+        (self.temp_dir / "photo_cleaned.jpg").write_bytes(b"data")
+        (self.temp_dir / "photo.jpg.bak").write_bytes(b"data")
+
+        collector.assert_empty(self, SETTLE * 3)
+
+    def test_rewrite_by_cleaner_ignored(self):
+        """Тест: перезапись файла очистителем не вызывает повторную очистку."""
+        collector = self._watch()
+        path = self.temp_dir / "photo.jpg"
+        path.write_bytes(b"original")
+        self.assertEqual(collector.next(), path)
+
+        path.write_bytes(b"cleaned")
+        job = FileJob(file_path=path, file_type=FileType.IMAGE, output_path=path)
+        collector.watcher.mark_done(CleanResult(job, CleanStatus.SUCCESS))
+        collector.assert_empty(self, SETTLE * 3)
+
+        # Последующее изменение пользователем снова обрабатывается
+        path.write_bytes(b"edited by user")
+        self.assertEqual(collector.next(), path)
+
+    def test_recursive_new_directory(self):
+        """Тест: файлы в созданных подкаталогах обнаруживаются при -r."""
+        collector = self._watch(recursive=True)
+        subdir = self.temp_dir / "album"
+        subdir.mkdir()
+        time.sleep(0.1)
+        path = subdir / "photo.png"
+        path.write_bytes(b"data")
+
+        self.assertEqual(collector.next(), path)
+
+    def test_process_existing(self):
+        """Тест обработки уже лежащих в каталоге файлов."""
+        path = self.temp_dir / "old.jpg"
+        path.write_bytes(b"data")
+        os.utime(path, (0, 0))
+
+        collector = self._watch(process_existing=True)
+
+        self.assertEqual(collector.next(), path)
+
+    def test_close_stops_iteration(self):
+        """Тест: close завершает ожидание без новых событий."""
+        collector = self._watch()
+        collector.stop()
+        self.assertFalse(collector.thread.is_alive())
+
+
+class TestPollingWatcher(_WatcherTests, unittest.TestCase):
+    """Тесты наблюдения опросом каталога."""
+
+    use_inotify = False
+
+    def test_backend(self):
+        """Тест выбора опроса при отключенном inotify."""
+        collector = self._watch()
+        self.assertEqual(collector.watcher.backend_name, "poll")
+
+
+@unittest.skipUnless(inotify_available(), "inotify недоступен")
+class TestInotifyWatcher(_WatcherTests, unittest.TestCase):
+    """Тесты наблюдения через inotify."""
+
+    def test_backend(self):
+        """Тест выбора inotify на Linux."""
+        collector = self._watch()
+        self.assertEqual(collector.watcher.backend_name, "inotify")
+
+
+if __name__ == "__main__":
+    unittest.main()
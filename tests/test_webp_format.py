@@ -0,0 +1,124 @@
+"""Тесты для очистки WebP на уровне чанков RIFF."""
+
+import io
+import shutil
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.errors import CorruptedFileError
+from metadata_cleaner.cleaner.formats import webp
+from metadata_cleaner.cleaner.models import CleanStatus, OutputMode
+from metadata_cleaner.services.settings_service import SettingsService
+
+TEST_FILES = Path(__file__).parent / "test_files"
+
+XMP = b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><Artist>J. Doe</Artist></x:xmpmeta>'
+
+
+def _fourccs(data: bytes) -> list[bytes]:
+    return [chunk.fourcc for chunk in webp.iter_chunks(io.BytesIO(data))]
+
+
+class TestWebpChunks(unittest.TestCase):
+    """Тесты для metadata_cleaner.cleaner.formats.webp."""
+
+    def setUp(self):
+        with Image.open(TEST_FILES / "test_image.jpeg") as image:
+            buffer = io.BytesIO()
+            image.save(
+                buffer, "WEBP", exif=image.info["exif"], xmp=XMP, lossless=True
+            )
+        self.data = buffer.getvalue()
+        self.assertIn(b"EXIF", _fourccs(self.data))
+
+    def test_strip_chunks(self):
+        """Тест: EXIF и XMP удаляются, флаги VP8X и размер RIFF исправляются."""
+        target = io.BytesIO()
+
+        removed = webp.strip_metadata(io.BytesIO(self.data), target)
+
+        cleaned = target.getvalue()
+        self.assertEqual(sorted(removed), ["exif", "xmp"])
+        fourccs = _fourccs(cleaned)
+        self.assertNotIn(b"EXIF", fourccs)
+        self.assertNotIn(b"XMP ", fourccs)
+        self.assertEqual(fourccs[0], b"VP8X")
+        self.assertEqual(cleaned[20] & 0x0C, 0)
+        self.assertEqual(struct.unpack("<I", cleaned[4:8])[0], len(cleaned) - 8)
+        with Image.open(io.BytesIO(cleaned)) as image, Image.open(
+            io.BytesIO(self.data)
+        ) as original:
+            self.assertEqual(len(image.getexif()), 0)
+            self.assertEqual(image.tobytes(), original.tobytes())
+
+    def test_image_chunks_copied(self):
+        """Тест: чанки изображения копируются без изменений."""
+        target = io.BytesIO()
+        webp.strip_metadata(io.BytesIO(self.data), target)
+
+        def image_chunk(data):
+            source = io.BytesIO(data)
+            for chunk in webp.iter_chunks(source):
+                if chunk.fourcc in (b"VP8 ", b"VP8L"):
+                    source.seek(chunk.offset)
+                    return source.read(chunk.total_size)
+            return None
+
+        self.assertEqual(image_chunk(target.getvalue()), image_chunk(self.data))
+
+    def test_missing_final_pad_byte(self):
+        """Тест: последний чанк нечетного размера без байта выравнивания."""
+        body = self.data[8:] + b"ZZZZ" + struct.pack("<I", 3) + b"abc"
+        data = b"RIFF" + struct.pack("<I", len(body)) + body
+        target = io.BytesIO()
+
+        webp.strip_metadata(io.BytesIO(data), target)
+
+        cleaned = target.getvalue()
+        self.assertTrue(cleaned.endswith(b"ZZZZ\x03\0\0\0abc\0"))
+        self.assertEqual(struct.unpack("<I", cleaned[4:8])[0], len(cleaned) - 8)
+        self.assertEqual(_fourccs(cleaned)[-1], b"ZZZZ")
+
+    def test_corrupted(self):
+        """Тест: не WebP и обрезанный чанк."""
+        with self.assertRaises(CorruptedFileError):
+            webp.strip_metadata(io.BytesIO(b"RIFF\0\0\0\0AVI "), io.BytesIO())
+        with self.assertRaises(CorruptedFileError):
+            webp.strip_metadata(io.BytesIO(self.data[:-10]), io.BytesIO())
+
+
+class TestWebpHandler(unittest.TestCase):
+    """Тесты очистки WebP через диспетчер."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.mock_settings = mock.Mock(spec=SettingsService)
+        self.mock_settings.get_metadata_to_clean.return_value = {"gps": True}
+        self.mock_settings.get_output_mode.return_value = OutputMode.REPLACE
+        self.dispatcher = MetadataDispatcher(self.mock_settings)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_replace_in_place(self):
+        """Тест замены файла на месте без временных файлов."""
+        path = self.temp_dir / "photo.webp"
+        with Image.open(TEST_FILES / "test_image.jpeg") as image:
+            image.save(path, "WEBP", exif=image.info["exif"])
+
+        result = self.dispatcher.process_file(path)
+
+        self.assertEqual(result.status, CleanStatus.SUCCESS, result.message)
+        self.assertTrue(result.cleaned_fields["webp_exif"])
+        self.assertNotIn(b"EXIF", _fourccs(path.read_bytes()))
+        self.assertEqual([p.name for p in self.temp_dir.iterdir()], ["photo.webp"])
+
+
+if __name__ == "__main__":
+    unittest.main()
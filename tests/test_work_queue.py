@@ -0,0 +1,236 @@
+"""Тесты для очереди задач с арендой."""
+
+import multiprocessing
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from metadata_cleaner.batch.engine import BatchEngine
+from metadata_cleaner.batch.work_queue import QueueWorker, WorkQueue
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.models import (
+    CleanResult,
+    CleanStatus,
+    FileJob,
+    OutputMode,
+)
+from metadata_cleaner.services.settings_service import SettingsService
+
+
+def _dispatcher() -> MetadataDispatcher:
+    settings = mock.Mock(spec=SettingsService)
+    settings.get_max_threads.return_value = 2
+    settings.get_output_mode.return_value = OutputMode.CREATE_COPY
+    settings.get_metadata_to_clean.return_value = {"creator": True}
+    return MetadataDispatcher(settings)
+
+
+def _drain(queue_path: str, worker_id: str, results) -> None:
+    """Рабочий процесс: обработать очередь и сообщить обработанные пути."""
+    with WorkQueue(queue_path) as work_queue:
+        worker = QueueWorker(
+            work_queue,
+            BatchEngine(_dispatcher(), jobs=2),
+            batch_size=2,
+            worker_id=worker_id,
+            poll_interval=0.05,
+        )
+        for result in worker.run():
+            results.put((worker_id, str(result.job.file_path), result.status.value))
+
+
+def _success(path: str) -> CleanResult:
+    return CleanResult(FileJob(file_path=Path(path)), CleanStatus.SUCCESS)
+
+
+class TestWorkQueue(unittest.TestCase):
+    """Тесты таблицы задач."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.queue = WorkQueue(self.temp_dir / "q.db", lease_seconds=60)
+        self.paths = [self.temp_dir / f"file{i}.jpg" for i in range(5)]
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_enqueue_deduplicates(self):
+        """Тест: повторно добавленные пути не дублируются."""
+        self.assertEqual(self.queue.enqueue(self.paths), 5)
+        self.assertEqual(self.queue.enqueue(self.paths[:2], batch_size=1), 0)
+        self.assertEqual(self.queue.counts()["pending"], 5)
+
+    def test_claims_are_disjoint(self):
+        """Тест: разные рабочие получают разные задачи."""
+        self.queue.enqueue(self.paths)
+
+        first = self.queue.claim("a", 3)
+        second = self.queue.claim("b", 3)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({j.id for j in first} & {j.id for j in second})
+        self.assertEqual(self.queue.claim("c", 3), [])
+        self.assertFalse(self.queue.is_drained())
+
+    def test_complete(self):
+        """Тест записи результатов: ошибки отделяются от успешных задач."""
+        self.queue.enqueue(self.paths[:2])
+        ok, bad = self.queue.claim("a", 2)
+        error = CleanResult(FileJob(file_path=Path(bad.path)), CleanStatus.ERROR, "сбой")
+
+        accepted = self.queue.complete("a", [(ok.id, _success(ok.path)), (bad.id, error)])
+
+        self.assertEqual(accepted, 2)
+        self.assertEqual(self.queue.counts()["done"], 1)
+        self.assertEqual(self.queue.counts()["failed"], 1)
+        self.assertTrue(self.queue.is_drained())
+
+    def test_expired_lease_reclaimed(self):
+        """Тест: задачи упавшего рабочего снова выдаются после истечения аренды."""
+        self.queue.lease_seconds = 0.05
+        self.queue.enqueue(self.paths[:1])
+        (job,) = self.queue.claim("crashed", 1)
+        self.assertEqual(self.queue.claim("b", 1), [])
+
+        time.sleep(0.1)
+        (again,) = self.queue.claim("b", 1)
+
+        self.assertEqual(again.id, job.id)
+        self.assertEqual(again.attempts, 2)
+        # Опоздавший результат прежнего владельца не принимается
+        self.assertEqual(self.queue.complete("crashed", [(job.id, _success(job.path))]), 0)
+        self.assertEqual(self.queue.complete("b", [(job.id, _success(job.path))]), 1)
+
+    def test_renew_keeps_lease(self):
+        """Тест: продленная аренда не истекает."""
+        self.queue.lease_seconds = 0.2
+        self.queue.enqueue(self.paths[:1])
+        (job,) = self.queue.claim("a", 1)
+
+        for _ in range(3):
+            time.sleep(0.1)
+            self.assertEqual(self.queue.renew("a", [job.id]), 1)
+            self.assertEqual(self.queue.claim("b", 1), [])
+
+    def test_max_attempts(self):
+        """Тест: задача, ронявшая рабочих слишком часто, становится ошибочной."""
+        self.queue.lease_seconds = 0.01
+        self.queue.max_attempts = 2
+        self.queue.enqueue(self.paths[:1])
+        for worker in ("a", "b"):
+            self.assertEqual(len(self.queue.claim(worker, 1)), 1)
+            time.sleep(0.02)
+
+        self.assertEqual(self.queue.claim("c", 1), [])
+        self.assertEqual(self.queue.counts()["failed"], 1)
+        self.assertTrue(self.queue.is_drained())
+
+    def test_release(self):
+        """Тест возврата задач без учета попытки."""
+        self.queue.enqueue(self.paths[:2])
+        jobs = self.queue.claim("a", 2)
+
+        self.assertEqual(self.queue.release("a", [j.id for j in jobs]), 2)
+        self.assertEqual(self.queue.counts()["pending"], 2)
+        self.assertEqual({j.attempts for j in self.queue.claim("b", 2)}, {1})
+
+
+class TestQueueWorker(unittest.TestCase):
+    """Тесты рабочих процессов очереди."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.queue_path = self.temp_dir / "q.db"
+        self.files = []
+        for i in range(12):
+            path = self.temp_dir / f"image{i}.png"
+            Image.new("RGB", (8 + i, 8), (i * 20, 0, 0)).save(path)
+            self.files.append(path)
+        with WorkQueue(self.queue_path) as work_queue:
+            work_queue.enqueue(self.files)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _states(self) -> list[tuple]:
+        with sqlite3.connect(self.queue_path) as conn:
+            return conn.execute(
+                "SELECT state, attempts, COUNT(*) FROM jobs GROUP BY state, attempts"
+            ).fetchall()
+
+    def test_drains_queue(self):
+        """Тест: рабочий обрабатывает все задачи и завершается."""
+        with WorkQueue(self.queue_path) as work_queue:
+            worker = QueueWorker(
+                work_queue, BatchEngine(_dispatcher(), jobs=2), batch_size=5
+            )
+            results = list(worker.run())
+
+        self.assertEqual(len(results), len(self.files))
+        self.assertTrue(all(r.status == CleanStatus.SUCCESS for r in results))
+        self.assertEqual(self._states(), [("done", 1, len(self.files))])
+
+    def test_interrupted_batch_released(self):
+        """Тест: при досрочной остановке необработанные задачи возвращаются."""
+        with WorkQueue(self.queue_path) as work_queue:
+            worker = QueueWorker(
+                work_queue, BatchEngine(_dispatcher(), jobs=1), batch_size=4
+            )
+            results = worker.run()
+            next(results)
+            results.close()
+
+            counts = work_queue.counts()
+        self.assertEqual(counts["leased"], 0)
+        self.assertGreaterEqual(counts["done"], 1)
+        self.assertEqual(counts["done"] + counts["pending"], len(self.files))
+
+    def test_results_committed_in_parts(self):
+        """Тест: результаты пачки записываются частями до ее окончания."""
+        with WorkQueue(self.queue_path) as work_queue:
+            worker = QueueWorker(
+                work_queue,
+                BatchEngine(_dispatcher(), jobs=1),
+                batch_size=len(self.files),
+                commit_every=3,
+            )
+            results = worker.run()
+            for _ in range(4):
+                next(results)
+
+            self.assertEqual(work_queue.counts()["done"], 3)
+            results.close()
+
+    def test_several_processes(self):
+        """Тест: несколько процессов делят очередь без повторной обработки."""
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_drain, args=(str(self.queue_path), f"w{i}", results)
+            )
+            for i in range(3)
+        ]
+        for process in processes:
+            process.start()
+        processed = [results.get(timeout=60) for _ in self.files]
+        for process in processes:
+            process.join(60)
+            self.assertEqual(process.exitcode, 0)
+
+        paths = [path for _, path, _ in processed]
+        self.assertEqual(sorted(paths), sorted(str(f) for f in self.files))
+        self.assertTrue(all(status == "success" for _, _, status in processed))
+        self.assertEqual(self._states(), [("done", 1, len(self.files))])
+
+
+if __name__ == "__main__":
+    unittest.main()
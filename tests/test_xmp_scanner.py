@@ -0,0 +1,178 @@
+"""Тесты для поиска и очистки пакетов XMP."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from metadata_cleaner.cleaner.dispatcher import MetadataDispatcher
+from metadata_cleaner.cleaner.formats import xmp
+from metadata_cleaner.cleaner.models import (
+    CleanResult,
+    CleanStatus,
+    FileJob,
+    FileType,
+)
+from metadata_cleaner.services.settings_service import SettingsService
+
+PACKET = (
+    b'<?xpacket begin="\xef\xbb\xbf" id="W5M0MpCehiHzreSzNTczkc9d"?>\n'
+    b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF>'
+    b"<exif:GPSLatitude>55,45.0N</exif:GPSLatitude>"
+    b"<tiff:Artist>J. Doe</tiff:Artist></rdf:RDF></x:xmpmeta>\n"
+    + b" " * 200
+    + b'\n<?xpacket end="w"?>'
+)
+
+
+class TestXmpScanner(unittest.TestCase):
+    """Тесты для metadata_cleaner.cleaner.formats.xmp."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.data = b"HEADER" + PACKET + b"\x00" * 64 + PACKET + b"TRAILER"
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_find_packets(self):
+        """Тест поиска пакетов и границ содержимого."""
+        packets = list(xmp.find_packets(self.data))
+
+        self.assertEqual(len(packets), 2)
+        first = packets[0]
+        self.assertEqual(first.start, len(b"HEADER"))
+        self.assertEqual(first.end - first.start, len(PACKET))
+        self.assertTrue(self.data[first.body_start :].startswith(b"\n<x:xmpmeta"))
+        self.assertTrue(self.data[first.body_end :].startswith(xmp.PACKET_END))
+
+    def test_blank_keeps_layout(self):
+        """Тест: размер и смещения сохраняются, метаданные удаляются."""
+        cleaned, count = xmp.blank_bytes(self.data)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(len(cleaned), len(self.data))
+        self.assertNotIn(b"GPSLatitude", cleaned)
+        self.assertNotIn(b"J. Doe", cleaned)
+        self.assertEqual(cleaned.count(xmp.EMPTY_XMPMETA), 2)
+        self.assertTrue(cleaned.startswith(b"HEADER<?xpacket begin="))
+        self.assertTrue(cleaned.endswith(b'<?xpacket end="w"?>TRAILER'))
+        # Повторная очистка ничего не меняет
+        self.assertEqual(xmp.blank_bytes(cleaned), (cleaned, 0))
+
+    def test_blank_file_in_place(self):
+        """Тест очистки файла на месте через mmap."""
+        path = self.temp_dir / "scan.tif"
+        path.write_bytes(self.data)
+        empty = self.temp_dir / "empty.bin"
+        empty.write_bytes(b"")
+
+        self.assertEqual(xmp.blank_file(path), 2)
+        self.assertEqual(path.stat().st_size, len(self.data))
+        self.assertNotIn(b"J. Doe", path.read_bytes())
+        self.assertEqual(xmp.blank_file(empty), 0)
+
+    def test_malformed_packets_skipped(self):
+        """Тест: незакрытые и слишком короткие пакеты не изменяются."""
+        unclosed = b'<?xpacket begin="" id="x"?><x:xmpmeta>secret'
+        short = b'<?xpacket begin="" id="x"?>tiny<?xpacket end="w"?>'
+        data = unclosed + short
+
+        self.assertEqual(xmp.blank_bytes(data), (data, 0))
+        self.assertEqual(len(list(xmp.find_packets(data))), 1)
+
+
+class TestDispatcherScrubXmp(unittest.TestCase):
+    """Тесты дополнительного этапа очистки XMP в диспетчере."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.mock_settings = mock.Mock(spec=SettingsService)
+        self.mock_settings.get_metadata_to_clean.return_value = {}
+        self.dispatcher = MetadataDispatcher(self.mock_settings)
+        self.dispatcher.scrub_xmp = True
+        self.handler = mock.Mock()
+        self.dispatcher.handlers[FileType.IMAGE] = self.handler
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _result(self, job):
+        return CleanResult(job=job, status=CleanStatus.SUCCESS, message="ok")
+
+    def test_scrub_written_output(self):
+        """Тест: пакеты очищаются в записанном обработчиком файле."""
+        output = self.temp_dir / "photo_cleaned.jpg"
+
+        def clean(job):
+            job.output_path.write_bytes(b"\xff\xd8" + PACKET)
+            return self._result(job)
+
+        self.handler.clean.side_effect = clean
+        job = FileJob(
+            file_path=self.temp_dir / "photo.jpg",
+            file_type=FileType.IMAGE,
+            output_path=output,
+        )
+
+        result = self.dispatcher.run_job(job)
+
+        self.assertEqual(result.cleaned_fields["xmp_packets"], 1)
+        self.assertNotIn(b"J. Doe", output.read_bytes())
+
+    def test_scrub_pending_write(self):
+        """Тест: отложенный результат очищается до записи."""
+
+        def clean(job):
+            job.pending_write = (job.output_path, b"\xff\xd8" + PACKET)
+            return self._result(job)
+
+        self.handler.clean.side_effect = clean
+
+        result = self.dispatcher.clean_bytes(b"\xff\xd8", "jpg")
+
+        self.assertTrue(result.is_success)
+        self.assertEqual(result.cleaned_fields["xmp_packets"], 1)
+        self.assertEqual(len(result.output_data), len(PACKET) + 2)
+        self.assertIn(xmp.EMPTY_XMPMETA, result.output_data)
+
+    def test_clean_bytes_without_output(self):
+        """Тест: задача в памяти не трогает файл с тем же именем в CWD."""
+        self.handler.clean.side_effect = self._result
+        decoy = self.temp_dir / "stream.jpg"
+        decoy.write_bytes(b"\xff\xd8" + PACKET)
+
+        old_cwd = Path.cwd()
+        os.chdir(self.temp_dir)
+        try:
+            result = self.dispatcher.clean_bytes(b"\xff\xd8" + PACKET, "jpg")
+        finally:
+            os.chdir(old_cwd)
+
+        self.assertTrue(result.is_success, result.message)
+        self.assertEqual(result.cleaned_fields["xmp_packets"], 1)
+        self.assertIn(xmp.EMPTY_XMPMETA, result.output_data)
+        self.assertEqual(decoy.read_bytes(), b"\xff\xd8" + PACKET)
+
+    def test_copy_not_written(self):
+        """Тест: без записанной копии исходник не меняется и ошибки нет."""
+        source = self.temp_dir / "photo.jpg"
+        source.write_bytes(b"\xff\xd8" + PACKET)
+        self.handler.clean.side_effect = self._result
+        job = FileJob(
+            file_path=source,
+            file_type=FileType.IMAGE,
+            output_path=self.temp_dir / "photo_cleaned.jpg",
+        )
+
+        result = self.dispatcher.run_job(job)
+
+        self.assertTrue(result.is_success, result.message)
+        self.assertNotIn("xmp_packets", result.cleaned_fields or {})
+        self.assertEqual(source.read_bytes(), b"\xff\xd8" + PACKET)
+
+
+if __name__ == "__main__":
+    unittest.main()